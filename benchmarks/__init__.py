@@ -0,0 +1,6 @@
+"""
+性能基准测试包
+
+包含进程内的模拟Telegram后端和针对转发流水线、状态存储的基准测试脚本，
+所有基准测试均不访问真实的Telegram服务器。
+"""
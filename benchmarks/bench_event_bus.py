@@ -0,0 +1,340 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+tg-app 事件总线发布吞吐量基准测试
+
+对比当前 EventBus.publish 与原始实现（每次复制处理器字典、为每个处理器创建任务、
+无条件格式化包含完整数据的调试日志）在不同订阅场景下的每秒发布次数；
+并对比 publish_and_wait 请求/响应的单次延迟，原实现每次生成uuid、向事件数据
+写入 _response_id、为每个处理器创建任务。
+
+用法:
+    python -m benchmarks.bench_event_bus --events 100000
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import uuid
+import argparse
+import tempfile
+from typing import Dict, Any, List, Optional, Callable
+
+# 保证以脚本方式运行时能导入 tg-app 模块
+TG_APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tg-app")
+if TG_APP_DIR not in sys.path:
+    sys.path.insert(0, TG_APP_DIR)
+
+from core import event_bus as event_bus_module
+from core.event_bus import EventBus
+from events import event_types as events
+
+
+class LegacyEventBus(EventBus):
+    """原始的发布实现，作为对比基线"""
+
+    async def publish(self, event_type: str, data: Optional[Dict[str, Any]] = None) -> int:
+        logger = event_bus_module.logger
+        if data is None:
+            data = {}
+
+        if event_type not in self._handlers:
+            logger.debug(f"没有处理器订阅事件: {event_type}")
+            return 0
+
+        handlers = self._handlers[event_type].copy()
+        self._stats["published"] += 1
+
+        if handlers:
+            logger.debug(f"发布事件 {event_type}，数据: {data}，处理器数量: {len(handlers)}")
+
+        tasks = []
+        for handler_id, handler in handlers.items():
+            try:
+                task = asyncio.create_task(handler(data))
+                tasks.append(task)
+            except Exception as e:
+                logger.error(f"创建事件处理任务时出错: {str(e)}")
+
+        if tasks:
+            try:
+                await asyncio.gather(*tasks)
+                self._stats["handled"] += len(tasks)
+            except Exception as e:
+                logger.error(f"等待事件处理器执行时出错: {str(e)}")
+
+        return len(handlers)
+
+    async def publish_and_wait(self, event_type: str, data: Optional[Dict[str, Any]] = None,
+                               timeout: float = 30.0) -> Optional[Dict[str, Any]]:
+        logger = event_bus_module.logger
+        if data is None:
+            data = {}
+
+        if event_type not in self._handlers:
+            logger.debug(f"没有处理器订阅事件: {event_type}")
+            return None
+
+        handlers = self._handlers[event_type].copy()
+        self._stats["published"] += 1
+
+        if handlers:
+            logger.debug(f"发布事件 {event_type} 并等待响应，数据: {data}，处理器数量: {len(handlers)}")
+
+        response_id = str(uuid.uuid4())
+        response_future = asyncio.Future()
+        waiting = self.__dict__.setdefault("_waiting_responses", {})
+        waiting[response_id] = response_future
+        data["_response_id"] = response_id
+
+        tasks = []
+        for handler_id, handler in handlers.items():
+            tasks.append(asyncio.create_task(self._call_handler_with_response(handler, data, response_id)))
+
+        try:
+            response = await asyncio.wait_for(response_future, timeout=timeout)
+            self._stats["handled"] += 1
+            return response
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            waiting.pop(response_id, None)
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _call_handler_with_response(self, handler, data, response_id) -> None:
+        waiting = self._waiting_responses
+        try:
+            response = await handler(data)
+            if isinstance(response, dict) and response_id in waiting and not waiting[response_id].done():
+                waiting[response_id].set_result(response)
+        except Exception as e:
+            event_bus_module.logger.error(f"事件处理器 {handler.__qualname__} 执行时出错: {str(e)}")
+
+
+def make_payload(index: int) -> Dict[str, Any]:
+    """构造与下载进度事件相当的事件数据"""
+    return {
+        "file_id": f"file_{index % 64}",
+        "message_id": index,
+        "chat_id": -1001000000001,
+        "current": index * 131072,
+        "total": 1073741824,
+        "file_name": f"video_{index % 64}.mp4",
+    }
+
+
+async def noop_handler(data: Dict[str, Any]) -> None:
+    """空处理器，只测量总线自身的开销"""
+    return None
+
+
+# 场景: (名称, 事件类型, 处理器数量, 当前实现是否使用合并订阅)
+SCENARIOS = [
+    ("no_subscriber", events.MESSAGE_SENT, 0, False),
+    ("single_handler", events.MESSAGE_SENT, 1, False),
+    ("three_handlers", events.MESSAGE_SENT, 3, False),
+    ("hot_progress", events.DOWNLOAD_PROGRESS, 1, False),
+    ("coalesced_progress", events.DOWNLOAD_PROGRESS, 1, True),
+]
+
+
+async def respond_handler(data: Dict[str, Any]) -> Dict[str, Any]:
+    """立即返回响应的请求处理器"""
+    return {"success": True, "message_id": data["message_id"]}
+
+
+async def silent_handler(data: Dict[str, Any]) -> None:
+    """不返回响应的旁听处理器，模拟同一事件上的日志或统计订阅"""
+    await asyncio.sleep(0)
+    return None
+
+
+# 请求/响应场景: (名称, 旁听处理器数量, 当前实现是否绑定请求处理器)
+RPC_SCENARIOS = [
+    ("rpc_subscribed", 0, False),
+    ("rpc_bound", 0, True),
+    ("rpc_with_listeners", 2, False),
+]
+
+
+async def run_rpc_scenario(bus_factory: Callable[[], EventBus], listeners: int, count: int,
+                           bound: bool = False) -> Dict[str, float]:
+    """
+    运行单个请求/响应场景
+
+    Args:
+        bus_factory: 事件总线构造函数
+        listeners: 不返回响应的处理器数量
+        count: 请求次数
+        bound: 是否通过 register_rpc 绑定响应处理器
+
+    Returns:
+        Dict[str, float]: 平均延迟与p99延迟（微秒）
+    """
+    bus = bus_factory()
+    event_type = events.CHANNEL_GET_INFO
+    if bound:
+        bus.register_rpc(event_type, respond_handler)
+    else:
+        bus.subscribe(event_type, respond_handler)
+    for _ in range(listeners):
+        bus.subscribe(event_type, silent_handler)
+
+    payloads = [make_payload(i) for i in range(256)]
+    request = bus.publish_and_wait
+    perf_counter = time.perf_counter
+    latencies = []
+
+    for i in range(count):
+        # 原实现会修改事件数据，每次传入新的字典，两边条件相同
+        data = dict(payloads[i & 255])
+        start = perf_counter()
+        await request(event_type, data, 5.0)
+        latencies.append(perf_counter() - start)
+
+    # 让被取消的处理器任务完成清理，避免影响下一个场景
+    await asyncio.sleep(0)
+    latencies.sort()
+    return {
+        "mean_us": sum(latencies) / len(latencies) * 1e6,
+        "p99_us": latencies[int(len(latencies) * 0.99) - 1] * 1e6,
+    }
+
+
+async def run_scenario(bus_factory: Callable[[], EventBus], event_type: str, handlers: int,
+                       count: int, coalesced: bool = False) -> float:
+    """
+    运行单个场景
+
+    Args:
+        bus_factory: 事件总线构造函数
+        event_type: 发布的事件类型
+        handlers: 订阅的处理器数量
+        count: 发布次数
+        coalesced: 是否使用合并订阅（原实现不支持，始终为普通订阅）
+
+    Returns:
+        float: 每秒发布次数
+    """
+    bus = bus_factory()
+    for _ in range(handlers):
+        # 每个订阅使用独立的函数对象，与插件各自注册处理器的情况一致
+        async def handler(data, _inner=noop_handler):
+            return await _inner(data)
+        if coalesced:
+            bus.subscribe_coalesced(event_type, handler, key="file_id", interval=0.1)
+        else:
+            bus.subscribe(event_type, handler)
+
+    payloads = [make_payload(i) for i in range(256)]
+    publish = bus.publish
+
+    start = time.perf_counter()
+    for i in range(count):
+        await publish(event_type, payloads[i & 255])
+    duration = time.perf_counter() - start
+    return count / duration if duration else 0.0
+
+
+async def run_all(count: int) -> List[Dict[str, Any]]:
+    """运行全部场景"""
+    results = []
+    for name, event_type, handlers, coalesced in SCENARIOS:
+        legacy = await run_scenario(LegacyEventBus, event_type, handlers, count)
+        current = await run_scenario(EventBus, event_type, handlers, count, coalesced)
+        results.append({
+            "scenario": name,
+            "handlers": handlers,
+            "legacy_per_sec": round(legacy),
+            "current_per_sec": round(current),
+            "speedup": round(current / legacy, 2) if legacy else None,
+        })
+    return results
+
+
+async def run_rpc_all(count: int) -> List[Dict[str, Any]]:
+    """运行全部请求/响应场景"""
+    results = []
+    for name, listeners, bound in RPC_SCENARIOS:
+        legacy = await run_rpc_scenario(LegacyEventBus, listeners, count)
+        current = await run_rpc_scenario(EventBus, listeners, count, bound)
+        results.append({
+            "scenario": name,
+            "handlers": listeners + 1,
+            "legacy_mean_us": round(legacy["mean_us"], 2),
+            "legacy_p99_us": round(legacy["p99_us"], 2),
+            "current_mean_us": round(current["mean_us"], 2),
+            "current_p99_us": round(current["p99_us"], 2),
+            "speedup": round(legacy["mean_us"] / current["mean_us"], 2) if current["mean_us"] else None,
+        })
+    return results
+
+
+def print_report(results: List[Dict[str, Any]]) -> None:
+    """以表格形式输出结果"""
+    header = f"{'场景':<18}{'处理器':>8}{'原实现(次/s)':>16}{'当前(次/s)':>16}{'提升':>8}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['scenario']:<18}{r['handlers']:>8}{r['legacy_per_sec']:>16}"
+            f"{r['current_per_sec']:>16}{r['speedup']:>7}x"
+        )
+
+
+def print_rpc_report(results: List[Dict[str, Any]]) -> None:
+    """以表格形式输出请求/响应延迟"""
+    header = (f"{'场景':<20}{'处理器':>8}{'原平均(us)':>12}{'原p99(us)':>12}"
+              f"{'当前平均(us)':>14}{'当前p99(us)':>14}{'提升':>8}")
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['scenario']:<20}{r['handlers']:>8}{r['legacy_mean_us']:>12}{r['legacy_p99_us']:>12}"
+            f"{r['current_mean_us']:>14}{r['current_p99_us']:>14}{r['speedup']:>7}x"
+        )
+
+
+def parse_arguments() -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="tg-app 事件总线发布吞吐量基准测试")
+    parser.add_argument("--events", type=int, default=100000, help="每个场景的发布次数 (默认: 100000)")
+    parser.add_argument("--requests", type=int, default=20000, help="每个请求/响应场景的请求次数 (默认: 20000)")
+    parser.add_argument("--log-level", default="INFO", help="日志级别，生产环境通常为INFO (默认: INFO)")
+    parser.add_argument("--json", dest="json_path", help="将结果写入JSON文件")
+    return parser.parse_args()
+
+
+def main() -> int:
+    """主程序"""
+    args = parse_arguments()
+
+    from utils.logger import setup_logger
+    with tempfile.TemporaryDirectory(prefix="tg_bench_bus_") as work_dir:
+        setup_logger({
+            "level": args.log_level.upper(),
+            "file_path": os.path.join(work_dir, "bench.log"),
+            "errors_file": os.path.join(work_dir, "error.log"),
+            "use_console": False
+        })
+        results = asyncio.run(run_all(args.events))
+        rpc_results = asyncio.run(run_rpc_all(args.requests))
+
+    print_report(results)
+    print()
+    print_rpc_report(rpc_results)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"publish": results, "publish_and_wait": rpc_results}, f, ensure_ascii=False, indent=2)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+消息描述内存基准测试
+
+按页从模拟频道获取消息，分别以完整的 pyrogram Message 和 MessageRef 形式保留全部消息，
+用 tracemalloc 测量保留内存和峰值内存。模拟频道中的消息共享同一个 Chat 对象，
+真实消息每条都带有独立的聊天和发送者对象，实际差距比这里测得的更大。
+
+用法:
+    python -m benchmarks.bench_message_refs --sizes 10000,100000
+"""
+
+import gc
+import os
+import sys
+import asyncio
+import argparse
+import tracemalloc
+from typing import Dict, Any, List
+
+# 保证以脚本方式运行时能导入项目模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_telegram import FakeTelegramBackend, FakePyrogramClient, ChannelSpec
+from tg_forwarder.downloader.message_ref import MessageRef
+
+MODES = ("message", "ref")
+
+SOURCE_CHAT_ID = -1001000000001
+
+
+async def measure(mode: str, size: int, page_size: int, seed: int) -> Dict[str, Any]:
+    """
+    获取并保留 size 条消息，测量内存
+
+    Args:
+        mode: message 保留完整消息，ref 保留消息描述
+        size: 消息数量
+        page_size: 每页获取的消息数
+        seed: 随机种子
+
+    Returns:
+        Dict[str, Any]: 测试结果
+    """
+    backend = FakeTelegramBackend(seed=seed)
+    backend.add_channel(ChannelSpec(chat_id=SOURCE_CHAT_ID, message_count=size))
+    client = FakePyrogramClient(backend, "bench")
+
+    gc.collect()
+    tracemalloc.start()
+    held = []
+    for start in range(1, size + 1, page_size):
+        page = await client.get_messages(SOURCE_CHAT_ID, list(range(start, min(start + page_size, size + 1))))
+        if mode == "ref":
+            held.extend(MessageRef.from_message(message) for message in page)
+        else:
+            held.extend(page)
+        del page
+
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "mode": mode,
+        "messages": size,
+        "retained_mb": round(retained / 1024 / 1024, 2),
+        "peak_mb": round(peak / 1024 / 1024, 2),
+        "bytes_per_message": round(retained / size) if size else 0,
+    }
+
+
+def print_report(results: List[Dict[str, Any]]) -> None:
+    """输出结果表格"""
+    header = f"{'模式':<10}{'消息数':>10}{'保留内存(MB)':>16}{'峰值内存(MB)':>16}{'字节/条':>12}"
+    print(header)
+    print("-" * 64)
+    for result in results:
+        print(
+            f"{result['mode']:<10}{result['messages']:>10}{result['retained_mb']:>16.2f}"
+            f"{result['peak_mb']:>16.2f}{result['bytes_per_message']:>12}"
+        )
+
+
+def parse_arguments() -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="消息描述内存基准测试")
+    parser.add_argument("--sizes", default="10000,100000", help="消息数量列表，逗号分隔 (默认: 10000,100000)")
+    parser.add_argument("--page-size", type=int, default=100, help="每页获取的消息数 (默认: 100)")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    return parser.parse_args()
+
+
+def main() -> int:
+    """主程序"""
+    args = parse_arguments()
+    results = []
+    for size in (int(value) for value in args.sizes.split(",") if value.strip()):
+        for mode in MODES:
+            results.append(asyncio.run(measure(mode, size, args.page_size, args.seed)))
+    print_report(results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+端到端吞吐量基准测试
+
+使用模拟Telegram后端运行 ForwardManager 的正常转发流程和下载上传流程，
+输出每秒消息数、每秒字节数和峰值内存。每个场景在独立子进程中运行，
+保证峰值内存互不影响。
+
+用法:
+    python -m benchmarks.bench_pipeline --sizes 1000,10000 --scenarios normal,download_upload
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional
+
+# 保证以脚本方式运行时能导入项目模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_telegram import (
+    FakeTelegramBackend, FakePyrogramClient, NetworkProfile, ChannelSpec, use_fake_uploader_client
+)
+
+SCENARIOS = ("normal", "download_upload")
+
+SOURCE_CHAT_ID = -1001000000001
+TARGET_CHAT_BASE = -1002000000000
+
+
+def get_peak_rss_mb() -> Optional[float]:
+    """
+    获取当前进程的峰值常驻内存
+
+    Returns:
+        Optional[float]: 峰值内存（MB），无法获取时返回None
+    """
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 单位为KB，macOS 为字节
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        pass
+
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+    except ImportError:
+        return None
+
+
+def write_config(work_dir: str, params: Dict[str, Any]) -> str:
+    """
+    写入基准测试使用的配置文件
+
+    Args:
+        work_dir: 工作目录
+        params: 场景参数
+
+    Returns:
+        str: 配置文件路径
+    """
+    targets = ",".join(str(TARGET_CHAT_BASE - i) for i in range(params["targets"]))
+    config_path = os.path.join(work_dir, "bench_config.ini")
+    with open(config_path, "w", encoding="utf-8") as f:
+        f.write(
+            "[API]\napi_id = 1\napi_hash = bench\n\n"
+            f"[CHANNELS]\nsource_channel = {SOURCE_CHAT_ID}\ntarget_channels = {targets}\n\n"
+            f"[FORWARD]\nstart_message_id = 1\nend_message_id = {params['messages']}\n"
+            f"hide_author = true\ndelay = 0\nbatch_size = {params['batch_size']}\n\n"
+            f"[DOWNLOAD]\ntemp_folder = {os.path.join(work_dir, 'temp')}\n"
+            f"concurrent_downloads = {params['concurrent_downloads']}\nretry_count = 1\nretry_delay = 0\n\n"
+            f"[UPLOAD]\nconcurrent_uploads = {params['concurrent_uploads']}\nwait_between_messages = 0\n"
+        )
+    return config_path
+
+
+async def run_scenario_async(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    在当前进程中运行一个基准场景
+
+    Args:
+        params: 场景参数
+
+    Returns:
+        Dict[str, Any]: 测试结果
+    """
+    from tg_forwarder.logModule.logger import setup_logger
+    from tg_forwarder.manager import ForwardManager
+    from tg_forwarder.client import TelegramClient
+    from tg_forwarder.forward.forwarder import MessageForwarder
+    from tg_forwarder.utils.channel_utils import ChannelUtils
+
+    scenario = params["scenario"]
+    network = NetworkProfile(
+        rtt=params["rtt"],
+        bandwidth=params["bandwidth"],
+        flood_wait_rate=params["flood_wait_rate"],
+        flood_wait_seconds=params["flood_wait_seconds"]
+    )
+
+    with tempfile.TemporaryDirectory(prefix="tg_bench_") as work_dir:
+        setup_logger({
+            "level": params["log_level"],
+            "file": os.path.join(work_dir, "logs", "bench.log"),
+            "use_console": params["log_level"] in ("DEBUG", "INFO")
+        })
+
+        backend = FakeTelegramBackend(network, seed=params["seed"])
+        source = backend.add_channel(ChannelSpec(
+            chat_id=SOURCE_CHAT_ID,
+            message_count=params["messages"],
+            protected=(scenario == "download_upload"),
+            album_ratio=params["album_ratio"],
+            text_ratio=params["text_ratio"],
+            size_spec=params["size_spec"]
+        ))
+        target_ids = [TARGET_CHAT_BASE - i for i in range(params["targets"])]
+        for target_id in target_ids:
+            backend.add_target(target_id)
+
+        # 组装管理器，跳过真实登录
+        manager = ForwardManager(write_config(work_dir, params))
+        manager.client = TelegramClient(manager.config.get_api_config())
+        manager.client.client = FakePyrogramClient(backend, "bench")
+        manager.channel_utils = ChannelUtils(manager.client)
+        manager.forwarder = MessageForwarder(manager.client, manager.config.get_forward_config())
+
+        start = time.perf_counter()
+        if scenario == "normal":
+            result = await manager.process_normal_forward(SOURCE_CHAT_ID, target_ids, 1, params["messages"])
+        else:
+            with use_fake_uploader_client(backend):
+                result = await manager._process_download_upload(SOURCE_CHAT_ID, target_ids, 1, params["messages"])
+        duration = time.perf_counter() - start
+
+        transferred = backend.stats["bytes_downloaded"] + backend.stats["bytes_uploaded"]
+        return {
+            "scenario": scenario,
+            "messages": params["messages"],
+            "success": result.get("success", 0),
+            "delivered": backend.stats["messages_sent"],
+            "failed": result.get("failed", 0),
+            "duration": round(duration, 3),
+            "messages_per_sec": round(params["messages"] / duration, 1) if duration else 0,
+            "bytes_per_sec": round(transferred / duration) if duration else 0,
+            "bytes_downloaded": backend.stats["bytes_downloaded"],
+            "bytes_uploaded": backend.stats["bytes_uploaded"],
+            "source_bytes": source.total_bytes,
+            "flood_waits": backend.stats["flood_waits"],
+            "api_calls": sum(backend.stats["calls"].values()),
+            "peak_rss_mb": get_peak_rss_mb(),
+        }
+
+
+def run_scenario(params: Dict[str, Any]) -> Dict[str, Any]:
+    """子进程入口"""
+    return asyncio.run(run_scenario_async(params))
+
+
+def format_bytes(value: float) -> str:
+    """格式化字节数"""
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(value) < 1024:
+            return f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} TB"
+
+
+def print_report(results: List[Dict[str, Any]]) -> None:
+    """以表格形式输出结果"""
+    header = f"{'场景':<16}{'消息数':>10}{'送达':>10}{'耗时(s)':>10}{'消息/s':>12}{'字节/s':>14}{'峰值内存(MB)':>16}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        rss = f"{r['peak_rss_mb']:.1f}" if r["peak_rss_mb"] is not None else "n/a"
+        print(
+            f"{r['scenario']:<16}{r['messages']:>10}{r['delivered']:>10}{r['duration']:>10.2f}"
+            f"{r['messages_per_sec']:>12.1f}{format_bytes(r['bytes_per_sec']) + '/s':>14}{rss:>16}"
+        )
+
+
+def parse_arguments() -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="转发流水线端到端吞吐量基准测试")
+    parser.add_argument("--sizes", default="1000", help="消息数量列表，逗号分隔 (默认: 1000)")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="场景列表: normal,download_upload")
+    parser.add_argument("--targets", type=int, default=1, help="目标频道数量")
+    parser.add_argument("--rtt", type=float, default=0.0, help="每次API调用的往返时间（秒）")
+    parser.add_argument("--bandwidth", type=float, default=0.0, help="模拟带宽（字节/秒），0为不限速")
+    parser.add_argument("--flood-wait-rate", type=float, default=0.0, help="每次调用触发FloodWait的概率")
+    parser.add_argument("--flood-wait-seconds", type=float, default=0.01, help="FloodWait等待秒数")
+    parser.add_argument("--album-ratio", type=float, default=0.3, help="属于媒体组的消息比例")
+    parser.add_argument("--text-ratio", type=float, default=0.2, help="纯文本消息比例")
+    parser.add_argument("--size-spec", default="uniform:65536:4194304",
+                        help="文件大小分布: fixed:N | uniform:MIN:MAX | lognormal:MEDIAN:SIGMA")
+    parser.add_argument("--batch-size", type=int, default=100, help="消息获取批次大小")
+    parser.add_argument("--concurrent-downloads", type=int, default=10, help="并发下载数")
+    parser.add_argument("--concurrent-uploads", type=int, default=3, help="并发上传数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--log-level", default="ERROR", help="流水线日志级别 (默认: ERROR)")
+    parser.add_argument("--json", dest="json_path", help="将结果写入JSON文件")
+    return parser.parse_args()
+
+
+def main() -> int:
+    """主程序"""
+    args = parse_arguments()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    for scenario in scenarios:
+        if scenario not in SCENARIOS:
+            print(f"未知场景: {scenario}", file=sys.stderr)
+            return 2
+
+    results = []
+    for scenario in scenarios:
+        for size in sizes:
+            params = {
+                "scenario": scenario,
+                "messages": size,
+                "targets": args.targets,
+                "rtt": args.rtt,
+                "bandwidth": args.bandwidth,
+                "flood_wait_rate": args.flood_wait_rate,
+                "flood_wait_seconds": args.flood_wait_seconds,
+                "album_ratio": args.album_ratio,
+                "text_ratio": args.text_ratio,
+                "size_spec": args.size_spec,
+                "batch_size": args.batch_size,
+                "concurrent_downloads": args.concurrent_downloads,
+                "concurrent_uploads": args.concurrent_uploads,
+                "seed": args.seed,
+                "log_level": args.log_level.upper(),
+            }
+            # 每个场景使用独立子进程，峰值内存互不干扰
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                results.append(executor.submit(run_scenario, params).result())
+
+    print_report(results)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
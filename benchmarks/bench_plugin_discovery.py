@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+tg-app 插件发现冷启动基准测试
+
+每次测量都启动新的解释器进程，统计从解释器启动到 PluginManager.discover_plugins
+完成的总耗时，对比不使用发现清单（导入所有插件模块，与原实现相同）和使用已生成的
+发现清单（不导入任何插件模块）两种情况，并记录是否导入了 Pyrogram。
+
+用法:
+    python -m benchmarks.bench_plugin_discovery --runs 10
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+import statistics
+from typing import Dict, Any, List, Optional
+
+TG_APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tg-app")
+
+# 在子进程中执行的启动脚本
+STARTUP_SCRIPT = """
+import sys, time, json, asyncio
+sys.path.insert(0, {tg_app_dir!r})
+from utils.logger import setup_logger
+setup_logger({{"level": "WARNING", "use_console": False,
+              "file_path": {log_path!r}, "errors_file": None}})
+from core.event_bus import EventBus
+from core.plugin_manager import PluginManager
+
+manager = PluginManager(EventBus(), manifest_path={manifest_path!r})
+started = time.perf_counter()
+plugins = asyncio.run(manager.discover_plugins())
+print(json.dumps({{
+    "discover_ms": (time.perf_counter() - started) * 1000,
+    "plugins": sorted(plugins),
+    "modules": len(sys.modules),
+    "pyrogram": "pyrogram" in sys.modules
+}}))
+"""
+
+
+def run_once(manifest_path: Optional[str], log_path: str) -> Dict[str, Any]:
+    """
+    启动一个解释器进程完成插件发现
+
+    Args:
+        manifest_path: 发现清单路径，None表示不使用清单
+        log_path: 子进程的日志文件
+
+    Returns:
+        Dict[str, Any]: 总耗时、发现耗时、模块数量等
+    """
+    script = STARTUP_SCRIPT.format(tg_app_dir=TG_APP_DIR, log_path=log_path, manifest_path=manifest_path)
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=os.path.dirname(log_path),
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+    total_ms = (time.perf_counter() - started) * 1000
+
+    result = json.loads(output.strip().splitlines()[-1])
+    result["total_ms"] = total_ms
+    return result
+
+
+def measure(mode: str, manifest_path: Optional[str], runs: int, log_path: str) -> Dict[str, Any]:
+    """
+    多次测量同一种启动方式
+
+    Args:
+        mode: 名称
+        manifest_path: 发现清单路径
+        runs: 测量次数
+        log_path: 子进程的日志文件
+
+    Returns:
+        Dict[str, Any]: 汇总结果
+    """
+    results = [run_once(manifest_path, log_path) for _ in range(runs)]
+    totals = [r["total_ms"] for r in results]
+    discovers = [r["discover_ms"] for r in results]
+    return {
+        "mode": mode,
+        "total_ms_median": round(statistics.median(totals), 1),
+        "total_ms_min": round(min(totals), 1),
+        "discover_ms_median": round(statistics.median(discovers), 1),
+        "modules": results[-1]["modules"],
+        "pyrogram_imported": results[-1]["pyrogram"],
+        "plugins": results[-1]["plugins"],
+    }
+
+
+def print_report(results: List[Dict[str, Any]]) -> None:
+    """以表格形式输出结果"""
+    header = f"{'方式':<12}{'总耗时中位数(ms)':>18}{'最小(ms)':>10}{'发现(ms)':>10}{'模块数':>8}{'Pyrogram':>10}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['mode']:<12}{r['total_ms_median']:>18}{r['total_ms_min']:>10}"
+            f"{r['discover_ms_median']:>10}{r['modules']:>8}{str(r['pyrogram_imported']):>10}"
+        )
+    print(f"发现的插件: {', '.join(results[-1]['plugins'])}")
+
+
+def parse_arguments() -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="tg-app 插件发现冷启动基准测试")
+    parser.add_argument("--runs", type=int, default=10, help="每种方式的测量次数 (默认: 10)")
+    parser.add_argument("--json", dest="json_path", help="将结果写入JSON文件")
+    return parser.parse_args()
+
+
+def main() -> int:
+    """主程序"""
+    args = parse_arguments()
+
+    with tempfile.TemporaryDirectory(prefix="tg_bench_discovery_") as work_dir:
+        log_path = os.path.join(work_dir, "bench.log")
+        manifest_path = os.path.join(work_dir, "plugin_manifest.json")
+
+        results = [measure("full_scan", None, args.runs, log_path)]
+
+        # 先运行一次生成清单，之后的测量都命中清单
+        run_once(manifest_path, log_path)
+        results.append(measure("manifest", manifest_path, args.runs, log_path))
+
+    print_report(results)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
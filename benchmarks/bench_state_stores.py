@@ -0,0 +1,432 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+状态存储与消息重组规模基准测试
+
+为 UploadHistoryManager、MediaDownloader 的元数据/下载记录和 MessageAssembler
+生成指定规模的合成数据文件（格式与生产环境写出的一致），分别测量加载、查询、
+插入、保存和清理的耗时。每个组件和规模组合在独立子进程中运行，保证峰值内存互不影响。
+
+用法:
+    python -m benchmarks.bench_state_stores --sizes 10000,100000,1000000
+    python -m benchmarks.bench_state_stores --components history --sizes 1000000 --json result.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Callable, Optional
+
+# 保证以脚本方式运行时能导入项目模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_pipeline import get_peak_rss_mb, format_bytes
+
+COMPONENTS = ("history", "downloader", "assembler")
+
+SOURCE_CHAT_ID = -1001000000001
+TARGET_CHAT_ID = -1002000000000
+
+# 清理测试使用的保留天数，合成数据中约一半记录早于该期限
+CLEANUP_MAX_AGE_DAYS = 30
+
+
+def timed(name: str, func: Callable[[], Any], count: int = 1, items: Optional[int] = None) -> Dict[str, Any]:
+    """
+    重复执行操作并计时
+
+    Args:
+        name: 操作名称
+        func: 无参数的操作函数
+        count: 执行次数
+        items: 单次调用内部处理的条目数，用于批量操作计算单条耗时
+
+    Returns:
+        Dict[str, Any]: 操作名、次数、总耗时和单次耗时
+    """
+    start = time.perf_counter()
+    for _ in range(count):
+        func()
+    total = time.perf_counter() - start
+    ops = count * items if items is not None else count
+    return {
+        "op": name,
+        "count": ops,
+        "total_sec": round(total, 4),
+        "per_op_ms": round(total * 1000 / ops, 4) if ops else 0,
+    }
+
+
+def write_json(path: str, data: Any, indent: Optional[int] = 2) -> int:
+    """
+    按生产环境相同的参数写入JSON文件
+
+    Args:
+        path: 文件路径
+        data: 数据
+        indent: 缩进
+
+    Returns:
+        int: 文件大小（字节）
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+    return os.path.getsize(path)
+
+
+def generate_metadata(size: int, rng: random.Random, shared_file: str) -> Dict[str, Dict[str, Any]]:
+    """
+    生成消息元数据和下载映射，结构与 MediaDownloader._store_message_metadata 一致
+
+    Args:
+        size: 消息数量
+        rng: 随机数生成器
+        shared_file: 下载映射指向的真实文件，避免创建海量文件
+
+    Returns:
+        Dict[str, Dict[str, Any]]: {"metadata": ..., "mapping": ...}
+    """
+    metadata = {}
+    mapping = {}
+    now = time.time()
+    msg_id = 1
+    while msg_id <= size:
+        # 约30%的消息属于2~10条的媒体组
+        if rng.random() < 0.3:
+            group_size = min(rng.randint(2, 10), size - msg_id + 1)
+            group_id = str(13000000000000000 + msg_id)
+        else:
+            group_size = 1
+            group_id = None
+
+        for offset in range(group_size):
+            current_id = msg_id + offset
+            message_type = rng.choice(("photo", "video", "document"))
+            metadata[str(current_id)] = {
+                "message_id": current_id,
+                "chat_id": SOURCE_CHAT_ID,
+                "date": now - (size - current_id),
+                "media_group_id": group_id,
+                "message_type": message_type,
+                "caption": f"caption {current_id}" if offset == 0 else None,
+                "caption_entities": None,
+                "text": None,
+                "text_entities": None,
+                "file_name": f"{SOURCE_CHAT_ID}_{current_id}.bin",
+                "file_size": rng.randint(65536, 4194304),
+                "mime_type": "application/octet-stream",
+            }
+            mapping[str(current_id)] = shared_file
+        msg_id += group_size
+
+    return {"metadata": metadata, "mapping": mapping}
+
+
+def generate_history(size: int, rng: random.Random) -> Dict[str, Dict[str, Any]]:
+    """
+    生成上传历史，结构与 UploadHistoryManager.record_upload 一致
+
+    Args:
+        size: 记录数量
+        rng: 随机数生成器
+
+    Returns:
+        Dict[str, Dict[str, Any]]: 上传历史
+    """
+    now = time.time()
+    day = 24 * 3600
+    history = {}
+    for msg_id in range(1, size + 1):
+        # 约一半记录超过清理期限
+        age = rng.uniform(0, CLEANUP_MAX_AGE_DAYS * 2) * day
+        history[f"{SOURCE_CHAT_ID}_{msg_id}"] = {
+            str(TARGET_CHAT_ID): {
+                "message_ids": [msg_id],
+                "timestamp": now - age
+            }
+        }
+    return history
+
+
+def lookup_keys(size: int, count: int, rng: random.Random) -> List[int]:
+    """生成查询用的消息ID，约一半命中"""
+    return [rng.randint(1, size * 2) for _ in range(count)]
+
+
+def bench_history(work_dir: str, params: Dict[str, Any], rng: random.Random) -> Dict[str, Any]:
+    """
+    测试 UploadHistoryManager
+
+    Args:
+        work_dir: 工作目录
+        params: 测试参数
+        rng: 随机数生成器
+
+    Returns:
+        Dict[str, Any]: 文件大小和各操作耗时
+    """
+    from tg_forwarder.uploader.utils.history_manager import UploadHistoryManager
+
+    size = params["size"]
+    history_path = os.path.join(work_dir, "upload_history.json")
+    file_size = write_json(history_path, generate_history(size, rng))
+
+    ops = []
+    holder = {}
+
+    def load():
+        holder["manager"] = UploadHistoryManager(history_path)
+    ops.append(timed("load", load))
+    manager = holder["manager"]
+
+    keys = iter(lookup_keys(size, params["lookups"], rng))
+    ops.append(timed(
+        "lookup",
+        lambda: manager.is_message_uploaded(next(keys), TARGET_CHAT_ID, SOURCE_CHAT_ID),
+        params["lookups"]
+    ))
+
+    new_ids = iter(range(size + 1, size + params["inserts"] + 1))
+
+    async def insert_all():
+        for _ in range(params["inserts"]):
+            msg_id = next(new_ids)
+            await manager.record_upload(msg_id, TARGET_CHAT_ID, [msg_id], SOURCE_CHAT_ID)
+    ops.append(timed("insert", lambda: asyncio.run(insert_all()), items=params["inserts"]))
+
+    ops.append(timed("save", lambda: asyncio.run(manager._save_history()), params["saves"]))
+
+    cleanup = timed("cleanup", lambda: holder.update(removed=manager.cleanup_old_records(CLEANUP_MAX_AGE_DAYS)))
+    cleanup["removed"] = holder["removed"]
+    ops.append(cleanup)
+
+    return {"file_size": file_size, "ops": ops}
+
+
+def bench_downloader(work_dir: str, params: Dict[str, Any], rng: random.Random) -> Dict[str, Any]:
+    """
+    测试 MediaDownloader 的元数据和已下载记录
+
+    Args:
+        work_dir: 工作目录
+        params: 测试参数
+        rng: 随机数生成器
+
+    Returns:
+        Dict[str, Any]: 文件大小和各操作耗时
+    """
+    from tg_forwarder.downloader.media_downloader import MediaDownloader
+
+    size = params["size"]
+    temp_folder = os.path.join(work_dir, "temp")
+    os.makedirs(temp_folder, exist_ok=True)
+    shared_file = os.path.join(temp_folder, "shared.bin")
+    with open(shared_file, "wb") as f:
+        f.write(b"\0")
+
+    data = generate_metadata(size, rng, shared_file)
+    file_size = write_json(os.path.join(temp_folder, "message_metadata.json"), data["metadata"])
+    file_size += write_json(os.path.join(temp_folder, "download_mapping.json"), data["mapping"])
+    file_size += write_json(
+        os.path.join(temp_folder, "downloaded_messages.json"),
+        {"version": 1, "chats": {str(SOURCE_CHAT_ID): [[1, size]]}},
+        indent=None
+    )
+    del data
+
+    ops = []
+    holder = {}
+
+    def load():
+        holder["downloader"] = MediaDownloader(None, temp_folder=temp_folder)
+    ops.append(timed("load", load))
+    downloader = holder["downloader"]
+
+    keys = iter(lookup_keys(size, params["lookups"], rng))
+    ops.append(timed(
+        "lookup",
+        lambda: downloader._is_message_downloaded(SOURCE_CHAT_ID, next(keys)),
+        params["lookups"]
+    ))
+
+    # 生产环境每标记10条消息就完整写一次下载记录
+    new_ids = iter(range(size + 1, size + params["inserts"] + 1))
+    ops.append(timed(
+        "insert",
+        lambda: downloader._mark_message_downloaded(SOURCE_CHAT_ID, next(new_ids)),
+        params["inserts"]
+    ))
+
+    ops.append(timed("save_metadata", downloader._save_metadata, params["saves"]))
+    ops.append(timed("save_downloaded", downloader._save_downloaded_messages, params["saves"]))
+
+    return {"file_size": file_size, "ops": ops}
+
+
+def bench_assembler(work_dir: str, params: Dict[str, Any], rng: random.Random) -> Dict[str, Any]:
+    """
+    测试 MessageAssembler
+
+    Args:
+        work_dir: 工作目录
+        params: 测试参数
+        rng: 随机数生成器
+
+    Returns:
+        Dict[str, Any]: 文件大小和各操作耗时
+    """
+    from tg_forwarder.uploader.assember import MessageAssembler
+
+    size = params["size"]
+    temp_folder = os.path.join(work_dir, "temp")
+    os.makedirs(temp_folder, exist_ok=True)
+    shared_file = os.path.join(temp_folder, "shared.bin")
+    with open(shared_file, "wb") as f:
+        f.write(b"\0")
+
+    data = generate_metadata(size, rng, shared_file)
+    metadata_path = os.path.join(temp_folder, "message_metadata.json")
+    mapping_path = os.path.join(temp_folder, "download_mapping.json")
+    file_size = write_json(metadata_path, data["metadata"])
+    file_size += write_json(mapping_path, data["mapping"])
+
+    # 取中间一段连续消息作为一个下载批次
+    batch_start = max(1, size // 2)
+    batch_items = []
+    for msg_id in range(batch_start, min(size, batch_start + params["batch_size"] - 1) + 1):
+        meta = data["metadata"][str(msg_id)]
+        batch_items.append({
+            "message_id": msg_id,
+            "media_group_id": meta["media_group_id"],
+            "type": meta["message_type"],
+            "file_path": shared_file
+        })
+    del data
+
+    ops = []
+    holder = {}
+
+    def load():
+        holder["assembler"] = MessageAssembler(metadata_path, mapping_path)
+    ops.append(timed("load", load))
+    assembler = holder["assembler"]
+
+    keys = iter(str(k) for k in lookup_keys(size, params["lookups"], rng))
+    ops.append(timed("lookup", lambda: assembler.assemble_single_message(next(keys)), params["lookups"]))
+
+    batch = timed("assemble_batch", lambda: holder.update(result=assembler.assemble_batch(batch_items)), params["saves"])
+    batch["groups"] = len(holder["result"]["media_groups"])
+    batch["singles"] = len(holder["result"]["single_messages"])
+    ops.append(batch)
+
+    return {"file_size": file_size, "ops": ops}
+
+
+BENCHMARKS = {
+    "history": bench_history,
+    "downloader": bench_downloader,
+    "assembler": bench_assembler,
+}
+
+
+def run_component(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    子进程入口，运行一个组件在一个规模下的测试
+
+    Args:
+        params: 测试参数
+
+    Returns:
+        Dict[str, Any]: 测试结果
+    """
+    from tg_forwarder.logModule.logger import setup_logger
+
+    rng = random.Random(params["seed"])
+    with tempfile.TemporaryDirectory(prefix="tg_bench_state_") as work_dir:
+        setup_logger({
+            "level": params["log_level"],
+            "file": os.path.join(work_dir, "logs", "bench.log"),
+            "use_console": params["log_level"] in ("DEBUG", "INFO")
+        })
+        result = BENCHMARKS[params["component"]](work_dir, params, rng)
+
+    result.update(component=params["component"], size=params["size"], peak_rss_mb=get_peak_rss_mb())
+    return result
+
+
+def print_report(results: List[Dict[str, Any]]) -> None:
+    """以表格形式输出结果"""
+    header = f"{'组件':<12}{'规模':>10}{'操作':>18}{'次数':>8}{'总耗时(s)':>12}{'单次(ms)':>12}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        for op in r["ops"]:
+            print(
+                f"{r['component']:<12}{r['size']:>10}{op['op']:>18}{op['count']:>8}"
+                f"{op['total_sec']:>12.4f}{op['per_op_ms']:>12.4f}"
+            )
+        rss = f"{r['peak_rss_mb']:.1f} MB" if r["peak_rss_mb"] is not None else "n/a"
+        print(f"{'':<12}{'':>10}  文件大小 {format_bytes(r['file_size'])}, 峰值内存 {rss}")
+
+
+def parse_arguments() -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="状态存储与消息重组规模基准测试")
+    parser.add_argument("--sizes", default="10000,100000", help="记录数量列表，逗号分隔 (默认: 10000,100000)")
+    parser.add_argument("--components", default=",".join(COMPONENTS), help="组件列表: history,downloader,assembler")
+    parser.add_argument("--lookups", type=int, default=10000, help="查询次数")
+    parser.add_argument("--inserts", type=int, default=100, help="插入次数")
+    parser.add_argument("--saves", type=int, default=3, help="保存次数（重组器为批次重组次数）")
+    parser.add_argument("--batch-size", type=int, default=100, help="重组批次包含的消息数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--log-level", default="ERROR", help="被测组件日志级别 (默认: ERROR)")
+    parser.add_argument("--json", dest="json_path", help="将结果写入JSON文件")
+    return parser.parse_args()
+
+
+def main() -> int:
+    """主程序"""
+    args = parse_arguments()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    components = [c.strip() for c in args.components.split(",") if c.strip()]
+    for component in components:
+        if component not in COMPONENTS:
+            print(f"未知组件: {component}", file=sys.stderr)
+            return 2
+
+    results = []
+    for component in components:
+        for size in sizes:
+            params = {
+                "component": component,
+                "size": size,
+                "lookups": args.lookups,
+                "inserts": args.inserts,
+                "saves": args.saves,
+                "batch_size": args.batch_size,
+                "seed": args.seed,
+                "log_level": args.log_level.upper(),
+            }
+            # 每个组合使用独立子进程，峰值内存互不干扰
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                results.append(executor.submit(run_component, params).result())
+
+    print_report(results)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
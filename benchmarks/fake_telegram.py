@@ -0,0 +1,594 @@
+"""
+模拟Telegram后端模块，提供可在进程内运行的Pyrogram客户端替身
+
+模拟客户端实现了转发流程用到的Pyrogram接口，返回真实的 pyrogram.types 对象，
+并可配置网络往返时间、带宽、FloodWait注入、禁止转发频道、媒体组布局和文件大小分布。
+所有随机行为都由种子决定，同样的参数会得到同样的频道内容和错误序列。
+"""
+
+import os
+import random
+import asyncio
+import contextlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Union, Tuple, Callable, Iterator, AsyncGenerator
+
+from pyrogram import types, enums
+from pyrogram.errors import FloodWait, ChatForwardsRestricted, PeerIdInvalid
+
+from tg_forwarder.uploader.utils.client_manager import TelegramClientManager
+
+
+# 消息内容种类
+KIND_TEXT = "text"
+KIND_PHOTO = "photo"
+KIND_VIDEO = "video"
+KIND_DOCUMENT = "document"
+
+# 发送接口参数名到媒体种类的映射
+SEND_MEDIA_ARGS = {
+    "photo": KIND_PHOTO,
+    "video": KIND_VIDEO,
+    "document": KIND_DOCUMENT,
+    "audio": KIND_DOCUMENT,
+    "animation": KIND_VIDEO,
+    "voice": KIND_DOCUMENT,
+}
+
+
+def make_size_sampler(spec: str) -> Callable[[random.Random], int]:
+    """
+    根据描述字符串创建文件大小采样函数
+
+    Args:
+        spec: 分布描述，支持 "fixed:大小"、"uniform:最小:最大"、"lognormal:中位数:sigma"
+
+    Returns:
+        Callable[[random.Random], int]: 采样函数
+
+    Raises:
+        ValueError: 描述格式无效时抛出
+    """
+    parts = spec.split(":")
+    kind = parts[0]
+
+    try:
+        if kind == "fixed" and len(parts) == 2:
+            size = int(parts[1])
+            return lambda rng: size
+        if kind == "uniform" and len(parts) == 3:
+            low, high = int(parts[1]), int(parts[2])
+            return lambda rng: rng.randint(low, high)
+        if kind == "lognormal" and len(parts) == 3:
+            import math
+            mu, sigma = math.log(float(parts[1])), float(parts[2])
+            return lambda rng: max(1, int(rng.lognormvariate(mu, sigma)))
+    except ValueError:
+        pass
+
+    raise ValueError(f"无效的文件大小分布: {spec}")
+
+
+@dataclass
+class NetworkProfile:
+    """模拟网络参数"""
+
+    # 每次API调用的往返时间（秒）
+    rtt: float = 0.0
+    # 上传和下载带宽（字节/秒），0表示不限速
+    bandwidth: float = 0.0
+    # 每次API调用触发FloodWait的概率
+    flood_wait_rate: float = 0.0
+    # FloodWait要求等待的秒数，可以是小数以便压缩测试时间
+    flood_wait_seconds: float = 1.0
+
+
+@dataclass
+class ChannelSpec:
+    """合成频道参数"""
+
+    chat_id: int
+    message_count: int
+    title: str = ""
+    # 禁止转发（has_protected_content）
+    protected: bool = False
+    # 属于媒体组的消息比例
+    album_ratio: float = 0.3
+    # 媒体组大小范围
+    album_size: Tuple[int, int] = (2, 10)
+    # 纯文本消息比例（只作用于非媒体组消息）
+    text_ratio: float = 0.2
+    # 文件大小分布
+    size_spec: str = "uniform:65536:4194304"
+    # 起始消息ID
+    first_id: int = 1
+
+
+class FakeChannel:
+    """
+    合成频道，只保存每条消息的紧凑描述，按需构造 pyrogram Message
+    """
+
+    def __init__(self, spec: ChannelSpec, rng: random.Random):
+        """
+        生成频道内容
+
+        Args:
+            spec: 频道参数
+            rng: 随机数生成器
+        """
+        self.spec = spec
+        self.chat_id = spec.chat_id
+        self.protected = spec.protected
+        # {消息ID: (种类, 媒体组ID, 文件大小, 说明文字)}
+        self.entries: Dict[int, Tuple[str, Optional[str], int, Optional[str]]] = {}
+        # {媒体组ID: [消息ID, ...]}
+        self.groups: Dict[str, List[int]] = {}
+        self.next_id = spec.first_id
+        self._generate(rng)
+
+    def _generate(self, rng: random.Random) -> None:
+        """按频道参数生成消息"""
+        sample_size = make_size_sampler(self.spec.size_spec)
+        end_id = self.spec.first_id + self.spec.message_count
+
+        while self.next_id < end_id:
+            remaining = end_id - self.next_id
+            low, high = self.spec.album_size
+            if remaining >= low and rng.random() < self.spec.album_ratio:
+                size = min(rng.randint(low, high), remaining)
+                group_id = f"{self.chat_id}{self.next_id:012d}"
+                ids = []
+                for index in range(size):
+                    kind = KIND_PHOTO if rng.random() < 0.7 else KIND_VIDEO
+                    caption = f"album {group_id}" if index == 0 else None
+                    self.entries[self.next_id] = (kind, group_id, sample_size(rng), caption)
+                    ids.append(self.next_id)
+                    self.next_id += 1
+                self.groups[group_id] = ids
+            else:
+                if rng.random() < self.spec.text_ratio:
+                    self.entries[self.next_id] = (KIND_TEXT, None, 0, f"text message {self.next_id}")
+                else:
+                    kind = rng.choice((KIND_PHOTO, KIND_VIDEO, KIND_DOCUMENT))
+                    self.entries[self.next_id] = (kind, None, sample_size(rng), f"caption {self.next_id}")
+                self.next_id += 1
+
+    def add(self, kind: str, file_size: int, caption: Optional[str] = None,
+            group_id: Optional[str] = None) -> int:
+        """
+        追加一条消息（用于记录发送到目标频道的消息）
+
+        Returns:
+            int: 新消息ID
+        """
+        message_id = self.next_id
+        self.next_id += 1
+        self.entries[message_id] = (kind, group_id, file_size, caption)
+        if group_id:
+            self.groups.setdefault(group_id, []).append(message_id)
+        return message_id
+
+    @property
+    def total_bytes(self) -> int:
+        """频道中全部媒体文件的字节数"""
+        return sum(entry[2] for entry in self.entries.values())
+
+
+class FakeTelegramBackend:
+    """
+    模拟Telegram服务端，保存频道数据、网络参数和调用统计
+    """
+
+    def __init__(self, network: Optional[NetworkProfile] = None, seed: int = 0):
+        """
+        初始化模拟后端
+
+        Args:
+            network: 网络参数
+            seed: 随机种子
+        """
+        self.network = network or NetworkProfile()
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.channels: Dict[int, FakeChannel] = {}
+        self.stats: Dict[str, Any] = {
+            "calls": {},
+            "flood_waits": 0,
+            "bytes_downloaded": 0,
+            "bytes_uploaded": 0,
+            "messages_sent": 0,
+        }
+
+    def add_channel(self, spec: ChannelSpec) -> FakeChannel:
+        """
+        创建合成频道
+
+        Args:
+            spec: 频道参数
+
+        Returns:
+            FakeChannel: 频道对象
+        """
+        channel = FakeChannel(spec, random.Random(f"{self.seed}:{spec.chat_id}"))
+        self.channels[spec.chat_id] = channel
+        return channel
+
+    def add_target(self, chat_id: int, title: str = "") -> FakeChannel:
+        """
+        创建空的目标频道
+
+        Args:
+            chat_id: 频道ID
+            title: 频道标题
+
+        Returns:
+            FakeChannel: 频道对象
+        """
+        return self.add_channel(ChannelSpec(chat_id=chat_id, message_count=0, title=title))
+
+    def channel(self, chat_id: Union[int, str]) -> FakeChannel:
+        """
+        获取频道，不存在时抛出 PeerIdInvalid
+
+        Args:
+            chat_id: 频道ID
+
+        Returns:
+            FakeChannel: 频道对象
+        """
+        try:
+            return self.channels[int(chat_id)]
+        except (KeyError, ValueError, TypeError):
+            raise PeerIdInvalid()
+
+    async def call(self, method: str, transfer_bytes: int = 0) -> None:
+        """
+        模拟一次API调用的网络开销和限流
+
+        Args:
+            method: 方法名
+            transfer_bytes: 本次调用传输的字节数
+
+        Raises:
+            FloodWait: 按配置概率注入
+        """
+        calls = self.stats["calls"]
+        calls[method] = calls.get(method, 0) + 1
+
+        network = self.network
+        if network.flood_wait_rate and self.rng.random() < network.flood_wait_rate:
+            self.stats["flood_waits"] += 1
+            error = FloodWait(value=network.flood_wait_seconds)
+            # RPCError会把数值截断为整数，这里保留小数以便压缩测试时间
+            error.value = network.flood_wait_seconds
+            await asyncio.sleep(network.rtt)
+            raise error
+
+        delay = network.rtt
+        if transfer_bytes and network.bandwidth:
+            delay += transfer_bytes / network.bandwidth
+        await asyncio.sleep(delay)
+
+
+class FakePyrogramClient:
+    """
+    Pyrogram Client 的进程内替身，实现转发、下载上传流程用到的方法
+    """
+
+    def __init__(self, backend: FakeTelegramBackend, name: str = "fake"):
+        """
+        初始化模拟客户端
+
+        Args:
+            backend: 模拟后端
+            name: 会话名称
+        """
+        self.backend = backend
+        self.name = name
+        self.api_id = 0
+        self.api_hash = "fake"
+        self.is_connected = False
+        self._date = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        self._chats: Dict[int, types.Chat] = {}
+
+    # ---- 连接管理 ----
+
+    async def start(self) -> "FakePyrogramClient":
+        self.is_connected = True
+        return self
+
+    async def connect(self) -> bool:
+        self.is_connected = True
+        return True
+
+    async def stop(self, block: bool = True) -> "FakePyrogramClient":
+        self.is_connected = False
+        return self
+
+    async def disconnect(self) -> None:
+        self.is_connected = False
+
+    async def get_me(self) -> types.User:
+        await self.backend.call("get_me")
+        return types.User(id=1, first_name="Bench", last_name=None, username="bench", client=self)
+
+    # ---- 对象构造 ----
+
+    def _chat(self, channel: FakeChannel) -> types.Chat:
+        """获取（缓存的）频道对象"""
+        chat = self._chats.get(channel.chat_id)
+        if chat is None:
+            chat = types.Chat(
+                id=channel.chat_id,
+                type=enums.ChatType.CHANNEL,
+                title=channel.spec.title or f"channel {channel.chat_id}",
+                has_protected_content=channel.protected,
+                client=self
+            )
+            self._chats[channel.chat_id] = chat
+        return chat
+
+    def _message(self, channel: FakeChannel, message_id: int) -> Optional[types.Message]:
+        """根据紧凑描述构造 pyrogram Message"""
+        entry = channel.entries.get(message_id)
+        if entry is None:
+            return None
+
+        kind, group_id, file_size, caption = entry
+        common = {
+            "id": message_id,
+            "chat": self._chat(channel),
+            "date": self._date,
+            "media_group_id": group_id,
+            "client": self,
+        }
+        file_id = f"{channel.chat_id}_{message_id}"
+
+        if kind == KIND_TEXT:
+            return types.Message(text=caption, **common)
+        if kind == KIND_PHOTO:
+            media = types.Photo(file_id=file_id, file_unique_id=file_id, width=1280, height=720,
+                                file_size=file_size, date=self._date, client=self)
+            return types.Message(media=enums.MessageMediaType.PHOTO, photo=media, caption=caption, **common)
+        if kind == KIND_VIDEO:
+            media = types.Video(file_id=file_id, file_unique_id=file_id, width=1280, height=720,
+                                duration=10, file_name=f"video_{message_id}.mp4", mime_type="video/mp4",
+                                file_size=file_size, date=self._date, client=self)
+            return types.Message(media=enums.MessageMediaType.VIDEO, video=media, caption=caption, **common)
+
+        media = types.Document(file_id=file_id, file_unique_id=file_id, file_name=f"file_{message_id}.bin",
+                               mime_type="application/octet-stream", file_size=file_size,
+                               date=self._date, client=self)
+        return types.Message(media=enums.MessageMediaType.DOCUMENT, document=media, caption=caption, **common)
+
+    def _file_size_of(self, message: types.Message) -> int:
+        """获取消息中媒体文件的大小"""
+        media = message.photo or message.video or message.document
+        return getattr(media, "file_size", 0) or 0
+
+    def _kind_of(self, message: types.Message) -> str:
+        """获取消息的内容种类"""
+        if message.photo:
+            return KIND_PHOTO
+        if message.video:
+            return KIND_VIDEO
+        if message.document:
+            return KIND_DOCUMENT
+        return KIND_TEXT
+
+    # ---- 读取接口 ----
+
+    async def get_chat(self, chat_id: Union[int, str]) -> types.Chat:
+        channel = self.backend.channel(chat_id)
+        await self.backend.call("get_chat")
+        return self._chat(channel)
+
+    async def get_messages(self, chat_id: Union[int, str],
+                           message_ids: Union[int, List[int]] = None, **kwargs) -> Union[types.Message, List[types.Message]]:
+        channel = self.backend.channel(chat_id)
+        await self.backend.call("get_messages")
+
+        if isinstance(message_ids, (list, tuple, range)):
+            return [self._message(channel, message_id) for message_id in message_ids]
+        return self._message(channel, message_ids)
+
+    async def get_chat_history(self, chat_id: Union[int, str], limit: int = 0,
+                               **kwargs) -> AsyncGenerator[types.Message, None]:
+        channel = self.backend.channel(chat_id)
+        await self.backend.call("get_chat_history")
+
+        count = 0
+        for message_id in sorted(channel.entries, reverse=True):
+            if limit and count >= limit:
+                break
+            yield self._message(channel, message_id)
+            count += 1
+
+    async def get_media_group(self, chat_id: Union[int, str], message_id: int) -> List[types.Message]:
+        channel = self.backend.channel(chat_id)
+        await self.backend.call("get_media_group")
+
+        entry = channel.entries.get(message_id)
+        if entry is None or entry[1] is None:
+            raise ValueError("The message doesn't belong to a media group")
+        return [self._message(channel, mid) for mid in channel.groups[entry[1]]]
+
+    def _file_size_of_id(self, file_id: str) -> int:
+        """根据 _message 生成的文件ID（"频道ID_消息ID"）获取媒体文件的大小"""
+        chat_id, _, message_id = file_id.rpartition("_")
+        entry = self.backend.channel(int(chat_id)).entries.get(int(message_id))
+        return entry[2] if entry else 0
+
+    async def download_media(self, message: Union[types.Message, str], file_name: str = "", **kwargs) -> Optional[str]:
+        if isinstance(message, str):
+            file_size = self._file_size_of_id(message)
+        else:
+            file_size = self._file_size_of(message)
+        if not file_size:
+            raise ValueError("This message doesn't contain any downloadable media")
+
+        await self.backend.call("download_media", file_size)
+
+        directory = os.path.dirname(file_name)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # 生成稀疏文件，保证文件大小正确而不占用真实磁盘空间
+        with open(file_name, "wb") as f:
+            f.truncate(file_size)
+
+        self.backend.stats["bytes_downloaded"] += file_size
+        return file_name
+
+    # ---- 写入接口 ----
+
+    def _target(self, chat_id: Union[int, str]) -> FakeChannel:
+        """获取目标频道"""
+        return self.backend.channel(chat_id)
+
+    def _check_forward_allowed(self, from_chat_id: Union[int, str]) -> FakeChannel:
+        """检查源频道是否允许转发"""
+        source = self.backend.channel(from_chat_id)
+        if source.protected:
+            raise ChatForwardsRestricted()
+        return source
+
+    def _record_sent(self, target: FakeChannel, kind: str, file_size: int,
+                     caption: Optional[str] = None, group_id: Optional[str] = None) -> types.Message:
+        """在目标频道记录一条新消息"""
+        message_id = target.add(kind, file_size, caption, group_id)
+        self.backend.stats["messages_sent"] += 1
+        return self._message(target, message_id)
+
+    async def copy_message(self, chat_id: Union[int, str], from_chat_id: Union[int, str],
+                           message_id: int, **kwargs) -> types.Message:
+        source = self._check_forward_allowed(from_chat_id)
+        target = self._target(chat_id)
+        await self.backend.call("copy_message")
+
+        kind, _, file_size, caption = source.entries[message_id]
+        return self._record_sent(target, kind, file_size, kwargs.get("caption", caption))
+
+    async def forward_messages(self, chat_id: Union[int, str], from_chat_id: Union[int, str],
+                               message_ids: Union[int, List[int]], **kwargs) -> Union[types.Message, List[types.Message]]:
+        source = self._check_forward_allowed(from_chat_id)
+        target = self._target(chat_id)
+        await self.backend.call("forward_messages")
+
+        ids = message_ids if isinstance(message_ids, list) else [message_ids]
+        sent = []
+        for message_id in ids:
+            kind, _, file_size, caption = source.entries[message_id]
+            sent.append(self._record_sent(target, kind, file_size, caption))
+        return sent if isinstance(message_ids, list) else sent[0]
+
+    async def copy_media_group(self, chat_id: Union[int, str], from_chat_id: Union[int, str],
+                               message_id: int, **kwargs) -> List[types.Message]:
+        source = self._check_forward_allowed(from_chat_id)
+        target = self._target(chat_id)
+        await self.backend.call("copy_media_group")
+
+        entry = source.entries.get(message_id)
+        if entry is None or entry[1] is None:
+            raise ValueError("The message doesn't belong to a media group")
+
+        new_group_id = f"{target.chat_id}{target.next_id:012d}"
+        return [
+            self._record_sent(target, source.entries[mid][0], source.entries[mid][2],
+                              source.entries[mid][3], new_group_id)
+            for mid in source.groups[entry[1]]
+        ]
+
+    async def send_cached_media(self, chat_id: Union[int, str], file_id: str, caption: str = "",
+                                **kwargs) -> types.Message:
+        source_chat_id, source_message_id = file_id.rsplit("_", 1)
+        source = self._check_forward_allowed(source_chat_id)
+        target = self._target(chat_id)
+        await self.backend.call("send_cached_media")
+
+        kind, _, file_size, original_caption = source.entries[int(source_message_id)]
+        return self._record_sent(target, kind, file_size, caption or original_caption)
+
+    async def send_message(self, chat_id: Union[int, str], text: str, **kwargs) -> types.Message:
+        target = self._target(chat_id)
+        await self.backend.call("send_message")
+        return self._record_sent(target, KIND_TEXT, 0, text)
+
+    async def _send_file(self, method: str, chat_id: Union[int, str], kind: str, path: Any,
+                         caption: Optional[str] = None, group_id: Optional[str] = None) -> types.Message:
+        """模拟上传本地文件"""
+        target = self._target(chat_id)
+        file_size = os.path.getsize(path) if isinstance(path, str) and os.path.exists(path) else 0
+        await self.backend.call(method, file_size)
+        self.backend.stats["bytes_uploaded"] += file_size
+        return self._record_sent(target, kind, file_size, caption, group_id)
+
+    async def send_media_group(self, chat_id: Union[int, str], media: List[Any], **kwargs) -> List[types.Message]:
+        target = self._target(chat_id)
+        group_id = f"{target.chat_id}{target.next_id:012d}"
+        total = sum(
+            os.path.getsize(item.media) for item in media
+            if isinstance(item.media, str) and os.path.exists(item.media)
+        )
+        await self.backend.call("send_media_group", total)
+        self.backend.stats["bytes_uploaded"] += total
+
+        sent = []
+        for item in media:
+            kind = KIND_PHOTO if isinstance(item, types.InputMediaPhoto) else (
+                KIND_VIDEO if isinstance(item, types.InputMediaVideo) else KIND_DOCUMENT)
+            size = os.path.getsize(item.media) if isinstance(item.media, str) and os.path.exists(item.media) else 0
+            sent.append(self._record_sent(target, kind, size, getattr(item, "caption", None), group_id))
+        return sent
+
+    def __getattr__(self, name: str) -> Callable:
+        # send_photo/send_video/send_document 等单文件上传接口
+        if name.startswith("send_") and name[5:] in SEND_MEDIA_ARGS:
+            arg = name[5:]
+            kind = SEND_MEDIA_ARGS[arg]
+
+            async def send_file(chat_id: Union[int, str], *args, **kwargs) -> types.Message:
+                path = kwargs.get(arg, args[0] if args else None)
+                return await self._send_file(name, chat_id, kind, path, kwargs.get("caption"))
+
+            return send_file
+        raise AttributeError(name)
+
+
+class FakeClientManager(TelegramClientManager):
+    """
+    上传器客户端管理器的替身，直接使用模拟客户端而不创建新的Pyrogram会话
+    """
+
+    backend: Optional[FakeTelegramBackend] = None
+
+    async def initialize(self, force: bool = False) -> bool:
+        if self.initialized and not force:
+            return True
+        self.client = FakePyrogramClient(self.backend, self.session_name)
+        await self.client.start()
+        self.initialized = True
+        return True
+
+
+@contextlib.contextmanager
+def use_fake_uploader_client(backend: FakeTelegramBackend) -> Iterator[None]:
+    """
+    在上下文中让 MediaUploader 使用模拟客户端
+
+    MediaUploader 会用API凭据自行创建独立会话，这里替换其客户端管理器类。
+
+    Args:
+        backend: 模拟后端
+    """
+    from tg_forwarder.uploader import media_uploader
+
+    original = media_uploader.TelegramClientManager
+    FakeClientManager.backend = backend
+    media_uploader.TelegramClientManager = FakeClientManager
+    try:
+        yield
+    finally:
+        media_uploader.TelegramClientManager = original
+        FakeClientManager.backend = None
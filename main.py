@@ -11,7 +11,11 @@ import asyncio
 import argparse
 
 from tg_forwarder.logModule.logger import setup_logger, get_logger
+from tg_forwarder.config import Config
 from tg_forwarder.manager import ForwardManager
+from tg_forwarder.route_runner import RouteRunner
+from tg_forwarder.backfill import BackfillCoordinator
+from tg_forwarder.utils.profiler import SamplingProfiler, PROFILE_MODES, PROFILE_FORMATS
 
 # 获取日志记录器
 logger = get_logger("main")
@@ -53,8 +57,77 @@ def parse_arguments():
         help="结束消息ID，优先于配置文件中的设置"
     )
     
+    parser.add_argument(
+        "--tail",
+        action="store_true",
+        help="实时跟随模式，持续转发源频道的新消息，直到程序被中断"
+    )
+    
+    parser.add_argument(
+        "--backfill",
+        action="store_true",
+        help="多进程回填模式，按 [BACKFILL] 配置把 [CHANNELS] 路由的消息范围分片，由会话池中的多个进程并行转发"
+    )
+    
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="启用采样分析，运行期间周期性采集调用栈"
+    )
+    
+    parser.add_argument(
+        "--profile-output",
+        dest="profile_output",
+        help="采样结果输出路径 (默认: logs/profile.txt，speedscope格式为 logs/profile.speedscope.json)"
+    )
+    
+    parser.add_argument(
+        "--profile-interval",
+        dest="profile_interval",
+        type=float,
+        default=10.0,
+        help="采样间隔，单位毫秒 (默认: 10)"
+    )
+    
+    parser.add_argument(
+        "--profile-format",
+        dest="profile_format",
+        choices=PROFILE_FORMATS,
+        default="collapsed",
+        help="采样结果格式 (默认: collapsed)"
+    )
+    
+    parser.add_argument(
+        "--profile-mode",
+        dest="profile_mode",
+        choices=PROFILE_MODES,
+        default="thread",
+        help="采样模式: thread 统计线程调用栈, task 按协程统计墙钟时间 (默认: thread)"
+    )
+    
     return parser.parse_args()
 
+def create_profiler(args) -> SamplingProfiler:
+    """
+    根据命令行参数创建采样分析器
+    
+    Args:
+        args: 命令行参数
+        
+    Returns:
+        SamplingProfiler: 采样分析器
+    """
+    output_path = args.profile_output
+    if not output_path:
+        output_path = "logs/profile.speedscope.json" if args.profile_format == "speedscope" else "logs/profile.txt"
+    
+    return SamplingProfiler(
+        output_path,
+        interval=args.profile_interval / 1000,
+        mode=args.profile_mode,
+        output_format=args.profile_format
+    )
+
 async def main():
     """主程序"""
     args = parse_arguments()
@@ -67,6 +140,11 @@ async def main():
         'retention': '7 days'
     })
     
+    # 启动采样分析
+    profiler = create_profiler(args) if args.profile else None
+    if profiler:
+        profiler.start(asyncio.get_running_loop())
+    
     try:
         # 检查配置文件是否存在
         if not os.path.exists(args.config_path):
@@ -76,15 +154,27 @@ async def main():
                 logger.error(f"配置文件 '{args.config_path}' 不存在。")
             return 1
         
-        # 创建转发管理器
-        manager = ForwardManager(args.config_path)
+        # 回填模式由多个进程分片处理；配置了 [ROUTES] 时在一个进程中运行所有路由，否则只运行 [CHANNELS] 中的一条
+        config = Config(args.config_path)
+        tail = args.tail or config.get_live_tail_config()['enabled']
+        if args.backfill:
+            manager = BackfillCoordinator(args.config_path)
+        elif config.get_routes_config():
+            manager = RouteRunner(args.config_path)
+        else:
+            manager = ForwardManager(args.config_path)
         
         # 设置管理器
         await manager.setup()
         
         try:
-            # 运行转发流程
-            result = await manager.run()
+            # 运行转发流程，实时跟随模式一直运行到程序被中断
+            if isinstance(manager, RouteRunner):
+                result = await manager.run(tail=tail)
+            elif tail and isinstance(manager, ForwardManager):
+                result = await manager.run_tail()
+            else:
+                result = await manager.run()
             
             # 输出统计信息
             logger.info(f"统计信息: 总数 {result.get('total', 0)}, 处理 {result.get('processed', 0)}, 成功 {result.get('success', 0)}, 失败 {result.get('failed', 0)}")
@@ -108,6 +198,10 @@ async def main():
     except Exception as e:
         logger.exception(f"发生错误: {str(e)}")
         return 1
+    
+    finally:
+        if profiler:
+            profiler.stop()
 
 if __name__ == "__main__":
     # 在Windows上运行异步事件循环的修复
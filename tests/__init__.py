@@ -0,0 +1,5 @@
+"""
+tg_forwarder 测试包。
+
+测试不依赖Telegram连接，需要客户端时使用 benchmarks.fake_telegram 中的模拟后端。
+"""
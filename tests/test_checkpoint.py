@@ -0,0 +1,98 @@
+"""
+转发检查点单元测试，使用临时文件，不依赖Telegram连接。
+"""
+
+import json
+import os
+import sys
+
+# 添加项目根目录到Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from tg_forwarder.utils.checkpoint import CheckpointStore
+
+
+def test_record_advances_checkpoint_and_stops_at_failed_ids(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.json"))
+    assert store.get(-1, -2) is None
+    assert store.resume_from(-1, [-2]) is None
+
+    # 新路由从本次起始位置开始，失败的消息之前的部分计入检查点
+    assert store.record(-1, -2, 10, 20, failed_ids=[15, 18]) == 14
+    route = store.routes["-1->-2"]
+    assert route["completed"] == [[16, 17], [19, 20]]
+    assert store.is_delivered(-1, -2, 9)
+    assert store.is_delivered(-1, -2, 14)
+    assert not store.is_delivered(-1, -2, 15)
+    assert store.is_delivered(-1, -2, 16) and store.is_delivered(-1, -2, 17)
+    assert not store.is_delivered(-1, -2, 18)
+    assert store.is_delivered(-1, -2, 20)
+    assert not store.is_delivered(-1, -2, 21)
+    assert not store.is_delivered(-1, -3, 10)
+
+    # 失败消息重试成功后，检查点越过相连的已完成区间
+    assert store.record(-1, -2, 15, 15) == 17
+    assert store.routes["-1->-2"]["completed"] == [[19, 20]]
+    assert store.record(-1, -2, 18, 18) == 20
+    assert store.routes["-1->-2"]["completed"] == []
+
+
+def test_record_merges_completed_intervals_after_gap(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.json"))
+    store.record(-1, -2, 1, 10)
+
+    # 中间的 [11, 20] 没有处理，后面的区间保留并合并
+    assert store.record(-1, -2, 21, 30) == 10
+    assert store.record(-1, -2, 31, 35, failed_ids=[33]) == 10
+    assert store.record(-1, -2, 25, 32) == 10
+    assert store.routes["-1->-2"]["completed"] == [[21, 32], [34, 35]]
+    assert not store.is_delivered(-1, -2, 15)
+    assert not store.is_delivered(-1, -2, 33)
+
+    # 已在检查点之前的区间不影响结果，补上缺口后检查点一直推进到下一个失败消息
+    assert store.record(-1, -2, 1, 5) == 10
+    assert store.record(-1, -2, 11, 20) == 32
+    assert store.routes["-1->-2"]["completed"] == [[34, 35]]
+
+
+def test_resume_from_uses_slowest_target(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.json"))
+    store.record(-1, -2, 1, 50)
+    store.record(-1, -3, 1, 50, failed_ids=[31])
+
+    assert store.resume_from(-1, [-2, -3]) == 31
+    assert store.resume_from(-1, [-2]) == 51
+    # 任一目标频道没有记录时从配置的起始位置开始
+    assert store.resume_from(-1, [-2, -4]) is None
+    assert store.resume_from(-1, []) is None
+
+
+def test_reload_from_disk(tmp_path):
+    path = str(tmp_path / "state" / "checkpoints.json")
+    store = CheckpointStore(path)
+    store.record(-1, -2, 1, 10, failed_ids=[4])
+    store.record("@source", "@target", 5, 8)
+    store.save()
+
+    assert not os.path.exists(f"{path}.tmp")
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f)["version"] == 1
+
+    reloaded = CheckpointStore(path)
+    assert reloaded.get(-1, -2) == 3
+    assert reloaded.routes["-1->-2"]["completed"] == [[5, 10]]
+    assert reloaded.is_delivered(-1, -2, 7)
+    assert not reloaded.is_delivered(-1, -2, 4)
+    assert reloaded.get("@source", "@target") == 8
+
+    # 重新加载后继续记录
+    assert reloaded.record(-1, -2, 4, 4) == 10
+
+
+def test_corrupt_file_starts_empty(tmp_path):
+    path = tmp_path / "checkpoints.json"
+    path.write_text("{not json", encoding="utf-8")
+    assert CheckpointStore(str(path)).routes == {}
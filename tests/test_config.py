@@ -0,0 +1,89 @@
+"""
+配置重新加载和配置观察者单元测试。
+"""
+
+import os
+import sys
+
+# 添加项目根目录到Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from tg_forwarder.config import Config
+
+BASE_CONFIG = (
+    "[API]\napi_id = 1\napi_hash = x\n\n"
+    "[CHANNELS]\nsource_channel = -1\ntarget_channels = -2\n\n"
+)
+
+
+def _write(path, text):
+    path.write_text(BASE_CONFIG + text, encoding="utf-8")
+
+
+def _recorder(calls):
+    return lambda section, changed: calls.append((section, changed))
+
+
+def test_reload_notifies_only_changed_sections(tmp_path):
+    path = tmp_path / "config.ini"
+    _write(path, "[FORWARD]\nbatch_size = 30\ndelay = 1\n\n[DOWNLOAD]\nconcurrent_downloads = 5\n")
+    config = Config(str(path))
+
+    forward_calls, download_calls, upload_calls = [], [], []
+    config.add_observer("FORWARD", _recorder(forward_calls))
+    config.add_observer("DOWNLOAD", _recorder(download_calls))
+    config.add_observer("UPLOAD", _recorder(upload_calls))
+
+    # 没有变化时不通知
+    assert config.reload() == {}
+    assert not forward_calls and not download_calls
+
+    _write(path, "[FORWARD]\nbatch_size = 50\n\n[DOWNLOAD]\nconcurrent_downloads = 5\n\n[UPLOAD]\nconcurrent_uploads = 2\n")
+    changes = config.reload()
+
+    # 删除的键以 None 报告，新增的配置节也会通知
+    assert changes == {"FORWARD": {"batch_size": "50", "delay": None}, "UPLOAD": {"concurrent_uploads": "2"}}
+    assert forward_calls == [("FORWARD", {"batch_size": "50", "delay": None})]
+    assert upload_calls == [("UPLOAD", {"concurrent_uploads": "2"})]
+    assert not download_calls
+    assert config.get_forward_config()["batch_size"] == 50
+
+
+def test_invalid_config_is_not_applied(tmp_path):
+    path = tmp_path / "config.ini"
+    _write(path, "[FORWARD]\nbatch_size = 30\n")
+    config = Config(str(path))
+    calls = []
+    config.add_observer("FORWARD", _recorder(calls))
+
+    path.write_text("[FORWARD]\nbatch_size = 10\n", encoding="utf-8")
+    assert config.reload() == {}
+    assert not calls
+    assert config.get_forward_config()["batch_size"] == 30
+
+
+def test_removed_observer_and_failing_observer(tmp_path):
+    path = tmp_path / "config.ini"
+    _write(path, "[FORWARD]\nbatch_size = 30\n")
+    config = Config(str(path))
+
+    removed, calls = [], []
+    removed_callback = _recorder(removed)
+    config.add_observer("FORWARD", removed_callback)
+    assert config.remove_observer("FORWARD", removed_callback)
+    assert not config.remove_observer("FORWARD", removed_callback)
+
+    def failing(section, changed):
+        raise RuntimeError("观察者出错")
+
+    # 一个观察者出错不影响其他观察者
+    config.add_observer("FORWARD", failing)
+    config.add_observer("FORWARD", _recorder(calls))
+
+    _write(path, "[FORWARD]\nbatch_size = 40\n")
+    config.reload()
+    assert not removed
+    assert calls == [("FORWARD", {"batch_size": "40"})]
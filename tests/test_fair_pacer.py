@@ -0,0 +1,101 @@
+"""
+公平发送调度器单元测试，不依赖Telegram连接。
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+# 添加项目根目录到Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from tg_forwarder.utils.fair_pacer import FairPacer
+
+
+async def _send(pacer, route, count, order):
+    for index in range(count):
+        await pacer.acquire(route)
+        order.append((route, index))
+
+
+@pytest.mark.asyncio
+async def test_waiting_routes_are_granted_round_robin():
+    pacer = FairPacer(0.001)
+    order = []
+    # 消息多的路由 a 先开始排队，也不会挤占 b、c 的发送机会
+    await asyncio.gather(
+        _send(pacer, "a", 6, order),
+        _send(pacer, "b", 2, order),
+        _send(pacer, "c", 2, order),
+    )
+    await pacer.close()
+
+    assert [route for route, _ in order[:6]] == ["a", "b", "c", "a", "b", "c"]
+    assert [route for route, _ in order[6:]] == ["a"] * 4
+    # 每条路由内部保持顺序
+    assert [index for route, index in order if route == "a"] == list(range(6))
+
+    stats = pacer.get_stats()
+    assert stats["a"]["granted"] == 6
+    assert stats["b"]["granted"] == 2 and stats["b"]["pending"] == 0
+
+
+@pytest.mark.asyncio
+async def test_min_interval_is_shared_between_routes():
+    pacer = FairPacer(0.02)
+    loop = asyncio.get_running_loop()
+    grants = []
+
+    async def send(route):
+        for _ in range(2):
+            await pacer.acquire(route)
+            grants.append(loop.time())
+
+    await asyncio.gather(send("a"), send("b"))
+    await pacer.close()
+
+    assert len(grants) == 4
+    gaps = [later - earlier for earlier, later in zip(grants, grants[1:])]
+    assert min(gaps) >= 0.015
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_consume_a_grant():
+    pacer = FairPacer(0.05)
+    await pacer.acquire("a")
+
+    # a 的第二个许可要等待发送间隔，期间取消
+    cancelled = asyncio.create_task(pacer.acquire("a"))
+    waiting = asyncio.create_task(pacer.acquire("b"))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    await asyncio.gather(cancelled, return_exceptions=True)
+
+    await asyncio.wait_for(waiting, 1)
+    assert cancelled.cancelled()
+    assert pacer.get_stats()["a"]["granted"] == 1
+    assert pacer.get_stats()["b"]["granted"] == 1
+    await pacer.close()
+
+
+@pytest.mark.asyncio
+async def test_close_cancels_pending_waiters():
+    pacer = FairPacer(10)
+    await pacer.acquire("a")
+    pending = asyncio.create_task(pacer.acquire("a"))
+    await asyncio.sleep(0)
+
+    await pacer.close()
+    with pytest.raises(asyncio.CancelledError):
+        await pending
+    assert pacer.get_stats()["a"]["pending"] == 0
+
+    # 关闭后再次使用会重新启动调度
+    pacer.min_interval = 0
+    await asyncio.wait_for(pacer.acquire("a"), 1)
+    await pacer.close()
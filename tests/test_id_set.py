@@ -0,0 +1,126 @@
+"""
+消息ID区间集合单元测试。
+"""
+
+import json
+import os
+import sys
+
+# 添加项目根目录到Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from tg_forwarder.downloader.media_downloader import MediaDownloader
+from tg_forwarder.utils.id_set import IdIntervalSet, ChatIdSet, ID_SET_VERSION
+
+
+def test_add_and_contains():
+    id_set = IdIntervalSet()
+    assert id_set.add(5)
+    assert not id_set.add(5)
+    assert 5 in id_set
+    assert 4 not in id_set and 6 not in id_set
+    # 非整数不在集合中
+    assert "5" not in id_set and None not in id_set
+    assert len(id_set) == 1
+
+
+def test_adjacent_ids_merge_into_one_interval():
+    id_set = IdIntervalSet([1, 2, 3, 7, 9])
+    assert id_set.intervals() == [[1, 3], [7, 7], [9, 9]]
+
+    # 填补缺口后相邻区间合并
+    id_set.add(8)
+    assert id_set.intervals() == [[1, 3], [7, 9]]
+    id_set.add(0)
+    id_set.add(4)
+    assert id_set.intervals() == [[0, 4], [7, 9]]
+    assert len(id_set) == 8
+    assert list(id_set) == [0, 1, 2, 3, 4, 7, 8, 9]
+
+
+def test_add_range_counts_only_new_ids():
+    id_set = IdIntervalSet.from_intervals([[10, 20], [30, 40]])
+    assert id_set.add_range(15, 35) == 9
+    assert id_set.intervals() == [[10, 40]]
+    assert id_set.add_range(12, 18) == 0
+    assert id_set.add_range(5, 3) == 0
+    assert id_set.add_range(41, 41) == 1
+    assert len(id_set) == 32
+
+    # 无序、重叠的区间列表
+    id_set = IdIntervalSet.from_intervals([[50, 60], [1, 5], [4, 8], ["9", "9"]])
+    assert id_set.intervals() == [[1, 9], [50, 60]]
+
+    id_set.clear()
+    assert len(id_set) == 0 and id_set.intervals() == []
+
+
+def test_consecutive_ids_use_one_interval():
+    id_set = IdIntervalSet()
+    for value in range(1, 100001):
+        id_set.add(value)
+    assert len(id_set) == 100000
+    assert id_set.intervals() == [[1, 100000]]
+
+
+def test_chat_id_set_keys_chats_by_string():
+    chat_set = ChatIdSet()
+    assert chat_set.add(-1001, 5)
+    assert not chat_set.add("-1001", "5")
+    chat_set.add(-1001, 6)
+    chat_set.add(-1002, 5)
+
+    assert chat_set.contains("-1001", 6)
+    assert chat_set.contains(-1002, "5")
+    assert not chat_set.contains(-1002, 6)
+    assert not chat_set.contains(-1003, 5)
+    assert len(chat_set) == 3
+    assert chat_set.interval_count() == 2
+
+
+def test_to_dict_from_dict_round_trip():
+    chat_set = ChatIdSet()
+    for message_id in (1, 2, 3, 10):
+        chat_set.add(-1001, message_id)
+    chat_set.add(-1002, 7)
+    # 空集合不写入
+    chat_set.chats["-1003"] = IdIntervalSet()
+
+    data = json.loads(json.dumps(chat_set.to_dict()))
+    assert data == {"version": ID_SET_VERSION, "chats": {"-1001": [[1, 3], [10, 10]], "-1002": [[7, 7]]}}
+
+    restored = ChatIdSet.from_dict(data)
+    assert restored.to_dict() == data
+    assert restored.contains(-1001, 2) and not restored.contains(-1001, 5)
+    assert len(restored) == 5
+
+
+def test_from_keys_loads_legacy_records():
+    keys = ["-1001_1", "-1001_2", "-1001_3", "-1002_10", "@name_4", "bad", "-1001_x", "_5"]
+    chat_set = ChatIdSet.from_keys(keys)
+
+    assert chat_set.to_dict()["chats"] == {"-1001": [[1, 3]], "-1002": [[10, 10]], "@name": [[4, 4]]}
+    assert chat_set.contains(-1001, 2)
+    assert len(chat_set) == 5
+
+    # 转换后的结果和新格式一致
+    assert ChatIdSet.from_dict(chat_set.to_dict()).to_dict() == chat_set.to_dict()
+
+
+def test_downloader_converts_legacy_record_file(tmp_path):
+    record_path = tmp_path / "downloaded_messages.json"
+    record_path.write_text(json.dumps(["-1001_1", "-1001_2", "-1001_4"]), encoding="utf-8")
+
+    downloader = MediaDownloader(None, temp_folder=str(tmp_path))
+    assert downloader._is_message_downloaded(-1001, 2)
+    assert not downloader._is_message_downloaded(-1001, 3)
+
+    # 下次保存时写入区间格式
+    downloader._mark_message_downloaded(-1001, 3)
+    downloader._save_downloaded_messages()
+    data = json.loads(record_path.read_text(encoding="utf-8"))
+    assert data == {"version": ID_SET_VERSION, "chats": {"-1001": [[1, 4]]}}
+    assert MediaDownloader(None, temp_folder=str(tmp_path))._is_message_downloaded("-1001", 4)
@@ -0,0 +1,152 @@
+"""
+实时跟随器单元测试，直接调用新消息回调，不依赖Telegram连接。
+"""
+
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+# 添加项目根目录到Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from tg_forwarder.forward.live_tail import LiveTail
+
+CHAT_ID = -1001
+
+
+class FakeClient:
+    """记录注册的消息处理器"""
+
+    def __init__(self):
+        self.handlers = []
+        self.client = SimpleNamespace(
+            add_handler=lambda handler, group: self.handlers.append((handler, group)),
+            remove_handler=lambda handler, group: self.handlers.remove((handler, group)),
+        )
+
+    async def start_updates(self):
+        return True
+
+
+def _message(message_id, media_group_id=None, chat_id=CHAT_ID):
+    return SimpleNamespace(id=message_id, media_group_id=media_group_id, chat=SimpleNamespace(id=chat_id))
+
+
+class Recorder:
+    """记录处理的消息单元，可以在处理时等待放行"""
+
+    def __init__(self, delay=0.0, fail_ids=()):
+        self.units = []
+        self.delay = delay
+        self.fail_ids = set(fail_ids)
+
+    async def __call__(self, messages):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.fail_ids & {message.id for message in messages}:
+            raise RuntimeError("处理失败")
+        self.units.append([message.id for message in messages])
+
+
+async def _start(handler, **kwargs):
+    client = FakeClient()
+    tail = LiveTail(client, [CHAT_ID], handler, **kwargs)
+    await tail.start()
+    assert tail.running and len(client.handlers) == 1
+    return tail, client
+
+
+@pytest.mark.asyncio
+async def test_units_are_handled_in_arrival_order():
+    recorder = Recorder()
+    tail, client = await _start(recorder, album_window=10)
+
+    await tail._on_message(None, _message(1))
+    # 媒体组乱序到达，处理时按ID排序
+    await tail._on_message(None, _message(3, "g1"))
+    await tail._on_message(None, _message(2, "g1"))
+    # 同一频道的新消息到达时，先到的媒体组先进入队列
+    await tail._on_message(None, _message(4))
+    await tail._on_message(None, _message(5))
+    await tail.stop()
+
+    assert recorder.units == [[1], [2, 3], [4], [5]]
+    assert tail.stats["units"] == 4 and tail.stats["albums"] == 1
+    assert not client.handlers and not tail.running
+
+
+@pytest.mark.asyncio
+async def test_album_is_flushed_after_window():
+    recorder = Recorder()
+    tail, _ = await _start(recorder, album_window=0.05)
+
+    await tail._on_message(None, _message(10, "g2"))
+    await tail._on_message(None, _message(11, "g2"))
+    await asyncio.sleep(0.2)
+    assert recorder.units == [[10, 11]]
+    await tail.stop()
+
+
+@pytest.mark.asyncio
+async def test_duplicates_and_delivered_messages_are_skipped():
+    recorder = Recorder()
+    delivered = {(CHAT_ID, 21), (CHAT_ID, 31)}
+    tail, _ = await _start(
+        recorder, album_window=10,
+        is_delivered=lambda chat_id, message_id: (chat_id, message_id) in delivered
+    )
+
+    await tail._on_message(None, _message(20))
+    # 重新连接后重复推送的更新
+    await tail._on_message(None, _message(20))
+    # 检查点中已送达的消息
+    await tail._on_message(None, _message(21))
+    await tail._on_message(None, _message(30, "g3"))
+    await tail._on_message(None, _message(30, "g3"))
+    await tail._on_message(None, _message(31, "g3"))
+    await tail._on_message(None, _message(32, "g3"))
+    # 其他聊天中相同的消息ID不是重复消息
+    await tail._on_message(None, _message(20, chat_id=-1002))
+    await tail.stop()
+
+    # 其他聊天的消息不会提前结束本聊天的媒体组收集
+    assert recorder.units == [[20], [20], [30, 32]]
+    assert tail.stats["received"] == 8
+    assert tail.stats["duplicates"] == 4
+
+
+@pytest.mark.asyncio
+async def test_stop_drains_queue_and_pending_albums():
+    recorder = Recorder(delay=0.02, fail_ids=[42])
+    tail, client = await _start(recorder, album_window=10)
+
+    for message_id in range(40, 45):
+        await tail._on_message(None, _message(message_id))
+    await tail._on_message(None, _message(50, "g4"))
+    await tail._on_message(None, _message(51, "g4"))
+
+    # 停止时不再等待媒体组窗口，已收到的消息全部处理完才结束
+    await asyncio.wait_for(tail.stop(), 2)
+    assert recorder.units == [[40], [41], [43], [44], [50, 51]]
+    assert tail.stats["units"] == 5 and tail.stats["failed"] == 1
+    assert tail._queue.empty() and not tail._albums
+    assert not client.handlers
+
+
+@pytest.mark.asyncio
+async def test_stop_gives_up_after_timeout():
+    recorder = Recorder(delay=0.5)
+    tail, _ = await _start(recorder)
+
+    for message_id in range(60, 63):
+        await tail._on_message(None, _message(message_id))
+    await asyncio.wait_for(tail.stop(timeout=0.1), 2)
+
+    assert not tail.running
+    assert len(recorder.units) < 3
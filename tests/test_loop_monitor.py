@@ -0,0 +1,48 @@
+"""
+事件循环阻塞监控单元测试，直接生成阻塞报告，不依赖真实的阻塞。
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+# 添加项目根目录到Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from tg_forwarder.utils.loop_monitor import LoopLagMonitor
+
+
+@pytest.mark.asyncio
+async def test_coroutine_callbacks_are_kept_until_done():
+    monitor = LoopLagMonitor(threshold=0.1)
+    gate = asyncio.Event()
+    reports = []
+    locations = []
+
+    async def publish(report):
+        await gate.wait()
+        reports.append(report["lag"])
+
+    async def failing(report):
+        await gate.wait()
+        raise RuntimeError("发布失败")
+
+    monitor.add_callback(publish)
+    monitor.add_callback(failing)
+    monitor.add_callback(lambda report: locations.append(report["location"]))
+    monitor._report(0.25)
+
+    # 事件循环只保留任务的弱引用，由监控器保留到回调完成
+    assert len(monitor._callback_tasks) == 2
+    assert locations == ["未知"]
+
+    gate.set()
+    await monitor.stop()
+    assert not monitor._callback_tasks
+    assert reports == [0.25]
+    assert monitor.stats["stalls"] == 1
@@ -0,0 +1,136 @@
+"""
+消息描述单元测试，用 pyrogram 类型构造消息，不依赖Telegram连接。
+"""
+
+import os
+import sys
+from datetime import datetime
+
+import pytest
+from pyrogram import enums, types
+
+# 添加项目根目录到Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from tg_forwarder.downloader.media_downloader import MediaDownloader
+from tg_forwarder.downloader.message_ref import MessageRef, MEDIA_METADATA_FIELDS
+
+CHAT_ID = -1001
+DATE = datetime(2024, 1, 2, 3, 4, 5)
+
+
+def _media(kind, file_id):
+    common = {"file_id": file_id, "file_unique_id": f"u{file_id}", "file_size": 2048}
+    if kind == "photo":
+        return types.Photo(width=1280, height=720, date=DATE, **common)
+    if kind == "video":
+        return types.Video(width=640, height=360, duration=12, file_name="clip.mp4", mime_type="video/mp4", **common)
+    if kind == "document":
+        return types.Document(file_name="report.pdf", mime_type="application/pdf", **common)
+    if kind == "audio":
+        return types.Audio(duration=180, performer="band", title="song", file_name="song.mp3",
+                           mime_type="audio/mpeg", **common)
+    if kind == "voice":
+        return types.Voice(duration=5, mime_type="audio/ogg", **common)
+    return types.Animation(width=320, height=240, duration=3, file_name="loop.mp4", mime_type="video/mp4", **common)
+
+
+def _message(kind, message_id, media_group_id=None, caption="说明"):
+    chat = types.Chat(id=CHAT_ID, type=enums.ChatType.CHANNEL, title="source")
+    common = {"id": message_id, "chat": chat, "date": DATE, "media_group_id": media_group_id}
+    if kind == "text":
+        entity = types.MessageEntity(type=enums.MessageEntityType.TEXT_LINK, offset=0, length=2, url="https://a.b")
+        return types.Message(text="正文", entities=[entity], **common)
+    entity = types.MessageEntity(type=enums.MessageEntityType.BOLD, offset=0, length=1)
+    return types.Message(caption=caption, caption_entities=[entity],
+                         **{kind: _media(kind, f"file_{message_id}")}, **common)
+
+
+@pytest.mark.parametrize("kind", ["photo", "video", "document", "audio", "voice", "animation"])
+def test_media_message_round_trip(kind):
+    message = _message(kind, 10)
+    ref = MessageRef.from_message(message)
+    media = getattr(message, kind)
+
+    assert (ref.id, ref.chat_id, ref.message_type) == (10, CHAT_ID, kind)
+    assert ref.file_id == "file_10" and ref.has_downloadable_media
+    assert ref.date == DATE.timestamp()
+    for name in ("file_name", "file_size", "mime_type", "duration", "width", "height", "performer", "title"):
+        assert getattr(ref, name) == getattr(media, name, None)
+
+    metadata = ref.to_metadata()
+    assert metadata["message_id"] == 10 and metadata["chat_id"] == CHAT_ID
+    assert metadata["message_type"] == kind
+    assert metadata["caption"] == "说明"
+    assert metadata["caption_entities"] == [{"type": str(enums.MessageEntityType.BOLD), "offset": 0, "length": 1}]
+    assert metadata["text"] is None and metadata["text_entities"] is None
+    # 每种媒体类型只写入对应的文件字段
+    for name in MEDIA_METADATA_FIELDS.get(kind, ()):
+        assert metadata[name] == getattr(media, name)
+    assert "file_id" not in metadata
+
+
+def test_text_message_has_no_media():
+    ref = MessageRef.from_message(_message("text", 11))
+
+    assert ref.message_type == "text"
+    assert ref.file_id is None and not ref.has_downloadable_media
+    metadata = ref.to_metadata()
+    assert metadata["text"] == "正文"
+    assert metadata["text_entities"] == [
+        {"type": str(enums.MessageEntityType.TEXT_LINK), "offset": 0, "length": 2, "url": "https://a.b"}
+    ]
+    assert metadata["caption"] is None
+
+
+def test_media_group_id_is_kept_and_can_be_overridden():
+    refs = [MessageRef.from_message(_message("photo", message_id, media_group_id="g1")) for message_id in (20, 21)]
+
+    assert [ref.media_group_id for ref in refs] == ["g1", "g1"]
+    assert refs[0].to_metadata()["media_group_id"] == "g1"
+    assert refs[0].to_metadata("other")["media_group_id"] == "other"
+    # 描述对象不保留原始消息
+    assert not hasattr(refs[0], "__dict__")
+
+
+class RecordingClient:
+    """记录 download_media 的参数并写入文件"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def download_media(self, file_id, file_name=""):
+        self.calls.append((file_id, file_name))
+        with open(file_name, "wb") as f:
+            f.write(b"data")
+        return file_name
+
+
+@pytest.mark.asyncio
+async def test_downloader_uses_ref_file_id(tmp_path):
+    client = RecordingClient()
+    downloader = MediaDownloader(client, temp_folder=str(tmp_path), retry_count=0, retry_delay=0)
+
+    group = [_message("photo", 30, media_group_id="g2"), _message("document", 31, media_group_id="g2")]
+    result = await downloader.download_media_batch({
+        "media_groups": [group],
+        "single_messages": [_message("text", 32)]
+    })
+
+    assert result["success"] == 2 and result["failed"] == 0
+    assert [file_id for file_id, _ in client.calls] == ["file_30", "file_31"]
+    files = {item["message_id"]: item for item in result["files"]}
+    assert files[30]["media_group_id"] == "g2"
+    assert files[31]["file_name"] == f"{CHAT_ID}_31_group_g2_report.pdf"
+    assert os.path.exists(files[31]["file_path"])
+
+    # 元数据按消息描述保存，文本消息也会记录
+    assert set(downloader.message_metadata) == {"30", "31", "32"}
+    assert downloader.message_metadata["31"]["file_name"] == "report.pdf"
+
+    # 已下载的文件直接复用，不再请求下载
+    again = await downloader._process_message_media(MessageRef.from_message(group[0]))
+    assert again["already_existed"] and len(client.calls) == 2
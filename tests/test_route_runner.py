@@ -0,0 +1,133 @@
+"""
+多路由运行器测试，使用 benchmarks 中的模拟Telegram后端，不依赖网络连接。
+"""
+
+import os
+import sys
+
+import pytest
+
+# 添加项目根目录到Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from benchmarks.fake_telegram import (
+    ChannelSpec, FakePyrogramClient, FakeTelegramBackend, NetworkProfile, use_fake_uploader_client
+)
+from tg_forwarder.client import TelegramClient
+from tg_forwarder.forward.forwarder import MessageForwarder
+from tg_forwarder.route_runner import RouteRunner
+from tg_forwarder.utils.channel_utils import ChannelUtils
+
+
+def _write_config(tmp_path, routes, delay=0.0):
+    path = tmp_path / "config.ini"
+    path.write_text(
+        "[API]\napi_id = 1\napi_hash = x\n\n"
+        f"[ROUTES]\n{routes}\n\n"
+        f"[FORWARD]\nstart_message_id = 1\nend_message_id = 0\nhide_author = true\ndelay = {delay}\n\n"
+        f"[DOWNLOAD]\ntemp_folder = {tmp_path / 'temp'}\nretry_count = 1\nretry_delay = 0\n\n"
+        "[UPLOAD]\nwait_between_messages = 0\n\n"
+        f"[CHECKPOINT]\npath = {tmp_path / 'checkpoints.json'}\n",
+        encoding="utf-8"
+    )
+    return str(path)
+
+
+def _create_runner(config_path, backend):
+    runner = RouteRunner(config_path)
+
+    async def fake_setup():
+        primary = runner.primary
+        primary.client = TelegramClient(primary.config.get_api_config())
+        primary.client.client = FakePyrogramClient(backend, "test")
+        primary.channel_utils = ChannelUtils(primary.client)
+        primary.forwarder = MessageForwarder(primary.client, primary.config.get_forward_config())
+        primary._apply_live_settings()
+        for section in primary.LIVE_SETTING_SECTIONS:
+            primary.config.add_observer(section, primary._apply_live_settings)
+
+    runner.primary.setup = fake_setup
+    return runner
+
+
+async def _shutdown(runner):
+    # 模拟客户端没有真实连接需要断开
+    runner.primary.client.client = None
+    await runner.shutdown()
+
+
+@pytest.fixture
+def backend():
+    backend = FakeTelegramBackend(NetworkProfile(rtt=0.001), seed=1)
+    backend.add_channel(ChannelSpec(chat_id=-1001, message_count=20, protected=False))
+    backend.add_channel(ChannelSpec(chat_id=-1002, message_count=10, protected=True, size_spec="fixed:1000"))
+    for target in (-2001, -2002, -2003):
+        backend.add_target(target)
+    return backend
+
+
+@pytest.mark.asyncio
+async def test_failing_route_does_not_affect_other_routes(tmp_path, backend):
+    config_path = _write_config(
+        tmp_path, "free = -1001 -> -2001, -2002\nprot = -1002 -> -2003\nbroken = -1009 -> -2001"
+    )
+    runner = _create_runner(config_path, backend)
+
+    with use_fake_uploader_client(backend):
+        await runner.setup()
+        assert set(runner.routes) == {"free", "prot", "broken"}
+
+        summary = await runner.run()
+        routes = summary["routes"]
+        assert not routes["broken"]["success_flag"]
+        assert routes["free"]["success_flag"] and routes["prot"]["success_flag"]
+        assert not summary["success_flag"]
+
+        assert len(backend.channel(-2001).entries) == 20
+        assert len(backend.channel(-2002).entries) == 20
+        # 受保护频道的媒体组合并为一条记录
+        protected_entries = len(backend.channel(-2003).entries)
+        assert protected_entries > 0
+
+        # 每条路由的检查点各自推进，再次运行不会重复转发
+        store = runner.primary.get_checkpoint_store()
+        assert store.get(-1001, -2001) == 20 and store.get(-1002, -2003) == 10
+        await runner.run()
+        assert len(backend.channel(-2001).entries) == 20
+        assert len(backend.channel(-2003).entries) == protected_entries
+
+        # 共享调度器为每条成功的路由放行
+        assert {"free", "prot"} <= set(summary["pacer"])
+
+        await _shutdown(runner)
+
+
+@pytest.mark.asyncio
+async def test_live_settings_reach_every_route(tmp_path, backend):
+    config_path = _write_config(tmp_path, "free = -1001 -> -2001\nprot = -1002 -> -2003")
+    runner = _create_runner(config_path, backend)
+
+    with use_fake_uploader_client(backend):
+        await runner.setup()
+        config = runner.config
+        config.config.set("FORWARD", "batch_size", "7")
+        config.config.set("FORWARD", "delay", "3")
+        for section in ("FORWARD", "ROUTE_RUNNER"):
+            for callback in list(config._observers.get(section, ())):
+                callback(section, {})
+
+        for manager in [runner.primary, *runner.routes.values()]:
+            assert manager.live_settings["batch_size"] == 7
+            assert manager.forwarder.batch_size == 7
+        # 路由的发送间隔由共享调度器控制
+        for manager in runner.routes.values():
+            assert manager.forwarder.delay == 0
+        assert runner.primary.forwarder.delay == 3
+
+        await _shutdown(runner)
+
+    for section in runner.primary.LIVE_SETTING_SECTIONS:
+        assert not config._observers.get(section)
@@ -0,0 +1,133 @@
+"""
+分片租约存储单元测试，使用临时文件，不依赖Telegram连接。
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# 添加项目根目录到Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from tg_forwarder.utils.shard_lease import ShardLeaseStore, PENDING, LEASED, DONE, FAILED
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ShardLeaseStore(str(tmp_path / "state" / "leases.json"))
+    assert store.prepare(-1, [-2], 1, 250, 100) == 3
+    return store
+
+
+def test_prepare_splits_range_and_keeps_existing_shards(store):
+    shards = store.snapshot()["shards"]
+    assert [(shard["start_id"], shard["end_id"]) for shard in shards] == [(1, 100), (101, 200), (201, 250)]
+
+    shard = store.claim("w1", 60)
+    assert store.complete(shard["id"], "w1", {"processed": 100})
+
+    # 结束ID变大时只追加新分片，已完成的分片保留
+    assert store.prepare(-1, [-2], 1, 320, 100) == 3
+    shards = store.snapshot()["shards"]
+    assert shards[0]["status"] == DONE
+    assert [(shard["start_id"], shard["end_id"]) for shard in shards[3:]] == [(251, 320)]
+
+    # 任务变化时重新划分
+    assert store.prepare(-1, [-3], 1, 100, 100) == 1
+
+
+def test_claim_and_renew(store):
+    first = store.claim("w1", 60)
+    second = store.claim("w2", 60)
+    assert (first["id"], second["id"]) == (0, 1)
+    assert first["status"] == LEASED and first["attempts"] == 1
+
+    assert store.renew(first["id"], "w1", 60, progress={"processed": 10})
+    assert store.snapshot()["shards"][0]["progress"] == {"processed": 10}
+    # 其他进程不能续约或完成不属于自己的分片
+    assert not store.renew(first["id"], "w2", 60)
+    assert not store.complete(first["id"], "w2", {})
+
+    assert store.complete(first["id"], "w1", {"processed": 100})
+    assert not store.renew(first["id"], "w1", 60)
+
+
+def test_expired_lease_is_reclaimed(store):
+    shard = store.claim("w1", 0.05)
+    store.claim("w1", 60)
+    store.claim("w1", 60)
+    assert store.claim("w2", 60) is None
+    assert not store.has_claimable()
+
+    time.sleep(0.1)
+    assert store.has_claimable()
+    reclaimed = store.claim("w2", 60)
+    assert reclaimed["id"] == shard["id"]
+    assert reclaimed["worker"] == "w2" and reclaimed["attempts"] == 2
+
+    # 原持有者续约失败，得知租约已失效
+    assert not store.renew(shard["id"], "w1", 60)
+    assert store.renew(shard["id"], "w2", 60)
+
+
+def test_release_counts_attempts(store):
+    for attempt in range(1, 3):
+        shard = store.claim("w1", 60)
+        assert shard["id"] == 0 and shard["attempts"] == attempt
+        store.release(shard["id"], "w1", "部分消息未送达", max_attempts=2)
+
+    shard = store.snapshot()["shards"][0]
+    assert shard["status"] == FAILED
+    assert shard["result"] == {"error": "部分消息未送达"}
+    assert store.has_unfinished()
+
+    # 重新运行时失败的分片重新计数
+    store.prepare(-1, [-2], 1, 250, 100)
+    shard = store.snapshot()["shards"][0]
+    assert shard["status"] == PENDING and shard["attempts"] == 0
+
+
+def test_release_worker_returns_leases(store):
+    store.claim("w1", 60)
+    store.claim("w2", 60)
+    store.claim("w1", 60)
+
+    assert store.release_worker("w1") == [0, 2]
+    statuses = [shard["status"] for shard in store.snapshot()["shards"]]
+    assert statuses == [PENDING, LEASED, PENDING]
+
+
+def test_concurrent_claims_get_distinct_shards(store):
+    claimed = []
+
+    def claim(worker):
+        shard = store.claim(worker, 60)
+        if shard is not None:
+            claimed.append(shard["id"])
+
+    threads = [threading.Thread(target=claim, args=(f"w{index}",)) for index in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(claimed) == [0, 1, 2]
+
+
+def test_lock_times_out_while_held(tmp_path):
+    path = str(tmp_path / "leases.json")
+    holder = ShardLeaseStore(path)
+    waiter = ShardLeaseStore(path, lock_timeout=0.1)
+
+    with holder._locked(save=False):
+        with pytest.raises(TimeoutError):
+            waiter.snapshot()
+    # 锁释放后可以继续使用，锁文件保留
+    assert waiter.snapshot()["shards"] == []
+    assert os.path.exists(f"{path}.lock")
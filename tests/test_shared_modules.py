@@ -0,0 +1,38 @@
+"""
+两个应用中重复实现的工具模块一致性检查。
+
+tg_forwarder 和 tg-app 各自配置 loguru 日志（tg_forwarder 的日志管理器在导入时
+会移除已有的日志输出），两个应用互不导入，性能工具模块在两处各保留一份。
+本测试确保两份实现除日志导入和应用名外完全相同。
+"""
+
+import os
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SHARED_MODULES = ("profiler", "loop_monitor", "file_watcher")
+
+# 允许两份实现不同的行：日志导入和应用名
+ALLOWED_DIFFERENCES = (
+    "from tg_forwarder.logModule.logger import get_logger",
+    "from utils.logger import get_logger",
+    "APP_NAME = ",
+)
+
+
+def _implementation(path):
+    """读取模块源码，去掉模块文档字符串和允许不同的行"""
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    # 模块文档字符串按各应用的风格编写，从第一条 import 开始比较
+    start = next(index for index, line in enumerate(lines) if line.startswith("import "))
+    return [line for line in lines[start:] if not line.startswith(ALLOWED_DIFFERENCES)]
+
+
+@pytest.mark.parametrize("name", SHARED_MODULES)
+def test_shared_module_copies_are_identical(name):
+    forwarder_copy = _implementation(os.path.join(ROOT_DIR, "tg_forwarder", "utils", f"{name}.py"))
+    app_copy = _implementation(os.path.join(ROOT_DIR, "tg-app", "utils", f"{name}.py"))
+    assert forwarder_copy == app_copy, f"tg_forwarder/utils/{name}.py 与 tg-app/utils/{name}.py 不一致"
@@ -0,0 +1,143 @@
+"""
+任务队列单元测试，覆盖运行中调整消费者数量。
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+# 添加项目根目录到Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from tg_forwarder.taskQueue import TaskQueue
+
+
+class GatedConsumer:
+    """处理任务时等待放行，记录同时处理的任务数"""
+
+    def __init__(self):
+        self.gate = asyncio.Event()
+        self.running = 0
+        self.peak = 0
+        self.done = []
+
+    async def __call__(self, item):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await self.gate.wait()
+            self.done.append(item)
+            return True
+        finally:
+            self.running -= 1
+
+
+async def _wait_for(condition, timeout=1.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "等待条件超时"
+        await asyncio.sleep(0.005)
+
+
+@pytest.mark.asyncio
+async def test_grow_while_tasks_in_flight():
+    queue = TaskQueue(max_queue_size=10, max_workers=1)
+    consumer = GatedConsumer()
+    finish = asyncio.Event()
+
+    async def producer():
+        for item in range(6):
+            await queue.put(item)
+        await finish.wait()
+
+    run = asyncio.create_task(queue.run(producer, consumer))
+    await _wait_for(lambda: consumer.running == 1)
+
+    queue.resize(3)
+    assert queue.live_workers == 3
+    await _wait_for(lambda: consumer.running == 3)
+
+    consumer.gate.set()
+    finish.set()
+    stats = await asyncio.wait_for(run, 2)
+    assert sorted(consumer.done) == list(range(6))
+    assert stats["completed"] == 6 and stats["max_workers"] == 3
+    assert consumer.peak == 3
+    assert queue.live_workers == 0
+
+
+@pytest.mark.asyncio
+async def test_shrink_cancels_idle_consumers_first():
+    queue = TaskQueue(max_queue_size=10, max_workers=4)
+    consumer = GatedConsumer()
+    more_items = asyncio.Event()
+
+    async def producer():
+        for item in range(2):
+            await queue.put(item)
+        await more_items.wait()
+        for item in range(2, 8):
+            await queue.put(item)
+
+    run = asyncio.create_task(queue.run(producer, consumer))
+    # 两个消费者在处理任务，另外两个空闲等待
+    await _wait_for(lambda: consumer.running == 2 and len(queue._idle_consumers) == 2)
+
+    queue.resize(1)
+    await _wait_for(lambda: queue.live_workers == 2)
+    assert consumer.running == 2
+    assert not queue._idle_consumers and not queue._retired_consumers
+
+    # 正在处理的任务不受影响，完成后多出的消费者退出
+    consumer.gate.set()
+    await _wait_for(lambda: queue.live_workers == 1)
+    more_items.set()
+    stats = await asyncio.wait_for(run, 2)
+
+    assert sorted(consumer.done) == list(range(8))
+    assert stats["completed"] == 8 and stats["failed"] == 0
+    assert consumer.running == 0 and queue.live_workers == 0
+
+
+@pytest.mark.asyncio
+async def test_resize_after_producer_finished_is_deferred():
+    queue = TaskQueue(max_queue_size=10, max_workers=1)
+    consumer = GatedConsumer()
+
+    async def producer():
+        for item in range(3):
+            await queue.put(item)
+
+    run = asyncio.create_task(queue.run(producer, consumer))
+    await _wait_for(lambda: consumer.running == 1 and queue._draining)
+
+    # 结束信号已按原消费者数量发出，不再启动新的消费者
+    queue.resize(3)
+    assert queue.live_workers == 1 and queue.max_workers == 3
+
+    consumer.gate.set()
+    stats = await asyncio.wait_for(run, 2)
+    assert stats["completed"] == 3 and consumer.peak == 1
+
+
+@pytest.mark.asyncio
+async def test_resize_before_run_sets_worker_count():
+    queue = TaskQueue(max_workers=2)
+    queue.resize(0)
+    assert queue.max_workers == 1 and queue.live_workers == 0
+
+    consumer = GatedConsumer()
+    consumer.gate.set()
+
+    async def producer():
+        for item in range(3):
+            await queue.put(item)
+
+    stats = await queue.run(producer, consumer)
+    assert stats["completed"] == 3
+    assert consumer.peak == 1
@@ -0,0 +1,83 @@
+"""
+上传消费者单元测试，使用模拟的重组器和上传器，不依赖Telegram连接。
+"""
+
+import os
+import sys
+from collections import defaultdict
+
+import pytest
+
+# 添加项目根目录到Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from tg_forwarder.manager import ForwardManager
+from tg_forwarder.utils.id_set import IdIntervalSet
+
+
+class FakeAssembler:
+    def assemble_batch(self, files):
+        return {"media_groups": [], "single_messages": files}
+
+
+class FakeUploader:
+    """每条消息发送到两个目标频道，-1002 没有收到 failed_ids 中的消息"""
+
+    def __init__(self, failed_ids):
+        self.failed_ids = failed_ids
+
+    async def upload_batch(self, assembled_data):
+        total = len(assembled_data["single_messages"])
+        return {
+            "total_messages": total,
+            "success_total": total - len(self.failed_ids),
+            "failed_total": len(self.failed_ids),
+            "failed_by_target": {"-1002": list(self.failed_ids)} if self.failed_ids else {}
+        }
+
+
+def _pipeline_control():
+    return {
+        "downloading_complete": False,
+        "processed_items": IdIntervalSet(),
+        "download_count": 1,
+        "upload_count": 0,
+        "failed_ids": set(),
+        "failed_by_target": defaultdict(set)
+    }
+
+
+@pytest.mark.asyncio
+async def test_partial_target_failure_marks_whole_batch_processed(tmp_path):
+    config_path = tmp_path / "config.ini"
+    config_path.write_text(
+        "[API]\napi_id = 1\napi_hash = x\n\n[CHANNELS]\nsource_channel = -1001\ntarget_channels = -1002, -1003\n",
+        encoding="utf-8"
+    )
+    manager = ForwardManager(str(config_path))
+
+    files = [{"message_id": message_id, "file_path": f"/tmp/{message_id}.jpg"} for message_id in (10, 11, 12)]
+    pipeline_control = _pipeline_control()
+    result = {"processed": 0, "success": 0, "failed": 0}
+
+    response = await manager._upload_consumer(
+        {"batch_id": "1", "download_result": {"files": files}},
+        FakeAssembler(), FakeUploader([12]), pipeline_control, result
+    )
+
+    assert response["batch_id"] == "1"
+    # 处理过的是整个批次，未送达的消息另外按目标频道记录
+    assert pipeline_control["processed_items"].intervals() == [[10, 12]]
+    assert pipeline_control["failed_by_target"] == {"-1002": {12}}
+    assert result == {"processed": 3, "success": 2, "failed": 1}
+    assert pipeline_control["upload_count"] == 1
+
+    # 同一批次再次出现时跳过
+    assert await manager._upload_consumer(
+        {"batch_id": "1", "download_result": {"files": files}},
+        FakeAssembler(), FakeUploader([]), pipeline_control, result
+    ) is True
+    assert pipeline_control["upload_count"] == 1
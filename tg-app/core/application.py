@@ -15,6 +15,7 @@ from typing import Dict, Any, Optional, List, Set, Callable
 from core.context import ApplicationContext
 from events.event_types import APP_ERROR, create_event_data
 from utils.logger import get_logger
+from utils.profiler import SamplingProfiler
 
 # 获取日志记录器
 logger = get_logger("application")
@@ -194,10 +195,13 @@ def create_application() -> Application:
     return Application()
 
 
-def run_application() -> int:
+def run_application(profiler: Optional[SamplingProfiler] = None) -> int:
     """
     运行应用程序，封装异步运行。
     
+    Args:
+        profiler: 可选的采样分析器，在事件循环创建后启动，应用退出时停止
+    
     Returns:
         int: 退出代码
     """
@@ -210,6 +214,8 @@ def run_application() -> int:
             asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
         
         loop = asyncio.get_event_loop()
+        if profiler:
+            profiler.start(loop)
         return loop.run_until_complete(app.run())
         
     except KeyboardInterrupt:
@@ -218,4 +224,8 @@ def run_application() -> int:
         
     except Exception as e:
         logger.error(f"运行应用程序时出现未捕获的异常: {str(e)}")
-        return 1 
\ No newline at end of file
+        return 1
+        
+    finally:
+        if profiler:
+            profiler.stop() 
\ No newline at end of file
@@ -8,16 +8,19 @@
 import os
 import json
 import time
+import asyncio
 import configparser
 import threading
 import shutil
 from pathlib import Path
-from typing import Dict, Any, Optional, Union, List, Callable, Set
+from types import MappingProxyType
+from typing import Dict, Any, Optional, Union, List, Callable, Set, Mapping, Iterable, Hashable
 from dataclasses import dataclass
 
 from core.event_bus import EventBus
-from events.event_types import CONFIG_LOADED, CONFIG_CHANGED, CONFIG_ERROR, create_event_data
+from events.event_types import CONFIG_LOADED, CONFIG_CHANGED, CONFIG_ERROR, CONFIG_GET_SECTION, create_event_data
 from utils.logger import get_logger
+from utils.file_watcher import FileWatcher
 
 # 获取日志记录器
 logger = get_logger("config_manager")
@@ -49,6 +52,126 @@ class ConfigValue:
         return self.value == self.default
 
 
+# 不存在的配置节返回的空映射
+_EMPTY_SECTION: Mapping[str, Any] = MappingProxyType({})
+
+
+class ConfigSnapshot:
+    """
+    配置的不可变快照。
+    
+    配置变更时生成新快照并整体替换引用，读取方拿到的快照不会再变化，无需加锁；
+    未变化的配置节在新旧快照之间共享。version 在每次变更后加一，热点代码可以
+    用 derive 缓存由配置计算出的值，缓存随快照一起失效。
+    """
+    
+    __slots__ = ("version", "_sections", "_derived")
+    
+    def __init__(self, version: int, sections: Dict[str, Mapping[str, Any]]):
+        """
+        初始化配置快照。
+        
+        Args:
+            version: 配置版本号
+            sections: {配置节: 只读的键值映射}
+        """
+        self.version = version
+        self._sections = sections
+        self._derived: Dict[Hashable, Any] = {}
+    
+    def get(self, section: str, key: str, default: Any = None) -> Any:
+        """
+        获取配置值。
+        
+        Args:
+            section: 配置节
+            key: 配置键
+            default: 默认值
+            
+        Returns:
+            Any: 配置值，如果不存在则返回默认值
+        """
+        values = self._sections.get(section)
+        if values is None:
+            return default
+        return values.get(key, default)
+    
+    def section(self, section: str) -> Mapping[str, Any]:
+        """
+        获取配置节的只读映射，不复制。
+        
+        Args:
+            section: 配置节
+            
+        Returns:
+            Mapping[str, Any]: 只读的键值映射，配置节不存在时为空映射
+        """
+        return self._sections.get(section, _EMPTY_SECTION)
+    
+    def sections(self) -> List[str]:
+        """
+        获取所有配置节名称。
+        
+        Returns:
+            List[str]: 配置节名称列表
+        """
+        return list(self._sections)
+    
+    def derive(self, key: Hashable, compute: Callable[["ConfigSnapshot"], Any]) -> Any:
+        """
+        获取由配置计算出的值，每个快照只计算一次。
+        
+        Args:
+            key: 缓存键
+            compute: 计算函数，接收当前快照
+            
+        Returns:
+            Any: 计算结果
+        """
+        try:
+            return self._derived[key]
+        except KeyError:
+            value = self._derived[key] = compute(self)
+            return value
+    
+    def changes_since(self, older: "ConfigSnapshot") -> Dict[str, Dict[str, Any]]:
+        """
+        计算相对于旧快照发生变化的配置项，包括新增、修改和删除的键。
+        
+        Args:
+            older: 旧快照
+            
+        Returns:
+            Dict[str, Dict[str, Any]]: {配置节: {变化的键: 新值}}，删除的键（包括
+                被删除的配置节中的所有键）新值为None
+        """
+        changes = {}
+        removed_sections = [section for section in older._sections if section not in self._sections]
+        for section in [*self._sections, *removed_sections]:
+            values = self.section(section)
+            old_values = older.section(section)
+            # 未变化的配置节在快照之间共享，直接跳过
+            if values is old_values:
+                continue
+            changed = {
+                key: value for key, value in values.items()
+                if key not in old_values or old_values[key] != value
+            }
+            changed.update((key, None) for key in old_values if key not in values)
+            if changed:
+                changes[section] = changed
+        return changes
+    
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        """
+        转换为可修改的普通字典。
+        
+        Returns:
+            Dict[str, Dict[str, Any]]: 所有配置节和键值对的副本
+        """
+        return {section: dict(values) for section, values in self._sections.items()}
+
+
 class ConfigManager:
     """
     配置管理器，负责读取、保存和更新应用配置。
@@ -72,13 +195,21 @@ class ConfigManager:
         # 已注册的配置文件
         self._config_files: Dict[str, Path] = {}
         
-        # 配置文件监视线程
-        self._watch_thread: Optional[threading.Thread] = None
-        self._watch_stop_event = threading.Event()
+        # 各配置文件提供的配置项 {config_id: {section: set(key)}}，重新加载时据此删除文件中已移除的项
+        self._file_keys: Dict[str, Dict[str, Set[str]]] = {}
+        
+        # 配置文件监视器，在事件循环中运行
+        self._watcher: Optional[FileWatcher] = None
         
         # 配置观察者 {section: set(回调函数)}
         self._observers: Dict[str, Set[Callable[[str, Dict[str, Any]], None]]] = {}
         
+        # 当前配置快照，写入时整体替换，读取无需加锁
+        self._snapshot = ConfigSnapshot(0, {})
+        
+        # 插件通过 CONFIG_GET_SECTION 请求读取配置节
+        self._event_bus.register_rpc(CONFIG_GET_SECTION, self._handle_get_section)
+        
         logger.info("配置管理器已初始化")
     
     def load_default_config(self) -> bool:
@@ -148,12 +279,7 @@ class ConfigManager:
                 self._config_files[config_id] = config_path
                 
                 # 根据格式加载配置
-                if file_format == "ini":
-                    self._load_ini_config(config_path, config_id == "default")
-                elif file_format == "json":
-                    self._load_json_config(config_path, config_id == "default")
-                elif file_format == "yaml":
-                    self._load_yaml_config(config_path, config_id == "default")
+                self._read_config_file(config_path, file_format, config_id)
             
             # 发布配置加载事件
             self._publish_config_loaded(config_id)
@@ -168,6 +294,61 @@ class ConfigManager:
             self._publish_config_error(f"加载配置文件时出错: {str(e)}")
             return False
     
+    def _read_config_file(self, config_path: Path, file_format: str, config_id: str) -> None:
+        """
+        读取配置文件并生成新快照，调用方需持有 _config_lock。
+        
+        上次读取时文件中有、这次没有的配置项被删除，默认配置中有该项时恢复为默认值。
+        
+        Args:
+            config_path: 配置文件路径
+            file_format: 配置文件格式
+            config_id: 配置文件标识符
+        """
+        is_default = config_id == "default"
+        if file_format == "ini":
+            loaded = self._load_ini_config(config_path, is_default)
+        elif file_format == "json":
+            loaded = self._load_json_config(config_path, is_default)
+        elif file_format == "yaml":
+            loaded = self._load_yaml_config(config_path, is_default)
+        else:
+            loaded = {}
+        
+        previous = self._file_keys.get(config_id, {})
+        self._file_keys[config_id] = loaded
+        for section, keys in previous.items():
+            for key in keys - loaded.get(section, set()):
+                self._remove_file_key(config_id, section, key)
+        
+        self._commit_snapshot()
+    
+    def _remove_file_key(self, config_id: str, section: str, key: str) -> None:
+        """
+        处理从配置文件中移除的配置项，调用方需持有 _config_lock。
+        
+        Args:
+            config_id: 移除了该项的配置文件标识符
+            section: 配置节
+            key: 配置键
+        """
+        items = self._config_data.get(section)
+        if items is None or key not in items:
+            return
+        
+        providers = [
+            other_id for other_id, file_keys in self._file_keys.items()
+            if other_id != config_id and key in file_keys.get(section, ())
+        ]
+        if "default" in providers:
+            # 用户配置中删除的项恢复为默认值
+            items[key].value = items[key].default
+            items[key].last_modified = time.time()
+        elif not providers:
+            del items[key]
+            if not items:
+                del self._config_data[section]
+    
     def save_config(self, config_id: str = "user") -> bool:
         """
         保存配置到文件。
@@ -210,7 +391,7 @@ class ConfigManager:
     
     def get(self, section: str, key: str, default: Any = None) -> Any:
         """
-        获取配置值。
+        获取配置值，从当前快照读取，不加锁。
         
         Args:
             section: 配置节
@@ -220,33 +401,21 @@ class ConfigManager:
         Returns:
             Any: 配置值，如果不存在则返回默认值
         """
-        with self._config_lock:
-            if section not in self._config_data:
-                return default
-            
-            if key not in self._config_data[section]:
-                return default
-            
-            return self._config_data[section][key].value
+        return self._snapshot.get(section, key, default)
     
     def get_section(self, section: str) -> Dict[str, Any]:
         """
         获取配置节的所有键值对。
         
+        返回可修改的副本；只读访问请使用 snapshot().section(section)，不复制。
+        
         Args:
             section: 配置节
             
         Returns:
             Dict[str, Any]: 配置节的键值对
         """
-        with self._config_lock:
-            if section not in self._config_data:
-                return {}
-            
-            return {
-                key: value.value
-                for key, value in self._config_data[section].items()
-            }
+        return dict(self._snapshot.section(section))
     
     def get_all(self) -> Dict[str, Dict[str, Any]]:
         """
@@ -255,11 +424,65 @@ class ConfigManager:
         Returns:
             Dict[str, Dict[str, Any]]: 所有配置节和键值对
         """
-        with self._config_lock:
-            return {
-                section: {key: value.value for key, value in items.items()}
-                for section, items in self._config_data.items()
-            }
+        return self._snapshot.to_dict()
+    
+    def snapshot(self) -> ConfigSnapshot:
+        """
+        获取当前配置快照。
+        
+        快照不可变，可以在不加锁的情况下任意读取；配置变更后需要重新获取。
+        
+        Returns:
+            ConfigSnapshot: 当前配置快照
+        """
+        return self._snapshot
+    
+    @property
+    def version(self) -> int:
+        """当前配置版本号，每次配置变更后加一"""
+        return self._snapshot.version
+    
+    def _commit_snapshot(self, sections: Optional[Iterable[str]] = None) -> bool:
+        """
+        根据配置数据生成新快照并替换当前快照，调用方需持有 _config_lock。
+        
+        内容与当前快照相同的配置节沿用原来的映射，全部相同时不生成新快照，
+        版本号不变。
+        
+        Args:
+            sections: 发生变化的配置节，None表示全部重建
+            
+        Returns:
+            bool: 是否生成了新快照
+        """
+        current = self._snapshot
+        if sections is None:
+            new_sections: Dict[str, Mapping[str, Any]] = {}
+            sections = self._config_data.keys()
+        else:
+            new_sections = dict(current._sections)
+        
+        changed = False
+        for section in sections:
+            items = self._config_data.get(section)
+            if items is None:
+                changed |= new_sections.pop(section, None) is not None
+                continue
+            
+            values = {key: value.value for key, value in items.items()}
+            old_values = current._sections.get(section)
+            if old_values is not None and old_values == values:
+                new_sections[section] = old_values
+            else:
+                new_sections[section] = MappingProxyType(values)
+                changed = True
+        
+        if not changed and new_sections.keys() == current._sections.keys():
+            return False
+        
+        # 引用赋值是原子的，读取方要么看到旧快照，要么看到新快照
+        self._snapshot = ConfigSnapshot(current.version + 1, new_sections)
+        return True
     
     def set(self, section: str, key: str, value: Any, description: str = "") -> bool:
         """
@@ -303,6 +526,8 @@ class ConfigManager:
                     description=description,
                     last_modified=time.time()
                 )
+            
+            self._commit_snapshot((section,))
         
         # 发布配置变更事件
         if old_value != value:
@@ -357,6 +582,9 @@ class ConfigManager:
                 # 记录变更的键
                 if old_value != value:
                     changed_keys[key] = value
+            
+            if changed_keys:
+                self._commit_snapshot((section,))
         
         # 如果有变更，通知观察者并发布事件
         if changed_keys:
@@ -393,6 +621,7 @@ class ConfigManager:
             # 重置为默认值
             config_value.value = config_value.default
             config_value.last_modified = time.time()
+            self._commit_snapshot((section,))
         
         # 发布配置变更事件
         self._notify_observers(section, {key: config_value.default})
@@ -423,6 +652,9 @@ class ConfigManager:
                     config_value.value = config_value.default
                     config_value.last_modified = time.time()
                     changed_keys[key] = config_value.default
+            
+            if changed_keys:
+                self._commit_snapshot((section,))
         
         # 如果有变更，通知观察者并发布事件
         if changed_keys:
@@ -505,22 +737,27 @@ class ConfigManager:
         suffix = config_path.suffix.lower()
         return CONFIG_FORMATS.get(suffix)
     
-    def _load_ini_config(self, config_path: Path, is_default: bool) -> None:
+    def _load_ini_config(self, config_path: Path, is_default: bool) -> Dict[str, Set[str]]:
         """
         加载INI格式的配置文件。
         
         Args:
             config_path: 配置文件路径
             is_default: 是否为默认配置
+            
+        Returns:
+            Dict[str, Set[str]]: 文件中的配置项 {section: set(key)}
         """
         parser = configparser.ConfigParser()
         parser.read(config_path, encoding="utf-8")
+        loaded: Dict[str, Set[str]] = {}
         
         # 处理所有节
         for section in parser.sections():
             # 确保配置节存在
             if section not in self._config_data:
                 self._config_data[section] = {}
+            loaded[section] = set(parser[section].keys())
             
             # 读取节中的所有配置项
             for key, value in parser[section].items():
@@ -545,17 +782,23 @@ class ConfigManager:
                 elif not is_default:
                     self._config_data[section][key].value = typed_value
                     self._config_data[section][key].last_modified = time.time()
+        
+        return loaded
     
-    def _load_json_config(self, config_path: Path, is_default: bool) -> None:
+    def _load_json_config(self, config_path: Path, is_default: bool) -> Dict[str, Set[str]]:
         """
         加载JSON格式的配置文件。
         
         Args:
             config_path: 配置文件路径
             is_default: 是否为默认配置
+            
+        Returns:
+            Dict[str, Set[str]]: 文件中的配置项 {section: set(key)}
         """
         with open(config_path, "r", encoding="utf-8") as f:
             data = json.load(f)
+        loaded: Dict[str, Set[str]] = {}
         
         # 处理所有节
         for section, section_data in data.items():
@@ -565,6 +808,7 @@ class ConfigManager:
             
             # 读取节中的所有配置项
             if isinstance(section_data, dict):
+                loaded[section] = set(section_data)
                 for key, value in section_data.items():
                     # 如果是默认配置或配置项不存在，则创建新配置项
                     if is_default or key not in self._config_data[section]:
@@ -584,15 +828,21 @@ class ConfigManager:
                     elif not is_default:
                         self._config_data[section][key].value = value
                         self._config_data[section][key].last_modified = time.time()
+        
+        return loaded
     
-    def _load_yaml_config(self, config_path: Path, is_default: bool) -> None:
+    def _load_yaml_config(self, config_path: Path, is_default: bool) -> Dict[str, Set[str]]:
         """
         加载YAML格式的配置文件。
         
         Args:
             config_path: 配置文件路径
             is_default: 是否为默认配置
+            
+        Returns:
+            Dict[str, Set[str]]: 文件中的配置项 {section: set(key)}
         """
+        loaded: Dict[str, Set[str]] = {}
         try:
             import yaml
             with open(config_path, "r", encoding="utf-8") as f:
@@ -606,6 +856,7 @@ class ConfigManager:
                 
                 # 读取节中的所有配置项
                 if isinstance(section_data, dict):
+                    loaded[section] = set(section_data)
                     for key, value in section_data.items():
                         # 如果是默认配置或配置项不存在，则创建新配置项
                         if is_default or key not in self._config_data[section]:
@@ -629,6 +880,8 @@ class ConfigManager:
         except ImportError:
             logger.error("加载YAML配置失败: 缺少PyYAML库，请安装 pip install pyyaml")
             raise
+        
+        return loaded
     
     def _save_ini_config(self, config_path: Path) -> None:
         """
@@ -797,66 +1050,89 @@ class ConfigManager:
         return value
     
     def _start_config_watch(self) -> None:
-        """启动配置文件监视线程"""
-        if self._watch_thread and self._watch_thread.is_alive():
+        """
+        在当前事件循环中启动配置文件监视。
+        
+        Linux 上使用 inotify，修改在毫秒级生效；其他平台退回到定时检查。
+        不在事件循环中调用时不启动监视。
+        """
+        with self._config_lock:
+            files = list(self._config_files.values())
+        
+        if self._watcher is not None:
+            self._watcher.add_files(files)
             return
         
-        # 重置停止事件
-        self._watch_stop_event.clear()
+        if not self.get("monitor", "config_watch", True):
+            return
         
-        # 创建监视线程
-        self._watch_thread = threading.Thread(
-            target=self._watch_config_files,
-            daemon=True,
-            name="ConfigWatchThread"
-        )
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            logger.debug("不在事件循环中，不启动配置文件监视")
+            return
         
-        # 启动线程
-        self._watch_thread.start()
+        self._watcher = FileWatcher(
+            self._on_config_files_changed,
+            debounce=float(self.get("monitor", "config_watch_debounce", 0.05)),
+            poll_interval=float(self.get("monitor", "config_poll_interval", 1.0))
+        )
+        self._watcher.start(files)
+        logger.debug(f"配置文件监视已启动: 方式={self._watcher.mode}")
     
-    def _watch_config_files(self) -> None:
-        """监视配置文件变更"""
-        logger.debug("启动配置文件监视线程")
-        
-        # 记录文件的最后修改时间 {config_id: (文件路径, 最后修改时间)}
-        last_modified: Dict[str, Tuple[Path, float]] = {}
+    def _on_config_files_changed(self, paths: Set[Path]) -> None:
+        """
+        配置文件变更回调，按注册顺序重新加载变更的文件。
         
+        Args:
+            paths: 发生变更的文件路径
+        """
         with self._config_lock:
-            for config_id, path in self._config_files.items():
-                if path.exists():
-                    last_modified[config_id] = (path, path.stat().st_mtime)
+            changed_ids = [
+                config_id for config_id, path in self._config_files.items()
+                if path.absolute() in paths
+            ]
         
-        # 监视循环
-        while not self._watch_stop_event.is_set():
-            reload_needed = []
-            
-            # 检查所有配置文件
+        for config_id in changed_ids:
+            self._reload_config(config_id)
+    
+    def _reload_config(self, config_id: str) -> None:
+        """
+        重新加载配置文件，只通知实际变化的配置项。
+        
+        Args:
+            config_id: 配置文件标识符
+        """
+        config_path = self._config_files[config_id]
+        file_format = self._get_config_format(config_path)
+        logger.info(f"检测到配置文件变更: {config_path}")
+        
+        try:
             with self._config_lock:
-                for config_id, path in self._config_files.items():
-                    if path.exists() and config_id in last_modified:
-                        current_mtime = path.stat().st_mtime
-                        if current_mtime > last_modified[config_id][1]:
-                            logger.info(f"检测到配置文件变更: {path}")
-                            reload_needed.append(config_id)
-                            last_modified[config_id] = (path, current_mtime)
-            
-            # 重新加载变更的配置
-            for config_id in reload_needed:
-                path = self._config_files[config_id]
-                try:
-                    self.load_config(path, config_id)
-                except Exception as e:
-                    logger.error(f"重新加载配置文件时出错: {str(e)}")
-            
-            # 等待一段时间
-            self._watch_stop_event.wait(5.0)
+                previous = self._snapshot
+                self._read_config_file(config_path, file_format, config_id)
+                current = self._snapshot
+        except Exception as e:
+            logger.error(f"重新加载配置文件时出错: {str(e)}")
+            self._publish_config_error(f"重新加载配置文件时出错: {str(e)}")
+            return
+        
+        changes = current.changes_since(previous)
+        if not changes:
+            logger.debug(f"配置文件内容未变化: {config_path}")
+            return
+        
+        for section, changed in changes.items():
+            logger.info(f"配置节 [{section}] 已更新: {', '.join(changed)}")
+            self._notify_observers(section, changed)
+            self._publish_config_section_changed(section, changed)
     
     def stop_config_watch(self) -> None:
-        """停止配置文件监视线程"""
-        if self._watch_thread and self._watch_thread.is_alive():
-            logger.debug("停止配置文件监视线程")
-            self._watch_stop_event.set()
-            self._watch_thread.join(timeout=1.0)
+        """停止配置文件监视"""
+        if self._watcher is not None:
+            logger.debug("停止配置文件监视")
+            self._watcher.stop()
+            self._watcher = None
     
     def _publish_config_loaded(self, config_id: str) -> None:
         """
@@ -910,6 +1186,21 @@ class ConfigManager:
             # 不在事件循环中，记录日志但不发布事件
             logger.debug(f"配置变更事件无法发布: {event_data}")
     
+    async def _handle_get_section(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        处理 CONFIG_GET_SECTION 请求。
+        
+        Args:
+            data: 事件数据，包含 section
+            
+        Returns:
+            Dict[str, Any]: 包含配置节副本的响应
+        """
+        section = data.get("section")
+        if not section:
+            return {"success": False, "error": "未提供配置节名称"}
+        return {"success": True, "section": section, "data": self.get_section(section)}
+    
     def _publish_config_section_changed(
         self, 
         section: str, 
@@ -16,10 +16,11 @@ from core.config_manager import ConfigManager
 from core.plugin_manager import PluginManager
 from plugins.base import PluginBase
 from events.event_types import (
-    APP_INIT, APP_READY, APP_SHUTDOWN, APP_ERROR,
+    APP_INIT, APP_READY, APP_SHUTDOWN, APP_ERROR, APP_LOOP_STALL,
     create_event_data
 )
 from utils.logger import get_logger, setup_logger
+from utils.loop_monitor import LoopLagMonitor
 
 
 # 获取日志记录器
@@ -70,6 +71,7 @@ class ApplicationContext:
         self.event_bus: Optional[EventBus] = None
         self.config_manager: Optional[ConfigManager] = None
         self.plugin_manager: Optional[PluginManager] = None
+        self.loop_monitor: Optional[LoopLagMonitor] = None
         
         # 应用数据目录
         self.app_dir = Path.cwd()
@@ -145,8 +147,24 @@ class ApplicationContext:
             self.debug = self.config_manager.get("app", "debug", False)
             logger.debug(f"调试模式: {'开启' if self.debug else '关闭'}")
             
-            # 初始化插件管理器
-            self.plugin_manager = PluginManager(self.event_bus)
+            # 启动事件循环阻塞监控
+            if self.config_manager.get("monitor", "loop_monitor", True):
+                self.loop_monitor = LoopLagMonitor(
+                    threshold=float(self.config_manager.get("monitor", "loop_lag_threshold", 0.5)),
+                    interval=float(self.config_manager.get("monitor", "loop_lag_interval", 0.1))
+                )
+                self.loop_monitor.add_callback(self._publish_loop_stall)
+                await self.loop_monitor.start()
+            
+            # 初始化插件管理器，CPU密集型插件可以配置为在独立进程中运行，
+            # 插件发现结果缓存在数据目录的清单中，只有启用的插件会被导入
+            self.plugin_manager = PluginManager(
+                self.event_bus,
+                process_plugins=self._get_list("plugins", "process_plugins"),
+                enabled_plugins=self._get_list("plugins", "enabled"),
+                disabled_plugins=self._get_list("plugins", "disabled"),
+                manifest_path=self.data_dir / "plugin_manifest.json"
+            )
             logger.debug("插件管理器已初始化")
             
             # 发现可用插件
@@ -167,6 +185,22 @@ class ApplicationContext:
                 
             return False
     
+    def _get_list(self, section: str, key: str) -> List[str]:
+        """
+        读取以逗号分隔的列表配置项。
+        
+        Args:
+            section: 配置节
+            key: 配置键
+            
+        Returns:
+            List[str]: 去除空白后的非空项
+        """
+        value = self.config_manager.get(section, key, "")
+        if isinstance(value, str):
+            return [item.strip() for item in value.split(",") if item.strip()]
+        return list(value or [])
+    
     async def start(self) -> bool:
         """
         启动应用。
@@ -241,6 +275,11 @@ class ApplicationContext:
                 # 停止配置监视
                 self.config_manager.stop_config_watch()
             
+            # 停止事件循环阻塞监控
+            if self.loop_monitor:
+                await self.loop_monitor.stop()
+                self.loop_monitor = None
+            
             self.is_initialized = False
             logger.info("应用已关闭")
             return True
@@ -255,6 +294,16 @@ class ApplicationContext:
                 
             return False
     
+    async def _publish_loop_stall(self, report: Dict[str, Any]) -> None:
+        """
+        将事件循环阻塞报告发布到事件总线。
+        
+        Args:
+            report: 阻塞报告，包含延迟、阻塞位置和调用栈
+        """
+        if self.event_bus:
+            await self.event_bus.publish(APP_LOOP_STALL, create_event_data(APP_LOOP_STALL, **report))
+    
     def get_plugin(self, plugin_id: str) -> Optional[PluginBase]:
         """
         获取指定ID的插件实例。
@@ -0,0 +1,801 @@
+"""
+事件总线进程桥接模块。
+
+本模块让插件运行在独立的工作进程中。工作进程中的插件使用 WorkerEventBus，
+它在本地分发事件的同时，把订阅、请求处理器绑定、发布和请求通过 multiprocessing
+管道转发给主进程的事件总线；主进程中的 PluginProcess 把这些订阅映射为本地订阅，
+事件发布时再转发回工作进程。
+
+消息是以整数开头的短元组，使用 pickle 最高协议编码，由管道负责分帧。插件中的
+CPU密集型工作（JSON编码、哈希计算、元数据提取）因此不会阻塞主进程的事件循环，
+多个插件也可以使用多个CPU核心。跨进程传递的事件数据必须可以序列化，Pyrogram
+客户端这类进程内对象无法传递，依赖它们的插件需要在工作进程中自行创建。
+"""
+
+import os
+import pickle
+import signal
+import asyncio
+import importlib
+import itertools
+import threading
+import multiprocessing
+from multiprocessing.connection import Connection
+from typing import Dict, Any, Optional, Callable, Set, Tuple, Type
+
+from core.event_bus import EventBus, EventHandler, is_pattern, pattern_matches
+from plugins.base import PluginBase
+from utils.logger import get_logger, get_logger_config, setup_logger
+
+# 获取日志记录器
+logger = get_logger("event_bridge")
+
+# 消息类型，每条消息是以消息类型开头的元组
+MSG_READY = 0            # (MSG_READY, 插件元数据)
+MSG_FAILED = 1           # (MSG_FAILED, 错误信息)
+MSG_SUBSCRIBE = 2        # (MSG_SUBSCRIBE, 订阅键)
+MSG_UNSUBSCRIBE = 3      # (MSG_UNSUBSCRIBE, 订阅键)
+MSG_REGISTER_RPC = 4     # (MSG_REGISTER_RPC, 事件类型)
+MSG_UNREGISTER_RPC = 5   # (MSG_UNREGISTER_RPC, 事件类型)
+MSG_EVENT = 6            # (MSG_EVENT, 事件类型或订阅键, 事件数据)
+MSG_CALL = 7             # (MSG_CALL, 请求编号, 事件类型, 事件数据, 超时)
+MSG_REPLY = 8            # (MSG_REPLY, 请求编号, 响应)
+MSG_STOP = 9             # (MSG_STOP,)
+MSG_MAIN_KEYS = 10       # (MSG_MAIN_KEYS, 主进程中其他订阅者的订阅键元组)
+
+# 序列化协议
+PICKLE_PROTOCOL = pickle.HIGHEST_PROTOCOL
+
+# 工作进程使用 spawn 启动，避免在已有事件循环和线程的进程中 fork
+MP_CONTEXT = multiprocessing.get_context("spawn")
+
+
+def _spawn(tasks: Set[asyncio.Task], coroutine: Any) -> None:
+    """
+    启动处理消息的任务，在任务完成前保留引用，避免任务在执行中被回收
+
+    Args:
+        tasks: 保存任务的集合
+        coroutine: 协程
+    """
+    task = asyncio.create_task(coroutine)
+    tasks.add(task)
+    task.add_done_callback(tasks.discard)
+
+
+async def _cancel_tasks(tasks: Set[asyncio.Task]) -> None:
+    """
+    取消并等待集合中的任务
+
+    Args:
+        tasks: 保存任务的集合
+    """
+    pending = list(tasks)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+
+
+class _Channel:
+    """
+    管道的一端。
+
+    发送在事件循环线程中完成；后台线程阻塞接收并解码消息，再交给事件循环处理，
+    双方都持续接收，因此即使两端同时发送大量消息也不会互相阻塞。
+    """
+
+    def __init__(
+        self,
+        conn: Connection,
+        loop: asyncio.AbstractEventLoop,
+        on_message: Callable[[Tuple[Any, ...]], None],
+        on_closed: Callable[[], None],
+        name: str
+    ):
+        """
+        初始化管道端点
+
+        Args:
+            conn: 管道连接
+            loop: 处理消息的事件循环
+            on_message: 消息回调，在事件循环线程中调用
+            on_closed: 对端关闭时的回调，在事件循环线程中调用
+            name: 接收线程名称
+        """
+        self._conn = conn
+        self._loop = loop
+        self._on_message = on_message
+        self._on_closed = on_closed
+        self._thread = threading.Thread(target=self._receive, name=name, daemon=True)
+
+        # 统计：发送与接收的消息数和字节数
+        self.stats = {"sent": 0, "sent_bytes": 0, "received": 0, "received_bytes": 0, "dropped": 0}
+
+    def start(self) -> None:
+        """启动接收线程"""
+        self._thread.start()
+
+    def send(self, message: Tuple[Any, ...]) -> bool:
+        """
+        发送消息
+
+        Args:
+            message: 消息元组
+
+        Returns:
+            bool: 是否发送成功，数据无法序列化或管道已关闭时返回False
+        """
+        try:
+            payload = pickle.dumps(message, PICKLE_PROTOCOL)
+        except Exception as e:
+            self.stats["dropped"] += 1
+            logger.warning(f"消息无法序列化，已丢弃: 类型 {message[0]}，{str(e)}")
+            return False
+
+        try:
+            self._conn.send_bytes(payload)
+        except (OSError, ValueError) as e:
+            self.stats["dropped"] += 1
+            logger.debug(f"管道已关闭，消息未发送: 类型 {message[0]}，{str(e)}")
+            return False
+
+        self.stats["sent"] += 1
+        self.stats["sent_bytes"] += len(payload)
+        return True
+
+    def _receive(self) -> None:
+        """接收线程主循环"""
+        while True:
+            try:
+                payload = self._conn.recv_bytes()
+            except (EOFError, OSError):
+                break
+
+            try:
+                message = pickle.loads(payload)
+            except Exception as e:
+                logger.error(f"解码消息失败: {str(e)}")
+                continue
+
+            self.stats["received"] += 1
+            self.stats["received_bytes"] += len(payload)
+            try:
+                self._loop.call_soon_threadsafe(self._on_message, message)
+            except RuntimeError:
+                # 事件循环已关闭
+                return
+
+        try:
+            self._loop.call_soon_threadsafe(self._on_closed)
+        except RuntimeError:
+            pass
+
+    def close(self) -> None:
+        """关闭管道"""
+        try:
+            self._conn.close()
+        except OSError:
+            pass
+
+
+class PluginProcess:
+    """
+    主进程中的插件工作进程句柄。
+
+    负责启动工作进程，把工作进程的订阅和请求处理器绑定映射到主进程的事件总线上，
+    转发双方发布的事件和请求。
+    """
+
+    def __init__(self, event_bus: EventBus, plugin_id: str, module_path: str, class_name: str,
+                 start_timeout: float = 60.0):
+        """
+        初始化插件工作进程句柄
+
+        Args:
+            event_bus: 主进程事件总线
+            plugin_id: 插件ID
+            module_path: 插件类所在模块
+            class_name: 插件类名
+            start_timeout: 等待工作进程中插件初始化完成的超时时间（秒）
+        """
+        self._event_bus = event_bus
+        self.plugin_id = plugin_id
+        self.module_path = module_path
+        self.class_name = class_name
+        self.start_timeout = start_timeout
+
+        self.process: Optional[multiprocessing.Process] = None
+        self.metadata: Dict[str, Any] = {}
+
+        self._channel: Optional[_Channel] = None
+        self._ready: Optional[asyncio.Future] = None
+        self._stopping = False
+
+        # 工作进程的订阅 {订阅键: 主进程中的处理器ID}
+        self._subscriptions: Dict[str, str] = {}
+
+        # 工作进程绑定的请求处理器 {事件类型: 主进程中的代理处理器}
+        self._rpc_proxies: Dict[str, EventHandler] = {}
+
+        # 等待工作进程响应的请求 {请求编号: Future}
+        self._calls: Dict[int, asyncio.Future] = {}
+        self._call_ids = itertools.count(1)
+
+        # 正在主进程中发布的、来自工作进程的事件数据的 id，转发时不回送给工作进程
+        self._inbound: Set[int] = set()
+
+        # 已同步给工作进程的主进程订阅键
+        self._main_keys: Optional[Set[str]] = None
+
+        # 正在处理工作进程消息的任务，保留引用直到完成
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def alive(self) -> bool:
+        """工作进程是否在运行"""
+        return self.process is not None and self.process.is_alive()
+
+    @property
+    def pid(self) -> Optional[int]:
+        """工作进程ID"""
+        return self.process.pid if self.process else None
+
+    def _worker_log_config(self) -> Dict[str, Any]:
+        """工作进程使用与主进程相同的日志配置，但写入单独的日志文件"""
+        config = get_logger_config()
+        for key in ("file_path", "errors_file"):
+            if config.get(key):
+                root, ext = os.path.splitext(config[key])
+                config[key] = f"{root}.{self.plugin_id}{ext}"
+        return config
+
+    async def start(self) -> Dict[str, Any]:
+        """
+        启动工作进程并等待插件初始化完成
+
+        Returns:
+            Dict[str, Any]: 工作进程中插件的元数据
+
+        Raises:
+            RuntimeError: 插件初始化失败或超时
+        """
+        loop = asyncio.get_running_loop()
+        parent_conn, child_conn = MP_CONTEXT.Pipe(duplex=True)
+
+        self._stopping = False
+        self._ready = loop.create_future()
+        self._channel = _Channel(parent_conn, loop, self._on_message, self._on_closed,
+                                 f"plugin-bridge-{self.plugin_id}")
+        self.process = MP_CONTEXT.Process(
+            target=run_plugin_worker,
+            args=(child_conn, self.module_path, self.class_name, self._worker_log_config()),
+            name=f"plugin-{self.plugin_id}",
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self._channel.start()
+
+        # 工作进程只转发主进程有人订阅的事件
+        self._main_keys = None
+        self._event_bus.add_subscription_listener(self._sync_main_keys)
+        self._sync_main_keys()
+        logger.info(f"已启动插件工作进程: {self.plugin_id}，PID {self.process.pid}")
+
+        try:
+            self.metadata = await asyncio.wait_for(self._ready, timeout=self.start_timeout)
+        except Exception as e:
+            await self.stop()
+            if isinstance(e, asyncio.TimeoutError):
+                raise RuntimeError(f"等待插件工作进程 {self.plugin_id} 初始化超时")
+            raise RuntimeError(f"插件工作进程 {self.plugin_id} 初始化失败: {str(e)}")
+
+        return self.metadata
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """
+        通知工作进程关闭插件并等待其退出
+
+        Args:
+            timeout: 等待退出的超时时间（秒），超时后强制终止
+        """
+        self._stopping = True
+        process = self.process
+
+        if process is not None:
+            if process.is_alive() and self._channel is not None:
+                self._channel.send((MSG_STOP,))
+
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, process.join, timeout)
+            if process.is_alive():
+                logger.warning(f"插件工作进程 {self.plugin_id} 未在 {timeout} 秒内退出，强制终止")
+                process.terminate()
+                await loop.run_in_executor(None, process.join, 5.0)
+
+            logger.info(f"插件工作进程已退出: {self.plugin_id}，退出码 {process.exitcode}")
+
+        await _cancel_tasks(self._tasks)
+        self._detach()
+        if self._channel is not None:
+            self._channel.close()
+
+    def _detach(self) -> None:
+        """移除工作进程在主进程事件总线上的订阅和请求处理器，结束等待中的请求"""
+        self._event_bus.remove_subscription_listener(self._sync_main_keys)
+        for key, handler_id in self._subscriptions.items():
+            self._event_bus.unsubscribe_by_id(key, handler_id)
+        self._subscriptions.clear()
+
+        for method, proxy in self._rpc_proxies.items():
+            self._event_bus.unregister_rpc(method, proxy)
+        self._rpc_proxies.clear()
+
+        for future in self._calls.values():
+            if not future.done():
+                future.set_result(None)
+        self._calls.clear()
+
+    def _on_closed(self) -> None:
+        """管道对端关闭，即工作进程已退出"""
+        if self._ready is not None and not self._ready.done():
+            self._ready.set_exception(RuntimeError("工作进程意外退出"))
+
+        if not self._stopping:
+            exitcode = self.process.exitcode if self.process else None
+            logger.error(f"插件工作进程意外退出: {self.plugin_id}，退出码 {exitcode}")
+            self._detach()
+
+    def _on_message(self, message: Tuple[Any, ...]) -> None:
+        """
+        处理工作进程发来的消息
+
+        Args:
+            message: 消息元组
+        """
+        kind = message[0]
+
+        if kind == MSG_EVENT:
+            _spawn(self._tasks, self._publish(message[1], message[2]))
+        elif kind == MSG_CALL:
+            _spawn(self._tasks, self._answer(message[1], message[2], message[3], message[4]))
+        elif kind == MSG_REPLY:
+            future = self._calls.pop(message[1], None)
+            if future is not None and not future.done():
+                future.set_result(message[2])
+        elif kind == MSG_SUBSCRIBE:
+            key = message[1]
+            if key not in self._subscriptions:
+                self._subscriptions[key] = self._event_bus.subscribe(key, self._make_forwarder(key))
+                # 订阅时的同步还没有排除刚注册的转发处理器，这里重新计算
+                self._sync_main_keys()
+        elif kind == MSG_UNSUBSCRIBE:
+            handler_id = self._subscriptions.pop(message[1], None)
+            if handler_id is not None:
+                self._event_bus.unsubscribe_by_id(message[1], handler_id)
+        elif kind == MSG_REGISTER_RPC:
+            proxy = self._make_rpc_proxy(message[1])
+            self._rpc_proxies[message[1]] = proxy
+            self._event_bus.register_rpc(message[1], proxy)
+        elif kind == MSG_UNREGISTER_RPC:
+            proxy = self._rpc_proxies.pop(message[1], None)
+            if proxy is not None:
+                self._event_bus.unregister_rpc(message[1], proxy)
+        elif kind == MSG_READY:
+            if self._ready is not None and not self._ready.done():
+                self._ready.set_result(message[1])
+        elif kind == MSG_FAILED:
+            if self._ready is not None and not self._ready.done():
+                self._ready.set_exception(RuntimeError(message[1]))
+        else:
+            logger.warning(f"未知的消息类型: {kind}")
+
+    def _sync_main_keys(self) -> None:
+        """把主进程中除本工作进程的转发处理器之外的订阅键同步给工作进程"""
+        if self._channel is None or self._stopping:
+            return
+
+        keys = self._event_bus.get_subscription_keys(exclude_ids=self._subscriptions.values())
+        if keys != self._main_keys:
+            self._main_keys = keys
+            self._channel.send((MSG_MAIN_KEYS, tuple(sorted(keys))))
+
+    def _make_forwarder(self, key: str) -> EventHandler:
+        """
+        为工作进程的订阅键创建主进程中的转发处理器
+
+        Args:
+            key: 订阅键，可以是事件类型或模式
+
+        Returns:
+            EventHandler: 转发处理器
+        """
+        async def forward(data: Dict[str, Any]) -> None:
+            # 按事件数据对象判断来源，处理器在同一上下文中发布的新事件仍会转发
+            if id(data) not in self._inbound:
+                self._channel.send((MSG_EVENT, key, data))
+
+        forward.__qualname__ = f"PluginProcess[{self.plugin_id}].forward({key})"
+        return forward
+
+    def _make_rpc_proxy(self, method: str) -> EventHandler:
+        """
+        为工作进程绑定的请求处理器创建主进程中的代理处理器
+
+        Args:
+            method: 事件类型
+
+        Returns:
+            EventHandler: 代理处理器，超时由调用方的 publish_and_wait 控制
+        """
+        async def proxy(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            return await self.call(method, data)
+
+        proxy.__qualname__ = f"PluginProcess[{self.plugin_id}].call({method})"
+        return proxy
+
+    async def call(self, method: str, data: Dict[str, Any], timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        请求工作进程中的插件处理事件并等待响应
+
+        Args:
+            method: 事件类型
+            data: 事件数据
+            timeout: 工作进程内部使用的超时时间（秒），默认为30秒
+
+        Returns:
+            Optional[Dict[str, Any]]: 响应，发送失败或工作进程退出时返回None
+        """
+        call_id = next(self._call_ids)
+        future = asyncio.get_running_loop().create_future()
+        self._calls[call_id] = future
+        try:
+            if not self._channel.send((MSG_CALL, call_id, method, data, timeout)):
+                return None
+            return await future
+        finally:
+            self._calls.pop(call_id, None)
+
+    async def _publish(self, event_type: str, data: Dict[str, Any]) -> None:
+        """
+        在主进程中发布工作进程发布的事件
+
+        工作进程已在本地分发过该事件，发布期间记录事件数据对象，转发处理器据此不回送。
+        """
+        self._inbound.add(id(data))
+        try:
+            await self._event_bus.publish(event_type, data)
+        finally:
+            self._inbound.discard(id(data))
+
+    async def _answer(self, call_id: int, method: str, data: Dict[str, Any], timeout: Optional[float]) -> None:
+        """在主进程中处理工作进程的请求并回复"""
+        response = await self._event_bus.publish_and_wait(method, data, timeout or 30.0)
+        if not self._channel.send((MSG_REPLY, call_id, response)):
+            # 响应无法序列化时回复None，避免工作进程一直等到超时
+            self._channel.send((MSG_REPLY, call_id, None))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取桥接统计信息
+
+        Returns:
+            Dict[str, Any]: 进程状态、订阅数量和消息统计
+        """
+        return {
+            "pid": self.pid,
+            "alive": self.alive,
+            "subscriptions": len(self._subscriptions),
+            "rpc_methods": len(self._rpc_proxies),
+            "pending_calls": len(self._calls),
+            **(self._channel.stats if self._channel else {})
+        }
+
+
+class WorkerEventBus(EventBus):
+    """
+    工作进程中的事件总线。
+
+    本地订阅和发布与普通事件总线相同；订阅键和请求处理器的变化同步给主进程，
+    本地发布的事件在主进程有订阅者时转发给主进程，本地无人处理的请求交给主进程处理。
+    """
+
+    def __init__(self):
+        """初始化工作进程事件总线"""
+        super().__init__()
+
+        self._channel: Optional[_Channel] = None
+
+        # 已同步给主进程的订阅键
+        self._remote_keys: Set[str] = set()
+
+        # 等待主进程响应的请求 {请求编号: Future}
+        self._calls: Dict[int, asyncio.Future] = {}
+        self._call_ids = itertools.count(1)
+
+        # 收到主进程的停止消息或管道关闭时设置
+        self.stopped: Optional[asyncio.Event] = None
+
+        # 主进程中其他订阅者的订阅键，收到同步消息前为None，此时所有事件都转发
+        self._main_keys: Optional[Set[str]] = None
+        self._main_patterns: Tuple[str, ...] = ()
+        # {事件类型: 是否需要转发给主进程}
+        self._main_wants: Dict[str, bool] = {}
+
+        # 正在处理主进程消息的任务，保留引用直到完成
+        self._tasks: Set[asyncio.Task] = set()
+
+    def attach(self, channel: _Channel) -> None:
+        """
+        连接到主进程
+
+        Args:
+            channel: 与主进程通信的管道端点
+        """
+        self._channel = channel
+        self.stopped = asyncio.Event()
+        self._sync_subscriptions()
+        for method in self._rpc_handlers:
+            channel.send((MSG_REGISTER_RPC, method))
+
+    async def close(self) -> None:
+        """取消尚未完成的事件投递和请求处理"""
+        await _cancel_tasks(self._tasks)
+
+    def _invalidate_dispatch(self) -> None:
+        """订阅关系变化时同时同步给主进程"""
+        super()._invalidate_dispatch()
+        self._sync_subscriptions()
+
+    def _sync_subscriptions(self) -> None:
+        """把新增和移除的订阅键发送给主进程"""
+        if self._channel is None:
+            return
+
+        keys = set(self._handlers)
+        for key in keys - self._remote_keys:
+            self._channel.send((MSG_SUBSCRIBE, key))
+        for key in self._remote_keys - keys:
+            self._channel.send((MSG_UNSUBSCRIBE, key))
+        self._remote_keys = keys
+
+    def register_rpc(self, method: str, handler: EventHandler) -> None:
+        """绑定请求处理器，并在主进程中注册代理"""
+        super().register_rpc(method, handler)
+        if self._channel is not None:
+            self._channel.send((MSG_REGISTER_RPC, method))
+
+    def unregister_rpc(self, method: str, handler: Optional[EventHandler] = None) -> bool:
+        """解除请求处理器，并移除主进程中的代理"""
+        removed = super().unregister_rpc(method, handler)
+        if removed and self._channel is not None:
+            self._channel.send((MSG_UNREGISTER_RPC, method))
+        return removed
+
+    async def publish(self, event_type: str, data: Optional[Dict[str, Any]] = None) -> int:
+        """
+        发布事件，先在本地分发，再转发给主进程
+
+        Returns:
+            int: 本进程中接收到事件的处理器数量
+        """
+        if data is None:
+            data = {}
+        count = await super().publish(event_type, data)
+        if self._channel is not None and self._main_subscribes(event_type):
+            self._channel.send((MSG_EVENT, event_type, data))
+        return count
+
+    def _main_subscribes(self, event_type: str) -> bool:
+        """
+        判断主进程中是否有订阅者需要该事件
+
+        Args:
+            event_type: 事件类型
+
+        Returns:
+            bool: 需要转发给主进程时返回True
+        """
+        if self._main_keys is None:
+            return True
+
+        wanted = self._main_wants.get(event_type)
+        if wanted is None:
+            wanted = event_type in self._main_keys or any(
+                pattern_matches(pattern, event_type) for pattern in self._main_patterns
+            )
+            self._main_wants[event_type] = wanted
+        return wanted
+
+    async def publish_and_wait(
+        self,
+        event_type: str,
+        data: Optional[Dict[str, Any]] = None,
+        timeout: float = 30.0
+    ) -> Optional[Dict[str, Any]]:
+        """
+        发布事件并等待响应，本地没有处理器时请求主进程处理
+
+        Returns:
+            Optional[Dict[str, Any]]: 响应，如果超时或无处理器则返回None
+        """
+        if self._channel is None or event_type in self._rpc_handlers:
+            return await super().publish_and_wait(event_type, data, timeout)
+
+        handlers = self._dispatch.get(event_type)
+        if handlers is None:
+            handlers = self._resolve_handlers(event_type)
+        if handlers:
+            return await super().publish_and_wait(event_type, data, timeout)
+
+        call_id = next(self._call_ids)
+        future = asyncio.get_running_loop().create_future()
+        self._calls[call_id] = future
+        try:
+            if not self._channel.send((MSG_CALL, call_id, event_type, data or {}, timeout)):
+                return None
+            return await asyncio.wait_for(future, timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"等待主进程响应事件 {event_type} 超时")
+            return None
+        finally:
+            self._calls.pop(call_id, None)
+
+    async def _deliver(self, key: str, data: Dict[str, Any]) -> None:
+        """
+        投递主进程转发的事件，只调用该订阅键下的处理器
+
+        同一事件可能同时匹配工作进程的多个订阅键（如具体类型和 "*"），
+        主进程按订阅键分别转发，这里不再做模式匹配，避免重复投递。
+        """
+        for handler in tuple(self._handlers.get(key, {}).values()):
+            try:
+                await handler(data)
+                self._stats["handled"] += 1
+            except Exception as e:
+                logger.error(f"事件处理器 {getattr(handler, '__qualname__', handler)} 处理 {key} 时出错: {str(e)}")
+
+    async def _answer(self, call_id: int, method: str, data: Dict[str, Any], timeout: Optional[float]) -> None:
+        """处理主进程转发的请求并回复"""
+        response = await super().publish_and_wait(method, data, timeout or 30.0)
+        if not self._channel.send((MSG_REPLY, call_id, response)):
+            self._channel.send((MSG_REPLY, call_id, None))
+
+    def _on_message(self, message: Tuple[Any, ...]) -> None:
+        """
+        处理主进程发来的消息
+
+        Args:
+            message: 消息元组
+        """
+        kind = message[0]
+
+        if kind == MSG_EVENT:
+            _spawn(self._tasks, self._deliver(message[1], message[2]))
+        elif kind == MSG_CALL:
+            _spawn(self._tasks, self._answer(message[1], message[2], message[3], message[4]))
+        elif kind == MSG_REPLY:
+            future = self._calls.pop(message[1], None)
+            if future is not None and not future.done():
+                future.set_result(message[2])
+        elif kind == MSG_MAIN_KEYS:
+            self._main_keys = set(message[1])
+            self._main_patterns = tuple(key for key in self._main_keys if is_pattern(key))
+            self._main_wants.clear()
+        elif kind == MSG_STOP:
+            self.stopped.set()
+        else:
+            logger.warning(f"未知的消息类型: {kind}")
+
+
+class ProcessPlugin(PluginBase):
+    """
+    在独立进程中运行的插件在主进程中的代理。
+
+    初始化时启动工作进程并等待其中的插件初始化完成，关闭时通知工作进程关闭插件
+    并退出。插件管理器像管理普通插件一样管理它。
+    """
+
+    def __init__(self, event_bus: EventBus, plugin_class: Type[PluginBase], plugin_id: Optional[str] = None):
+        """
+        初始化进程插件代理
+
+        Args:
+            event_bus: 主进程事件总线
+            plugin_class: 在工作进程中实例化的插件类
+            plugin_id: 插件ID，默认使用插件类的ID
+        """
+        super().__init__(event_bus)
+
+        self.id = plugin_id or plugin_class.get_id_from_class()
+        self.name = plugin_class.name
+        self.version = plugin_class.version
+        self.description = plugin_class.description
+        self.dependencies = list(plugin_class.dependencies)
+        self._logger = get_logger(f"plugin.{self.id}")
+
+        self.host = PluginProcess(event_bus, self.id, plugin_class.__module__, plugin_class.__qualname__)
+
+    async def initialize(self) -> None:
+        """启动工作进程，失败时抛出异常"""
+        if self._initialized:
+            return
+
+        metadata = await self.host.start()
+        for key in ("name", "version", "description"):
+            if metadata.get(key):
+                setattr(self, key, metadata[key])
+
+        await super().initialize()
+
+    async def shutdown(self) -> None:
+        """关闭工作进程"""
+        await self.host.stop()
+        await super().shutdown()
+
+    def get_metadata(self) -> Dict[str, Any]:
+        """获取插件元数据，包含工作进程信息"""
+        metadata = super().get_metadata()
+        metadata["process"] = self.host.get_stats()
+        return metadata
+
+
+async def _serve_plugin(conn: Connection, module_path: str, class_name: str) -> None:
+    """
+    在工作进程中运行插件，直到收到停止消息或主进程退出
+
+    Args:
+        conn: 与主进程通信的管道
+        module_path: 插件类所在模块
+        class_name: 插件类名
+    """
+    loop = asyncio.get_running_loop()
+    event_bus = WorkerEventBus()
+    channel = _Channel(conn, loop, event_bus._on_message, lambda: event_bus.stopped.set(),
+                       "plugin-worker-bridge")
+    event_bus.attach(channel)
+    channel.start()
+
+    try:
+        module = importlib.import_module(module_path)
+        plugin_class = getattr(module, class_name)
+        plugin = plugin_class(event_bus)
+        await plugin.initialize()
+    except Exception as e:
+        logger.exception(f"工作进程中初始化插件 {module_path}.{class_name} 失败: {str(e)}")
+        channel.send((MSG_FAILED, f"{type(e).__name__}: {str(e)}"))
+        return
+
+    channel.send((MSG_READY, plugin.get_metadata()))
+    logger.info(f"工作进程中的插件已就绪: {plugin.id}，PID {os.getpid()}")
+
+    await event_bus.stopped.wait()
+
+    try:
+        await plugin.shutdown()
+    except Exception as e:
+        logger.error(f"工作进程中关闭插件 {plugin.id} 时出错: {str(e)}")
+    await event_bus.close()
+
+
+def run_plugin_worker(conn: Connection, module_path: str, class_name: str,
+                      log_config: Optional[Dict[str, Any]] = None) -> None:
+    """
+    插件工作进程入口
+
+    Args:
+        conn: 与主进程通信的管道
+        module_path: 插件类所在模块
+        class_name: 插件类名
+        log_config: 日志配置
+    """
+    # 中断信号由主进程处理，工作进程等待主进程的停止消息
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    if log_config:
+        setup_logger(log_config)
+
+    try:
+        asyncio.run(_serve_plugin(conn, module_path, class_name))
+    finally:
+        conn.close()
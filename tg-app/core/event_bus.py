@@ -9,10 +9,14 @@ import asyncio
 import uuid
 import time
 import inspect
-from typing import Dict, Any, List, Callable, Optional, Set, Tuple, Coroutine
+from typing import Dict, Any, List, Awaitable, Callable, Optional, Set, Tuple, Coroutine, Iterable, Hashable, Union
 from functools import wraps
 
 # 修改导入语句
+from events.event_types import (
+    DOWNLOAD_PROGRESS, UPLOAD_PROGRESS, FORWARD_PROGRESS, TASK_PROGRESS,
+    EVENT_CATEGORIES, EventCategory
+)
 from utils.logger import get_logger
 
 # 获取日志记录器
@@ -21,6 +25,203 @@ logger = get_logger("event_bus")
 # 事件处理器类型
 EventHandler = Callable[[Dict[str, Any]], Coroutine[Any, Any, Dict[str, Any]]]
 
+# 默认的热点事件类型，发布频率高，走不记录日志、不创建任务的快速路径
+DEFAULT_HOT_EVENTS = (DOWNLOAD_PROGRESS, UPLOAD_PROGRESS, FORWARD_PROGRESS, TASK_PROGRESS)
+
+# Python 3.11 起提供的超时上下文管理器
+_timeout = getattr(asyncio, "timeout", None)
+
+# 通配订阅：匹配所有事件
+WILDCARD = "*"
+
+# 类别订阅的键前缀，例如 "category:download"
+CATEGORY_PREFIX = "category:"
+
+
+def is_pattern(event_type: str) -> bool:
+    """
+    判断订阅键是否为通配或类别模式。
+    
+    Args:
+        event_type: 订阅键
+        
+    Returns:
+        bool: 是否为模式
+    """
+    return event_type == WILDCARD or event_type.endswith(".*") or event_type.startswith(CATEGORY_PREFIX)
+
+
+def pattern_matches(pattern: str, event_type: str) -> bool:
+    """
+    判断模式是否匹配具体的事件类型。
+    
+    支持 "*"、前缀通配（如 "download.*"）和类别（如 "category:download"）。
+    
+    Args:
+        pattern: 订阅模式
+        event_type: 事件类型
+        
+    Returns:
+        bool: 是否匹配
+    """
+    if pattern == WILDCARD:
+        return True
+    if pattern.endswith(".*"):
+        return event_type.startswith(pattern[:-1])
+    if pattern.startswith(CATEGORY_PREFIX):
+        category = EVENT_CATEGORIES.get(event_type)
+        return category is not None and category.value == pattern[len(CATEGORY_PREFIX):]
+    return False
+
+
+# 合并键：事件数据中的字段名，或从事件数据计算键的函数
+CoalesceKey = Union[str, Callable[[Dict[str, Any]], Hashable], None]
+
+
+async def _wait_with_timeout(awaitable: Awaitable[Any], timeout: float) -> Any:
+    """
+    在当前任务中等待并限制超时。
+    
+    asyncio.timeout 直接在当前任务中等待；旧版本的 wait_for 会为协程额外创建任务。
+    """
+    if _timeout is not None:
+        async with _timeout(timeout):
+            return await awaitable
+    return await asyncio.wait_for(awaitable, timeout=timeout)
+
+
+def category_key(category: EventCategory) -> str:
+    """
+    获取类别订阅使用的订阅键。
+    
+    Args:
+        category: 事件类别
+        
+    Returns:
+        str: 订阅键
+    """
+    return f"{CATEGORY_PREFIX}{category.value}"
+
+
+class CoalescingSubscription:
+    """
+    合并订阅，作为普通处理器注册到事件总线。
+    
+    收到事件时只按键保存最新数据并安排一次延迟投递，不调用真正的处理器，
+    因此发布方的开销是常数级的；处理器每隔 interval 秒最多被调用一轮，
+    每个键只收到最新的一条数据，或在批量模式下一次收到全部键的最新数据。
+    """
+    
+    def __init__(self, event_type: str, handler: EventHandler, key: CoalesceKey = "file_id",
+                 interval: float = 0.5, batch: bool = False):
+        """
+        初始化合并订阅
+        
+        Args:
+            event_type: 事件类型
+            handler: 真正的事件处理函数
+            key: 合并键，事件数据中的字段名或计算函数，None表示所有事件合并为一条
+            interval: 两次投递之间的最小间隔（秒）
+            batch: 是否批量投递，批量模式下处理器收到 {"event_type", "updates"} 形式的数据
+        """
+        self.event_type = event_type
+        self.handler = handler
+        self.key = key
+        self.interval = interval
+        self.batch = batch
+        
+        self.__qualname__ = f"coalesced({getattr(handler, '__qualname__', repr(handler))})"
+        
+        self._pending: Dict[Hashable, Dict[str, Any]] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._task: Optional[asyncio.Task] = None
+        self._next_delivery = 0.0
+        self._closed = False
+        
+        # 统计：收到的事件数、投递的事件数、被合并丢弃的事件数
+        self.received = 0
+        self.delivered = 0
+        self.superseded = 0
+    
+    def _get_key(self, data: Dict[str, Any]) -> Hashable:
+        """计算事件数据的合并键"""
+        if self.key is None:
+            return None
+        if callable(self.key):
+            return self.key(data)
+        return data.get(self.key)
+    
+    async def __call__(self, data: Dict[str, Any]) -> None:
+        """
+        接收事件，只记录最新数据并安排投递
+        
+        Args:
+            data: 事件数据
+        """
+        if self._closed:
+            return
+        
+        self.received += 1
+        key = self._get_key(data)
+        if key in self._pending:
+            self.superseded += 1
+        self._pending[key] = data
+        
+        if self._timer is None and (self._task is None or self._task.done()):
+            self._schedule()
+    
+    def _schedule(self) -> None:
+        """安排下一次投递，保证两次投递之间至少间隔 interval 秒"""
+        loop = asyncio.get_running_loop()
+        delay = max(0.0, self._next_delivery - loop.time())
+        self._timer = loop.call_later(delay, self._start_delivery)
+    
+    def _start_delivery(self) -> None:
+        """定时器回调，在事件循环中启动投递任务"""
+        self._timer = None
+        if not self._closed and self._pending:
+            self._task = asyncio.get_running_loop().create_task(self._deliver())
+    
+    async def _deliver(self) -> None:
+        """投递当前积累的最新数据"""
+        loop = asyncio.get_running_loop()
+        self._next_delivery = loop.time() + self.interval
+        
+        pending, self._pending = self._pending, {}
+        self.delivered += len(pending)
+        
+        try:
+            if self.batch:
+                await self.handler({"event_type": self.event_type, "updates": list(pending.values())})
+            else:
+                for data in pending.values():
+                    await self.handler(data)
+        except Exception as e:
+            logger.error(f"合并事件处理器 {self.__qualname__} 处理 {self.event_type} 时出错: {str(e)}")
+        
+        # 投递期间又有新数据时，安排下一轮
+        if self._pending and not self._closed:
+            self._schedule()
+    
+    async def flush(self) -> None:
+        """立即投递所有积累的数据，忽略间隔限制"""
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        if self._task and not self._task.done():
+            await self._task
+        if self._pending:
+            self._next_delivery = 0.0
+            await self._deliver()
+    
+    def close(self) -> None:
+        """关闭订阅，丢弃未投递的数据"""
+        self._closed = True
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        self._pending.clear()
+
 
 class EventBus:
     """
@@ -29,13 +230,30 @@ class EventBus:
     支持异步事件处理，可以等待事件处理结果。
     """
     
-    def __init__(self):
-        """初始化事件总线"""
+    def __init__(self, hot_event_types: Optional[Iterable[str]] = None):
+        """
+        初始化事件总线
+        
+        Args:
+            hot_event_types: 热点事件类型，默认为各类进度事件
+        """
         # 事件处理器映射 {事件类型: {处理器ID: 处理器函数}}
         self._handlers: Dict[str, Dict[str, EventHandler]] = {}
         
-        # 等待中的事件响应 {响应ID: 响应Future}
-        self._waiting_responses: Dict[str, asyncio.Future] = {}
+        # 分发表 {事件类型: 处理器元组}，发布时直接使用，订阅关系变化时失效
+        self._dispatch: Dict[str, Tuple[EventHandler, ...]] = {}
+        
+        # 当前订阅的模式键，按订阅顺序排列
+        self._patterns: List[str] = []
+        
+        # 热点事件类型
+        self._hot_events: Set[str] = set(DEFAULT_HOT_EVENTS if hot_event_types is None else hot_event_types)
+        
+        # 请求/响应处理器 {事件类型: 处理器函数}，publish_and_wait 优先直接调用
+        self._rpc_handlers: Dict[str, EventHandler] = {}
+        
+        # 订阅关系变化时调用的回调，进程桥接据此同步订阅键
+        self._subscription_listeners: List[Callable[[], None]] = []
         
         # 事件统计信息
         self._stats = {
@@ -51,15 +269,20 @@ class EventBus:
         """
         订阅事件。
         
+        事件类型也可以是模式："*" 匹配所有事件，"download.*" 匹配该前缀下的事件，
+        "category:download" 匹配该类别的事件。模式在订阅关系变化后解析进分发表，
+        发布时不做模式匹配。通过模式订阅的处理器应从事件数据的 event_type 字段
+        （由 create_event_data 填充）区分具体事件。
+        
         Args:
-            event_type: 事件类型
+            event_type: 事件类型或模式
             handler: 事件处理函数，必须是一个接受事件数据(dict)的异步函数
             
         Returns:
             str: 处理器ID，可用于取消订阅
         """
         # 验证处理器是否是异步函数
-        if not inspect.iscoroutinefunction(handler):
+        if not inspect.iscoroutinefunction(handler) and not isinstance(handler, CoalescingSubscription):
             logger.warning(f"事件处理器不是异步函数: {handler.__qualname__}")
             
         # 初始化事件类型的处理器字典
@@ -71,6 +294,7 @@ class EventBus:
         
         # 注册处理器
         self._handlers[event_type][handler_id] = handler
+        self._invalidate_dispatch()
         
         # 更新统计信息
         self._stats["subscribers"] += 1
@@ -78,6 +302,46 @@ class EventBus:
         logger.debug(f"已订阅事件 {event_type}，处理器 {handler.__qualname__}，ID {handler_id}")
         return handler_id
     
+    def subscribe_category(self, category: EventCategory, handler: EventHandler) -> str:
+        """
+        订阅某一类别的所有事件。
+        
+        Args:
+            category: 事件类别
+            handler: 事件处理函数
+            
+        Returns:
+            str: 处理器ID，取消订阅时使用 category_key(category) 作为事件类型
+        """
+        return self.subscribe(category_key(category), handler)
+    
+    def subscribe_coalesced(
+        self,
+        event_type: str,
+        handler: EventHandler,
+        key: CoalesceKey = "file_id",
+        interval: float = 0.5,
+        batch: bool = False
+    ) -> str:
+        """
+        以合并方式订阅高频事件，如下载、上传进度。
+        
+        同一个键在 interval 秒内的多次事件只投递最新的一条；batch 为True时，
+        处理器一次收到 {"event_type": 事件类型, "updates": [各键最新数据]}。
+        
+        Args:
+            event_type: 事件类型
+            handler: 事件处理函数
+            key: 合并键，事件数据中的字段名或计算函数，None表示所有事件合并为一条
+            interval: 两次投递之间的最小间隔（秒）
+            batch: 是否批量投递
+            
+        Returns:
+            str: 处理器ID，可用于取消订阅
+        """
+        subscription = CoalescingSubscription(event_type, handler, key, interval, batch)
+        return self.subscribe(event_type, subscription)
+    
     def unsubscribe(self, event_type: str, handler: EventHandler) -> bool:
         """
         取消订阅事件。
@@ -96,7 +360,7 @@ class EventBus:
         # 查找处理器ID
         handler_id = None
         for h_id, h in self._handlers[event_type].items():
-            if h == handler:
+            if h == handler or getattr(h, "handler", None) == handler:
                 handler_id = h_id
                 break
                 
@@ -105,11 +369,12 @@ class EventBus:
             return False
             
         # 移除处理器
-        del self._handlers[event_type][handler_id]
+        self._close_handler(self._handlers[event_type].pop(handler_id))
         
         # 如果事件类型没有处理器了，删除该类型
         if not self._handlers[event_type]:
             del self._handlers[event_type]
+        self._invalidate_dispatch()
             
         # 更新统计信息
         self._stats["subscribers"] -= 1
@@ -137,11 +402,12 @@ class EventBus:
             return False
             
         # 移除处理器
-        del self._handlers[event_type][handler_id]
+        self._close_handler(self._handlers[event_type].pop(handler_id))
         
         # 如果事件类型没有处理器了，删除该类型
         if not self._handlers[event_type]:
             del self._handlers[event_type]
+        self._invalidate_dispatch()
             
         # 更新统计信息
         self._stats["subscribers"] -= 1
@@ -167,7 +433,9 @@ class EventBus:
         count = len(self._handlers[event_type])
         
         # 删除所有处理器
-        del self._handlers[event_type]
+        for handler in self._handlers.pop(event_type).values():
+            self._close_handler(handler)
+        self._invalidate_dispatch()
         
         # 更新统计信息
         self._stats["subscribers"] -= count
@@ -175,10 +443,96 @@ class EventBus:
         logger.debug(f"已取消订阅事件 {event_type} 的所有处理器，共 {count} 个")
         return count
     
+    def set_hot_event(self, event_type: str, hot: bool = True) -> None:
+        """
+        设置事件类型是否为热点事件。
+        
+        热点事件按顺序直接调用处理器，不创建任务，也不记录调试日志，
+        适用于进度更新这类高频事件。
+        
+        Args:
+            event_type: 事件类型
+            hot: 是否为热点事件
+        """
+        if hot:
+            self._hot_events.add(event_type)
+        else:
+            self._hot_events.discard(event_type)
+    
+    @staticmethod
+    def _close_handler(handler: EventHandler) -> None:
+        """处理器被移除时释放合并订阅持有的定时器"""
+        if isinstance(handler, CoalescingSubscription):
+            handler.close()
+    
+    def _invalidate_dispatch(self) -> None:
+        """订阅关系变化后清空分发表，并重新整理模式键"""
+        self._dispatch.clear()
+        self._patterns = [key for key in self._handlers if is_pattern(key)]
+        for listener in tuple(self._subscription_listeners):
+            try:
+                listener()
+            except Exception as e:
+                logger.error(f"订阅变化回调 {getattr(listener, '__qualname__', listener)} 出错: {str(e)}")
+    
+    def add_subscription_listener(self, listener: Callable[[], None]) -> None:
+        """
+        添加订阅关系变化时调用的回调
+        
+        Args:
+            listener: 无参数的同步回调
+        """
+        self._subscription_listeners.append(listener)
+    
+    def remove_subscription_listener(self, listener: Callable[[], None]) -> None:
+        """
+        移除订阅关系变化回调
+        
+        Args:
+            listener: add_subscription_listener 添加的回调
+        """
+        if listener in self._subscription_listeners:
+            self._subscription_listeners.remove(listener)
+    
+    def get_subscription_keys(self, exclude_ids: Iterable[str] = ()) -> Set[str]:
+        """
+        获取当前有处理器的订阅键
+        
+        Args:
+            exclude_ids: 不计入的处理器ID
+            
+        Returns:
+            Set[str]: 至少有一个未排除处理器的订阅键，包含模式键
+        """
+        excluded = set(exclude_ids)
+        return {key for key, handlers in self._handlers.items() if not excluded.issuperset(handlers)}
+    
+    def _resolve_handlers(self, event_type: str) -> Tuple[EventHandler, ...]:
+        """
+        计算事件类型对应的处理器元组并写入分发表。
+        
+        Args:
+            event_type: 事件类型
+            
+        Returns:
+            Tuple[EventHandler, ...]: 处理器元组
+        """
+        handlers = list(self._handlers.get(event_type, {}).values())
+        for pattern in self._patterns:
+            if pattern != event_type and pattern_matches(pattern, event_type):
+                handlers.extend(self._handlers[pattern].values())
+        
+        handlers = tuple(handlers)
+        self._dispatch[event_type] = handlers
+        return handlers
+    
     async def publish(self, event_type: str, data: Optional[Dict[str, Any]] = None) -> int:
         """
         发布事件。
         
+        处理器从预先计算的分发表中读取；只有一个处理器时直接等待，
+        不创建任务；热点事件不记录日志。
+        
         Args:
             event_type: 事件类型
             data: 事件数据，默认为空字典
@@ -186,44 +540,113 @@ class EventBus:
         Returns:
             int: 接收到事件的处理器数量
         """
+        handlers = self._dispatch.get(event_type)
+        if handlers is None:
+            handlers = self._resolve_handlers(event_type)
+        
+        hot = event_type in self._hot_events
+        if not handlers:
+            if not hot:
+                logger.debug("没有处理器订阅事件: {}", event_type)
+            return 0
+        
         if data is None:
             data = {}
-            
-        if event_type not in self._handlers:
-            logger.debug(f"没有处理器订阅事件: {event_type}")
-            return 0
-            
-        # 复制处理器字典，防止遍历过程中修改
-        handlers = self._handlers[event_type].copy()
         
         # 更新统计信息
         self._stats["published"] += 1
-        
-        # 记录日志
-        if handlers:
-            logger.debug(f"发布事件 {event_type}，数据: {data}，处理器数量: {len(handlers)}")
-        
-        # 调用所有处理器
+        count = len(handlers)
+        
+        # 热点事件或单个处理器：直接调用
+        if hot or count == 1:
+            if not hot:
+                logger.debug("发布事件 {}，数据: {}，处理器数量: 1", event_type, data)
+            handled = 0
+            for handler in handlers:
+                try:
+                    await handler(data)
+                    handled += 1
+                except Exception as e:
+                    logger.error(f"事件处理器 {getattr(handler, '__qualname__', handler)} 处理 {event_type} 时出错: {str(e)}")
+            self._stats["handled"] += handled
+            return count
+        
+        # 记录日志，以参数形式传入，只有在调试级别启用时才格式化事件数据
+        logger.debug("发布事件 {}，数据: {}，处理器数量: {}", event_type, data, count)
+        
+        # 多个处理器并发执行
         tasks = []
-        for handler_id, handler in handlers.items():
+        for handler in handlers:
             try:
-                task = asyncio.create_task(handler(data))
-                tasks.append(task)
+                tasks.append(asyncio.create_task(handler(data)))
             except Exception as e:
                 logger.error(f"创建事件处理任务时出错: {str(e)}")
-                
+        
         # 等待所有处理器执行完成
         if tasks:
-            try:
-                await asyncio.gather(*tasks)
-                
-                # 更新统计信息
-                self._stats["handled"] += len(tasks)
-                
-            except Exception as e:
-                logger.error(f"等待事件处理器执行时出错: {str(e)}")
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+            for result in results:
+                if isinstance(result, BaseException):
+                    logger.error(f"等待事件处理器执行时出错: {str(result)}")
+                else:
+                    # 更新统计信息
+                    self._stats["handled"] += 1
+        
+        return count
+    
+    def register_rpc(self, method: str, handler: EventHandler) -> None:
+        """
+        绑定请求/响应处理器。
+        
+        publish_and_wait 请求该事件类型时直接等待这个处理器的返回值，
+        不经过订阅分发，也不创建任务。每个事件类型只能绑定一个处理器，
+        重复绑定时后者覆盖前者。
+        
+        Args:
+            method: 事件类型
+            handler: 处理函数，返回响应字典
+        """
+        if not inspect.iscoroutinefunction(handler):
+            logger.warning(f"请求处理器不是异步函数: {handler.__qualname__}")
+        
+        previous = self._rpc_handlers.get(method)
+        if previous is not None and previous != handler:
+            logger.warning(f"请求处理器 {method} 已被覆盖: {previous.__qualname__} -> {handler.__qualname__}")
+        
+        self._rpc_handlers[method] = handler
+        logger.debug(f"已绑定请求处理器 {method}，处理器 {handler.__qualname__}")
+    
+    def unregister_rpc(self, method: str, handler: Optional[EventHandler] = None) -> bool:
+        """
+        解除请求/响应处理器的绑定。
+        
+        Args:
+            method: 事件类型
+            handler: 处理函数，指定时只有当前绑定的正是该函数才解除
+            
+        Returns:
+            bool: 是否成功解除
+        """
+        current = self._rpc_handlers.get(method)
+        if current is None or (handler is not None and current != handler):
+            logger.warning(f"解除请求处理器失败，未绑定: {method}")
+            return False
         
-        return len(handlers)
+        del self._rpc_handlers[method]
+        logger.debug(f"已解除请求处理器 {method}")
+        return True
+    
+    def has_rpc_handler(self, method: str) -> bool:
+        """
+        检查当前进程的事件总线是否绑定了请求处理器。
+        
+        Args:
+            method: 事件类型
+            
+        Returns:
+            bool: 是否已绑定
+        """
+        return method in self._rpc_handlers
     
     async def publish_and_wait(
         self, 
@@ -234,6 +657,10 @@ class EventBus:
         """
         发布事件并等待第一个处理器的响应。
         
+        已通过 register_rpc 绑定处理器时直接等待该处理器；否则使用订阅的处理器，
+        只有一个处理器时直接等待，多个处理器时并发执行，收到第一个字典响应后
+        取消其余处理器。不会修改传入的事件数据。
+        
         Args:
             event_type: 事件类型
             data: 事件数据，默认为空字典
@@ -244,47 +671,35 @@ class EventBus:
         """
         if data is None:
             data = {}
-            
-        if event_type not in self._handlers:
-            logger.debug(f"没有处理器订阅事件: {event_type}")
-            return None
-            
-        # 复制处理器字典，防止遍历过程中修改
-        handlers = self._handlers[event_type].copy()
+        
+        handler = self._rpc_handlers.get(event_type)
+        if handler is None:
+            handlers = self._dispatch.get(event_type)
+            if handlers is None:
+                handlers = self._resolve_handlers(event_type)
+            if not handlers:
+                logger.debug("没有处理器订阅事件: {}", event_type)
+                return None
+            if len(handlers) == 1:
+                handler = handlers[0]
         
         # 更新统计信息
         self._stats["published"] += 1
         
-        # 记录日志
-        if handlers:
-            logger.debug(f"发布事件 {event_type} 并等待响应，数据: {data}，处理器数量: {len(handlers)}")
-            
-        # 创建响应Future
-        response_id = str(uuid.uuid4())
-        response_future = asyncio.Future()
-        
-        # 存储响应Future
-        self._waiting_responses[response_id] = response_future
-        
-        # 添加响应ID到事件数据
-        data["_response_id"] = response_id
-        
-        # 调用所有处理器
-        tasks = []
-        for handler_id, handler in handlers.items():
-            try:
-                task = asyncio.create_task(self._call_handler_with_response(handler, data, response_id))
-                tasks.append(task)
-            except Exception as e:
-                logger.error(f"创建事件处理任务时出错: {str(e)}")
-                
         try:
-            # 等待响应，带超时
-            response = await asyncio.wait_for(response_future, timeout=timeout)
+            if handler is not None:
+                logger.debug("发布请求 {}，数据: {}", event_type, data)
+                response = await _wait_with_timeout(handler(data), timeout)
+                if not isinstance(response, dict):
+                    return None
+            else:
+                logger.debug("发布事件 {} 并等待响应，数据: {}，处理器数量: {}", event_type, data, len(handlers))
+                response = await self._wait_first_response(event_type, handlers, data, timeout)
+                if response is None:
+                    return None
             
             # 更新统计信息
             self._stats["handled"] += 1
-            
             return response
             
         except asyncio.TimeoutError:
@@ -294,45 +709,64 @@ class EventBus:
         except Exception as e:
             logger.error(f"等待事件 {event_type} 响应时出错: {str(e)}")
             return None
-            
-        finally:
-            # 清理响应Future
-            if response_id in self._waiting_responses:
-                del self._waiting_responses[response_id]
-                
-            # 取消所有任务
-            for task in tasks:
-                if not task.done():
-                    task.cancel()
     
-    async def _call_handler_with_response(
-        self, 
-        handler: EventHandler, 
-        data: Dict[str, Any], 
-        response_id: str
-    ) -> None:
+    async def _wait_first_response(
+        self,
+        event_type: str,
+        handlers: Tuple[EventHandler, ...],
+        data: Dict[str, Any],
+        timeout: float
+    ) -> Optional[Dict[str, Any]]:
         """
-        调用处理器并处理响应。
+        并发执行多个处理器，返回第一个字典响应并取消其余处理器。
         
         Args:
-            handler: 事件处理函数
+            event_type: 事件类型
+            handlers: 处理器元组
             data: 事件数据
-            response_id: 响应ID
+            timeout: 超时时间（秒）
+            
+        Returns:
+            Optional[Dict[str, Any]]: 第一个字典响应，全部处理器都没有返回字典时为None
+            
+        Raises:
+            asyncio.TimeoutError: 超时前没有收到响应
         """
+        loop = asyncio.get_running_loop()
+        response = loop.create_future()
+        tasks = []
+        
+        def on_done(task: asyncio.Task) -> None:
+            # 处理器完成时检查结果，第一个字典响应即为请求结果
+            if response.done():
+                return
+            if not task.cancelled():
+                error = task.exception()
+                if error is not None:
+                    logger.error(f"事件处理器处理 {event_type} 时出错: {str(error)}")
+                elif isinstance(task.result(), dict):
+                    response.set_result(task.result())
+                    return
+            if all(t.done() for t in tasks):
+                response.set_result(None)
+        
+        for handler in handlers:
+            try:
+                tasks.append(loop.create_task(handler(data)))
+            except Exception as e:
+                logger.error(f"创建事件处理任务时出错: {str(e)}")
+        if not tasks:
+            return None
+        for task in tasks:
+            task.add_done_callback(on_done)
+        
         try:
-            # 调用处理器
-            response = await handler(data)
-            
-            # 如果响应是字典，且Future仍在等待中，设置结果
-            if (
-                isinstance(response, dict) and 
-                response_id in self._waiting_responses and 
-                not self._waiting_responses[response_id].done()
-            ):
-                self._waiting_responses[response_id].set_result(response)
-                
-        except Exception as e:
-            logger.error(f"事件处理器 {handler.__qualname__} 执行时出错: {str(e)}")
+            return await _wait_with_timeout(response, timeout)
+        finally:
+            # 已经得到响应或超时，取消仍在运行的处理器
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
     
     def get_stats(self) -> Dict[str, Any]:
         """
@@ -344,6 +778,7 @@ class EventBus:
         # 复制统计信息并添加当前事件类型和处理器数量
         stats = self._stats.copy()
         stats["event_types"] = len(self._handlers)
+        stats["rpc_handlers"] = len(self._rpc_handlers)
         
         # 计算每个事件类型的处理器数量
         event_stats = {}
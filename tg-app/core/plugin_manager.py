@@ -7,6 +7,7 @@
 
 import os
 import sys
+import json
 import importlib
 import importlib.util
 import inspect
@@ -14,10 +15,11 @@ import pkgutil
 import asyncio
 import time
 from pathlib import Path
-from typing import Dict, List, Set, Type, Optional, Any, Tuple, cast
+from typing import Dict, List, Set, Type, Optional, Any, Iterable, cast
 
 # 修改导入语句
 from core.event_bus import EventBus
+from core.event_bridge import ProcessPlugin
 from events.event_types import (
     PLUGIN_LOADED, PLUGIN_UNLOADED, PLUGIN_ERROR,
     create_event_data
@@ -28,6 +30,9 @@ from utils.logger import get_logger
 # 获取日志记录器
 logger = get_logger("plugin_manager")
 
+# 插件发现清单格式版本，格式变化时旧清单自动失效
+MANIFEST_VERSION = 1
+
 
 class PluginManager:
     """
@@ -36,24 +41,54 @@ class PluginManager:
     管理插件的完整生命周期，处理插件依赖关系，维护已加载插件的列表。
     """
     
-    def __init__(self, event_bus: EventBus):
+    def __init__(
+        self,
+        event_bus: EventBus,
+        process_plugins: Optional[Iterable[str]] = None,
+        enabled_plugins: Optional[Iterable[str]] = None,
+        disabled_plugins: Optional[Iterable[str]] = None,
+        manifest_path: Optional[Path] = None
+    ):
         """
         初始化插件管理器。
         
         Args:
             event_bus: 事件总线实例
+            process_plugins: 在独立工作进程中运行的插件ID
+            enabled_plugins: 启用的插件ID，为空表示全部启用
+            disabled_plugins: 禁用的插件ID
+            manifest_path: 插件发现清单的缓存文件，为None时不使用缓存
         """
         self._event_bus = event_bus
         
+        # 在独立工作进程中运行的插件ID
+        self._process_plugins: Set[str] = set(process_plugins or ())
+        
+        # 启用与禁用的插件ID
+        self._enabled_plugins: Set[str] = set(enabled_plugins or ())
+        self._disabled_plugins: Set[str] = set(disabled_plugins or ())
+        
+        # 插件发现清单缓存文件
+        self._manifest_path = Path(manifest_path) if manifest_path else None
+        
         # 已加载的插件实例 {插件ID: 插件实例}
         self._plugins: Dict[str, PluginBase] = {}
         
-        # 已发现的插件类 {插件ID: (插件类, 模块路径)}
-        self._discovered_plugins: Dict[str, Tuple[Type[PluginBase], str]] = {}
+        # 已发现的插件元数据 {插件ID: 元数据}，包含模块路径、类名、名称、版本、描述和依赖
+        self._discovered_plugins: Dict[str, Dict[str, Any]] = {}
+        
+        # 已导入的插件类 {插件ID: 插件类}，插件首次加载时才导入
+        self._plugin_classes: Dict[str, Type[PluginBase]] = {}
         
         # 插件加载顺序，用于按顺序卸载
         self._load_order: List[str] = []
         
+        # 正在加载的插件 {插件ID: 加载任务}
+        self._loading: Dict[str, asyncio.Task] = {}
+        
+        # 插件加载耗时 {插件ID: {阶段: 秒数}}
+        self._load_timings: Dict[str, Dict[str, float]] = {}
+        
         # 插件依赖图 {插件ID: 依赖的插件ID集合}
         self._dependencies: Dict[str, Set[str]] = {}
         
@@ -69,6 +104,9 @@ class PluginManager:
         """
         发现可用的插件。
         
+        只遍历目录结构，不导入插件模块。模块文件的修改时间和大小与发现清单一致时
+        直接使用清单中的插件元数据，否则导入该模块查找插件类，并更新清单。
+        
         Args:
             plugin_dirs: 插件目录列表，如果为None则使用默认目录
             
@@ -87,6 +125,8 @@ class PluginManager:
             if plugin_dir not in sys.path:
                 sys.path.insert(0, plugin_dir)
         
+        manifest = self._load_manifest()
+        modules: Dict[str, Dict[str, Any]] = {}
         all_plugins: List[str] = []
         
         # 遍历所有插件目录
@@ -98,6 +138,10 @@ class PluginManager:
                 logger.warning(f"插件目录不存在或不是目录: {dir_path}")
                 continue
             
+            # 插件目录本身是包（如内置的 plugins）时使用完整的模块路径，
+            # 避免 plugins/utils 这类子包与应用的同名顶层包冲突
+            package_prefix = f"{dir_path.name}." if (dir_path / "__init__.py").exists() else ""
+            
             # 遍历目录下的所有Python模块
             for finder, name, is_pkg in pkgutil.iter_modules([str(dir_path)]):
                 # 跳过非包和基础插件模块
@@ -106,19 +150,32 @@ class PluginManager:
                 
                 # 递归搜索包内的模块
                 pkg_path = dir_path / name
-                pkg_plugins = await self._discover_plugins_in_package(name, pkg_path)
+                pkg_plugins = await self._discover_plugins_in_package(
+                    package_prefix + name, pkg_path, manifest, modules
+                )
                 all_plugins.extend(pkg_plugins)
         
+        if modules != manifest:
+            self._save_manifest(modules)
+        
         logger.info(f"发现了 {len(self._discovered_plugins)} 个可用插件")
         return all_plugins
     
-    async def _discover_plugins_in_package(self, pkg_name: str, pkg_path: Path) -> List[str]:
+    async def _discover_plugins_in_package(
+        self,
+        pkg_name: str,
+        pkg_path: Path,
+        manifest: Dict[str, Dict[str, Any]],
+        modules: Dict[str, Dict[str, Any]]
+    ) -> List[str]:
         """
         在包中递归发现插件。
         
         Args:
             pkg_name: 包名
             pkg_path: 包路径
+            manifest: 已有的发现清单 {模块路径: 模块条目}
+            modules: 本次发现得到的清单，原地更新
             
         Returns:
             List[str]: 发现的插件ID列表
@@ -136,50 +193,169 @@ class PluginManager:
             if is_pkg:
                 # 递归搜索子包
                 sub_pkg_path = pkg_path / name
-                sub_discovered = await self._discover_plugins_in_package(module_path, sub_pkg_path)
+                sub_discovered = await self._discover_plugins_in_package(module_path, sub_pkg_path, manifest, modules)
                 discovered.extend(sub_discovered)
-            else:
-                # 检查模块中的插件类
+                continue
+            
+            file_path = pkg_path / f"{name}.py"
+            try:
+                stat = file_path.stat()
+            except OSError:
+                continue
+            
+            # 清单命中：文件未变化，不导入模块
+            entry = manifest.get(module_path)
+            if not (
+                entry and 
+                entry.get("file") == str(file_path) and 
+                entry.get("mtime_ns") == stat.st_mtime_ns and 
+                entry.get("size") == stat.st_size
+            ):
+                plugins = self._scan_module(module_path)
+                if plugins is None:
+                    continue
+                entry = {
+                    "file": str(file_path),
+                    "mtime_ns": stat.st_mtime_ns,
+                    "size": stat.st_size,
+                    "plugins": plugins
+                }
+            
+            modules[module_path] = entry
+            for metadata in entry["plugins"]:
+                plugin_id = metadata["id"]
+                self._discovered_plugins[plugin_id] = dict(metadata, module_path=module_path)
+                discovered.append(plugin_id)
+                logger.debug(f"发现插件: {plugin_id} ({module_path}.{metadata['class_name']})")
+        
+        return discovered
+    
+    def _scan_module(self, module_path: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        导入模块并提取其中插件类的元数据。
+        
+        Args:
+            module_path: 模块路径
+            
+        Returns:
+            Optional[List[Dict[str, Any]]]: 插件元数据列表，导入失败时返回None
+        """
+        try:
+            module = importlib.import_module(module_path)
+        except Exception as e:
+            logger.error(f"加载模块 {module_path} 时出错: {str(e)}")
+            return None
+        
+        plugins: List[Dict[str, Any]] = []
+        
+        # 查找模块中的插件类
+        for _, obj in inspect.getmembers(module, inspect.isclass):
+            # 检查是否是PluginBase的子类但不是PluginBase本身
+            if (
+                issubclass(obj, PluginBase) and 
+                obj is not PluginBase and 
+                obj.__module__ == module_path
+            ):
                 try:
-                    # 导入模块
-                    spec = importlib.util.find_spec(module_path)
-                    if spec is None:
-                        logger.warning(f"无法找到模块: {module_path}")
-                        continue
-                    
-                    module = importlib.util.module_from_spec(spec)
-                    spec.loader.exec_module(module)
-                    
-                    # 查找模块中的插件类
-                    for _, obj in inspect.getmembers(module, inspect.isclass):
-                        # 检查是否是PluginBase的子类但不是PluginBase本身
-                        if (
-                            issubclass(obj, PluginBase) and 
-                            obj is not PluginBase and 
-                            obj.__module__ == module_path
-                        ):
-                            # 创建临时实例获取ID
-                            try:
-                                plugin_id = obj.get_id_from_class()
-                                
-                                # 记录发现的插件
-                                self._discovered_plugins[plugin_id] = (obj, module_path)
-                                discovered.append(plugin_id)
-                                
-                                logger.debug(f"发现插件: {plugin_id} ({module_path}.{obj.__name__})")
-                                
-                            except Exception as e:
-                                logger.warning(f"获取插件ID时出错: {module_path}.{obj.__name__} - {str(e)}")
-                    
+                    plugin_id = obj.get_id_from_class()
+                    plugins.append({
+                        "id": plugin_id,
+                        "class_name": obj.__name__,
+                        "name": getattr(obj, "name", plugin_id),
+                        "version": getattr(obj, "version", "0.1.0"),
+                        "description": getattr(obj, "description", ""),
+                        "dependencies": list(getattr(obj, "dependencies", []))
+                    })
+                    self._plugin_classes[plugin_id] = obj
                 except Exception as e:
-                    logger.error(f"加载模块 {module_path} 时出错: {str(e)}")
+                    logger.warning(f"获取插件ID时出错: {module_path}.{obj.__name__} - {str(e)}")
         
-        return discovered
+        return plugins
+    
+    def _load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        """
+        读取插件发现清单。
+        
+        Returns:
+            Dict[str, Dict[str, Any]]: {模块路径: 模块条目}，清单不存在或损坏时为空
+        """
+        if self._manifest_path is None or not self._manifest_path.exists():
+            return {}
+        
+        try:
+            with open(self._manifest_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != MANIFEST_VERSION:
+                return {}
+            return data.get("modules", {})
+        except Exception as e:
+            logger.warning(f"读取插件发现清单失败，将重新扫描: {str(e)}")
+            return {}
+    
+    def _save_manifest(self, modules: Dict[str, Dict[str, Any]]) -> None:
+        """
+        写入插件发现清单，先写临时文件再替换。
+        
+        Args:
+            modules: {模块路径: 模块条目}
+        """
+        if self._manifest_path is None:
+            return
+        
+        try:
+            self._manifest_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self._manifest_path.with_name(self._manifest_path.name + ".tmp")
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": MANIFEST_VERSION, "modules": modules}, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self._manifest_path)
+            logger.debug(f"已更新插件发现清单: {self._manifest_path}")
+        except Exception as e:
+            logger.warning(f"写入插件发现清单失败: {str(e)}")
+    
+    def _get_plugin_class(self, plugin_id: str) -> Type[PluginBase]:
+        """
+        获取插件类，首次使用时导入插件模块。
+        
+        Args:
+            plugin_id: 插件ID
+            
+        Returns:
+            Type[PluginBase]: 插件类
+            
+        Raises:
+            ImportError: 模块中找不到插件类
+        """
+        plugin_class = self._plugin_classes.get(plugin_id)
+        if plugin_class is None:
+            metadata = self._discovered_plugins[plugin_id]
+            module = importlib.import_module(metadata["module_path"])
+            plugin_class = getattr(module, metadata["class_name"], None)
+            if plugin_class is None:
+                raise ImportError(f"模块 {metadata['module_path']} 中找不到插件类 {metadata['class_name']}")
+            self._plugin_classes[plugin_id] = plugin_class
+        return plugin_class
+    
+    def is_plugin_enabled(self, plugin_id: str) -> bool:
+        """
+        检查插件是否在配置中启用。
+        
+        Args:
+            plugin_id: 插件ID
+            
+        Returns:
+            bool: 是否启用
+        """
+        if plugin_id in self._disabled_plugins:
+            return False
+        return not self._enabled_plugins or plugin_id in self._enabled_plugins
     
     async def load_plugin(self, plugin_id: str, initialize: bool = True) -> Optional[PluginBase]:
         """
         加载指定ID的插件。
         
+        插件的依赖并发加载；同一插件同时被多处请求加载时只加载一次，
+        其余调用等待同一个加载过程的结果。
+        
         Args:
             plugin_id: 插件ID
             initialize: 是否初始化插件
@@ -187,60 +363,103 @@ class PluginManager:
         Returns:
             Optional[PluginBase]: 加载的插件实例，如果加载失败则返回None
         """
+        # 插件正在加载，等待加载完成
+        loading = self._loading.get(plugin_id)
+        if loading is not None:
+            return await asyncio.shield(loading)
+        
         # 插件已加载，直接返回
         if plugin_id in self._plugins:
             logger.info(f"插件已加载: {plugin_id}")
             return self._plugins[plugin_id]
         
+        task = asyncio.ensure_future(self._load_plugin(plugin_id, initialize))
+        self._loading[plugin_id] = task
+        task.add_done_callback(lambda _: self._loading.pop(plugin_id, None))
+        return await asyncio.shield(task)
+    
+    async def _load_plugin(self, plugin_id: str, initialize: bool) -> Optional[PluginBase]:
+        """
+        加载插件：先并发加载依赖，再创建并初始化插件，记录各阶段耗时。
+        
+        Args:
+            plugin_id: 插件ID
+            initialize: 是否初始化插件
+            
+        Returns:
+            Optional[PluginBase]: 加载的插件实例，如果加载失败则返回None
+        """
         # 检查插件是否已发现
         if plugin_id not in self._discovered_plugins:
             logger.error(f"未发现插件: {plugin_id}")
             self._publish_plugin_error(plugin_id, f"未发现插件: {plugin_id}")
             return None
         
-        # 获取插件类和模块路径
-        plugin_class, module_path = self._discovered_plugins[plugin_id]
+        # 获取插件元数据
+        metadata = self._discovered_plugins[plugin_id]
+        
+        # 循环依赖会使插件互相等待，加载前检查
+        cycle = self._find_dependency_cycle(plugin_id)
+        if cycle:
+            logger.error(f"插件存在循环依赖: {' -> '.join(cycle)}")
+            self._publish_plugin_error(plugin_id, f"循环依赖: {' -> '.join(cycle)}")
+            return None
+        
+        started = time.perf_counter()
+        timing = {"started": started, "dependencies": 0.0, "initialize": 0.0, "total": 0.0}
+        self._load_timings[plugin_id] = timing
         
         try:
             logger.info(f"加载插件: {plugin_id}")
             
             # 加载插件依赖
-            if hasattr(plugin_class, 'dependencies'):
-                dependencies = getattr(plugin_class, 'dependencies', [])
-                
+            dependencies = metadata.get("dependencies", [])
+            if dependencies:
                 # 记录依赖关系
                 self._dependencies[plugin_id] = set(dependencies)
                 
-                # 加载依赖
                 for dep_id in dependencies:
                     # 添加反向依赖关系
                     if dep_id not in self._dependents:
                         self._dependents[dep_id] = set()
                     self._dependents[dep_id].add(plugin_id)
+                
+                # 并发加载尚未加载的依赖
+                pending = [dep_id for dep_id in dependencies if dep_id not in self._plugins or dep_id in self._loading]
+                if pending:
+                    logger.info(f"加载插件 {plugin_id} 的依赖: {', '.join(pending)}")
+                    results = await asyncio.gather(*(self.load_plugin(dep_id, initialize) for dep_id in pending))
                     
-                    # 依赖尚未加载，递归加载
-                    if dep_id not in self._plugins:
-                        logger.info(f"加载插件 {plugin_id} 的依赖: {dep_id}")
-                        dep_plugin = await self.load_plugin(dep_id, initialize)
-                        
-                        if dep_plugin is None:
-                            logger.error(f"无法加载插件 {plugin_id} 的依赖: {dep_id}")
-                            self._publish_plugin_error(
-                                plugin_id, 
-                                f"无法加载依赖: {dep_id}"
-                            )
-                            return None
-            
-            # 创建插件实例
-            plugin = plugin_class(self._event_bus)
-            
-            # 添加到已加载插件列表
+                    failed = [dep_id for dep_id, dep_plugin in zip(pending, results) if dep_plugin is None]
+                    if failed:
+                        logger.error(f"无法加载插件 {plugin_id} 的依赖: {', '.join(failed)}")
+                        self._publish_plugin_error(
+                            plugin_id, 
+                            f"无法加载依赖: {', '.join(failed)}"
+                        )
+                        return None
+            
+            timing["dependencies"] = time.perf_counter() - started
+            
+            # 首次使用时导入插件类
+            plugin_class = self._get_plugin_class(plugin_id)
+            
+            # 创建插件实例，独立进程运行的插件在主进程中只保留代理
+            if plugin_id in self._process_plugins:
+                logger.info(f"插件 {plugin_id} 将在独立进程中运行")
+                plugin = ProcessPlugin(self._event_bus, plugin_class, plugin_id)
+            else:
+                plugin = plugin_class(self._event_bus)
+            
+            # 添加到已加载插件列表，依赖总是先于插件完成加载，因此加载顺序满足依赖关系
             self._plugins[plugin_id] = plugin
             self._load_order.append(plugin_id)
             
             # 初始化插件
             if initialize:
+                init_started = time.perf_counter()
                 success = await self._initialize_plugin(plugin)
+                timing["initialize"] = time.perf_counter() - init_started
                 if not success:
                     # 初始化失败，卸载插件
                     await self.unload_plugin(plugin_id)
@@ -249,7 +468,11 @@ class PluginManager:
             # 发布插件加载事件
             self._publish_plugin_loaded(plugin)
             
-            logger.info(f"插件已成功加载: {plugin_id}")
+            timing["total"] = time.perf_counter() - started
+            logger.info(
+                f"插件已成功加载: {plugin_id}，等待依赖 {timing['dependencies']:.3f}秒，"
+                f"初始化 {timing['initialize']:.3f}秒"
+            )
             return plugin
             
         except Exception as e:
@@ -257,6 +480,35 @@ class PluginManager:
             self._publish_plugin_error(plugin_id, f"加载出错: {str(e)}")
             return None
     
+    def _find_dependency_cycle(self, plugin_id: str) -> Optional[List[str]]:
+        """
+        在已发现插件的依赖图中查找从指定插件出发的循环依赖。
+        
+        Args:
+            plugin_id: 插件ID
+            
+        Returns:
+            Optional[List[str]]: 循环路径，如 [a, b, a]，无循环时返回None
+        """
+        path: List[str] = []
+        visited: Set[str] = set()
+        
+        def visit(current: str) -> Optional[List[str]]:
+            if current in path:
+                return path[path.index(current):] + [current]
+            if current in visited or current not in self._discovered_plugins:
+                return None
+            path.append(current)
+            for dep_id in self._discovered_plugins[current].get("dependencies", []):
+                cycle = visit(dep_id)
+                if cycle:
+                    return cycle
+            path.pop()
+            visited.add(current)
+            return None
+        
+        return visit(plugin_id)
+    
     async def _initialize_plugin(self, plugin: PluginBase) -> bool:
         """
         初始化插件。
@@ -392,7 +644,7 @@ class PluginManager:
         # 重新导入模块
         try:
             if plugin_id in self._discovered_plugins:
-                _, module_path = self._discovered_plugins[plugin_id]
+                module_path = self._discovered_plugins[plugin_id]["module_path"]
                 
                 # 重新加载模块
                 logger.debug(f"重新加载模块: {module_path}")
@@ -403,9 +655,10 @@ class PluginManager:
             self._publish_plugin_error(plugin_id, f"重新加载模块出错: {str(e)}")
             return None
         
-        # 从发现的插件中删除插件类，以便从模块重新发现
+        # 从发现的插件中删除插件类，以便从重新加载的模块中获取
         if plugin_id in self._discovered_plugins:
             del self._discovered_plugins[plugin_id]
+        self._plugin_classes.pop(plugin_id, None)
             
         # 重新发现插件
         await self.discover_plugins()
@@ -417,24 +670,72 @@ class PluginManager:
         """
         加载所有发现的插件。
         
+        互不依赖的插件并发初始化，插件只等待自己的依赖，
+        因此总耗时取决于依赖图中最长的一条链，而不是所有插件初始化时间之和。
+        
         Returns:
             List[PluginBase]: 成功加载的插件实例列表
         """
         logger.info("加载所有插件")
         
-        # 获取所有发现的插件ID
-        plugin_ids = list(self._discovered_plugins.keys())
-        loaded_plugins: List[PluginBase] = []
+        # 获取所有发现且启用的插件ID，禁用的插件不会被导入
+        plugin_ids = [plugin_id for plugin_id in self._discovered_plugins if self.is_plugin_enabled(plugin_id)]
+        
+        started = time.perf_counter()
+        results = await asyncio.gather(*(self.load_plugin(plugin_id) for plugin_id in plugin_ids))
+        elapsed = time.perf_counter() - started
         
-        # 按顺序加载插件
-        for plugin_id in plugin_ids:
-            plugin = await self.load_plugin(plugin_id)
-            if plugin:
-                loaded_plugins.append(plugin)
+        loaded_plugins: List[PluginBase] = [plugin for plugin in results if plugin]
         
-        logger.info(f"成功加载了 {len(loaded_plugins)} 个插件")
+        # 汇总耗时：各插件初始化时间之和与关键路径
+        timings = self.get_load_timings()
+        total_init = sum(t["initialize"] for t in timings.values())
+        critical_path = self.get_critical_path()
+        logger.info(
+            f"成功加载了 {len(loaded_plugins)} 个插件，耗时 {elapsed:.3f}秒"
+            f"（初始化时间合计 {total_init:.3f}秒，关键路径: {' -> '.join(critical_path) or '无'}）"
+        )
         return loaded_plugins
     
+    def get_load_timings(self) -> Dict[str, Dict[str, float]]:
+        """
+        获取各插件的加载耗时。
+        
+        Returns:
+            Dict[str, Dict[str, float]]: {插件ID: {"dependencies": 等待依赖的秒数,
+            "initialize": 初始化秒数, "total": 加载总秒数}}
+        """
+        return {
+            plugin_id: {key: round(value, 6) for key, value in timing.items() if key != "started"}
+            for plugin_id, timing in self._load_timings.items()
+        }
+    
+    def get_critical_path(self) -> List[str]:
+        """
+        获取最近一次加载中决定总耗时的依赖链。
+        
+        从最晚完成的插件出发，每一步选择最晚完成的依赖，直到没有依赖为止。
+        
+        Returns:
+            List[str]: 从最底层依赖到最晚完成插件的插件ID列表
+        """
+        finished = {
+            plugin_id: timing["started"] + timing["total"]
+            for plugin_id, timing in self._load_timings.items()
+            if timing["total"] > 0
+        }
+        if not finished:
+            return []
+        
+        path = [max(finished, key=finished.get)]
+        while True:
+            deps = [dep_id for dep_id in self._dependencies.get(path[-1], ()) if dep_id in finished]
+            if not deps:
+                break
+            path.append(max(deps, key=finished.get))
+        path.reverse()
+        return path
+    
     def get_plugin(self, plugin_id: str) -> Optional[PluginBase]:
         """
         获取指定ID的插件实例。
@@ -485,6 +786,8 @@ class PluginManager:
             # 添加加载状态和依赖信息
             info.update({
                 "loaded": True,
+                "out_of_process": plugin_id in self._process_plugins,
+                "load_time": self.get_load_timings().get(plugin_id),
                 "dependencies": list(self._dependencies.get(plugin_id, set())),
                 "dependents": list(self._dependents.get(plugin_id, set()))
             })
@@ -493,17 +796,18 @@ class PluginManager:
             
         # 未加载但已发现的插件
         elif plugin_id in self._discovered_plugins:
-            plugin_class, module_path = self._discovered_plugins[plugin_id]
+            metadata = self._discovered_plugins[plugin_id]
             
-            # 获取类级别的插件元数据
+            # 使用发现清单中的插件元数据，不导入插件模块
             info = {
                 "id": plugin_id,
-                "name": getattr(plugin_class, "name", plugin_id),
-                "version": getattr(plugin_class, "version", "0.1.0"),
-                "description": getattr(plugin_class, "description", ""),
-                "module_path": module_path,
+                "name": metadata.get("name", plugin_id),
+                "version": metadata.get("version", "0.1.0"),
+                "description": metadata.get("description", ""),
+                "module_path": metadata["module_path"],
                 "loaded": False,
-                "dependencies": getattr(plugin_class, "dependencies", []),
+                "enabled": self.is_plugin_enabled(plugin_id),
+                "dependencies": list(metadata.get("dependencies", [])),
                 "dependents": list(self._dependents.get(plugin_id, set()))
             }
             
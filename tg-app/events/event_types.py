@@ -12,6 +12,7 @@ APP_INIT = "app.init"              # 应用初始化
 APP_READY = "app.ready"            # 应用就绪
 APP_SHUTDOWN = "app.shutdown"      # 应用关闭
 APP_ERROR = "app.error"            # 应用错误
+APP_LOOP_STALL = "app.loop_stall"  # 事件循环阻塞
 
 # 配置相关事件
 CONFIG_LOADED = "config.loaded"    # 配置加载完成
@@ -40,6 +41,9 @@ MESSAGE_SENT = "message.sent"                # 发送消息
 MESSAGE_EDITED = "message.edited"            # 消息编辑
 MESSAGE_DELETED = "message.deleted"          # 消息删除
 MESSAGE_GET_FROM_CHANNEL = "message.get_from_channel"  # 从频道获取消息
+MESSAGE_STREAM_FROM_CHANNEL = "message.stream_from_channel"  # 按页获取频道消息
+MESSAGE_STREAM_CANCEL = "message.stream_cancel"  # 停止按页获取
+MESSAGE_PAGE = "message.page"                # 一页频道消息
 
 # 频道事件
 CHANNEL_JOINED = "channel.joined"            # 加入频道
@@ -62,12 +66,14 @@ DOWNLOAD_STARTED = "download.started"        # 开始下载
 DOWNLOAD_PROGRESS = "download.progress"      # 下载进度
 DOWNLOAD_COMPLETED = "download.completed"    # 下载完成
 DOWNLOAD_FAILED = "download.failed"          # 下载失败
+DOWNLOAD_REQUEST = "download.request"        # 请求下载媒体
 
 # 媒体上传事件
 UPLOAD_STARTED = "upload.started"            # 开始上传
 UPLOAD_PROGRESS = "upload.progress"          # 上传进度
 UPLOAD_COMPLETED = "upload.completed"        # 上传完成
 UPLOAD_FAILED = "upload.failed"              # 上传失败
+UPLOAD_REQUEST = "upload.request"            # 请求上传文件
 
 # 任务队列事件
 TASK_CREATED = "task.created"                # 任务创建
@@ -76,6 +82,10 @@ TASK_COMPLETED = "task.completed"            # 任务完成
 TASK_FAILED = "task.failed"                  # 任务失败
 TASK_CANCELLED = "task.cancelled"            # 任务取消
 TASK_PROGRESS = "task.progress"              # 任务进度
+TASK_ADD = "task.add"                        # 添加任务
+TASK_CANCEL = "task.cancel"                  # 取消任务
+TASK_GET_STATUS = "task.get_status"          # 获取任务状态
+TASK_GET_ALL = "task.get_all"                # 获取所有任务
 
 # UI事件
 UI_READY = "ui.ready"                        # UI就绪
@@ -106,6 +116,7 @@ EVENT_CATEGORIES: Dict[str, EventCategory] = {
     APP_READY: EventCategory.APPLICATION,
     APP_SHUTDOWN: EventCategory.APPLICATION,
     APP_ERROR: EventCategory.APPLICATION,
+    APP_LOOP_STALL: EventCategory.APPLICATION,
     
     # 配置事件
     CONFIG_LOADED: EventCategory.CONFIG,
@@ -134,6 +145,9 @@ EVENT_CATEGORIES: Dict[str, EventCategory] = {
     MESSAGE_EDITED: EventCategory.MESSAGE,
     MESSAGE_DELETED: EventCategory.MESSAGE,
     MESSAGE_GET_FROM_CHANNEL: EventCategory.MESSAGE,
+    MESSAGE_STREAM_FROM_CHANNEL: EventCategory.MESSAGE,
+    MESSAGE_STREAM_CANCEL: EventCategory.MESSAGE,
+    MESSAGE_PAGE: EventCategory.MESSAGE,
     
     # 频道事件
     CHANNEL_JOINED: EventCategory.CHANNEL,
@@ -156,12 +170,14 @@ EVENT_CATEGORIES: Dict[str, EventCategory] = {
     DOWNLOAD_PROGRESS: EventCategory.DOWNLOAD,
     DOWNLOAD_COMPLETED: EventCategory.DOWNLOAD,
     DOWNLOAD_FAILED: EventCategory.DOWNLOAD,
+    DOWNLOAD_REQUEST: EventCategory.DOWNLOAD,
     
     # 上传事件
     UPLOAD_STARTED: EventCategory.UPLOAD,
     UPLOAD_PROGRESS: EventCategory.UPLOAD,
     UPLOAD_COMPLETED: EventCategory.UPLOAD,
     UPLOAD_FAILED: EventCategory.UPLOAD,
+    UPLOAD_REQUEST: EventCategory.UPLOAD,
     
     # 任务事件
     TASK_CREATED: EventCategory.TASK,
@@ -170,6 +186,10 @@ EVENT_CATEGORIES: Dict[str, EventCategory] = {
     TASK_FAILED: EventCategory.TASK,
     TASK_CANCELLED: EventCategory.TASK,
     TASK_PROGRESS: EventCategory.TASK,
+    TASK_ADD: EventCategory.TASK,
+    TASK_CANCEL: EventCategory.TASK,
+    TASK_GET_STATUS: EventCategory.TASK,
+    TASK_GET_ALL: EventCategory.TASK,
     
     # UI事件
     UI_READY: EventCategory.UI,
@@ -18,6 +18,7 @@ if str(current_dir) not in sys.path:
     sys.path.insert(0, str(current_dir))
 
 from utils.logger import setup_logger, get_logger
+from utils.profiler import SamplingProfiler, PROFILE_MODES, PROFILE_FORMATS
 
 # 获取日志记录器
 logger = get_logger("main")
@@ -35,10 +36,38 @@ def parse_arguments():
     parser.add_argument('-l', '--log-level', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
                       default='INFO', help='日志级别')
     parser.add_argument('-v', '--version', action='store_true', help='显示版本信息')
+    parser.add_argument('--profile', action='store_true', help='启用采样分析，运行期间周期性采集调用栈')
+    parser.add_argument('--profile-output', help='采样结果输出路径 (默认: logs/profile.txt 或 logs/profile.speedscope.json)')
+    parser.add_argument('--profile-interval', type=float, default=10.0, help='采样间隔，单位毫秒 (默认: 10)')
+    parser.add_argument('--profile-format', choices=PROFILE_FORMATS, default='collapsed', help='采样结果格式')
+    parser.add_argument('--profile-mode', choices=PROFILE_MODES, default='thread',
+                      help='采样模式: thread 统计线程调用栈, task 按协程统计墙钟时间')
     
     return parser.parse_args()
 
 
+def create_profiler(args) -> SamplingProfiler:
+    """
+    根据命令行参数创建采样分析器。
+    
+    Args:
+        args: 解析后的参数
+        
+    Returns:
+        SamplingProfiler: 采样分析器
+    """
+    output_path = args.profile_output
+    if not output_path:
+        output_path = "logs/profile.speedscope.json" if args.profile_format == "speedscope" else "logs/profile.txt"
+    
+    return SamplingProfiler(
+        output_path,
+        interval=args.profile_interval / 1000,
+        mode=args.profile_mode,
+        output_format=args.profile_format
+    )
+
+
 def show_version():
     """显示版本信息"""
     print("my-TG-app v0.1.0")
@@ -64,7 +93,8 @@ def main():
     # 动态导入应用程序模块
     try:
         from core.application import run_application
-        return run_application()
+        profiler = create_profiler(args) if args.profile else None
+        return run_application(profiler)
     except ImportError as e:
         logger.critical(f"导入错误: {str(e)}")
         return 1
@@ -2,10 +2,31 @@
 my-TG-app 插件包。
 
 此包包含应用的所有插件模块，通过插件实现各种功能。
+插件类在首次访问时才导入，导入 plugins.base 不会连带导入 Pyrogram。
 """
 
-from plugins.client import ClientPlugin
+import importlib
+
+# 延迟导出的插件类 {类名: 模块路径}
+_LAZY_EXPORTS = {
+    'ClientPlugin': 'plugins.client',
+    'DownloaderPlugin': 'plugins.downloader',
+    'UploaderPlugin': 'plugins.uploader',
+    'TaskQueuePlugin': 'plugins.utils',
+}
 
 __all__ = [
     'ClientPlugin',
+    'DownloaderPlugin',
+    'UploaderPlugin',
+    'TaskQueuePlugin',
 ]
+
+
+def __getattr__(name):
+    """首次访问插件类时导入其所在模块"""
+    if name in _LAZY_EXPORTS:
+        value = getattr(importlib.import_module(_LAZY_EXPORTS[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
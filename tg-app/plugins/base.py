@@ -47,6 +47,9 @@ class PluginBase(abc.ABC):
         # 存储插件的订阅事件处理器ID {事件类型: 处理器ID}
         self._event_handlers: Dict[str, str] = {}
         
+        # 存储插件绑定的请求处理器 {事件类型: 处理器函数}
+        self._rpc_handlers: Dict[str, Any] = {}
+        
         # 插件配置
         self._config: Dict[str, Any] = {}
         
@@ -109,6 +112,12 @@ class PluginBase(abc.ABC):
             self._event_bus.unsubscribe_by_id(event_type, handler_id)
             
         self._event_handlers.clear()
+        
+        # 解除所有请求处理器
+        for event_type, handler in self._rpc_handlers.items():
+            self._event_bus.unregister_rpc(event_type, handler)
+            
+        self._rpc_handlers.clear()
         self._initialized = False
     
     def get_metadata(self) -> Dict[str, Any]:
@@ -210,6 +219,35 @@ class PluginBase(abc.ABC):
             
         return success
     
+    def register_rpc_handler(self, event_type: str, handler) -> None:
+        """
+        绑定请求处理器，publish_and_wait 请求该事件时直接调用，不经过订阅分发。
+        
+        Args:
+            event_type: 事件类型
+            handler: 异步处理函数，返回响应字典
+        """
+        self._event_bus.register_rpc(event_type, handler)
+        self._rpc_handlers[event_type] = handler
+        self._logger.debug(f"绑定请求处理器: {event_type} -> {handler.__name__}")
+    
+    def unregister_rpc_handler(self, event_type: str) -> bool:
+        """
+        解除请求处理器的绑定。
+        
+        Args:
+            event_type: 事件类型
+            
+        Returns:
+            bool: 是否成功解除
+        """
+        handler = self._rpc_handlers.pop(event_type, None)
+        if handler is None:
+            self._logger.warning(f"未绑定的请求处理器: {event_type}")
+            return False
+            
+        return self._event_bus.unregister_rpc(event_type, handler)
+    
     async def publish_event(self, event_type: str, data: Optional[Dict[str, Any]] = None) -> int:
         """
         发布事件。
@@ -246,11 +284,8 @@ class PluginBase(abc.ABC):
         Returns:
             Optional[Dict[str, Any]]: 事件响应数据，如果超时或没有响应则返回None
         """
-        if data is None:
-            data = {}
-            
-        # 添加插件ID到事件数据
-        data["source_plugin"] = self.id
+        # 添加插件ID到事件数据，使用副本，不修改调用方的字典
+        data = {**data, "source_plugin": self.id} if data else {"source_plugin": self.id}
         
         return await self._event_bus.publish_and_wait(event_type, data, timeout)
     
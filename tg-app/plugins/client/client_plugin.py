@@ -17,6 +17,13 @@ class ClientPlugin(PluginBase):
     Telegram客户端插件，负责管理与Telegram API的连接
     """
     
+    # 插件元数据，定义在类上以便不实例化即可发现插件
+    id = "client"
+    name = "Telegram客户端插件"
+    version = "1.0.0"
+    description = "管理与Telegram API的连接"
+    dependencies = []  # 客户端插件是基础插件，没有依赖
+    
     def __init__(self, event_bus):
         """
         初始化客户端插件
@@ -28,13 +35,6 @@ class ClientPlugin(PluginBase):
         
         self.client = None
         self.is_connected = False
-        
-        # 定义插件元数据
-        self.id = "client"
-        self.name = "Telegram客户端插件"
-        self.version = "1.0.0"
-        self.description = "管理与Telegram API的连接"
-        self.dependencies = []  # 客户端插件是基础插件，没有依赖
     
     async def initialize(self) -> None:
         """初始化插件"""
@@ -44,7 +44,7 @@ class ClientPlugin(PluginBase):
         self.register_event_handler(events.CLIENT_CONNECT, self._handle_connect)
         self.register_event_handler(events.CLIENT_DISCONNECT, self._handle_disconnect)
         self.register_event_handler(events.APP_SHUTDOWN, self._handle_app_shutdown)
-        self.register_event_handler(events.CLIENT_GET_INSTANCE, self._handle_get_instance)
+        self.register_rpc_handler(events.CLIENT_GET_INSTANCE, self._handle_get_instance)
         
         # 获取配置
         config = await self.get_config()
@@ -320,7 +320,7 @@ class ClientPlugin(PluginBase):
         self.unregister_event_handler(events.CLIENT_CONNECT)
         self.unregister_event_handler(events.CLIENT_DISCONNECT)
         self.unregister_event_handler(events.APP_SHUTDOWN)
-        self.unregister_event_handler(events.CLIENT_GET_INSTANCE)
+        self.unregister_rpc_handler(events.CLIENT_GET_INSTANCE)
         
         self.client = None
         logger.info("Telegram客户端插件已关闭") 
\ No newline at end of file
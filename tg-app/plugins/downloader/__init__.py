@@ -0,0 +1,9 @@
+"""
+媒体下载插件包。
+
+该包提供了并发下载消息媒体的功能，通过事件总线接收下载请求。
+"""
+
+from .downloader_plugin import DownloaderPlugin
+
+__all__ = ['DownloaderPlugin']
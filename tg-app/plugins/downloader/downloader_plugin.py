@@ -0,0 +1,539 @@
+"""
+媒体下载插件 (DownloaderPlugin)
+通过事件总线接收下载请求，在有并发上限的下载引擎中并行下载媒体文件
+
+请求格式 (DOWNLOAD_REQUEST):
+1. 直接传入消息对象: {"messages": [Message, ...]}
+2. 传入聊天ID和消息ID: {"chat_id": -1001234567890, "message_ids": [1, 2, 3]}
+
+每个请求下载完成后只发布一次 DOWNLOAD_COMPLETED（全部失败时为 DOWNLOAD_FAILED），
+DOWNLOAD_PROGRESS 按请求汇总所有文件的进度，并限制发布频率。
+"""
+
+import os
+import time
+import uuid
+import asyncio
+import mimetypes
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+from pyrogram.errors import FloodWait
+
+from plugins.base import PluginBase
+from events import event_types as events
+from task_queue import run_in_queue, TaskCancelled
+from utils.concurrency import ConcurrencyLimiter
+from utils.logger import get_logger
+
+# 获取日志记录器
+logger = get_logger("downloader_plugin")
+
+# Pyrogram stream_media 每次返回的数据块大小，断点续传的偏移量以此为单位
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+# 没有文件名的媒体类型使用的扩展名
+DEFAULT_EXTENSIONS = {
+    "photo": ".jpg",
+    "video": ".mp4",
+    "animation": ".mp4",
+    "video_note": ".mp4",
+    "voice": ".ogg",
+    "audio": ".mp3",
+    "sticker": ".webp",
+}
+
+DEFAULT_PATH_FORMAT = "{date}/{chat_id}/{message_id}_{file_name}"
+
+
+def _get_media(message: Any) -> Tuple[Optional[str], Any]:
+    """
+    获取消息中的媒体类型和媒体对象
+
+    Args:
+        message: Pyrogram消息对象
+
+    Returns:
+        Tuple[Optional[str], Any]: (媒体类型, 媒体对象)，没有媒体时为 (None, None)
+    """
+    media_type = getattr(getattr(message, "media", None), "value", None)
+    if not media_type:
+        return None, None
+    return media_type, getattr(message, media_type, None)
+
+
+def _file_key(message: Any) -> Tuple[Any, int]:
+    """文件在下载请求中的键 (聊天ID, 消息ID)"""
+    return getattr(getattr(message, "chat", None), "id", None), message.id
+
+
+def _safe_file_name(name: str) -> str:
+    """去除文件名中的路径分隔符和不可用字符"""
+    for char in '/\\:*?"<>|\0':
+        name = name.replace(char, "_")
+    return name.strip() or "file"
+
+
+class DownloadRequest:
+    """一次下载请求，可以包含多个文件，所有文件结束后统一发布结果"""
+
+    def __init__(self, request_id: str, messages: List[Any], priority: int = 0):
+        """
+        初始化下载请求
+
+        Args:
+            request_id: 请求ID
+            messages: 包含媒体的消息列表
+            priority: 在任务队列中的优先级
+        """
+        self.request_id = request_id
+        self.priority = priority
+        self.messages = messages
+        self.total_bytes = sum(getattr(_get_media(m)[1], "file_size", 0) or 0 for m in messages)
+        # 各文件已下载的字节数 {(聊天ID, 消息ID): 字节数}，不同聊天的消息ID可能相同
+        self.file_progress: Dict[Tuple[Any, int], int] = {}
+        self.files: List[Dict[str, Any]] = []
+        self.failed: List[Dict[str, Any]] = []
+        self.started = time.time()
+        self.last_progress = 0.0
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+    @property
+    def current_bytes(self) -> int:
+        """已下载的字节数"""
+        return sum(self.file_progress.values())
+
+    @property
+    def finished(self) -> int:
+        """已结束（成功或失败）的文件数"""
+        return len(self.files) + len(self.failed)
+
+
+class DownloaderPlugin(PluginBase):
+    """
+    媒体下载插件，负责下载消息中的媒体文件
+    """
+
+    # 插件元数据，定义在类上以便不实例化即可发现插件
+    id = "downloader"
+    name = "媒体下载插件"
+    version = "1.0.0"
+    description = "并发下载消息中的媒体文件"
+    dependencies = ["client"]
+
+    def __init__(self, event_bus):
+        """
+        初始化下载插件
+
+        Args:
+            event_bus: 事件总线
+        """
+        super().__init__(event_bus)
+
+        self.client = None
+        self.download_dir = "downloads"
+        self.path_format = DEFAULT_PATH_FORMAT
+        self.chunk_size = 131072
+        self.timeout = 300.0
+        self.retries = 3
+        self.retry_delay = 2.0
+        self.progress_interval = 0.5
+        self.limiter = ConcurrencyLimiter(10)
+
+        # 进行中的请求 {请求ID: 请求}
+        self._requests: Dict[str, DownloadRequest] = {}
+        # 进行中的下载任务
+        self._tasks: set = set()
+
+        self.stats = {
+            "requests": 0,
+            "completed": 0,
+            "failed": 0,
+            "skipped": 0,
+            "bytes": 0
+        }
+
+    async def initialize(self) -> None:
+        """初始化插件"""
+        logger.info("正在初始化媒体下载插件...")
+
+        self.register_rpc_handler(events.DOWNLOAD_REQUEST, self._handle_download_request)
+        self.register_event_handler(events.CONFIG_CHANGED, self._handle_config_changed)
+
+        await self.load_config()
+
+        # 获取客户端实例
+        response = await self.event_bus.publish_and_wait(
+            events.CLIENT_GET_INSTANCE,
+            timeout=5.0
+        )
+
+        if not response or not response.get("success", False) or not response.get("client"):
+            logger.error("获取客户端实例失败")
+            return
+
+        self.client = response.get("client")
+        await super().initialize()
+        logger.info(f"媒体下载插件初始化完成，最大并发数: {self.limiter.limit}")
+
+    async def load_config(self) -> None:
+        """从配置管理器读取 [downloader] 配置，运行中调用时立即生效"""
+        response = await self.publish_and_wait(
+            events.CONFIG_GET_SECTION,
+            {"section": "downloader"},
+            timeout=5.0
+        )
+        config = response.get("data", {}) if response and response.get("success", False) else {}
+
+        storage = await self.publish_and_wait(
+            events.CONFIG_GET_SECTION,
+            {"section": "storage"},
+            timeout=5.0
+        )
+        storage_config = storage.get("data", {}) if storage and storage.get("success", False) else {}
+
+        try:
+            self.download_dir = str(config.get("download_dir") or storage_config.get("download_dir") or self.download_dir)
+            self.path_format = str(config.get("path_format") or self.path_format)
+            self.chunk_size = max(1, int(config.get("chunk_size", self.chunk_size)))
+            self.timeout = float(config.get("timeout", self.timeout))
+            self.retries = max(0, int(config.get("retries", self.retries)))
+            self.retry_delay = float(config.get("retry_delay", self.retry_delay))
+            self.progress_interval = float(config.get("progress_interval", self.progress_interval))
+            self.limiter.set_limit(int(config.get("max_concurrent", self.limiter.limit)))
+        except (TypeError, ValueError) as e:
+            logger.error(f"下载配置无效，保留当前设置: {str(e)}")
+
+    async def _handle_config_changed(self, data: Dict[str, Any]) -> None:
+        """
+        处理配置变更事件，[downloader] 或 [storage] 变化时重新读取配置
+
+        Args:
+            data: 事件数据
+        """
+        if data.get("section") in ("downloader", "storage"):
+            await self.load_config()
+            logger.info(f"下载配置已更新，最大并发数: {self.limiter.limit}")
+
+    async def _handle_download_request(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        处理下载请求
+
+        Args:
+            data: 事件数据，包含 "messages"，或 "chat_id" 和 "message_ids"；
+                  "wait" 为真时等待下载结束后返回结果
+
+        Returns:
+            Dict[str, Any]: 请求ID，或等待时的下载结果
+        """
+        try:
+            messages = data.get("messages")
+            if messages is None:
+                chat_id = data.get("chat_id")
+                message_ids = data.get("message_ids") or ([data["message_id"]] if "message_id" in data else [])
+                if not chat_id or not message_ids:
+                    return {"success": False, "error": "未提供消息或聊天ID和消息ID"}
+                messages = await self._get_messages(chat_id, message_ids)
+
+            request = self.submit(messages, request_id=data.get("request_id"), priority=int(data.get("priority", 0)))
+        except Exception as e:
+            error_msg = f"创建下载请求时出错: {str(e)}"
+            logger.exception(error_msg)
+            return {"success": False, "error": error_msg}
+
+        if data.get("wait", False):
+            return await request.future
+
+        return {"success": True, "request_id": request.request_id, "files": len(request.messages)}
+
+    async def _get_messages(self, chat_id: Any, message_ids: List[int]) -> List[Any]:
+        """
+        按消息ID获取消息，每次最多获取200条
+
+        Args:
+            chat_id: 聊天ID
+            message_ids: 消息ID列表
+
+        Returns:
+            List[Any]: 消息列表
+        """
+        messages = []
+        for start in range(0, len(message_ids), 200):
+            result = await self.client.get_messages(chat_id, message_ids[start:start + 200])
+            messages.extend(result if isinstance(result, list) else [result])
+        return [m for m in messages if m is not None and not getattr(m, "empty", False)]
+
+    def submit(self, messages: List[Any], request_id: Optional[str] = None, priority: int = 0) -> DownloadRequest:
+        """
+        提交下载请求，立即返回，文件在下载引擎中并发下载
+
+        Args:
+            messages: 消息列表，不包含媒体的消息会被忽略
+            request_id: 请求ID，默认自动生成
+            priority: 在任务队列中的优先级
+
+        Returns:
+            DownloadRequest: 下载请求，可以等待 request.future 获取结果
+        """
+        if self.client is None:
+            raise RuntimeError("客户端未初始化")
+
+        media_messages = [m for m in messages if _get_media(m)[1] is not None]
+        request = DownloadRequest(request_id or uuid.uuid4().hex, media_messages, priority)
+        self._requests[request.request_id] = request
+        self.stats["requests"] += 1
+
+        task = asyncio.create_task(self._run_request(request))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return request
+
+    async def download(self, messages: List[Any], request_id: Optional[str] = None, priority: int = 0) -> Dict[str, Any]:
+        """
+        下载消息中的媒体并等待结束，供同一进程中的其他插件直接调用
+
+        Args:
+            messages: 消息列表
+            request_id: 请求ID
+            priority: 在任务队列中的优先级
+
+        Returns:
+            Dict[str, Any]: 下载结果
+        """
+        return await self.submit(messages, request_id, priority).future
+
+    async def _run_request(self, request: DownloadRequest) -> None:
+        """并发下载请求中的所有文件，结束后发布结果"""
+        await self.publish_event(events.DOWNLOAD_STARTED, events.create_event_data(
+            events.DOWNLOAD_STARTED,
+            request_id=request.request_id,
+            files=len(request.messages),
+            total_bytes=request.total_bytes
+        ))
+
+        try:
+            await asyncio.gather(*(self._download_file(request, message) for message in request.messages))
+        finally:
+            self._requests.pop(request.request_id, None)
+
+        result = {
+            "success": bool(request.files) or not request.failed,
+            "request_id": request.request_id,
+            "files": request.files,
+            "failed": request.failed,
+            "total_bytes": request.total_bytes,
+            "duration": time.time() - request.started
+        }
+
+        if result["success"]:
+            await self.publish_event(events.DOWNLOAD_COMPLETED, events.create_event_data(events.DOWNLOAD_COMPLETED, **result))
+        else:
+            result["error"] = request.failed[0]["error"]
+            await self.publish_event(events.DOWNLOAD_FAILED, events.create_event_data(events.DOWNLOAD_FAILED, **result))
+
+        if not request.future.done():
+            request.future.set_result(result)
+
+    async def _download_file(self, request: DownloadRequest, message: Any) -> None:
+        """
+        在并发上限内下载单个文件，失败时按配置重试；
+        启用任务队列插件时每次下载作为一个任务执行，占用全局并发预算
+        """
+        media_type, media = _get_media(message)
+        file_size = getattr(media, "file_size", 0) or 0
+        file_path = self._build_path(message, media_type, media)
+        info = {
+            "chat_id": getattr(getattr(message, "chat", None), "id", None),
+            "message_id": message.id,
+            "media_group_id": getattr(message, "media_group_id", None),
+            "media_type": media_type,
+            "file_path": file_path,
+            "file_size": file_size,
+            "skipped": False
+        }
+
+        # 文件已存在且大小一致时跳过
+        if os.path.exists(file_path) and file_size and os.path.getsize(file_path) == file_size:
+            info["skipped"] = True
+            request.file_progress[_file_key(message)] = file_size
+            request.files.append(info)
+            self.stats["skipped"] += 1
+            await self._publish_progress(request, force=True)
+            return
+
+        attempt = 0
+        while True:
+            try:
+                # 每次尝试单独占用并发许可，等待 FloodWait 和重试间隔时归还，不阻塞其他文件
+                async with self.limiter:
+                    await run_in_queue(
+                        self.event_bus,
+                        lambda: self._stream_to_file(request, message, file_path),
+                        priority=request.priority,
+                        metadata={"type": "download", "request_id": request.request_id, "message_id": message.id}
+                    )
+                break
+            except FloodWait as e:
+                logger.warning(f"下载消息 {message.id} 触发频率限制，等待 {e.value} 秒")
+                await asyncio.sleep(e.value)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # 在任务队列中被取消的下载不再重试
+                attempt = self.retries + 1 if isinstance(e, TaskCancelled) else attempt + 1
+                if attempt > self.retries:
+                    logger.error(f"下载消息 {message.id} 失败: {str(e)}")
+                    request.failed.append({**info, "error": str(e)})
+                    self.stats["failed"] += 1
+                    await self._publish_progress(request, force=True)
+                    return
+                logger.warning(f"下载消息 {message.id} 出错，{self.retry_delay * attempt} 秒后第 {attempt} 次重试: {str(e)}")
+                await asyncio.sleep(self.retry_delay * attempt)
+
+        info["file_size"] = os.path.getsize(file_path)
+        request.files.append(info)
+        self.stats["completed"] += 1
+        await self._publish_progress(request, force=True)
+
+    async def _stream_to_file(self, request: DownloadRequest, message: Any, file_path: str) -> None:
+        """
+        以流的方式下载文件，先写入 .part 文件，完成后重命名；
+        .part 文件已存在时从最后一个完整数据块继续下载
+
+        Args:
+            request: 下载请求
+            message: 消息对象
+            file_path: 目标文件路径
+        """
+        loop = asyncio.get_running_loop()
+        part_path = file_path + ".part"
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+
+        offset_chunks = 0
+        if os.path.exists(part_path):
+            offset_chunks = os.path.getsize(part_path) // STREAM_CHUNK_SIZE
+        written = offset_chunks * STREAM_CHUNK_SIZE
+        key = _file_key(message)
+        request.file_progress[key] = written
+
+        with open(part_path, "ab" if offset_chunks else "wb") as f:
+            if offset_chunks:
+                f.truncate(written)
+                logger.debug(f"消息 {message.id} 从 {written} 字节处继续下载")
+
+            buffer = bytearray()
+            stream = self.client.stream_media(message, offset=offset_chunks).__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(stream.__anext__(), self.timeout)
+                except StopAsyncIteration:
+                    break
+
+                buffer += chunk
+                written += len(chunk)
+                request.file_progress[key] = written
+                self.stats["bytes"] += len(chunk)
+
+                # 累计到 chunk_size 后在线程池中写入，避免阻塞事件循环
+                if len(buffer) >= self.chunk_size:
+                    data, buffer = bytes(buffer), bytearray()
+                    await loop.run_in_executor(None, f.write, data)
+                await self._publish_progress(request)
+
+            if buffer:
+                await loop.run_in_executor(None, f.write, bytes(buffer))
+
+        os.replace(part_path, file_path)
+
+    async def _publish_progress(self, request: DownloadRequest, force: bool = False) -> None:
+        """
+        发布请求的汇总进度，发布间隔不小于 progress_interval
+
+        Args:
+            request: 下载请求
+            force: 是否忽略发布间隔（文件结束时）
+        """
+        now = time.monotonic()
+        if not force and now - request.last_progress < self.progress_interval:
+            return
+        request.last_progress = now
+
+        current = request.current_bytes
+        total = request.total_bytes
+        await self.publish_event(events.DOWNLOAD_PROGRESS, events.create_event_data(
+            events.DOWNLOAD_PROGRESS,
+            request_id=request.request_id,
+            current=current,
+            total=total,
+            percent=round(current / total * 100, 2) if total else 100.0,
+            files_done=request.finished,
+            files_total=len(request.messages)
+        ))
+
+    def _build_path(self, message: Any, media_type: str, media: Any) -> str:
+        """
+        按 path_format 生成文件保存路径
+
+        Args:
+            message: 消息对象
+            media_type: 媒体类型
+            media: 媒体对象
+
+        Returns:
+            str: 文件路径
+        """
+        file_name = getattr(media, "file_name", None)
+        if not file_name:
+            extension = mimetypes.guess_extension(getattr(media, "mime_type", None) or "") or DEFAULT_EXTENSIONS.get(media_type, "")
+            file_name = f"{media_type}_{message.id}{extension}"
+
+        date = getattr(message, "date", None) or datetime.now()
+        values = {
+            "date": date.strftime("%Y-%m-%d"),
+            "chat_id": getattr(getattr(message, "chat", None), "id", "unknown"),
+            "message_id": message.id,
+            "media_group_id": getattr(message, "media_group_id", None) or "single",
+            "media_type": media_type,
+            "file_name": _safe_file_name(file_name),
+        }
+
+        try:
+            relative_path = self.path_format.format(**values)
+        except (KeyError, IndexError, ValueError) as e:
+            logger.warning(f"下载路径格式无效 ({e})，使用默认格式")
+            relative_path = DEFAULT_PATH_FORMAT.format(**values)
+
+        return os.path.join(self.download_dir, relative_path)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取下载统计
+
+        Returns:
+            Dict[str, Any]: 统计信息
+        """
+        return {
+            **self.stats,
+            "active": self.limiter.active,
+            "waiting": self.limiter.waiting,
+            "max_concurrent": self.limiter.limit,
+            "pending_requests": len(self._requests)
+        }
+
+    async def shutdown(self) -> None:
+        """关闭插件，取消进行中的下载"""
+        logger.info("正在关闭媒体下载插件...")
+
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+        for request in self._requests.values():
+            if not request.future.done():
+                request.future.set_result({"success": False, "request_id": request.request_id, "error": "下载插件已关闭"})
+        self._requests.clear()
+
+        await super().shutdown()
+        self.client = None
+        logger.info("媒体下载插件已关闭")
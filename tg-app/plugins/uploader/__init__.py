@@ -0,0 +1,9 @@
+"""
+媒体上传插件包。
+
+该包提供了把本地文件发送到多个目标的功能，每个文件只上传一次。
+"""
+
+from .uploader_plugin import UploaderPlugin
+
+__all__ = ['UploaderPlugin']
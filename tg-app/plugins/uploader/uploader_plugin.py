@@ -0,0 +1,547 @@
+"""
+媒体上传插件 (UploaderPlugin)
+通过事件总线接收上传请求，把本地文件发送到一个或多个目标聊天
+
+请求格式 (UPLOAD_REQUEST):
+{"files": [{"path": "a.jpg", "caption": "..."}, ...], "targets": [-1001, -1002], "group": False}
+
+每个文件只上传一次：第一个目标发送成功后得到 Telegram 的 file_id，
+其余目标直接按 file_id 发送，不再重复传输文件内容。每个目标是一条独立的
+发送通道，通道内按请求中的顺序发送，不同通道并发进行。
+"""
+
+import os
+import time
+import uuid
+import asyncio
+import mimetypes
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+from pyrogram.errors import FloodWait
+from pyrogram.types import InputMediaPhoto, InputMediaVideo, InputMediaAudio, InputMediaDocument, InputMediaAnimation
+
+from plugins.base import PluginBase
+from events import event_types as events
+from task_queue import run_in_queue, TaskCancelled
+from utils.concurrency import ConcurrencyLimiter
+from utils.logger import get_logger
+
+# 获取日志记录器
+logger = get_logger("uploader_plugin")
+
+# 媒体组中各媒体类型对应的 InputMedia 类
+INPUT_MEDIA_TYPES = {
+    "photo": InputMediaPhoto,
+    "video": InputMediaVideo,
+    "audio": InputMediaAudio,
+    "document": InputMediaDocument,
+    "animation": InputMediaAnimation,
+}
+
+# Telegram 媒体组最多包含的文件数
+MEDIA_GROUP_LIMIT = 10
+
+# 记住的 file_id 数量上限
+FILE_ID_CACHE_SIZE = 1000
+
+
+def _guess_media_type(path: str) -> str:
+    """根据文件扩展名推断媒体类型"""
+    mime_type = mimetypes.guess_type(path)[0] or ""
+    if mime_type == "image/gif":
+        return "animation"
+    for prefix, media_type in (("image/", "photo"), ("video/", "video"), ("audio/", "audio")):
+        if mime_type.startswith(prefix):
+            return media_type
+    return "document"
+
+
+def _get_file_id(message: Any) -> Optional[str]:
+    """从发送结果中获取媒体的 file_id"""
+    media_type = getattr(getattr(message, "media", None), "value", None)
+    return getattr(getattr(message, media_type, None), "file_id", None) if media_type else None
+
+
+class UploadItem:
+    """待上传的单个文件"""
+
+    def __init__(self, data: Dict[str, Any]):
+        """
+        初始化上传文件
+
+        Args:
+            data: 文件信息，包含 path（或下载插件结果中的 file_path），可选 media_type、caption
+        """
+        self.path = str(data.get("path") or data.get("file_path"))
+        if not os.path.isfile(self.path):
+            raise FileNotFoundError(f"文件不存在: {self.path}")
+
+        stat = os.stat(self.path)
+        self.size = stat.st_size
+        self.cache_key = (os.path.abspath(self.path), stat.st_size, stat.st_mtime_ns)
+        media_type = data.get("media_type")
+        self.media_type = media_type if media_type in INPUT_MEDIA_TYPES else _guess_media_type(self.path)
+        self.caption = data.get("caption") or ""
+        self.file_id: Optional[str] = None
+
+
+class UploadRequest:
+    """一次上传请求，所有目标发送结束后统一发布结果"""
+
+    def __init__(self, request_id: str, units: List[List[UploadItem]], targets: List[Any], group: bool,
+                 priority: int = 0):
+        """
+        初始化上传请求
+
+        Args:
+            request_id: 请求ID
+            units: 发送单元，每个单元是一条消息或一个媒体组
+            targets: 目标聊天列表
+            group: 是否以媒体组发送
+            priority: 在任务队列中的优先级
+        """
+        self.request_id = request_id
+        self.priority = priority
+        self.units = units
+        self.targets = targets
+        self.group = group
+        self.total_bytes = sum(item.size for unit in units for item in unit)
+        self.file_progress: Dict[str, int] = {}
+        # 每个单元上传文件内容后的 file_id，上传失败时为 None，由下一个目标接手上传
+        self.file_ids: List[asyncio.Future] = []
+        # 每个目标收到的消息ID {目标: [消息ID]}
+        self.messages: Dict[str, List[int]] = {}
+        self.failed: List[Dict[str, Any]] = []
+        self.started = time.time()
+        self.last_progress = 0.0
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+class UploaderPlugin(PluginBase):
+    """
+    媒体上传插件，负责把本地文件发送到目标聊天
+    """
+
+    # 插件元数据，定义在类上以便不实例化即可发现插件
+    id = "uploader"
+    name = "媒体上传插件"
+    version = "1.0.0"
+    description = "上传本地文件到多个目标，文件内容只传输一次"
+    dependencies = ["client"]
+
+    def __init__(self, event_bus):
+        """
+        初始化上传插件
+
+        Args:
+            event_bus: 事件总线
+        """
+        super().__init__(event_bus)
+
+        self.client = None
+        self.timeout = 300.0
+        self.retries = 3
+        self.retry_delay = 5.0
+        self.wait_between_messages = 1.0
+        self.progress_interval = 0.5
+        # 限制同时传输文件内容的发送数，按 file_id 发送不占用名额
+        self.limiter = ConcurrencyLimiter(3)
+
+        # 已上传文件的 file_id {(绝对路径, 大小, 修改时间): file_id}
+        self._file_ids: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+        self._requests: Dict[str, UploadRequest] = {}
+        self._tasks: set = set()
+
+        self.stats = {
+            "requests": 0,
+            "uploaded": 0,
+            "reused": 0,
+            "failed": 0,
+            "bytes": 0
+        }
+
+    async def initialize(self) -> None:
+        """初始化插件"""
+        logger.info("正在初始化媒体上传插件...")
+
+        self.register_rpc_handler(events.UPLOAD_REQUEST, self._handle_upload_request)
+        self.register_event_handler(events.CONFIG_CHANGED, self._handle_config_changed)
+
+        await self.load_config()
+
+        # 获取客户端实例
+        response = await self.event_bus.publish_and_wait(
+            events.CLIENT_GET_INSTANCE,
+            timeout=5.0
+        )
+
+        if not response or not response.get("success", False) or not response.get("client"):
+            logger.error("获取客户端实例失败")
+            return
+
+        self.client = response.get("client")
+        await super().initialize()
+        logger.info(f"媒体上传插件初始化完成，最大并发上传数: {self.limiter.limit}")
+
+    async def load_config(self) -> None:
+        """从配置管理器读取 [uploader] 配置，运行中调用时立即生效"""
+        response = await self.publish_and_wait(
+            events.CONFIG_GET_SECTION,
+            {"section": "uploader"},
+            timeout=5.0
+        )
+        config = response.get("data", {}) if response and response.get("success", False) else {}
+
+        try:
+            self.timeout = float(config.get("timeout", self.timeout))
+            self.retries = max(0, int(config.get("retries", self.retries)))
+            self.retry_delay = float(config.get("retry_delay", self.retry_delay))
+            self.wait_between_messages = float(config.get("wait_between_messages", self.wait_between_messages))
+            self.progress_interval = float(config.get("progress_interval", self.progress_interval))
+            self.limiter.set_limit(int(config.get("max_concurrent", self.limiter.limit)))
+        except (TypeError, ValueError) as e:
+            logger.error(f"上传配置无效，保留当前设置: {str(e)}")
+
+    async def _handle_config_changed(self, data: Dict[str, Any]) -> None:
+        """
+        处理配置变更事件，[uploader] 变化时重新读取配置
+
+        Args:
+            data: 事件数据
+        """
+        if data.get("section") == "uploader":
+            await self.load_config()
+            logger.info(f"上传配置已更新，最大并发上传数: {self.limiter.limit}")
+
+    async def _handle_upload_request(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        处理上传请求
+
+        Args:
+            data: 事件数据，包含 "files" 和 "targets"，可选 "group"；
+                  "wait" 为真时等待上传结束后返回结果
+
+        Returns:
+            Dict[str, Any]: 请求ID，或等待时的上传结果
+        """
+        try:
+            request = self.submit(
+                data.get("files") or [],
+                data.get("targets") or [],
+                group=data.get("group", False),
+                request_id=data.get("request_id"),
+                priority=int(data.get("priority", 0))
+            )
+        except Exception as e:
+            error_msg = f"创建上传请求时出错: {str(e)}"
+            logger.error(error_msg)
+            return {"success": False, "error": error_msg}
+
+        if data.get("wait", False):
+            return await request.future
+
+        return {"success": True, "request_id": request.request_id, "files": sum(len(unit) for unit in request.units)}
+
+    def submit(self, files: List[Dict[str, Any]], targets: List[Any], group: bool = False,
+               request_id: Optional[str] = None, priority: int = 0) -> UploadRequest:
+        """
+        提交上传请求，立即返回
+
+        Args:
+            files: 文件列表
+            targets: 目标聊天列表，第一个目标上传文件内容，其余目标复用 file_id
+            group: 是否以媒体组发送（每组最多10个文件）
+            request_id: 请求ID，默认自动生成
+            priority: 在任务队列中的优先级
+
+        Returns:
+            UploadRequest: 上传请求，可以等待 request.future 获取结果
+        """
+        if self.client is None:
+            raise RuntimeError("客户端未初始化")
+        if not files or not targets:
+            raise ValueError("未提供文件或目标")
+
+        items = [UploadItem(f) for f in files]
+        if group:
+            units = [items[i:i + MEDIA_GROUP_LIMIT] for i in range(0, len(items), MEDIA_GROUP_LIMIT)]
+        else:
+            units = [[item] for item in items]
+
+        request = UploadRequest(request_id or uuid.uuid4().hex, units, list(targets), group, priority)
+        self._requests[request.request_id] = request
+        self.stats["requests"] += 1
+
+        task = asyncio.create_task(self._run_request(request))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return request
+
+    async def upload(self, files: List[Dict[str, Any]], targets: List[Any], group: bool = False,
+                     request_id: Optional[str] = None, priority: int = 0) -> Dict[str, Any]:
+        """
+        上传文件并等待结束，供同一进程中的其他插件直接调用
+
+        Args:
+            files: 文件列表
+            targets: 目标聊天列表
+            group: 是否以媒体组发送
+            request_id: 请求ID
+            priority: 在任务队列中的优先级
+
+        Returns:
+            Dict[str, Any]: 上传结果
+        """
+        return await self.submit(files, targets, group, request_id, priority).future
+
+    async def _run_request(self, request: UploadRequest) -> None:
+        """为每个目标启动一条发送通道，全部结束后发布结果"""
+        loop = asyncio.get_running_loop()
+        request.file_ids = [loop.create_future() for _ in request.units]
+
+        await self.publish_event(events.UPLOAD_STARTED, events.create_event_data(
+            events.UPLOAD_STARTED,
+            request_id=request.request_id,
+            files=sum(len(unit) for unit in request.units),
+            targets=request.targets,
+            total_bytes=request.total_bytes
+        ))
+
+        try:
+            await asyncio.gather(*(self._run_lane(request, target, primary=(index == 0))
+                                   for index, target in enumerate(request.targets)))
+        finally:
+            self._requests.pop(request.request_id, None)
+
+        result = {
+            "success": bool(request.messages) or not request.failed,
+            "request_id": request.request_id,
+            "messages": request.messages,
+            "file_ids": {item.path: item.file_id for unit in request.units for item in unit},
+            "failed": request.failed,
+            "total_bytes": request.total_bytes,
+            "duration": time.time() - request.started
+        }
+
+        if result["success"]:
+            await self.publish_event(events.UPLOAD_COMPLETED, events.create_event_data(events.UPLOAD_COMPLETED, **result))
+        else:
+            result["error"] = request.failed[0]["error"]
+            await self.publish_event(events.UPLOAD_FAILED, events.create_event_data(events.UPLOAD_FAILED, **result))
+
+        if not request.future.done():
+            request.future.set_result(result)
+
+    async def _run_lane(self, request: UploadRequest, target: Any, primary: bool) -> None:
+        """
+        按顺序向一个目标发送请求中的所有单元
+
+        第一个目标的通道上传文件内容并公布 file_id，其他通道等待对应单元的
+        file_id 后再发送，因此各目标中的消息顺序与请求一致。上传失败时由
+        后面的一个通道接手上传文件内容。
+        """
+        for index, unit in enumerate(request.units):
+            if index and self.wait_between_messages > 0:
+                await asyncio.sleep(self.wait_between_messages)
+
+            if primary:
+                await self._upload_unit(request, index, unit, target)
+                continue
+
+            file_ids = await self._wait_file_ids(request, index)
+            if file_ids is None:
+                await self._upload_unit(request, index, unit, target)
+                continue
+            if any(value == item.path for item, value in zip(unit, file_ids)):
+                async with self.limiter:
+                    await self._send_unit(request, unit, target, file_ids)
+            else:
+                await self._send_unit(request, unit, target, file_ids)
+
+    async def _wait_file_ids(self, request: UploadRequest, index: int) -> Optional[List[str]]:
+        """
+        等待单元的 file_id
+
+        Args:
+            request: 上传请求
+            index: 单元序号
+
+        Returns:
+            Optional[List[str]]: 每个文件的 file_id 或本地路径；上传失败且由本通道接手上传时返回 None
+        """
+        while True:
+            future = request.file_ids[index]
+            file_ids = await future
+            if file_ids is not None:
+                return file_ids
+            if request.file_ids[index] is future:
+                # 第一个醒来的通道接手上传，其他通道等待它的结果
+                request.file_ids[index] = asyncio.get_running_loop().create_future()
+                return None
+
+    async def _upload_unit(self, request: UploadRequest, index: int, unit: List[UploadItem], target: Any) -> None:
+        """向负责上传的目标发送单元，尚未上传过的文件会传输文件内容"""
+        file_ids = request.file_ids[index]
+        cached = [self._file_ids.get(item.cache_key) for item in unit]
+        try:
+            if all(cached):
+                messages = await self._send_unit(request, unit, target, cached)
+            else:
+                async with self.limiter:
+                    messages = await self._send_unit(request, unit, target, [item.path for item in unit])
+        except asyncio.CancelledError:
+            # 不让其他通道一直等待这个单元
+            file_ids.set_result(None)
+            raise
+
+        if messages is None:
+            file_ids.set_result(None)
+            return
+
+        ids = []
+        for item, message in zip(unit, messages):
+            item.file_id = _get_file_id(message)
+            ids.append(item.file_id)
+            if item.file_id:
+                self._file_ids[item.cache_key] = item.file_id
+                self._file_ids.move_to_end(item.cache_key)
+        while len(self._file_ids) > FILE_ID_CACHE_SIZE:
+            self._file_ids.popitem(last=False)
+
+        # 无法取得 file_id 时其他目标只能重新上传文件
+        file_ids.set_result([file_id or item.path for item, file_id in zip(unit, ids)])
+
+    async def _send_unit(self, request: UploadRequest, unit: List[UploadItem], target: Any,
+                         media: List[str]) -> Optional[List[Any]]:
+        """
+        发送一个单元，失败时按配置重试；传输文件内容的发送在启用任务队列插件时
+        作为任务执行，占用全局并发预算
+
+        Args:
+            request: 上传请求
+            unit: 单元中的文件
+            target: 目标聊天
+            media: 每个文件的本地路径或 file_id
+
+        Returns:
+            Optional[List[Any]]: 发送得到的消息，失败时返回 None
+        """
+        uploading = any(value == item.path for item, value in zip(unit, media))
+
+        def send():
+            return asyncio.wait_for(self._send(request, unit, target, media), self.timeout)
+
+        attempt = 0
+        while True:
+            try:
+                if uploading:
+                    messages = await run_in_queue(
+                        self.event_bus, send, priority=request.priority,
+                        metadata={"type": "upload", "request_id": request.request_id, "target": target}
+                    )
+                else:
+                    messages = await send()
+                break
+            except FloodWait as e:
+                logger.warning(f"发送到 {target} 触发频率限制，等待 {e.value} 秒")
+                await asyncio.sleep(e.value)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # 在任务队列中被取消的上传不再重试
+                attempt = self.retries + 1 if isinstance(e, TaskCancelled) else attempt + 1
+                if attempt > self.retries:
+                    error = str(e) or type(e).__name__
+                    logger.error(f"发送到 {target} 失败: {error}")
+                    request.failed.append({"files": [item.path for item in unit], "target": target, "error": error})
+                    self.stats["failed"] += len(unit)
+                    return None
+                logger.warning(f"发送到 {target} 出错，{self.retry_delay * attempt} 秒后第 {attempt} 次重试: {str(e)}")
+                await asyncio.sleep(self.retry_delay * attempt)
+
+        if uploading:
+            self.stats["uploaded"] += len(unit)
+            self.stats["bytes"] += sum(item.size for item in unit)
+        else:
+            self.stats["reused"] += len(unit)
+
+        request.messages.setdefault(str(target), []).extend(message.id for message in messages)
+        if uploading:
+            for item in unit:
+                request.file_progress[item.path] = item.size
+            await self._publish_progress(request, force=True)
+        return messages
+
+    async def _send(self, request: UploadRequest, unit: List[UploadItem], target: Any, media: List[str]) -> List[Any]:
+        """调用客户端发送单条消息或媒体组"""
+        if not request.group:
+            item = unit[0]
+
+            async def progress(current: int, total: int) -> None:
+                request.file_progress[item.path] = current
+                await self._publish_progress(request)
+
+            send_func = getattr(self.client, f"send_{item.media_type}")
+            message = await send_func(target, media[0], caption=item.caption, progress=progress)
+            return [message]
+
+        input_media = [INPUT_MEDIA_TYPES[item.media_type](value, caption=item.caption) for item, value in zip(unit, media)]
+        return await self.client.send_media_group(target, input_media)
+
+    async def _publish_progress(self, request: UploadRequest, force: bool = False) -> None:
+        """
+        发布请求的汇总上传进度，发布间隔不小于 progress_interval
+
+        Args:
+            request: 上传请求
+            force: 是否忽略发布间隔（单元上传结束时）
+        """
+        now = time.monotonic()
+        if not force and now - request.last_progress < self.progress_interval:
+            return
+        request.last_progress = now
+
+        current = sum(request.file_progress.values())
+        total = request.total_bytes
+        await self.publish_event(events.UPLOAD_PROGRESS, events.create_event_data(
+            events.UPLOAD_PROGRESS,
+            request_id=request.request_id,
+            current=current,
+            total=total,
+            percent=round(current / total * 100, 2) if total else 100.0
+        ))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取上传统计
+
+        Returns:
+            Dict[str, Any]: 统计信息
+        """
+        return {
+            **self.stats,
+            "active": self.limiter.active,
+            "waiting": self.limiter.waiting,
+            "max_concurrent": self.limiter.limit,
+            "pending_requests": len(self._requests),
+            "cached_file_ids": len(self._file_ids)
+        }
+
+    async def shutdown(self) -> None:
+        """关闭插件，取消进行中的上传"""
+        logger.info("正在关闭媒体上传插件...")
+
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+        for request in self._requests.values():
+            if not request.future.done():
+                request.future.set_result({"success": False, "request_id": request.request_id, "error": "上传插件已关闭"})
+        self._requests.clear()
+
+        await super().shutdown()
+        self.client = None
+        logger.info("媒体上传插件已关闭")
@@ -1,9 +1,10 @@
 """
 Telegram工具插件包。
 
-该包提供了各种工具功能，包括频道解析、验证和信息获取等功能。
+该包提供了各种工具功能，包括频道解析、验证和信息获取，以及全局任务队列。
 """
 
 from .channel_plugin import ChannelPlugin
+from .task_queue_plugin import TaskQueuePlugin
 
-__all__ = ['ChannelPlugin']
+__all__ = ['ChannelPlugin', 'TaskQueuePlugin']
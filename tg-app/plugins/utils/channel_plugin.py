@@ -29,6 +29,7 @@
 """
 
 import re
+import asyncio
 from typing import Dict, Any, List, Optional, Union, Tuple
 
 from pyrogram import Client
@@ -37,6 +38,7 @@ from pyrogram.errors import FloodWait, ChannelInvalid, ChannelPrivate, UsernameI
 
 from plugins.base import PluginBase
 from events import event_types as events
+from plugins.utils.message_stream import MessageStream, DEFAULT_PAGE_SIZE, DEFAULT_IDLE_TIMEOUT
 from utils.logger import get_logger
 
 # 获取日志记录器
@@ -47,6 +49,13 @@ class ChannelPlugin(PluginBase):
     频道工具插件，负责频道解析、验证和信息获取
     """
     
+    # 插件元数据，定义在类上以便不实例化即可发现插件
+    id = "channel"
+    name = "频道工具插件"
+    version = "1.0.0"
+    description = "提供频道解析、验证和信息获取功能"
+    dependencies = ["client"]  # 依赖客户端插件
+    
     def __init__(self, event_bus):
         """
         初始化频道工具插件
@@ -58,22 +67,22 @@ class ChannelPlugin(PluginBase):
         
         self.client = None
         
-        # 定义插件元数据
-        self.id = "channel"
-        self.name = "频道工具插件"
-        self.version = "1.0.0"
-        self.description = "提供频道解析、验证和信息获取功能"
-        self.dependencies = ["client"]  # 依赖客户端插件
+        # 未结束的消息流 {流ID: 消息流}
+        self._streams: Dict[str, MessageStream] = {}
+        # 以事件方式发布的消息流 {流ID: 发布任务}
+        self._stream_tasks: Dict[str, asyncio.Task] = {}
     
     async def initialize(self) -> None:
         """初始化插件"""
         logger.info("正在初始化频道工具插件...")
         
-        # 注册事件处理器
-        self.event_bus.subscribe(events.CHANNEL_PARSE, self._handle_channel_parse)
-        self.event_bus.subscribe(events.CHANNEL_GET_INFO, self._handle_channel_get_info)
-        self.event_bus.subscribe(events.CHANNEL_CHECK_ACCESS, self._handle_channel_check_access)
-        self.event_bus.subscribe(events.MESSAGE_GET_FROM_CHANNEL, self._handle_message_get_from_channel)
+        # 绑定请求处理器
+        self.register_rpc_handler(events.CHANNEL_PARSE, self._handle_channel_parse)
+        self.register_rpc_handler(events.CHANNEL_GET_INFO, self._handle_channel_get_info)
+        self.register_rpc_handler(events.CHANNEL_CHECK_ACCESS, self._handle_channel_check_access)
+        self.register_rpc_handler(events.MESSAGE_GET_FROM_CHANNEL, self._handle_message_get_from_channel)
+        self.register_rpc_handler(events.MESSAGE_STREAM_FROM_CHANNEL, self._handle_message_stream_from_channel)
+        self.register_rpc_handler(events.MESSAGE_STREAM_CANCEL, self._handle_message_stream_cancel)
         
         # 获取客户端实例
         response = await self.event_bus.publish_and_wait(
@@ -248,6 +257,114 @@ class ChannelPlugin(PluginBase):
             logger.exception(error_msg)
             return {"success": False, "error": error_msg}
     
+    async def _handle_message_stream_from_channel(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        处理按页获取频道消息事件，不等待全部消息获取完成
+        
+        mode 为 "iterator"（默认）时返回消息流对象，调用方用 async for 逐页读取，
+        不再读取时调用 close() 或使用 async with，否则消息流在 idle_timeout 秒后才结束；
+        mode 为 "events" 时每页发布一个 MESSAGE_PAGE 事件，最后一个事件的 done 为 True。
+        
+        Args:
+            data: 事件数据，包含 "chat_id"，可选 "limit"（0 表示不限）、"offset_id"、
+                  "page_size"、"prefetch"、"idle_timeout"、"mode"
+            
+        Returns:
+            Dict[str, Any]: 包含 "stream_id"，迭代器模式下还包含 "stream"
+        """
+        chat_id = data.get("chat_id")
+        if not chat_id:
+            return {"success": False, "error": "未提供聊天ID"}
+        if self.client is None:
+            return {"success": False, "error": "客户端未初始化"}
+        
+        mode = data.get("mode", "iterator")
+        if mode not in ("iterator", "events"):
+            return {"success": False, "error": f"不支持的模式: {mode}"}
+        
+        try:
+            stream = MessageStream(
+                self.client,
+                chat_id,
+                limit=int(data.get("limit", 0)),
+                offset_id=int(data.get("offset_id", 0)),
+                page_size=int(data.get("page_size", DEFAULT_PAGE_SIZE)),
+                prefetch=int(data.get("prefetch", 2)),
+                # 事件模式由插件读取并负责关闭，不需要超时
+                idle_timeout=float(data.get("idle_timeout", DEFAULT_IDLE_TIMEOUT)) if mode == "iterator" else 0,
+                on_done=lambda s: self._streams.pop(s.stream_id, None)
+            ).start()
+        except (TypeError, ValueError) as e:
+            return {"success": False, "error": f"参数无效: {str(e)}"}
+        
+        self._streams[stream.stream_id] = stream
+        logger.debug(f"开始按页获取频道 {chat_id} 的消息: {stream.stream_id}")
+        
+        if mode == "iterator":
+            return {"success": True, "stream_id": stream.stream_id, "stream": stream}
+        
+        task = asyncio.create_task(self._publish_stream(stream))
+        self._stream_tasks[stream.stream_id] = task
+        task.add_done_callback(lambda _: self._stream_tasks.pop(stream.stream_id, None))
+        return {"success": True, "stream_id": stream.stream_id}
+    
+    async def _publish_stream(self, stream: MessageStream) -> None:
+        """
+        逐页发布 MESSAGE_PAGE 事件，事件处理器处理完一页后才发布下一页，
+        处理期间后台继续预取
+        
+        Args:
+            stream: 消息流
+        """
+        error = None
+        try:
+            async for page in stream:
+                await self.publish_event(events.MESSAGE_PAGE, events.create_event_data(
+                    events.MESSAGE_PAGE,
+                    stream_id=stream.stream_id,
+                    chat_id=stream.chat_id,
+                    page=stream.pages,
+                    messages=page,
+                    count=len(page),
+                    cursor=stream.cursor,
+                    done=False
+                ))
+        except Exception as e:
+            error = f"从频道 {stream.chat_id} 获取消息时出错: {str(e)}"
+        finally:
+            await stream.close()
+        
+        await self.publish_event(events.MESSAGE_PAGE, events.create_event_data(
+            events.MESSAGE_PAGE,
+            stream_id=stream.stream_id,
+            chat_id=stream.chat_id,
+            page=stream.pages,
+            messages=[],
+            count=0,
+            total=stream.count,
+            cursor=stream.cursor,
+            done=True,
+            error=error
+        ))
+    
+    async def _handle_message_stream_cancel(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        处理取消消息流事件
+        
+        Args:
+            data: 事件数据，包含 "stream_id"
+            
+        Returns:
+            Dict[str, Any]: 取消结果，包含可用于继续获取的 "cursor"
+        """
+        stream_id = data.get("stream_id")
+        stream = self._streams.get(stream_id)
+        if stream is None:
+            return {"success": False, "error": f"消息流不存在或已结束: {stream_id}"}
+        
+        await stream.close()
+        return {"success": True, "stream_id": stream_id, "cursor": stream.cursor, "count": stream.count}
+    
     async def _parse_channel(self, channel_str: str) -> Optional[Chat]:
         """
         解析频道字符串为Chat对象
@@ -347,10 +464,18 @@ class ChannelPlugin(PluginBase):
         logger.info("正在关闭频道工具插件...")
         
         # 取消事件订阅
-        self.event_bus.unsubscribe(events.CHANNEL_PARSE, self._handle_channel_parse)
-        self.event_bus.unsubscribe(events.CHANNEL_GET_INFO, self._handle_channel_get_info)
-        self.event_bus.unsubscribe(events.CHANNEL_CHECK_ACCESS, self._handle_channel_check_access)
-        self.event_bus.unsubscribe(events.MESSAGE_GET_FROM_CHANNEL, self._handle_message_get_from_channel)
+        self.unregister_rpc_handler(events.CHANNEL_PARSE)
+        self.unregister_rpc_handler(events.CHANNEL_GET_INFO)
+        self.unregister_rpc_handler(events.CHANNEL_CHECK_ACCESS)
+        self.unregister_rpc_handler(events.MESSAGE_GET_FROM_CHANNEL)
+        self.unregister_rpc_handler(events.MESSAGE_STREAM_FROM_CHANNEL)
+        self.unregister_rpc_handler(events.MESSAGE_STREAM_CANCEL)
+        
+        # 停止未结束的消息流
+        for stream in list(self._streams.values()):
+            await stream.close()
+        if self._stream_tasks:
+            await asyncio.gather(*self._stream_tasks.values(), return_exceptions=True)
         
         self.client = None
         logger.info("频道工具插件已关闭") 
\ No newline at end of file
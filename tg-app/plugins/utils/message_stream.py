@@ -0,0 +1,196 @@
+"""
+消息流模块。
+
+本模块把 get_chat_history 的结果按页交付：后台协程预先获取后面的页，
+调用方处理当前页时下一页已经在获取中；预取的页数有上限，内存中最多
+保留 prefetch 页消息。
+
+调用方停止迭代又没有调用 close() 时，后台协程在 idle_timeout 秒内等不到
+调用方取走下一页就自行结束并释放预取的页，调用方之后再读取会得到超时错误。
+"""
+
+import uuid
+import asyncio
+from typing import Any, AsyncIterator, Callable, List, Optional
+
+from utils.logger import get_logger
+
+# 获取日志记录器
+logger = get_logger("message_stream")
+
+# Telegram 每次请求最多返回的历史消息数
+DEFAULT_PAGE_SIZE = 100
+
+# 调用方多久不读取消息流后结束后台获取（秒）
+DEFAULT_IDLE_TIMEOUT = 300
+
+# 页队列结束标记
+_END = object()
+
+
+class MessageStream:
+    """
+    按页获取频道消息的异步迭代器
+
+    用法:
+        async for page in stream:       # 每页是一个消息列表
+            ...
+        async for message in stream.messages():
+            ...
+
+    cursor 是已交付的最后一条消息的ID，作为 offset_id 传给新的请求即可从
+    中断处继续获取更早的消息。不再读取时应调用 close() 或使用 async with，
+    否则消息流在 idle_timeout 秒后才会结束。
+    """
+
+    def __init__(self, client: Any, chat_id: Any, limit: int = 0, offset_id: int = 0,
+                 page_size: int = DEFAULT_PAGE_SIZE, prefetch: int = 2,
+                 idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+                 on_done: Optional[Callable[["MessageStream"], None]] = None):
+        """
+        初始化消息流
+
+        Args:
+            client: Pyrogram客户端
+            chat_id: 聊天ID
+            limit: 最多获取的消息数，0 表示不限
+            offset_id: 从该消息ID之前开始获取，0 表示从最新消息开始
+            page_size: 每页消息数
+            prefetch: 最多预先获取的页数
+            idle_timeout: 调用方超过该秒数不读取时结束消息流，0 表示不限
+            on_done: 消息流结束（获取完毕、出错或关闭）时调用一次
+        """
+        self.stream_id = uuid.uuid4().hex
+        self.client = client
+        self.chat_id = chat_id
+        self.limit = limit
+        self.offset_id = offset_id
+        self.page_size = max(1, int(page_size))
+        self.idle_timeout = max(0.0, float(idle_timeout))
+
+        self.cursor = offset_id
+        self.pages = 0
+        self.count = 0
+        self.done = False
+        self.on_done = on_done
+
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, int(prefetch)))
+        self._producer: Optional[asyncio.Task] = None
+
+    def start(self) -> "MessageStream":
+        """开始在后台获取消息"""
+        if self._producer is None:
+            self._producer = asyncio.create_task(self._produce())
+        return self
+
+    async def _produce(self) -> None:
+        """后台获取消息并按页放入队列"""
+        page: List[Any] = []
+        try:
+            async for message in self.client.get_chat_history(
+                chat_id=self.chat_id,
+                limit=self.limit,
+                offset_id=self.offset_id
+            ):
+                page.append(message)
+                if len(page) >= self.page_size:
+                    await self._put(page)
+                    page = []
+            if page:
+                await self._put(page)
+            await self._put(_END)
+            await self._wait_drained()
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            self._expire()
+        except Exception as e:
+            logger.error(f"从频道 {self.chat_id} 获取消息时出错: {str(e)}")
+            # 已获取的消息先交付，再报告错误
+            try:
+                if page:
+                    await self._put(page)
+                await self._put(e)
+                await self._wait_drained()
+            except asyncio.TimeoutError:
+                self._expire()
+
+    async def _put(self, item: Any) -> None:
+        """把一页放入队列，调用方超过 idle_timeout 秒不读取时抛出 asyncio.TimeoutError"""
+        if self.idle_timeout:
+            await asyncio.wait_for(self._queue.put(item), self.idle_timeout)
+        else:
+            await self._queue.put(item)
+
+    async def _wait_drained(self) -> None:
+        """等待调用方取走队列中剩余的页"""
+        if self.idle_timeout:
+            await asyncio.wait_for(self._queue.join(), self.idle_timeout)
+        else:
+            await self._queue.join()
+
+    def _expire(self) -> None:
+        """调用方长时间不读取，释放预取的页并结束消息流"""
+        logger.warning(f"消息流 {self.stream_id} 超过 {self.idle_timeout} 秒未被读取，停止获取频道 {self.chat_id} 的消息")
+        while not self._queue.empty():
+            self._queue.get_nowait()
+            self._queue.task_done()
+        self._queue.put_nowait(asyncio.TimeoutError(
+            f"消息流 {self.stream_id} 长时间未被读取已结束，可从 cursor {self.cursor} 继续获取"))
+        self._finish()
+
+    def __aiter__(self) -> "MessageStream":
+        return self
+
+    async def __anext__(self) -> List[Any]:
+        """获取下一页消息"""
+        # 超时结束的消息流在队列中留有错误，读取后才停止
+        if self.done and self._queue.empty():
+            raise StopAsyncIteration
+        self.start()
+
+        item = await self._queue.get()
+        self._queue.task_done()
+        if item is _END:
+            self._finish()
+            raise StopAsyncIteration
+        if isinstance(item, Exception):
+            self._finish()
+            raise item
+
+        self.pages += 1
+        self.count += len(item)
+        self.cursor = item[-1].id
+        return item
+
+    async def messages(self) -> AsyncIterator[Any]:
+        """逐条迭代消息"""
+        async for page in self:
+            for message in page:
+                yield message
+
+    async def close(self) -> None:
+        """停止获取消息，释放预取的页"""
+        self._finish()
+        if self._producer is not None and not self._producer.done():
+            self._producer.cancel()
+            await asyncio.gather(self._producer, return_exceptions=True)
+        while not self._queue.empty():
+            self._queue.get_nowait()
+            self._queue.task_done()
+        # 唤醒正在等待下一页的调用方
+        self._queue.put_nowait(_END)
+
+    def _finish(self) -> None:
+        """标记消息流结束"""
+        if self.done:
+            return
+        self.done = True
+        if self.on_done is not None:
+            self.on_done(self)
+
+    async def __aenter__(self) -> "MessageStream":
+        return self.start()
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
@@ -0,0 +1,186 @@
+"""
+任务队列插件 (TaskQueuePlugin)
+通过事件总线提供全局的优先级任务调度器
+
+其他插件通过 TASK_ADD 提交任务（或使用 task_queue.run_in_queue），
+所有插件的任务共享 [task_queue] worker_count 个工作协程。TASK_ADD 传递的是
+函数和任务对象，只能由主进程中的插件调用。
+"""
+
+from typing import Dict, Any
+
+from plugins.base import PluginBase
+from events import event_types as events
+from task_queue import Task, TaskScheduler
+from utils.logger import get_logger
+
+# 获取日志记录器
+logger = get_logger("task_queue_plugin")
+
+
+class TaskQueuePlugin(PluginBase):
+    """
+    任务队列插件，负责管理异步任务的调度和执行
+    """
+
+    # 插件元数据，定义在类上以便不实例化即可发现插件
+    id = "task_queue"
+    name = "任务队列插件"
+    version = "1.0.0"
+    description = "管理异步任务的调度和执行"
+    dependencies = []
+
+    def __init__(self, event_bus):
+        """
+        初始化任务队列插件
+
+        Args:
+            event_bus: 事件总线
+        """
+        super().__init__(event_bus)
+        self.scheduler = TaskScheduler(on_event=self._publish_task_event)
+
+    async def initialize(self) -> None:
+        """初始化插件"""
+        logger.info("正在初始化任务队列插件...")
+
+        self.register_rpc_handler(events.TASK_ADD, self._handle_task_add)
+        self.register_rpc_handler(events.TASK_CANCEL, self._handle_task_cancel)
+        self.register_rpc_handler(events.TASK_GET_STATUS, self._handle_task_get_status)
+        self.register_rpc_handler(events.TASK_GET_ALL, self._handle_task_get_all)
+        self.register_event_handler(events.CONFIG_CHANGED, self._handle_config_changed)
+
+        await self.load_config()
+        self.scheduler.start()
+
+        await super().initialize()
+        logger.info(f"任务队列插件初始化完成，工作协程数: {self.scheduler.worker_count}")
+
+    async def load_config(self) -> None:
+        """从配置管理器读取 [task_queue] 配置，运行中调用时立即生效"""
+        response = await self.publish_and_wait(
+            events.CONFIG_GET_SECTION,
+            {"section": "task_queue"},
+            timeout=5.0
+        )
+        config = response.get("data", {}) if response and response.get("success", False) else {}
+
+        try:
+            self.scheduler.history_size = max(0, int(config.get("history_size", self.scheduler.history_size)))
+            self.scheduler.set_worker_count(int(config.get("worker_count", self.scheduler.worker_count)))
+        except (TypeError, ValueError):
+            logger.warning(f"任务队列配置无效，使用当前设置: 工作协程数 {self.scheduler.worker_count}")
+
+    async def _handle_config_changed(self, data: Dict[str, Any]) -> None:
+        """
+        处理配置变更事件，[task_queue] 变化时调整工作协程数
+
+        Args:
+            data: 事件数据
+        """
+        if data.get("section") == "task_queue":
+            await self.load_config()
+            logger.info(f"任务队列配置已更新，工作协程数: {self.scheduler.worker_count}")
+
+    async def _handle_task_add(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        处理添加任务请求
+
+        只能在主进程中请求：请求中的函数和响应中的任务对象都是进程内对象，
+        不能序列化，工作进程中的插件无法通过事件桥接提交任务，
+        run_in_queue 在这种情况下直接执行操作。
+
+        Args:
+            data: 事件数据，包含 "func"（返回协程的函数）或 "coroutine"，可选 "priority"、"metadata"、"id"
+
+        Returns:
+            Dict[str, Any]: 添加结果，"task" 为任务对象，可以等待 task.wait()
+        """
+        try:
+            task = self.scheduler.submit(
+                data.get("func") or data.get("coroutine"),
+                priority=int(data.get("priority", 0)),
+                metadata=data.get("metadata"),
+                task_id=data.get("id")
+            )
+        except (TypeError, ValueError, RuntimeError) as e:
+            return {"success": False, "error": str(e)}
+
+        logger.debug(f"添加任务: {task.id}, 优先级: {task.priority}")
+        return {"success": True, "task_id": task.id, "task": task}
+
+    async def _handle_task_cancel(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        处理取消任务请求，等待中和运行中的任务都可以取消
+
+        Args:
+            data: 事件数据，包含 "task_id"
+
+        Returns:
+            Dict[str, Any]: 取消结果
+        """
+        task_id = data.get("task_id")
+        task = self.scheduler.get(task_id)
+        if task is None:
+            return {"success": False, "error": f"任务不存在: {task_id}"}
+
+        if task.done:
+            return {"success": True, "message": "任务已经结束", "status": task.status}
+
+        self.scheduler.cancel(task_id)
+        return {"success": True, "status": task.status}
+
+    async def _handle_task_get_status(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        处理获取任务状态请求
+
+        Args:
+            data: 事件数据，包含 "task_id"
+
+        Returns:
+            Dict[str, Any]: 任务信息
+        """
+        task_id = data.get("task_id")
+        task = self.scheduler.get(task_id)
+        if task is None:
+            return {"success": False, "error": f"任务不存在: {task_id}"}
+
+        return {"success": True, "task": task.to_dict()}
+
+    async def _handle_task_get_all(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        处理获取所有任务请求
+
+        Args:
+            data: 事件数据，可选 "filters": {"status": 状态}
+
+        Returns:
+            Dict[str, Any]: 任务列表和调度统计
+        """
+        filters = data.get("filters", {}) if data else {}
+        tasks = [task.to_dict(include_result=False) for task in self.scheduler.list_tasks(filters.get("status"))]
+        return {"success": True, "tasks": tasks, "count": len(tasks), "stats": self.scheduler.get_stats()}
+
+    async def _publish_task_event(self, event_type: str, task: Task) -> None:
+        """发布任务状态事件"""
+        await self.publish_event(event_type, events.create_event_data(
+            event_type,
+            task_id=task.id,
+            **task.to_dict(include_result=False)
+        ))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取调度统计
+
+        Returns:
+            Dict[str, Any]: 统计信息
+        """
+        return self.scheduler.get_stats()
+
+    async def shutdown(self) -> None:
+        """关闭插件，取消所有未结束的任务"""
+        logger.info("正在关闭任务队列插件...")
+        await self.scheduler.stop()
+        await super().shutdown()
+        logger.info("任务队列插件已关闭")
@@ -0,0 +1,9 @@
+"""
+任务队列包。
+
+该包提供带优先级的任务调度器，由任务队列插件通过事件总线对外提供。
+"""
+
+from .scheduler import Task, TaskScheduler, TaskCancelled, run_in_queue
+
+__all__ = ['Task', 'TaskScheduler', 'TaskCancelled', 'run_in_queue']
@@ -0,0 +1,486 @@
+"""
+任务调度模块。
+
+本模块提供带优先级的异步任务调度器：固定数量的工作协程从优先级队列中取出
+任务执行，工作协程数就是全局的并发预算，下载、上传等插件把网络操作提交到
+同一个调度器中，不再各自创建任务。
+"""
+
+import time
+import uuid
+import asyncio
+import itertools
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Coroutine, Union, Set
+
+from events import event_types as events
+from utils.logger import get_logger
+
+# 获取日志记录器
+logger = get_logger("task_scheduler")
+
+# 任务状态
+PENDING = "pending"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATUSES = (COMPLETED, FAILED, CANCELLED)
+
+# 任务函数：无参数、返回协程的函数，或者直接传入协程对象
+TaskFunc = Union[Callable[[], Awaitable[Any]], Coroutine]
+
+# 任务状态变化回调，参数为事件类型和任务
+TaskEventCallback = Callable[[str, "Task"], Awaitable[None]]
+
+
+class TaskCancelled(Exception):
+    """等待的任务在调度器中被取消"""
+
+
+class Task:
+    """调度器中的一个任务"""
+
+    def __init__(self, task_id: str, func: TaskFunc, priority: int = 0, metadata: Optional[Dict[str, Any]] = None):
+        """
+        初始化任务
+
+        Args:
+            task_id: 任务ID
+            func: 任务函数或协程
+            priority: 优先级，数字越大越先执行
+            metadata: 任务元数据
+        """
+        self.id = task_id
+        self.func = func
+        self.priority = priority
+        self.metadata = metadata or {}
+        self.status = PENDING
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+
+        self._future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._runner: Optional[asyncio.Task] = None
+        self._scheduler: Optional["TaskScheduler"] = None
+
+    @property
+    def done(self) -> bool:
+        """任务是否已结束"""
+        return self.status in FINISHED_STATUSES
+
+    @property
+    def wait_time(self) -> Optional[float]:
+        """在队列中等待的时间（秒）"""
+        end = self.started_at or self.finished_at
+        return end - self.created_at if end else None
+
+    @property
+    def run_time(self) -> Optional[float]:
+        """执行时间（秒）"""
+        return self.finished_at - self.started_at if self.finished_at and self.started_at else None
+
+    async def wait(self) -> Any:
+        """
+        等待任务结束
+
+        Returns:
+            Any: 任务结果
+
+        Raises:
+            TaskCancelled: 任务被取消
+            Exception: 任务执行时抛出的异常
+        """
+        return await asyncio.shield(self._future)
+
+    def cancel(self) -> bool:
+        """取消任务，返回是否成功"""
+        return self._scheduler.cancel(self.id) if self._scheduler else False
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        """
+        获取任务信息
+
+        Args:
+            include_result: 是否包含任务结果
+
+        Returns:
+            Dict[str, Any]: 任务信息
+        """
+        info = {
+            "id": self.id,
+            "status": self.status,
+            "priority": self.priority,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "wait_time": self.wait_time,
+            "duration": self.run_time,
+            "metadata": self.metadata
+        }
+        if include_result and self.status == COMPLETED:
+            info["result"] = self.result
+        if self.error is not None:
+            info["error"] = self.error
+        return info
+
+    def _finish(self, status: str, result: Any = None, error: Optional[BaseException] = None) -> None:
+        """记录任务结束，释放任务函数的引用"""
+        self.status = status
+        self.finished_at = time.time()
+        self.result = result
+        self.func = None
+        self._runner = None
+        if self._future.done():
+            return
+        if status == COMPLETED:
+            self._future.set_result(result)
+        elif status == CANCELLED:
+            self.error = self.error or "任务已取消"
+            self._future.set_exception(TaskCancelled(self.error))
+        else:
+            self.error = str(error) or type(error).__name__
+            self._future.set_exception(error)
+        # 没有调用方等待结果时不报告未获取的异常
+        self._future.exception()
+
+
+class TaskScheduler:
+    """
+    优先级任务调度器
+
+    优先级相同的任务按提交顺序执行。等待中的任务被取消时只做标记，工作协程
+    取到后直接跳过；运行中的任务通过取消其执行协程结束。已结束任务的记录只
+    保留最近 history_size 条，任务函数和协程在结束时即释放。
+    """
+
+    def __init__(self, worker_count: int = 5, history_size: int = 1000,
+                 on_event: Optional[TaskEventCallback] = None):
+        """
+        初始化任务调度器
+
+        Args:
+            worker_count: 工作协程数，即同时执行的最大任务数
+            history_size: 保留的已结束任务记录数
+            on_event: 任务状态变化回调，参数为 TASK_* 事件类型和任务
+        """
+        self.worker_count = max(1, int(worker_count))
+        self.history_size = max(0, int(history_size))
+        self.on_event = on_event
+
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._sequence = itertools.count()
+        # 未结束的任务 {任务ID: 任务}
+        self._tasks: Dict[str, Task] = {}
+        # 已结束任务的记录 {任务ID: 任务}
+        self._history: "OrderedDict[str, Task]" = OrderedDict()
+
+        self._workers: Dict[int, asyncio.Task] = {}
+        self._idle_workers: set = set()
+        self._worker_ids = itertools.count()
+        # 正在发送的任务事件，保留引用直到发送完成
+        self._event_tasks: Set[asyncio.Task] = set()
+
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "total_wait_time": 0.0,
+            "total_run_time": 0.0
+        }
+
+    @property
+    def running(self) -> bool:
+        """调度器是否正在运行"""
+        return self._queue is not None
+
+    @property
+    def pending(self) -> int:
+        """等待执行的任务数"""
+        return sum(1 for task in self._tasks.values() if task.status == PENDING)
+
+    @property
+    def active(self) -> int:
+        """正在执行的任务数"""
+        return sum(1 for task in self._tasks.values() if task.status == RUNNING)
+
+    def start(self) -> None:
+        """在当前事件循环中启动工作协程"""
+        if self.running:
+            return
+        self._queue = asyncio.PriorityQueue()
+        self._adjust_workers()
+        logger.info(f"任务调度器已启动，工作协程数: {self.worker_count}")
+
+    async def stop(self) -> None:
+        """停止调度器，取消所有未结束的任务"""
+        if not self.running:
+            return
+
+        # 执行中的任务随工作协程一起取消，先单独取消会让工作协程把停止信号当作任务取消而继续运行
+        for task in list(self._tasks.values()):
+            if task.status != RUNNING:
+                self.cancel(task.id)
+
+        workers = list(self._workers.values())
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        # 等待取消任务产生的事件发送完成
+        await asyncio.gather(*self._event_tasks, return_exceptions=True)
+
+        self._workers.clear()
+        self._idle_workers.clear()
+        self._queue = None
+        logger.info("任务调度器已停止")
+
+    def set_worker_count(self, worker_count: int) -> None:
+        """
+        调整工作协程数，增加时立即启动新的工作协程，减少时先结束空闲的工作协程，
+        其余的在当前任务完成后结束
+
+        Args:
+            worker_count: 新的工作协程数
+        """
+        self.worker_count = max(1, int(worker_count))
+        if self.running:
+            self._adjust_workers()
+
+    def submit(self, func: TaskFunc, priority: int = 0, metadata: Optional[Dict[str, Any]] = None,
+               task_id: Optional[str] = None) -> Task:
+        """
+        提交任务
+
+        Args:
+            func: 无参数、返回协程的函数，或协程对象
+            priority: 优先级，数字越大越先执行
+            metadata: 任务元数据
+            task_id: 任务ID，默认自动生成
+
+        Returns:
+            Task: 任务，可以通过 task.wait() 等待结果
+        """
+        if not self.running:
+            raise RuntimeError("任务调度器未运行")
+        if not (callable(func) or asyncio.iscoroutine(func)):
+            raise TypeError("任务必须是返回协程的函数或协程对象")
+
+        task = Task(task_id or uuid.uuid4().hex, func, priority, metadata)
+        if task.id in self._tasks:
+            raise ValueError(f"任务ID已存在: {task.id}")
+
+        task._scheduler = self
+        self._tasks[task.id] = task
+        self._queue.put_nowait((-priority, next(self._sequence), task))
+        self.stats["submitted"] += 1
+        self._emit(events.TASK_CREATED, task)
+        return task
+
+    def cancel(self, task_id: str) -> bool:
+        """
+        取消任务
+
+        Args:
+            task_id: 任务ID
+
+        Returns:
+            bool: 是否取消了未结束的任务
+        """
+        task = self._tasks.get(task_id)
+        if task is None:
+            return False
+
+        if task.status == RUNNING and task._runner is not None:
+            task._runner.cancel()
+            return True
+
+        # 等待中的任务留在队列里，工作协程取到后跳过
+        if asyncio.iscoroutine(task.func):
+            task.func.close()
+        self._finalize(task, CANCELLED)
+        return True
+
+    def get(self, task_id: str) -> Optional[Task]:
+        """
+        获取任务，包括仍保留记录的已结束任务
+
+        Args:
+            task_id: 任务ID
+
+        Returns:
+            Optional[Task]: 任务，不存在时为 None
+        """
+        return self._tasks.get(task_id) or self._history.get(task_id)
+
+    def list_tasks(self, status: Optional[str] = None) -> List[Task]:
+        """
+        获取任务列表，按创建时间排序
+
+        Args:
+            status: 只返回该状态的任务
+
+        Returns:
+            List[Task]: 任务列表
+        """
+        tasks = list(self._tasks.values()) + list(self._history.values())
+        if status:
+            tasks = [task for task in tasks if task.status == status]
+        return sorted(tasks, key=lambda task: task.created_at)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取调度统计
+
+        Returns:
+            Dict[str, Any]: 统计信息
+        """
+        started = self.stats["completed"] + self.stats["failed"]
+        return {
+            **self.stats,
+            "workers": len(self._workers),
+            "worker_count": self.worker_count,
+            "pending": self.pending,
+            "active": self.active,
+            "history": len(self._history),
+            "average_wait_time": self.stats["total_wait_time"] / started if started else 0.0,
+            "average_run_time": self.stats["total_run_time"] / started if started else 0.0
+        }
+
+    def _adjust_workers(self) -> None:
+        """使工作协程数与设定值一致"""
+        while len(self._workers) < self.worker_count:
+            worker_id = next(self._worker_ids)
+            self._workers[worker_id] = asyncio.create_task(self._worker_loop(worker_id))
+
+        # 多余的空闲工作协程直接结束，忙碌的在完成当前任务后自行退出
+        excess = len(self._workers) - self.worker_count
+        for worker_id in list(self._idle_workers)[:max(0, excess)]:
+            self._idle_workers.discard(worker_id)
+            self._workers.pop(worker_id).cancel()
+
+    async def _worker_loop(self, worker_id: int) -> None:
+        """
+        工作协程循环
+
+        Args:
+            worker_id: 工作协程ID
+        """
+        queue = self._queue
+        try:
+            while len(self._workers) <= self.worker_count:
+                self._idle_workers.add(worker_id)
+                try:
+                    _, _, task = await queue.get()
+                finally:
+                    self._idle_workers.discard(worker_id)
+
+                if task.status != PENDING:
+                    continue
+                await self._run_task(task)
+        finally:
+            if self._workers.get(worker_id) is asyncio.current_task():
+                del self._workers[worker_id]
+
+    async def _run_task(self, task: Task) -> None:
+        """执行任务并记录结果"""
+        task.status = RUNNING
+        task.started_at = time.time()
+        self._emit(events.TASK_STARTED, task)
+
+        try:
+            coroutine = task.func if asyncio.iscoroutine(task.func) else task.func()
+            task._runner = asyncio.ensure_future(coroutine)
+            result = await asyncio.shield(task._runner)
+        except asyncio.CancelledError:
+            if task._runner is None or task._runner.cancelled():
+                # 任务本身被取消
+                self._finalize(task, CANCELLED)
+                return
+            # 工作协程被取消（调度器停止），一并取消任务
+            task._runner.cancel()
+            self._finalize(task, CANCELLED)
+            raise
+        except Exception as e:
+            logger.debug(f"任务 {task.id} 执行失败: {str(e)}")
+            self._finalize(task, FAILED, error=e)
+            return
+
+        self._finalize(task, COMPLETED, result=result)
+
+    def _finalize(self, task: Task, status: str, result: Any = None, error: Optional[BaseException] = None) -> None:
+        """结束任务，移入有限长度的历史记录"""
+        task._finish(status, result, error)
+        self._tasks.pop(task.id, None)
+
+        self.stats[status] += 1
+        if status != CANCELLED or task.started_at:
+            self.stats["total_wait_time"] += task.wait_time or 0.0
+            self.stats["total_run_time"] += task.run_time or 0.0
+
+        if self.history_size:
+            self._history[task.id] = task
+            while len(self._history) > self.history_size:
+                self._history.popitem(last=False)
+
+        self._emit({COMPLETED: events.TASK_COMPLETED, FAILED: events.TASK_FAILED,
+                    CANCELLED: events.TASK_CANCELLED}[status], task)
+
+    def _emit(self, event_type: str, task: Task) -> None:
+        """通知任务状态变化，不阻塞调度"""
+        if self.on_event is None:
+            return
+        try:
+            event_task = asyncio.ensure_future(self.on_event(event_type, task))
+        except Exception as e:
+            logger.error(f"发送任务事件 {event_type} 时出错: {str(e)}")
+            return
+        self._event_tasks.add(event_task)
+        event_task.add_done_callback(lambda done: self._event_done(done, event_type))
+
+    def _event_done(self, event_task: asyncio.Task, event_type: str) -> None:
+        """任务事件发送结束，释放引用并记录错误"""
+        self._event_tasks.discard(event_task)
+        if not event_task.cancelled() and event_task.exception() is not None:
+            logger.error(f"发送任务事件 {event_type} 时出错: {str(event_task.exception())}")
+
+
+async def run_in_queue(event_bus: Any, func: Callable[[], Awaitable[Any]], priority: int = 0,
+                       metadata: Optional[Dict[str, Any]] = None) -> Any:
+    """
+    通过任务队列插件执行操作，占用全局并发预算；没有任务队列插件时直接执行
+
+    Args:
+        event_bus: 事件总线
+        func: 无参数、返回协程的函数
+        priority: 优先级
+        metadata: 任务元数据
+
+    Returns:
+        Any: 操作结果
+
+    Raises:
+        TaskCancelled: 任务在队列中被取消
+    """
+    # TASK_ADD 的请求和响应中是函数和任务对象，无法经事件桥接传递，
+    # 任务队列插件不在当前进程中（如在工作进程中调用）时直接执行
+    if not event_bus.has_rpc_handler(events.TASK_ADD):
+        return await func()
+
+    response = await event_bus.publish_and_wait(
+        events.TASK_ADD,
+        {"func": func, "priority": priority, "metadata": metadata or {}},
+        timeout=5.0
+    )
+    if not response or not response.get("success", False):
+        return await func()
+
+    task = response["task"]
+    try:
+        return await task.wait()
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
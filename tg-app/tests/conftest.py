@@ -0,0 +1,70 @@
+"""
+测试共用的模拟客户端和插件启动夹具，不依赖Telegram连接。
+
+各插件测试模块继承 FakeTelegramClient 实现插件用到的客户端接口（下载、上传、
+获取历史消息），通过 start_plugin 夹具注册配置和客户端请求处理器并初始化插件。
+"""
+
+import os
+import sys
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+import pytest
+
+# 添加项目根目录到Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)  # tg-app目录
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from events import event_types as events
+
+
+class FakeTelegramClient:
+    """模拟 Pyrogram 客户端的基类，记录同时进行的请求数"""
+
+    def __init__(self):
+        self.active = 0
+        self.max_active = 0
+
+    @asynccontextmanager
+    async def request(self):
+        """包裹一次下载或上传请求，统计并发数"""
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            yield
+        finally:
+            self.active -= 1
+
+
+@pytest.fixture
+def start_plugin():
+    """
+    插件启动函数：注册配置和客户端请求处理器后初始化插件
+
+    用法:
+        plugin = await start_plugin(DownloaderPlugin, bus, client, {"downloader": {...}})
+
+    sections 为 {配置节: 配置字典}，测试中修改其中的字典后插件再次读取时生效；
+    同一事件总线上启动多个插件时，后注册的请求处理器覆盖前者。
+    """
+    async def start(plugin_class: type, bus: Any, client: Any,
+                    sections: Optional[Dict[str, Dict[str, Any]]] = None) -> Any:
+        sections = sections if sections is not None else {}
+
+        async def get_section(data):
+            return {"success": True, "data": sections.get(data["section"], {})}
+
+        async def get_client(data):
+            return {"success": True, "client": client}
+
+        bus.register_rpc(events.CONFIG_GET_SECTION, get_section)
+        bus.register_rpc(events.CLIENT_GET_INSTANCE, get_client)
+
+        plugin = plugin_class(bus)
+        await plugin.initialize()
+        return plugin
+
+    return start
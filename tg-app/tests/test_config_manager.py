@@ -0,0 +1,193 @@
+"""
+配置管理器单元测试，使用临时配置文件，不依赖Telegram连接。
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+# 添加项目根目录到Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)  # tg-app目录
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from core.config_manager import ConfigManager, ConfigSnapshot
+from core.event_bus import EventBus
+from utils.file_watcher import FileWatcher
+
+
+def test_snapshot_is_immutable_and_shares_unchanged_sections():
+    manager = ConfigManager(EventBus())
+    manager.update_section("forward", {"batch_size": 10, "delay": 1})
+    manager.set("download", "concurrency", 3)
+
+    snapshot = manager.snapshot()
+    version = manager.version
+    assert snapshot.get("forward", "batch_size") == 10
+    assert snapshot.get("missing", "key", "fallback") == "fallback"
+    with pytest.raises(TypeError):
+        snapshot.section("forward")["batch_size"] = 20
+
+    # 值未变化时不生成新快照
+    manager.set("forward", "batch_size", 10)
+    assert manager.snapshot() is snapshot
+
+    # 变更只重建对应的配置节，旧快照保持不变
+    manager.set("forward", "batch_size", 20)
+    current = manager.snapshot()
+    assert manager.version == version + 1
+    assert snapshot.get("forward", "batch_size") == 10
+    assert current.get("forward", "batch_size") == 20
+    assert current.section("download") is snapshot.section("download")
+
+    # 兼容接口返回可修改的副本
+    section = manager.get_section("forward")
+    section["delay"] = 99
+    assert manager.get("forward", "delay") == 1
+    assert manager.get_all() == {"forward": {"batch_size": 20, "delay": 1}, "download": {"concurrency": 3}}
+
+    manager.reset("forward", "batch_size")
+    assert manager.get("forward", "batch_size") == 10
+    assert manager.version == version + 2
+
+
+def test_derived_values_are_cached_per_version():
+    manager = ConfigManager(EventBus())
+    manager.update_section("forward", {"target_channels": "a, b"})
+    calls = []
+
+    def targets(snapshot):
+        calls.append(snapshot.version)
+        return [t.strip() for t in snapshot.get("forward", "target_channels").split(",")]
+
+    assert manager.snapshot().derive("targets", targets) == ["a", "b"]
+    assert manager.snapshot().derive("targets", targets) == ["a", "b"]
+    assert len(calls) == 1
+
+    manager.set("forward", "target_channels", "a, b, c")
+    assert manager.snapshot().derive("targets", targets) == ["a", "b", "c"]
+    assert len(calls) == 2
+
+
+def test_changes_since_reports_added_changed_and_removed_keys():
+    shared = {"concurrency": 3}
+    older = ConfigSnapshot(1, {
+        "forward": {"batch_size": 10, "delay": 1},
+        "download": shared,
+        "legacy": {"enabled": True, "path": "a"},
+    })
+    newer = ConfigSnapshot(2, {
+        "forward": {"batch_size": 20, "hide_author": True},
+        "download": shared,
+        "uploader": {"wait": 0},
+    })
+
+    assert newer.changes_since(older) == {
+        "forward": {"batch_size": 20, "hide_author": True, "delay": None},
+        "uploader": {"wait": 0},
+        # 删除的配置节中所有键都报告为删除
+        "legacy": {"enabled": None, "path": None},
+    }
+    assert older.changes_since(newer) == {
+        "forward": {"batch_size": 10, "delay": 1, "hide_author": None},
+        "uploader": {"wait": None},
+        "legacy": {"enabled": True, "path": "a"},
+    }
+    assert newer.changes_since(newer) == {}
+
+
+async def wait_for(predicate, timeout=2.0):
+    """等待条件成立"""
+    for _ in range(int(timeout / 0.01)):
+        if predicate():
+            return True
+        await asyncio.sleep(0.01)
+    return False
+
+
+@pytest.mark.asyncio
+async def test_config_file_changes_notify_only_changed_keys(tmp_path):
+    config_path = tmp_path / "config.ini"
+    config_path.write_text("[forward]\ndelay = 1.5\nbatch_size = 30\n[uploader]\nwait_between_messages = 1\n")
+
+    manager = ConfigManager(EventBus())
+    assert manager.load_config(config_path, "user")
+    notified = []
+    manager.add_observer("forward", lambda section, changed: notified.append((section, changed)))
+    manager.add_observer("uploader", lambda section, changed: notified.append((section, changed)))
+
+    try:
+        assert manager._watcher.mode == "inotify"
+        version = manager.version
+
+        # 编辑器常见的写法：写临时文件后重命名覆盖
+        temp_path = tmp_path / "config.ini.tmp"
+        temp_path.write_text("[forward]\ndelay = 0.2\nbatch_size = 30\n[uploader]\nwait_between_messages = 1\n")
+        os.replace(temp_path, config_path)
+
+        assert await wait_for(lambda: notified)
+        assert notified == [("forward", {"delay": 0.2})]
+        assert manager.get("forward", "delay") == 0.2
+        assert manager.version == version + 1
+
+        # 内容不变的写入不触发通知，版本号不变
+        config_path.write_text(config_path.read_text())
+        await asyncio.sleep(0.2)
+        assert len(notified) == 1
+        assert manager.version == version + 1
+    finally:
+        manager.stop_config_watch()
+
+
+def test_reload_drops_keys_removed_from_file(tmp_path):
+    default_path = tmp_path / "default_config.ini"
+    default_path.write_text("[forward]\ndelay = 2\nbatch_size = 10\n")
+    config_path = tmp_path / "config.ini"
+    config_path.write_text("[forward]\ndelay = 1.5\nbatch_size = 20\nhide_author = true\n[legacy]\nenabled = true\n")
+
+    manager = ConfigManager(EventBus())
+    assert manager.load_config(default_path, "default")
+    assert manager.load_config(config_path, "user")
+    manager.stop_config_watch()
+    notified = []
+    for section in ("forward", "legacy"):
+        manager.add_observer(section, lambda section, changed: notified.append((section, changed)))
+
+    # 删除没有默认值的键和整个配置节
+    config_path.write_text("[forward]\ndelay = 1.5\nbatch_size = 20\n")
+    manager._reload_config("user")
+    assert sorted(notified) == [("forward", {"hide_author": None}), ("legacy", {"enabled": None})]
+    assert manager.get("forward", "hide_author") is None
+    assert "legacy" not in manager.get_all()
+
+    # 删除有默认值的键时恢复为默认值
+    notified.clear()
+    config_path.write_text("[forward]\nbatch_size = 20\n")
+    manager._reload_config("user")
+    assert notified == [("forward", {"delay": 2})]
+    assert manager.get("forward", "delay") == 2
+
+
+@pytest.mark.asyncio
+async def test_file_watcher_polling_fallback_debounces(tmp_path):
+    path = tmp_path / "settings.json"
+    path.write_text("{}")
+    batches = []
+
+    watcher = FileWatcher(batches.append, debounce=0.05, poll_interval=0.02, use_inotify=False)
+    watcher.start([path])
+    try:
+        assert watcher.mode == "poll"
+        for size in range(1, 4):
+            path.write_text("{" + " " * size + "}")
+            await asyncio.sleep(0.03)
+
+        assert await wait_for(lambda: batches)
+        await asyncio.sleep(0.1)
+        assert batches == [{path.absolute()}]
+    finally:
+        watcher.stop()
+    assert not watcher.running
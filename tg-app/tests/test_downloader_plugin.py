@@ -0,0 +1,219 @@
+"""
+下载插件单元测试，使用模拟的客户端和消息，不依赖Telegram连接。
+"""
+
+import asyncio
+import os
+import sys
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from pyrogram.errors import FloodWait
+
+# 添加项目根目录到Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)  # tg-app目录
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from conftest import FakeTelegramClient
+from core.event_bus import EventBus
+from events import event_types as events
+from plugins.downloader import DownloaderPlugin
+
+CHUNK = 1024 * 1024
+
+
+def make_message(message_id, size, file_name=None, media="document", chat_id=-100123):
+    """构造带媒体的模拟消息"""
+    media_obj = SimpleNamespace(file_size=size, file_name=file_name, mime_type="image/jpeg" if media == "photo" else None)
+    return SimpleNamespace(
+        id=message_id,
+        chat=SimpleNamespace(id=chat_id),
+        date=datetime(2024, 5, 1),
+        media=SimpleNamespace(value=media),
+        media_group_id=None,
+        **{media: media_obj}
+    )
+
+
+class FakeClient(FakeTelegramClient):
+    """模拟 Pyrogram 客户端，stream_media 按 1MB 分块返回数据"""
+
+    def __init__(self, messages, fail_first=()):
+        super().__init__()
+        self.messages = {m.id: m for m in messages}
+        self.fail_first = set(fail_first)
+        self.offsets = []
+
+    async def get_messages(self, chat_id, message_ids):
+        return [self.messages.get(i) for i in message_ids]
+
+    async def stream_media(self, message, offset=0):
+        self.offsets.append((message.id, offset))
+        async with self.request():
+            size = getattr(message, message.media.value).file_size
+            position = offset * CHUNK
+            while position < size:
+                await asyncio.sleep(0.01)
+                length = min(CHUNK, size - position)
+                yield bytes([message.id % 256]) * length
+                position += length
+                if message.id in self.fail_first:
+                    self.fail_first.discard(message.id)
+                    raise ConnectionError("连接中断")
+
+
+def downloader_sections(download_dir, **config):
+    """下载插件使用的配置节"""
+    downloader_config = {"max_concurrent": 2, "retries": 1, "retry_delay": 0.01, "progress_interval": 0, **config}
+    return {"downloader": downloader_config, "storage": {"download_dir": str(download_dir)}}
+
+
+@pytest.mark.asyncio
+async def test_download_request_runs_bounded_and_publishes_once(tmp_path, start_plugin):
+    messages = [make_message(i, 2 * CHUNK + 100, f"file{i}.bin") for i in range(1, 6)]
+    messages.append(make_message(6, 5000, media="photo"))
+    client = FakeClient(messages, fail_first=[2])
+    bus = EventBus()
+    plugin = await start_plugin(DownloaderPlugin, bus, client, downloader_sections(tmp_path))
+
+    received = {events.DOWNLOAD_STARTED: [], events.DOWNLOAD_PROGRESS: [], events.DOWNLOAD_COMPLETED: []}
+    for event_type, items in received.items():
+        async def handler(data, items=items):
+            items.append(data)
+        bus.subscribe(event_type, handler)
+
+    try:
+        result = await bus.publish_and_wait(events.DOWNLOAD_REQUEST, {
+            "chat_id": -100123, "message_ids": [1, 2, 3, 4, 5, 6], "wait": True
+        }, timeout=10.0)
+
+        assert result["success"] and not result["failed"]
+        assert client.max_active == 2
+        paths = sorted(os.path.relpath(f["file_path"], tmp_path) for f in result["files"])
+        assert paths[0] == os.path.join("2024-05-01", "-100123", "1_file1.bin")
+        assert paths[-1] == os.path.join("2024-05-01", "-100123", "6_photo_6.jpg")
+        for info in result["files"]:
+            assert os.path.getsize(info["file_path"]) == info["file_size"]
+            assert not os.path.exists(info["file_path"] + ".part")
+
+        # 中断的文件从已下载的完整数据块继续
+        assert (2, 1) in client.offsets
+
+        await asyncio.sleep(0.05)
+        assert len(received[events.DOWNLOAD_STARTED]) == 1
+        assert len(received[events.DOWNLOAD_COMPLETED]) == 1
+        assert received[events.DOWNLOAD_PROGRESS][-1]["percent"] == 100.0
+
+        # 已下载的文件不再重复下载
+        client.offsets.clear()
+        again = await plugin.download(messages[:2])
+        assert all(f["skipped"] for f in again["files"])
+        assert client.offsets == []
+    finally:
+        await plugin.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_config_change_adjusts_concurrency_and_failures_are_reported(tmp_path, start_plugin):
+    messages = [make_message(i, CHUNK, f"f{i}") for i in range(1, 7)]
+    client = FakeClient(messages)
+    bus = EventBus()
+    sections = downloader_sections(tmp_path, max_concurrent=1)
+    plugin = await start_plugin(DownloaderPlugin, bus, client, sections)
+
+    try:
+        sections["downloader"]["max_concurrent"] = 3
+        await bus.publish(events.CONFIG_CHANGED, events.create_event_data(
+            events.CONFIG_CHANGED, section="downloader", changes={"max_concurrent": 3}
+        ))
+        await asyncio.sleep(0.05)
+        assert plugin.get_stats()["max_concurrent"] == 3
+
+        await plugin.download(messages)
+        assert client.max_active == 3
+
+        # 重试次数用尽后记录失败，全部失败时发布 DOWNLOAD_FAILED
+        failed = []
+
+        async def on_failed(data):
+            failed.append(data)
+        bus.subscribe(events.DOWNLOAD_FAILED, on_failed)
+
+        broken = make_message(99, CHUNK + 10, "broken")
+        client.messages[99] = broken
+        client.stream_media = None
+        result = await plugin.download([broken])
+        await asyncio.sleep(0.05)
+        assert not result["success"] and len(result["failed"]) == 1
+        assert len(failed) == 1 and failed[0]["request_id"] == result["request_id"]
+    finally:
+        await plugin.shutdown()
+
+
+class FloodWaitClient(FakeClient):
+    """第一次下载指定消息时触发 FloodWait"""
+
+    def __init__(self, messages, flood_ids, wait):
+        super().__init__(messages)
+        self.flood_ids = set(flood_ids)
+        self.wait = wait
+        self.finished = []
+
+    async def stream_media(self, message, offset=0):
+        if message.id in self.flood_ids:
+            self.flood_ids.discard(message.id)
+            error = FloodWait(value=1)
+            error.value = self.wait
+            raise error
+        async for chunk in super().stream_media(message, offset):
+            yield chunk
+        self.finished.append(message.id)
+
+
+@pytest.mark.asyncio
+async def test_flood_wait_releases_download_slot(tmp_path, start_plugin):
+    messages = [make_message(i, CHUNK, f"f{i}") for i in range(1, 4)]
+    client = FloodWaitClient(messages, flood_ids=[1], wait=0.3)
+    bus = EventBus()
+    plugin = await start_plugin(DownloaderPlugin, bus, client, downloader_sections(tmp_path, max_concurrent=1))
+
+    try:
+        result = await plugin.download(messages)
+        assert result["success"] and len(result["files"]) == 3
+        # 消息 1 等待期间不占用唯一的下载许可，其他文件先完成
+        assert client.finished == [2, 3, 1]
+        assert client.max_active == 1
+        assert plugin.limiter.active == 0
+    finally:
+        await plugin.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_progress_is_tracked_per_chat(tmp_path, start_plugin):
+    # 不同聊天中的消息ID相同
+    messages = [make_message(7, CHUNK, "a", chat_id=-1001), make_message(7, CHUNK, "b", chat_id=-1002)]
+    client = FakeClient([])
+    bus = EventBus()
+    plugin = await start_plugin(DownloaderPlugin, bus, client, downloader_sections(tmp_path))
+
+    progress = []
+
+    async def on_progress(data):
+        progress.append(data)
+    bus.subscribe(events.DOWNLOAD_PROGRESS, on_progress)
+
+    try:
+        request = plugin.submit(messages)
+        result = await request.future
+        await asyncio.sleep(0.05)
+        assert len(result["files"]) == 2
+        assert request.file_progress == {(-1001, 7): CHUNK, (-1002, 7): CHUNK}
+        assert request.current_bytes == request.total_bytes == 2 * CHUNK
+        assert progress[-1]["percent"] == 100.0
+    finally:
+        await plugin.shutdown()
@@ -0,0 +1,239 @@
+"""
+事件总线进程桥接测试，插件在独立的工作进程中运行，不依赖Telegram连接。
+"""
+
+import asyncio
+import hashlib
+import os
+import sys
+
+import pytest
+
+# 添加项目根目录到Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)  # tg-app目录
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from core.event_bus import EventBus
+from core.event_bridge import ProcessPlugin, WorkerEventBus, MSG_CALL, MSG_EVENT, MSG_REPLY
+from events import event_types as events
+from plugins.base import PluginBase
+
+
+class HashWorkerPlugin(PluginBase):
+    """在工作进程中计算哈希的测试插件"""
+
+    id = "hash_worker"
+    name = "哈希测试插件"
+    version = "1.0.0"
+
+    async def initialize(self) -> None:
+        # 工作进程中没有配置处理器，请求由主进程响应
+        response = await self.publish_and_wait(events.CONFIG_GET_SECTION, {"section": "hash"}, timeout=5.0)
+        self.algorithm = response["data"]["algorithm"]
+
+        self.register_rpc_handler(events.CHANNEL_GET_INFO, self._handle_hash)
+        self.register_event_handler(events.MESSAGE_RECEIVED, self._handle_message)
+        await super().initialize()
+
+    async def shutdown(self) -> None:
+        await super().shutdown()
+
+    async def _handle_hash(self, data):
+        digest = hashlib.new(self.algorithm, data["payload"]).hexdigest()
+        return {"success": True, "digest": digest, "pid": os.getpid()}
+
+    async def _handle_message(self, data):
+        await self.publish_event(events.MESSAGE_EDITED, {"message_id": data["message_id"], "pid": os.getpid()})
+
+
+@pytest.mark.asyncio
+async def test_plugin_runs_in_worker_process():
+    bus = EventBus()
+    edited = []
+
+    async def get_section(data):
+        return {"success": True, "data": {"algorithm": "sha256"}}
+
+    async def on_edited(data):
+        edited.append(data)
+
+    bus.register_rpc(events.CONFIG_GET_SECTION, get_section)
+    bus.subscribe(events.MESSAGE_EDITED, on_edited)
+
+    plugin = ProcessPlugin(bus, HashWorkerPlugin)
+    await plugin.initialize()
+    try:
+        assert plugin.id == "hash_worker"
+        worker_pid = plugin.host.pid
+        assert worker_pid != os.getpid()
+
+        response = await bus.publish_and_wait(events.CHANNEL_GET_INFO, {"payload": b"abc"}, timeout=5.0)
+        assert response == {"success": True, "digest": hashlib.sha256(b"abc").hexdigest(), "pid": worker_pid}
+
+        assert await bus.publish(events.MESSAGE_RECEIVED, {"message_id": 42}) == 1
+        for _ in range(100):
+            if edited:
+                break
+            await asyncio.sleep(0.02)
+        assert edited == [{"message_id": 42, "pid": worker_pid, "source_plugin": "hash_worker"}]
+    finally:
+        await plugin.shutdown()
+
+    assert not plugin.host.alive
+    assert plugin.host.process.exitcode == 0
+    assert await bus.publish(events.MESSAGE_RECEIVED, {"message_id": 43}) == 0
+    assert await bus.publish_and_wait(events.CHANNEL_GET_INFO, {"payload": b"abc"}) is None
+
+
+class ChainWorkerPlugin(PluginBase):
+    """记录收到的事件，并按请求发布事件的测试插件"""
+
+    id = "chain_worker"
+    name = "事件链测试插件"
+    version = "1.0.0"
+
+    async def initialize(self) -> None:
+        self.received = []
+        self.register_event_handler(events.MESSAGE_SENT, self._on_sent)
+        self.register_event_handler(events.MESSAGE_DELETED, self._on_deleted)
+        self.register_rpc_handler(events.MESSAGE_STREAM_FROM_CHANNEL, self._handle_publish)
+        self.register_rpc_handler(events.MESSAGE_GET_FROM_CHANNEL, self._handle_report)
+        await super().initialize()
+
+    async def shutdown(self) -> None:
+        await super().shutdown()
+
+    async def _on_sent(self, data):
+        self.received.append(("sent", data["n"]))
+
+    async def _on_deleted(self, data):
+        self.received.append(("deleted", data["n"]))
+
+    async def _handle_publish(self, data):
+        for index in range(data.get("progress", 0)):
+            await self.publish_event(events.DOWNLOAD_PROGRESS, {"file_id": "f", "current": index})
+        await self.publish_event(events.MESSAGE_SENT, {"n": data["n"]})
+        return {"success": True}
+
+    async def _handle_report(self, data):
+        return {"success": True, "received": self.received}
+
+
+@pytest.mark.asyncio
+async def test_worker_receives_events_published_by_main_handlers_but_not_echo():
+    bus = EventBus()
+
+    async def on_sent(data):
+        # 在处理工作进程事件的上下文中发布的新事件应转发回工作进程
+        await bus.publish(events.MESSAGE_DELETED, {"n": data["n"]})
+
+    bus.subscribe(events.MESSAGE_SENT, on_sent)
+
+    plugin = ProcessPlugin(bus, ChainWorkerPlugin)
+    await plugin.initialize()
+    try:
+        assert await bus.publish_and_wait(events.MESSAGE_STREAM_FROM_CHANNEL, {"n": 1}, timeout=5.0)
+        received = []
+        for _ in range(100):
+            response = await bus.publish_and_wait(events.MESSAGE_GET_FROM_CHANNEL, {}, timeout=5.0)
+            received = response["received"]
+            if ("deleted", 1) in received:
+                break
+            await asyncio.sleep(0.02)
+        # 工作进程自己发布的事件只在本地处理一次，主进程不回送
+        await asyncio.sleep(0.1)
+        response = await bus.publish_and_wait(events.MESSAGE_GET_FROM_CHANNEL, {}, timeout=5.0)
+        assert response["received"] == [("sent", 1), ("deleted", 1)]
+    finally:
+        await plugin.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_worker_only_sends_events_main_subscribes_to():
+    bus = EventBus()
+    sent = []
+
+    async def on_sent(data):
+        sent.append(data["n"])
+
+    bus.subscribe(events.MESSAGE_SENT, on_sent)
+
+    plugin = ProcessPlugin(bus, ChainWorkerPlugin)
+    await plugin.initialize()
+    try:
+        before = plugin.host.get_stats()["received"]
+        await bus.publish_and_wait(events.MESSAGE_STREAM_FROM_CHANNEL, {"n": 1, "progress": 50}, timeout=5.0)
+        # 主进程没有订阅进度事件，只收到 MESSAGE_SENT 和请求响应
+        assert plugin.host.get_stats()["received"] - before == 2
+
+        # 主进程订阅之后，工作进程开始转发进度事件
+        progress = []
+
+        async def on_progress(data):
+            progress.append(data["current"])
+
+        # 订阅键同步消息先于请求到达工作进程
+        bus.subscribe("download.*", on_progress)
+        await bus.publish_and_wait(events.MESSAGE_STREAM_FROM_CHANNEL, {"n": 2, "progress": 3}, timeout=5.0)
+        for _ in range(100):
+            if len(sent) == 2 and len(progress) == 3:
+                break
+            await asyncio.sleep(0.02)
+        assert sent == [1, 2]
+        assert progress == [0, 1, 2]
+    finally:
+        await plugin.shutdown()
+
+
+class RecordingChannel:
+    """记录发送的消息，代替与主进程之间的管道"""
+
+    def __init__(self):
+        self.sent = []
+
+    def send(self, message):
+        self.sent.append(message)
+        return True
+
+
+@pytest.mark.asyncio
+async def test_worker_keeps_message_tasks_until_done():
+    bus = WorkerEventBus()
+    bus.attach(RecordingChannel())
+    gate = asyncio.Event()
+    delivered = []
+
+    async def answer(data):
+        await gate.wait()
+        return {"success": True, "n": data["n"]}
+
+    async def on_message(data):
+        await gate.wait()
+        delivered.append(data["n"])
+
+    bus.register_rpc(events.CHANNEL_GET_INFO, answer)
+    bus.subscribe(events.MESSAGE_RECEIVED, on_message)
+
+    bus._on_message((MSG_CALL, 1, events.CHANNEL_GET_INFO, {"n": 1}, 5.0))
+    bus._on_message((MSG_EVENT, events.MESSAGE_RECEIVED, {"n": 2}))
+    await asyncio.sleep(0)
+    # 事件循环只保留任务的弱引用，由事件总线保留到任务完成
+    assert len(bus._tasks) == 2
+
+    gate.set()
+    for _ in range(100):
+        if not bus._tasks:
+            break
+        await asyncio.sleep(0.01)
+    assert not bus._tasks
+    assert delivered == [2]
+    assert (MSG_REPLY, 1, {"success": True, "n": 1}) in bus._channel.sent
+
+    # 关闭时取消尚未完成的任务
+    gate.clear()
+    bus._on_message((MSG_EVENT, events.MESSAGE_RECEIVED, {"n": 3}))
+    await asyncio.sleep(0)
+    await bus.close()
+    assert not bus._tasks and delivered == [2]
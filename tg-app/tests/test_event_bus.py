@@ -0,0 +1,211 @@
+"""
+事件总线单元测试，不依赖Telegram连接。
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+# 添加项目根目录到Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)  # tg-app目录
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from core.event_bus import EventBus, category_key
+from events import event_types as events
+
+
+@pytest.mark.asyncio
+async def test_publish_single_and_multiple_handlers():
+    bus = EventBus()
+    received = []
+
+    async def first(data):
+        received.append(("first", data["value"]))
+
+    async def second(data):
+        received.append(("second", data["value"]))
+
+    bus.subscribe(events.MESSAGE_SENT, first)
+    assert await bus.publish(events.MESSAGE_SENT, {"value": 1}) == 1
+
+    bus.subscribe(events.MESSAGE_SENT, second)
+    assert await bus.publish(events.MESSAGE_SENT, {"value": 2}) == 2
+
+    bus.unsubscribe(events.MESSAGE_SENT, first)
+    assert await bus.publish(events.MESSAGE_SENT, {"value": 3}) == 1
+
+    assert received[0] == ("first", 1)
+    assert sorted(received[1:3]) == [("first", 2), ("second", 2)]
+    assert received[3] == ("second", 3)
+    assert await bus.publish(events.MESSAGE_EDITED, {}) == 0
+
+
+@pytest.mark.asyncio
+async def test_handler_error_does_not_stop_other_handlers():
+    bus = EventBus()
+    received = []
+
+    async def broken(data):
+        raise RuntimeError("boom")
+
+    async def working(data):
+        received.append(data)
+
+    bus.subscribe(events.DOWNLOAD_PROGRESS, broken)
+    bus.subscribe(events.DOWNLOAD_PROGRESS, working)
+
+    # 进度事件走热点路径，处理器按顺序直接调用
+    assert await bus.publish(events.DOWNLOAD_PROGRESS, {"current": 1}) == 2
+    assert received == [{"current": 1}]
+    assert bus.get_stats()["handled"] == 1
+
+
+@pytest.mark.asyncio
+async def test_coalesced_subscription_delivers_latest_per_key():
+    bus = EventBus()
+    received = []
+
+    async def on_progress(data):
+        received.append((data["file_id"], data["current"]))
+
+    bus.subscribe_coalesced(events.DOWNLOAD_PROGRESS, on_progress, key="file_id", interval=0.05)
+
+    for current in range(100):
+        await bus.publish(events.DOWNLOAD_PROGRESS, {"file_id": "a", "current": current})
+        await bus.publish(events.DOWNLOAD_PROGRESS, {"file_id": "b", "current": current * 2})
+
+    # 第一轮投递在下一次循环迭代中发生，此时只剩各键的最新值
+    await asyncio.sleep(0.01)
+    assert sorted(received) == [("a", 99), ("b", 198)]
+
+    # 间隔内的新数据被推迟到间隔结束后投递
+    await bus.publish(events.DOWNLOAD_PROGRESS, {"file_id": "a", "current": 100})
+    await asyncio.sleep(0.01)
+    assert len(received) == 2
+    await asyncio.sleep(0.06)
+    assert received[-1] == ("a", 100)
+
+
+@pytest.mark.asyncio
+async def test_coalesced_subscription_batch_and_unsubscribe():
+    bus = EventBus()
+    batches = []
+
+    async def on_batch(data):
+        batches.append(data)
+
+    bus.subscribe_coalesced(events.UPLOAD_PROGRESS, on_batch, key=lambda d: d["message_id"],
+                            interval=0.05, batch=True)
+
+    for message_id in range(10):
+        await bus.publish(events.UPLOAD_PROGRESS, {"message_id": message_id, "current": 1})
+    await asyncio.sleep(0.01)
+
+    assert len(batches) == 1
+    assert batches[0]["event_type"] == events.UPLOAD_PROGRESS
+    assert [u["message_id"] for u in batches[0]["updates"]] == list(range(10))
+
+    await bus.publish(events.UPLOAD_PROGRESS, {"message_id": 1, "current": 2})
+    assert bus.unsubscribe(events.UPLOAD_PROGRESS, on_batch)
+    await asyncio.sleep(0.08)
+    assert len(batches) == 1
+
+
+@pytest.mark.asyncio
+async def test_wildcard_and_category_subscriptions():
+    bus = EventBus()
+    received = []
+
+    def recorder(tag):
+        async def handler(data):
+            received.append((tag, data["event_type"]))
+        return handler
+
+    bus.subscribe("download.*", recorder("prefix"))
+    bus.subscribe_category(events.EventCategory.UPLOAD, recorder("category"))
+    everything = recorder("all")
+    bus.subscribe("*", everything)
+
+    for event_type in (events.DOWNLOAD_STARTED, events.UPLOAD_COMPLETED, events.MESSAGE_SENT):
+        await bus.publish(event_type, events.create_event_data(event_type))
+
+    assert sorted(received) == sorted([
+        ("prefix", events.DOWNLOAD_STARTED), ("all", events.DOWNLOAD_STARTED),
+        ("category", events.UPLOAD_COMPLETED), ("all", events.UPLOAD_COMPLETED),
+        ("all", events.MESSAGE_SENT),
+    ])
+
+    # 取消订阅后分发表重新计算
+    received.clear()
+    assert bus.unsubscribe("*", everything)
+    assert bus.unsubscribe_all(category_key(events.EventCategory.UPLOAD)) == 1
+    await bus.publish(events.UPLOAD_COMPLETED, events.create_event_data(events.UPLOAD_COMPLETED))
+    await bus.publish(events.DOWNLOAD_FAILED, events.create_event_data(events.DOWNLOAD_FAILED))
+    assert received == [("prefix", events.DOWNLOAD_FAILED)]
+
+
+@pytest.mark.asyncio
+async def test_publish_and_wait_prefers_bound_handler_without_mutating_data():
+    bus = EventBus()
+    seen = []
+
+    async def subscribed(data):
+        seen.append("subscribed")
+        return {"from": "subscribed"}
+
+    async def bound(data):
+        seen.append("bound")
+        return {"from": "bound", "value": data["value"]}
+
+    bus.subscribe(events.CHANNEL_GET_INFO, subscribed)
+    request = {"value": 7}
+    assert await bus.publish_and_wait(events.CHANNEL_GET_INFO, request) == {"from": "subscribed"}
+
+    bus.register_rpc(events.CHANNEL_GET_INFO, bound)
+    assert await bus.publish_and_wait(events.CHANNEL_GET_INFO, request) == {"from": "bound", "value": 7}
+    assert request == {"value": 7}
+    assert seen == ["subscribed", "bound"]
+
+    assert bus.unregister_rpc(events.CHANNEL_GET_INFO, bound)
+    assert not bus.unregister_rpc(events.CHANNEL_GET_INFO)
+    assert await bus.publish_and_wait(events.CHANNEL_GET_INFO, request) == {"from": "subscribed"}
+
+
+@pytest.mark.asyncio
+async def test_publish_and_wait_cancels_remaining_handlers_and_times_out():
+    bus = EventBus()
+    cancelled = []
+
+    async def fast(data):
+        return {"success": True}
+
+    async def slow(data):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(data["id"])
+            raise
+
+    async def broken(data):
+        raise RuntimeError("boom")
+
+    bus.subscribe(events.CHANNEL_PARSE, slow)
+    bus.subscribe(events.CHANNEL_PARSE, broken)
+    bus.subscribe(events.CHANNEL_PARSE, fast)
+    assert await bus.publish_and_wait(events.CHANNEL_PARSE, {"id": 1}) == {"success": True}
+    await asyncio.sleep(0)
+    assert cancelled == [1]
+
+    bus.unsubscribe(events.CHANNEL_PARSE, fast)
+    assert await bus.publish_and_wait(events.CHANNEL_PARSE, {"id": 2}, timeout=0.05) is None
+    await asyncio.sleep(0)
+    assert cancelled == [1, 2]
+
+    bus.register_rpc(events.CLIENT_GET_INSTANCE, slow)
+    assert await bus.publish_and_wait(events.CLIENT_GET_INSTANCE, {"id": 3}, timeout=0.05) is None
+    assert cancelled == [1, 2, 3]
+    assert await bus.publish_and_wait(events.MESSAGE_SENT, {}) is None
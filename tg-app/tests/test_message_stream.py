@@ -0,0 +1,160 @@
+"""
+按页获取频道消息的单元测试，使用模拟的客户端，不依赖Telegram连接。
+"""
+
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+# 添加项目根目录到Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)  # tg-app目录
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from conftest import FakeTelegramClient
+from core.event_bus import EventBus
+from events import event_types as events
+from plugins.utils import ChannelPlugin
+
+
+class FakeClient(FakeTelegramClient):
+    """模拟 get_chat_history，消息ID从 top 开始递减，每 100 条模拟一次网络请求"""
+
+    def __init__(self, top=250, fail_after=None):
+        super().__init__()
+        self.top = top
+        self.fail_after = fail_after
+        self.yielded = 0
+
+    async def get_chat_history(self, chat_id, limit=0, offset_id=0):
+        message_id = (offset_id or self.top + 1) - 1
+        count = 0
+        while message_id > 0 and (not limit or count < limit):
+            if count % 100 == 0:
+                await asyncio.sleep(0.02)
+            if self.fail_after is not None and count >= self.fail_after:
+                raise ConnectionError("连接中断")
+            self.yielded += 1
+            count += 1
+            yield SimpleNamespace(id=message_id, chat=SimpleNamespace(id=chat_id))
+            message_id -= 1
+
+
+@pytest.mark.asyncio
+async def test_iterator_delivers_pages_before_history_is_drained(start_plugin):
+    client = FakeClient(top=250)
+    bus = EventBus()
+    plugin = await start_plugin(ChannelPlugin, bus, client)
+
+    try:
+        response = await bus.publish_and_wait(events.MESSAGE_STREAM_FROM_CHANNEL, {
+            "chat_id": -100, "page_size": 50, "prefetch": 1
+        })
+        stream = response["stream"]
+
+        sizes = []
+        async for page in stream:
+            if not sizes:
+                # 第一页交付时后续消息还没有全部获取
+                assert client.yielded < 250
+            # 预取有上限：处理当前页期间最多多获取两页（一页在队列中，一页在获取中）
+            assert client.yielded <= stream.count + 2 * 50
+            sizes.append(len(page))
+            await asyncio.sleep(0.01)
+
+        assert sizes == [50] * 5
+        assert stream.cursor == 1 and stream.done
+        assert response["stream_id"] not in plugin._streams
+
+        # 用 cursor 继续获取
+        response = await bus.publish_and_wait(events.MESSAGE_STREAM_FROM_CHANNEL, {
+            "chat_id": -100, "offset_id": 101, "limit": 30
+        })
+        async with response["stream"] as stream:
+            ids = [message.id async for message in stream.messages()]
+        assert ids == list(range(100, 70, -1))
+    finally:
+        await plugin.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_events_mode_publishes_pages_and_can_be_cancelled(start_plugin):
+    client = FakeClient(top=1000)
+    bus = EventBus()
+    plugin = await start_plugin(ChannelPlugin, bus, client)
+    pages = []
+    finished = asyncio.Event()
+
+    async def on_page(data):
+        pages.append(data)
+        if data["done"]:
+            finished.set()
+        elif data["page"] == 2 and client.fail_after is None:
+            response = await bus.publish_and_wait(events.MESSAGE_STREAM_CANCEL, {"stream_id": data["stream_id"]})
+            assert response["success"] and response["cursor"] == 801
+    bus.subscribe(events.MESSAGE_PAGE, on_page)
+
+    try:
+        response = await bus.publish_and_wait(events.MESSAGE_STREAM_FROM_CHANNEL, {
+            "chat_id": -100, "mode": "events"
+        })
+        assert response["success"] and "stream" not in response
+        await asyncio.wait_for(finished.wait(), 2.0)
+
+        assert [p["count"] for p in pages] == [100, 100, 0]
+        assert pages[-1]["total"] == 200 and pages[-1]["cursor"] == 801 and pages[-1]["error"] is None
+        assert client.yielded < 1000
+        await asyncio.sleep(0.01)
+        assert not plugin._streams and not plugin._stream_tasks
+
+        # 出错时先交付已获取的消息，结束事件中带有错误信息
+        pages.clear()
+        finished.clear()
+        client.fail_after = 150
+        await bus.publish_and_wait(events.MESSAGE_STREAM_FROM_CHANNEL, {"chat_id": -100, "mode": "events"})
+        await asyncio.wait_for(finished.wait(), 2.0)
+        assert [p["count"] for p in pages] == [100, 50, 0]
+        assert "连接中断" in pages[-1]["error"]
+    finally:
+        await plugin.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_abandoned_iterator_stops_after_idle_timeout(start_plugin):
+    client = FakeClient(top=1000)
+    bus = EventBus()
+    plugin = await start_plugin(ChannelPlugin, bus, client)
+
+    try:
+        response = await bus.publish_and_wait(events.MESSAGE_STREAM_FROM_CHANNEL, {
+            "chat_id": -100, "page_size": 50, "prefetch": 1, "idle_timeout": 0.1
+        })
+        stream = response["stream"]
+        await stream.__anext__()
+
+        # 调用方不再读取也没有关闭，后台获取在超时后结束并移出插件
+        await asyncio.sleep(0.3)
+        assert stream.done and stream._producer.done()
+        assert response["stream_id"] not in plugin._streams
+        yielded = client.yielded
+        assert yielded < 1000
+
+        with pytest.raises(asyncio.TimeoutError):
+            await stream.__anext__()
+        assert [page async for page in stream] == []
+        assert stream.cursor == 951 and client.yielded == yielded
+
+        # 消息全部预取完但没有读完的消息流同样会结束
+        response = await bus.publish_and_wait(events.MESSAGE_STREAM_FROM_CHANNEL, {
+            "chat_id": -100, "limit": 30, "prefetch": 2, "idle_timeout": 0.1
+        })
+        await asyncio.sleep(0.3)
+        assert response["stream"].done and response["stream_id"] not in plugin._streams
+    finally:
+        await plugin.shutdown()
@@ -0,0 +1,135 @@
+"""
+插件管理器单元测试，使用临时插件目录，不依赖Telegram连接。
+"""
+
+import json
+import os
+import sys
+import textwrap
+import time
+
+import pytest
+
+# 添加项目根目录到Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)  # tg-app目录
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from core.event_bus import EventBus
+from core.plugin_manager import PluginManager
+
+PLUGIN_SOURCE = '''
+import asyncio
+from plugins.base import PluginBase
+
+class {class_name}(PluginBase):
+    id = "{plugin_id}"
+    name = "{plugin_id} plugin"
+    version = "{version}"
+    dependencies = {dependencies!r}
+
+    async def initialize(self):
+        await asyncio.sleep({delay})
+        await super().initialize()
+
+    async def shutdown(self):
+        await super().shutdown()
+'''
+
+
+def write_plugin(root, package, plugin_id, version="1.0.0", dependencies=(), delay=0):
+    """在临时目录中生成插件包"""
+    pkg_dir = root / package
+    pkg_dir.mkdir(exist_ok=True)
+    (pkg_dir / "__init__.py").write_text("")
+    class_name = f"{plugin_id.capitalize()}Plugin"
+    (pkg_dir / f"{plugin_id}_plugin.py").write_text(textwrap.dedent(PLUGIN_SOURCE.format(
+        class_name=class_name, plugin_id=plugin_id, version=version, dependencies=list(dependencies), delay=delay
+    )))
+    return f"{package}.{plugin_id}_plugin"
+
+
+def forget_modules(*packages):
+    """从sys.modules移除临时插件模块，模拟新进程"""
+    for name in list(sys.modules):
+        if name.split(".")[0] in packages:
+            del sys.modules[name]
+
+
+@pytest.mark.asyncio
+async def test_manifest_discovery_imports_only_changed_and_enabled_plugins(tmp_path):
+    plugin_dir = tmp_path / "plugins_src"
+    plugin_dir.mkdir()
+    alpha_module = write_plugin(plugin_dir, "mfalpha", "alpha")
+    beta_module = write_plugin(plugin_dir, "mfbeta", "beta", dependencies=["alpha"])
+    manifest_path = tmp_path / "data" / "plugin_manifest.json"
+
+    try:
+        # 首次发现导入模块并写入清单
+        manager = PluginManager(EventBus(), manifest_path=manifest_path)
+        assert sorted(await manager.discover_plugins([str(plugin_dir)])) == ["alpha", "beta"]
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        assert set(manifest["modules"]) == {alpha_module, beta_module}
+
+        # 清单命中时不导入任何插件模块
+        forget_modules("mfalpha", "mfbeta")
+        manager = PluginManager(EventBus(), enabled_plugins=["beta"], manifest_path=manifest_path)
+        assert sorted(await manager.discover_plugins([str(plugin_dir)])) == ["alpha", "beta"]
+        assert alpha_module not in sys.modules and beta_module not in sys.modules
+        assert manager.get_plugin_info("beta")["dependencies"] == ["alpha"]
+        assert not manager.get_plugin_info("alpha")["enabled"]
+
+        # 只加载启用的插件及其依赖
+        loaded = await manager.load_all_plugins()
+        assert [plugin.id for plugin in loaded] == ["beta"]
+        assert manager.has_plugin("alpha") and manager.has_plugin("beta")
+        await manager.unload_all_plugins()
+
+        # 文件变化后只重新扫描该模块
+        forget_modules("mfalpha", "mfbeta")
+        write_plugin(plugin_dir, "mfbeta", "beta", version="2.0.0-changed", dependencies=["alpha"])
+        manager = PluginManager(EventBus(), manifest_path=manifest_path)
+        await manager.discover_plugins([str(plugin_dir)])
+        assert beta_module in sys.modules and alpha_module not in sys.modules
+        assert manager.get_plugin_info("beta")["version"] == "2.0.0-changed"
+    finally:
+        forget_modules("mfalpha", "mfbeta")
+        sys.path.remove(str(plugin_dir))
+
+
+@pytest.mark.asyncio
+async def test_independent_plugins_initialize_concurrently(tmp_path):
+    plugin_dir = tmp_path / "plugins_src"
+    plugin_dir.mkdir()
+    write_plugin(plugin_dir, "dagnet", "net", delay=0.2)
+    write_plugin(plugin_dir, "dagdisk", "disk", delay=0.2)
+    write_plugin(plugin_dir, "dagjob", "job", dependencies=["net", "disk"], delay=0.1)
+    write_plugin(plugin_dir, "dagloopa", "loopa", dependencies=["loopb"])
+    write_plugin(plugin_dir, "dagloopb", "loopb", dependencies=["loopa"])
+
+    try:
+        manager = PluginManager(EventBus(), disabled_plugins=["loopa", "loopb"])
+        await manager.discover_plugins([str(plugin_dir)])
+
+        started = time.perf_counter()
+        loaded = await manager.load_all_plugins()
+        elapsed = time.perf_counter() - started
+
+        # 关键路径为 0.2 + 0.1 秒，依次初始化则需要 0.5 秒
+        assert sorted(plugin.id for plugin in loaded) == ["disk", "job", "net"]
+        assert elapsed < 0.45
+        assert manager._load_order.index("job") > max(manager._load_order.index("net"), manager._load_order.index("disk"))
+
+        timings = manager.get_load_timings()
+        assert timings["job"]["dependencies"] >= 0.19
+        assert timings["net"]["initialize"] >= 0.19
+        assert manager.get_critical_path()[-1] == "job"
+        assert manager.get_plugin_info("job")["load_time"]["initialize"] >= 0.09
+
+        # 循环依赖的插件直接失败，不会互相等待
+        assert await manager.load_plugin("loopa") is None
+        assert await manager.unload_all_plugins()
+    finally:
+        forget_modules("dagnet", "dagdisk", "dagjob", "dagloopa", "dagloopb")
+        sys.path.remove(str(plugin_dir))
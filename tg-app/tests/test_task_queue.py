@@ -0,0 +1,206 @@
+"""
+任务队列单元测试，不依赖Telegram连接。
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+# 添加项目根目录到Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)  # tg-app目录
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+# 复用下载、上传插件测试中的模拟客户端
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from core.event_bus import EventBus
+from events import event_types as events
+from plugins.utils.task_queue_plugin import TaskQueuePlugin
+from task_queue import TaskScheduler, TaskCancelled, run_in_queue
+
+from test_downloader_plugin import FakeClient as FakeDownloadClient, make_message
+from test_uploader_plugin import FakeClient as FakeUploadClient, make_files
+
+
+@pytest.mark.asyncio
+async def test_scheduler_priorities_cancellation_and_history():
+    scheduler = TaskScheduler(worker_count=1, history_size=3)
+    scheduler.start()
+    order = []
+    gate = asyncio.Event()
+
+    async def job(name, wait=None):
+        if wait:
+            await wait.wait()
+        order.append(name)
+        return name
+
+    try:
+        blocker = scheduler.submit(lambda: job("blocker", gate))
+        await asyncio.sleep(0)
+        low = scheduler.submit(lambda: job("low"), priority=0)
+        high = scheduler.submit(lambda: job("high"), priority=5)
+        dropped = scheduler.submit(job("dropped"), priority=9)
+        assert scheduler.cancel(dropped.id)
+
+        gate.set()
+        assert await low.wait() == "low"
+        assert order == ["blocker", "high", "low"]
+        assert high.wait_time >= blocker.run_time - 0.01
+        with pytest.raises(TaskCancelled):
+            await dropped.wait()
+
+        # 运行中的任务也可以取消
+        running = scheduler.submit(lambda: asyncio.sleep(10))
+        await asyncio.sleep(0.01)
+        assert running.status == "running" and running.cancel()
+        with pytest.raises(TaskCancelled):
+            await running.wait()
+
+        async def fail():
+            raise ValueError("失败")
+        with pytest.raises(ValueError):
+            await scheduler.submit(fail).wait()
+
+        # 只保留最近的已结束任务记录，任务函数已释放
+        stats = scheduler.get_stats()
+        assert stats["history"] == 3 and stats["completed"] == 3
+        assert stats["cancelled"] == 2 and stats["failed"] == 1
+        assert scheduler.get(blocker.id) is None
+        assert [t.status for t in scheduler.list_tasks()] == ["completed", "cancelled", "failed"]
+        assert all(t.func is None for t in scheduler.list_tasks())
+
+        # 调整工作协程数
+        scheduler.set_worker_count(3)
+        assert scheduler.get_stats()["workers"] == 3
+        scheduler.set_worker_count(1)
+        await asyncio.sleep(0)
+        assert scheduler.get_stats()["workers"] == 1
+    finally:
+        await scheduler.stop()
+
+
+@pytest.mark.asyncio
+async def test_task_events_are_kept_until_sent():
+    received = []
+    gate = asyncio.Event()
+
+    async def on_event(event_type, task):
+        await gate.wait()
+        if event_type == events.TASK_FAILED:
+            raise RuntimeError("发送失败")
+        received.append(event_type)
+
+    scheduler = TaskScheduler(worker_count=1, on_event=on_event)
+    scheduler.start()
+
+    async def fail():
+        raise ValueError("失败")
+
+    await scheduler.submit(lambda: asyncio.sleep(0)).wait()
+    with pytest.raises(ValueError):
+        await scheduler.submit(fail).wait()
+    scheduler.submit(lambda: asyncio.sleep(10))
+    await asyncio.sleep(0.01)
+
+    # 事件任务在发送完成前一直被调度器引用
+    assert len(scheduler._event_tasks) == 8
+    gate.set()
+    await scheduler.stop()
+
+    assert not scheduler._event_tasks
+    assert received.count(events.TASK_CREATED) == 3
+    assert events.TASK_COMPLETED in received and events.TASK_CANCELLED in received
+    assert events.TASK_FAILED not in received
+
+
+@pytest.mark.asyncio
+async def test_run_in_queue_without_local_task_queue_runs_directly():
+    # 工作进程的事件总线上没有 TASK_ADD 处理器，函数不会被发送到其他进程
+    bus = EventBus()
+    calls = []
+
+    async def publish_and_wait(*args, **kwargs):
+        calls.append(args)
+        return None
+    bus.publish_and_wait = publish_and_wait
+
+    async def job():
+        return "done"
+
+    assert not bus.has_rpc_handler(events.TASK_ADD)
+    assert await run_in_queue(bus, job) == "done"
+    assert not calls
+
+    plugin = TaskQueuePlugin(EventBus())
+    await plugin.initialize()
+    try:
+        assert plugin.event_bus.has_rpc_handler(events.TASK_ADD)
+        assert await run_in_queue(plugin.event_bus, job) == "done"
+        assert plugin.scheduler.get_stats()["completed"] == 1
+    finally:
+        await plugin.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_downloads_and_uploads_share_the_global_budget(tmp_path, start_plugin):
+    from plugins.downloader import DownloaderPlugin
+    from plugins.uploader import UploaderPlugin
+
+    bus = EventBus()
+    sections = {
+        "task_queue": {"worker_count": 3, "history_size": 100},
+        "uploader": {"max_concurrent": 4, "wait_between_messages": 0},
+        "downloader": {"max_concurrent": 4, "retries": 0, "progress_interval": 0},
+        "storage": {"download_dir": str(tmp_path / "downloads")},
+    }
+    messages = [make_message(i, 2 * 1024 * 1024, f"d{i}") for i in range(1, 7)]
+    downloader = await start_plugin(DownloaderPlugin, bus, FakeDownloadClient(messages), sections)
+    queue_plugin = await start_plugin(TaskQueuePlugin, bus, None, sections)
+    uploader = await start_plugin(UploaderPlugin, bus, FakeUploadClient(), sections)
+
+    task_events = []
+
+    async def on_task_event(data):
+        task_events.append(data["event_type"])
+    bus.subscribe("task.*", on_task_event)
+
+    active = {"now": 0, "max": 0}
+    original_run = queue_plugin.scheduler._run_task
+
+    async def tracked_run(task):
+        active["now"] += 1
+        active["max"] = max(active["max"], active["now"])
+        try:
+            await original_run(task)
+        finally:
+            active["now"] -= 1
+    queue_plugin.scheduler._run_task = tracked_run
+
+    try:
+        files = make_files(tmp_path, 6)
+        download_result, upload_results = await asyncio.gather(
+            downloader.download(messages),
+            asyncio.gather(*(uploader.upload([{"path": p}], [-1, -2]) for p in files))
+        )
+        assert download_result["success"] and all(r["success"] for r in upload_results)
+
+        # 下载和上传各自允许 4 个并发，但合计不超过任务队列的 3 个工作协程
+        assert active["max"] == 3
+        stats = queue_plugin.get_stats()
+        assert stats["completed"] == 12 and stats["pending"] == 0
+
+        response = await bus.publish_and_wait(events.TASK_GET_ALL, {"filters": {"status": "completed"}})
+        assert response["count"] == 12
+        assert {t["metadata"]["type"] for t in response["tasks"]} == {"download", "upload"}
+
+        await asyncio.sleep(0.05)
+        assert task_events.count(events.TASK_COMPLETED) == 12
+    finally:
+        await uploader.shutdown()
+        await downloader.shutdown()
+        await queue_plugin.shutdown()
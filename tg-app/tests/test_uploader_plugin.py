@@ -0,0 +1,155 @@
+"""
+上传插件单元测试，使用模拟的客户端，不依赖Telegram连接。
+"""
+
+import asyncio
+import itertools
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+# 添加项目根目录到Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)  # tg-app目录
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from conftest import FakeTelegramClient
+from core.event_bus import EventBus
+from events import event_types as events
+from plugins.uploader import UploaderPlugin
+
+
+class FakeClient(FakeTelegramClient):
+    """模拟 Pyrogram 客户端，按路径发送视为上传，返回带 file_id 的消息"""
+
+    def __init__(self, fail_targets=()):
+        super().__init__()
+        self.fail_targets = set(fail_targets)
+        self.ids = itertools.count(1)
+        self.sent = []
+
+    async def _send(self, chat_id, media_type, media):
+        if chat_id in self.fail_targets:
+            raise ConnectionError("发送失败")
+        uploading = os.path.exists(media)
+        if uploading:
+            # 只有上传文件计入并发，按 file_id 转发不占用上传名额
+            async with self.request():
+                await asyncio.sleep(0.03)
+        else:
+            await asyncio.sleep(0.001)
+        self.sent.append((chat_id, media, uploading))
+        file_id = f"id:{os.path.basename(media)}" if uploading else media
+        return SimpleNamespace(
+            id=next(self.ids),
+            media=SimpleNamespace(value=media_type),
+            **{media_type: SimpleNamespace(file_id=file_id)}
+        )
+
+    async def send_document(self, chat_id, document, caption="", progress=None):
+        if progress and os.path.exists(document):
+            await progress(os.path.getsize(document), os.path.getsize(document))
+        return await self._send(chat_id, "document", document)
+
+    async def send_photo(self, chat_id, photo, caption="", progress=None):
+        return await self._send(chat_id, "photo", photo)
+
+    async def send_media_group(self, chat_id, media):
+        return [await self._send(chat_id, "photo" if type(m).__name__ == "InputMediaPhoto" else "document", m.media)
+                for m in media]
+
+
+def uploader_sections(**config):
+    """上传插件使用的配置节"""
+    return {"uploader": {"max_concurrent": 2, "retries": 1, "retry_delay": 0.01,
+                         "wait_between_messages": 0, "progress_interval": 0, **config}}
+
+
+def make_files(tmp_path, count, suffix=".bin"):
+    """生成临时文件"""
+    paths = []
+    for i in range(count):
+        path = tmp_path / f"file{i}{suffix}"
+        path.write_bytes(b"x" * (100 + i))
+        paths.append(str(path))
+    return paths
+
+
+@pytest.mark.asyncio
+async def test_each_file_is_uploaded_once_for_all_targets(tmp_path, start_plugin):
+    client = FakeClient()
+    bus = EventBus()
+    plugin = await start_plugin(UploaderPlugin, bus, client, uploader_sections())
+    completed = []
+
+    async def on_completed(data):
+        completed.append(data)
+    bus.subscribe(events.UPLOAD_COMPLETED, on_completed)
+
+    paths = make_files(tmp_path, 6)
+    try:
+        # 三个请求并发，最多同时上传 2 个文件
+        results = await asyncio.gather(
+            bus.publish_and_wait(events.UPLOAD_REQUEST, {
+                "files": [{"path": p} for p in paths[:2]], "targets": [-1, -2, -3], "wait": True
+            }, timeout=10.0),
+            plugin.upload([{"path": p} for p in paths[2:4]], [-4, -5]),
+            plugin.upload([{"path": p} for p in paths[4:]], [-6])
+        )
+        assert all(r["success"] and not r["failed"] for r in results)
+
+        uploads = [media for _, media, uploading in client.sent if uploading]
+        assert sorted(uploads) == sorted(paths)
+        assert client.max_active == 2
+
+        # 其他目标按 file_id 发送，且保持请求中的顺序
+        first = results[0]
+        assert [media for chat_id, media, _ in client.sent if chat_id == -3] == ["id:file0.bin", "id:file1.bin"]
+        assert len(first["messages"]["-2"]) == 2
+        assert first["file_ids"][paths[0]] == "id:file0.bin"
+
+        # 之前上传过的文件在新请求中也不再上传
+        again = await plugin.upload([{"path": paths[0]}], [-7])
+        assert again["messages"]["-7"] and (-7, "id:file0.bin", False) in client.sent
+
+        await asyncio.sleep(0.05)
+        assert len(completed) == 4
+        assert plugin.get_stats()["uploaded"] == 6
+    finally:
+        await plugin.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_media_group_and_failed_first_target(tmp_path, start_plugin):
+    client = FakeClient(fail_targets=[-1, -2])
+    bus = EventBus()
+    plugin = await start_plugin(UploaderPlugin, bus, client, uploader_sections())
+
+    paths = make_files(tmp_path, 3, suffix=".jpg")
+    try:
+        result = await plugin.upload([{"path": p} for p in paths], [-10, -20], group=True)
+        assert result["success"]
+        assert [uploading for chat_id, _, uploading in client.sent if chat_id == -10] == [True] * 3
+        assert [uploading for chat_id, _, uploading in client.sent if chat_id == -20] == [False] * 3
+
+        # 第一个目标失败时由下一个目标上传文件内容，其余目标复用它的 file_id
+        path = make_files(tmp_path, 1, ".txt")[0]
+        partial = await plugin.upload([{"path": path}], [-1, -30, -40])
+        assert partial["success"]
+        assert [f["target"] for f in partial["failed"]] == [-1]
+        assert [(chat_id, uploading) for chat_id, _, uploading in client.sent if chat_id in (-30, -40)] == [
+            (-30, True), (-40, False)
+        ]
+        assert set(partial["messages"]) == {"-30", "-40"}
+
+        # 所有目标都失败时结果为失败
+        failed = await plugin.upload([{"path": path}], [-1, -2])
+        assert not failed["success"]
+        assert [f["target"] for f in failed["failed"]] == [-1, -2]
+    finally:
+        await plugin.shutdown()
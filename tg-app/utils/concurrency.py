@@ -0,0 +1,99 @@
+"""
+并发控制模块。
+
+本模块提供可以在运行中调整上限的并发限制器，下载、上传等插件用它限制同时
+进行的网络操作数量，配置变更后不需要重建限制器。
+"""
+
+import asyncio
+from collections import deque
+from typing import Deque, Optional
+
+
+class ConcurrencyLimiter:
+    """
+    可调整上限的并发限制器
+
+    用法与 asyncio.Semaphore 相同（async with limiter），区别是 set_limit
+    可以在运行中修改上限：调高时立即唤醒等待者，调低时已经开始的操作不受
+    影响，之后的操作在活跃数降到新上限以下后才能开始。等待者按先来先得的
+    顺序获得许可。
+    """
+
+    def __init__(self, limit: int):
+        """
+        初始化并发限制器
+
+        Args:
+            limit: 同时进行的最大操作数
+        """
+        self._limit = max(1, int(limit))
+        self._active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def limit(self) -> int:
+        """当前上限"""
+        return self._limit
+
+    @property
+    def active(self) -> int:
+        """正在进行的操作数"""
+        return self._active
+
+    @property
+    def waiting(self) -> int:
+        """等待许可的操作数"""
+        return len(self._waiters)
+
+    def set_limit(self, limit: int) -> None:
+        """
+        调整上限
+
+        Args:
+            limit: 新的最大操作数
+        """
+        self._limit = max(1, int(limit))
+        self._wake()
+
+    async def acquire(self) -> None:
+        """获取许可，达到上限时等待"""
+        if self._active < self._limit and not self._waiters:
+            self._active += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # 已经获得许可后才被取消，归还许可
+                self.release()
+            else:
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+            raise
+
+    def release(self) -> None:
+        """归还许可"""
+        self._active -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        """在上限允许的范围内按顺序唤醒等待者"""
+        while self._waiters and self._active < self._limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._active += 1
+                waiter.set_result(None)
+
+    async def __aenter__(self) -> "ConcurrencyLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> Optional[bool]:
+        self.release()
+        return None
@@ -0,0 +1,281 @@
+"""
+文件变更监视模块。
+
+本模块在事件循环中监视一组文件，Linux 上通过 inotify 接收内核通知，
+其他平台或 inotify 不可用时退回到定时检查文件状态。短时间内的多次变更
+合并为一次回调。
+
+本模块与 tg_forwarder/utils/file_watcher.py 是同一实现。两个应用各自使用独立的日志系统，
+互不导入，修改时需要同步两处。
+"""
+
+import os
+import sys
+import errno
+import ctypes
+import ctypes.util
+import struct
+import asyncio
+from pathlib import Path
+from typing import Dict, Set, Tuple, Optional, Callable, Iterable
+
+from utils.logger import get_logger
+
+# 获取日志记录器
+logger = get_logger("file_watcher")
+
+# 变更回调，参数为发生变更的文件路径集合
+ChangeCallback = Callable[[Set[Path]], None]
+
+# inotify 常量，见 <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+
+# 编辑器通常先写临时文件再重命名覆盖，因此监视所在目录而不是文件本身
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _load_inotify() -> Optional[ctypes.CDLL]:
+    """加载 libc 中的 inotify 函数，不可用时返回 None"""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+def _file_state(path: Path) -> Optional[Tuple[int, int]]:
+    """获取文件的修改时间和大小，文件不存在时返回 None"""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class FileWatcher:
+    """
+    文件变更监视器
+
+    inotify 的文件描述符通过 loop.add_reader 注册到事件循环，变更通知直接在
+    事件循环线程中处理，不需要额外的线程；收到变更后等待 debounce 秒，期间
+    的后续变更一并合并。回调只在文件内容状态（修改时间或大小）确实变化时触发。
+    """
+
+    def __init__(self, callback: ChangeCallback, debounce: float = 0.05, poll_interval: float = 1.0,
+                 use_inotify: bool = True):
+        """
+        初始化文件变更监视器
+
+        Args:
+            callback: 变更回调，在事件循环线程中调用
+            debounce: 合并变更的等待时间（秒）
+            poll_interval: 退回定时检查时的检查间隔（秒）
+            use_inotify: 是否尝试使用 inotify
+        """
+        self.callback = callback
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._files: Dict[Path, Optional[Tuple[int, int]]] = {}
+        self._pending: Set[Path] = set()
+        self._debounce_handle: Optional[asyncio.TimerHandle] = None
+
+        self._libc: Optional[ctypes.CDLL] = None
+        self._fd: Optional[int] = None
+        self._watches: Dict[int, Path] = {}
+        self._poll_task: Optional[asyncio.Task] = None
+
+        self.stats = {
+            "mode": None,
+            "events": 0,
+            "callbacks": 0
+        }
+
+    @property
+    def running(self) -> bool:
+        """是否正在监视"""
+        return self._loop is not None
+
+    @property
+    def mode(self) -> Optional[str]:
+        """监视方式: inotify、poll，未启动时为 None"""
+        return self.stats["mode"]
+
+    def start(self, files: Iterable[Path] = ()) -> None:
+        """
+        在当前事件循环中启动监视，必须在事件循环中调用
+
+        Args:
+            files: 要监视的文件
+        """
+        if self.running:
+            self.add_files(files)
+            return
+
+        self._loop = asyncio.get_running_loop()
+        if self.use_inotify:
+            self._start_inotify()
+        if self._fd is None:
+            self._poll_task = self._loop.create_task(self._poll())
+            self.stats["mode"] = "poll"
+
+        self.add_files(files)
+        logger.debug(f"文件监视已启动: 方式={self.mode}")
+
+    def stop(self) -> None:
+        """停止监视"""
+        if self._debounce_handle:
+            self._debounce_handle.cancel()
+            self._debounce_handle = None
+
+        if self._fd is not None:
+            try:
+                self._loop.remove_reader(self._fd)
+            except Exception:
+                pass
+            os.close(self._fd)
+            self._fd = None
+            self._watches.clear()
+
+        if self._poll_task:
+            self._poll_task.cancel()
+            self._poll_task = None
+
+        self._pending.clear()
+        self._loop = None
+        self.stats["mode"] = None
+
+    def add_files(self, files: Iterable[Path]) -> None:
+        """
+        添加要监视的文件
+
+        Args:
+            files: 文件路径
+        """
+        for path in files:
+            path = Path(path).absolute()
+            if path in self._files:
+                continue
+            self._files[path] = _file_state(path)
+            if self._fd is not None and path.parent not in self._watches.values():
+                self._add_watch(path.parent)
+
+    def _start_inotify(self) -> None:
+        """初始化 inotify 并注册到事件循环，失败时保持 _fd 为 None"""
+        libc = _load_inotify()
+        if libc is None:
+            return
+
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            logger.debug(f"inotify 初始化失败: {os.strerror(ctypes.get_errno())}")
+            return
+
+        try:
+            self._loop.add_reader(fd, self._read_events)
+        except (NotImplementedError, RuntimeError):
+            # 部分事件循环（如 Windows 的 ProactorEventLoop）不支持 add_reader
+            os.close(fd)
+            return
+
+        self._libc = libc
+        self._fd = fd
+        self.stats["mode"] = "inotify"
+
+    def _add_watch(self, directory: Path) -> None:
+        """监视文件所在目录"""
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            logger.warning(f"无法监视目录 {directory}: {os.strerror(ctypes.get_errno())}")
+            return
+        self._watches[wd] = directory
+
+    def _read_events(self) -> None:
+        """读取 inotify 事件，由事件循环在描述符可读时调用"""
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except OSError as e:
+            if e.errno != errno.EAGAIN:
+                logger.error(f"读取 inotify 事件时出错: {str(e)}")
+            return
+
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buffer):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(buffer, offset)
+            offset += _EVENT_HEADER.size
+            name = buffer[offset:offset + length].rstrip(b"\0")
+            offset += length
+            self.stats["events"] += 1
+
+            if mask & IN_Q_OVERFLOW:
+                # 事件队列溢出，无法确定哪些文件变化，全部检查一遍
+                self._schedule(self._files)
+                continue
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+
+            directory = self._watches.get(wd)
+            if directory is None or not name:
+                continue
+            path = directory / os.fsdecode(name)
+            if path in self._files:
+                self._schedule((path,))
+
+    async def _poll(self) -> None:
+        """定时检查文件状态，与上一次检查的结果比较"""
+        observed = dict(self._files)
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            changed = []
+            for path in list(self._files):
+                state = _file_state(path)
+                if state != observed.get(path, self._files[path]):
+                    observed[path] = state
+                    changed.append(path)
+            if changed:
+                self.stats["events"] += len(changed)
+                self._schedule(changed)
+
+    def _schedule(self, paths: Iterable[Path]) -> None:
+        """记录可能变化的文件，debounce 秒内没有新变更时触发回调"""
+        self._pending.update(paths)
+        if self._debounce_handle:
+            self._debounce_handle.cancel()
+        self._debounce_handle = self._loop.call_later(self.debounce, self._flush)
+
+    def _flush(self) -> None:
+        """检查待处理的文件，对状态确实变化的文件触发回调"""
+        self._debounce_handle = None
+        pending, self._pending = self._pending, set()
+
+        changed = set()
+        for path in pending:
+            state = _file_state(path)
+            # 文件在替换过程中暂时不存在时不触发，等待新文件出现
+            if state is not None and state != self._files.get(path):
+                self._files[path] = state
+                changed.add(path)
+
+        if not changed:
+            return
+
+        self.stats["callbacks"] += 1
+        try:
+            self.callback(changed)
+        except Exception as e:
+            logger.error(f"调用文件变更回调时出错: {str(e)}")
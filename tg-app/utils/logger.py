@@ -100,6 +100,15 @@ def setup_logger(config: Optional[Dict[str, Any]] = None) -> None:
         
     logger.info(f"日志系统已配置，级别: {level}, 文件: {_config['file_path']}")
 
+def get_logger_config() -> Dict[str, Any]:
+    """
+    获取当前日志配置的副本，用于在子进程中使用相同的配置。
+    
+    Returns:
+        Dict[str, Any]: 日志配置字典
+    """
+    return _config.copy()
+
 def get_logger(name: str) -> logger:
     """
     获取指定名称的日志记录器。
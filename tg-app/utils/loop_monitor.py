@@ -0,0 +1,237 @@
+"""
+事件循环阻塞监控模块。
+
+本模块持续测量事件循环的调度延迟，延迟超过阈值时记录阻塞事件循环的代码的调用栈，
+并通过回调上报，便于在生产环境中定位同步阻塞调用。
+
+本模块与 tg_forwarder/utils/loop_monitor.py 是同一实现。两个应用各自使用独立的日志系统，
+互不导入，修改时需要同步两处。
+"""
+
+import os
+import sys
+import time
+import asyncio
+import sysconfig
+import threading
+from typing import Dict, Any, Optional, List, Callable, Set
+
+from utils.logger import get_logger
+
+# 获取日志记录器
+logger = get_logger("loop_monitor")
+
+# 阻塞报告回调，可以是普通函数或协程函数
+StallCallback = Callable[[Dict[str, Any]], Any]
+
+# 标准库目录，用于在调用栈中定位真正发起阻塞调用的业务代码
+_STDLIB_DIRS = tuple(
+    os.path.normcase(path) for path in {sysconfig.get_paths().get("stdlib"), sysconfig.get_paths().get("platstdlib")}
+    if path
+)
+
+
+def _is_stdlib(filename: str) -> bool:
+    """判断文件是否属于标准库"""
+    return os.path.normcase(filename).startswith(_STDLIB_DIRS)
+
+
+class LoopLagMonitor:
+    """
+    事件循环阻塞监控器
+
+    事件循环中的心跳协程每隔 interval 秒记录一次时间，后台看门狗线程发现心跳
+    超时 threshold 秒时，立即抓取事件循环线程的调用栈，此时栈顶就是正在阻塞
+    事件循环的同步代码（如大文件的json.dump、os.walk）。心跳恢复后汇总为一次
+    阻塞报告，写入日志并通知回调。
+    """
+
+    def __init__(self, threshold: float = 0.5, interval: float = 0.1, max_stack_depth: int = 64):
+        """
+        初始化事件循环阻塞监控器
+
+        Args:
+            threshold: 判定为阻塞的调度延迟（秒）
+            interval: 心跳间隔（秒）
+            max_stack_depth: 记录的最大调用栈深度
+        """
+        self.threshold = threshold
+        self.interval = interval
+        self.max_stack_depth = max_stack_depth
+
+        self._callbacks: List[StallCallback] = []
+        # 协程回调的任务，保留引用直到完成
+        self._callback_tasks: Set[asyncio.Task] = set()
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+        self._last_beat = 0.0
+        self._snapshot: Optional[Dict[str, Any]] = None
+
+        self.stats = {
+            "current_lag": 0.0,
+            "max_lag": 0.0,
+            "stalls": 0,
+            "stalled_seconds": 0.0,
+            "last_stall": None
+        }
+
+    def add_callback(self, callback: StallCallback) -> None:
+        """
+        添加阻塞报告回调
+
+        Args:
+            callback: 接收阻塞报告字典的回调，可以是协程函数
+        """
+        self._callbacks.append(callback)
+
+    @property
+    def running(self) -> bool:
+        """是否正在监控"""
+        return self._heartbeat_task is not None and not self._heartbeat_task.done()
+
+    async def start(self) -> None:
+        """在当前事件循环中启动监控"""
+        if self.running:
+            return
+
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._snapshot = None
+        self._stop_event.clear()
+
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info(f"事件循环阻塞监控已启动: 阈值={self.threshold}秒, 心跳间隔={self.interval}秒")
+
+    async def stop(self) -> None:
+        """停止监控"""
+        self._stop_event.set()
+
+        if self._heartbeat_task and not self._heartbeat_task.done():
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+        self._heartbeat_task = None
+
+        if self._watchdog:
+            self._watchdog.join(timeout=self.interval * 2 + 1)
+            self._watchdog = None
+
+        if self._callback_tasks:
+            await asyncio.gather(*self._callback_tasks, return_exceptions=True)
+
+        logger.info(f"事件循环阻塞监控已停止: 阻塞 {self.stats['stalls']} 次, "
+                    f"最大延迟 {self.stats['max_lag']:.3f}秒")
+
+    async def _heartbeat(self) -> None:
+        """心跳协程，测量每次唤醒的调度延迟"""
+        loop = asyncio.get_running_loop()
+        while True:
+            self._last_beat = time.monotonic()
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+
+            lag = max(0.0, loop.time() - expected)
+            self.stats["current_lag"] = lag
+            if lag > self.stats["max_lag"]:
+                self.stats["max_lag"] = lag
+
+            if lag >= self.threshold:
+                self._report(lag)
+            else:
+                self._snapshot = None
+
+    def _watch(self) -> None:
+        """看门狗线程，心跳超时时抓取事件循环线程的调用栈"""
+        captured_beat = None
+        while not self._stop_event.wait(self.interval):
+            beat = self._last_beat
+            blocked_for = time.monotonic() - beat - self.interval
+            if blocked_for < self.threshold or beat == captured_beat:
+                continue
+
+            # 每次阻塞只抓取一次，保留阻塞刚被发现时的调用栈
+            captured_beat = beat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            self._snapshot = {
+                "blocked_for": round(blocked_for, 3),
+                "stack": self._format_stack(frame)
+            }
+
+    def _format_stack(self, frame: Any) -> List[Dict[str, Any]]:
+        """将栈帧转换为从外到内的字典列表"""
+        stack = []
+        while frame is not None and len(stack) < self.max_stack_depth:
+            code = frame.f_code
+            stack.append({
+                "function": getattr(code, "co_qualname", code.co_name),
+                "file": code.co_filename,
+                "line": frame.f_lineno
+            })
+            frame = frame.f_back
+        stack.reverse()
+        return stack
+
+    def _report(self, lag: float) -> None:
+        """
+        汇总一次阻塞并通知回调
+
+        Args:
+            lag: 本次调度延迟（秒）
+        """
+        snapshot, self._snapshot = self._snapshot, None
+        stack = snapshot["stack"] if snapshot else []
+
+        # 最内层的非标准库帧通常就是发起阻塞调用的业务代码
+        culprit = next((f for f in reversed(stack) if not _is_stdlib(f["file"])), stack[-1] if stack else None)
+        location = f"{culprit['function']} ({os.path.basename(culprit['file'])}:{culprit['line']})" if culprit else "未知"
+
+        report = {
+            "lag": round(lag, 3),
+            "threshold": self.threshold,
+            "location": location,
+            "stack": stack,
+            "timestamp": time.time()
+        }
+
+        self.stats["stalls"] += 1
+        self.stats["stalled_seconds"] += lag
+        self.stats["last_stall"] = report
+
+        logger.warning(f"事件循环阻塞 {lag:.3f} 秒，阻塞位置: {location}")
+        if stack:
+            logger.debug("阻塞调用栈:\n" + "\n".join(
+                f"  {f['file']}:{f['line']} in {f['function']}" for f in stack
+            ))
+
+        for callback in self._callbacks:
+            try:
+                result = callback(report)
+                if asyncio.iscoroutine(result):
+                    task = asyncio.create_task(result)
+                    self._callback_tasks.add(task)
+                    task.add_done_callback(self._callback_done)
+            except Exception as e:
+                logger.error(f"执行阻塞报告回调时出错: {str(e)}")
+
+    def _callback_done(self, task: asyncio.Task) -> None:
+        """协程回调结束，释放引用并记录错误"""
+        self._callback_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"执行阻塞报告回调时出错: {str(task.exception())}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取监控统计
+
+        Returns:
+            Dict[str, Any]: 当前延迟、最大延迟、阻塞次数等
+        """
+        return dict(self.stats)
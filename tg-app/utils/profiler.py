@@ -0,0 +1,301 @@
+"""
+采样分析器模块。
+
+本模块在后台线程中周期性采集调用栈，支持按线程或按asyncio任务统计，
+结果以折叠栈或speedscope格式输出，开销足够低，可在长时间运行时持续开启。
+
+本模块与 tg_forwarder/utils/profiler.py 是同一实现。两个应用各自使用独立的日志系统，
+互不导入，修改时需要同步两处。
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import threading
+from types import CodeType, FrameType
+from typing import Dict, Any, Optional, List, Tuple
+
+from utils.logger import get_logger
+
+# 获取日志记录器
+logger = get_logger("profiler")
+
+# speedscope 结果中标记的应用名
+APP_NAME = "my-TG-app"
+
+# 采样模式：thread 按线程调用栈统计CPU位置，task 按协程等待链统计墙钟时间
+PROFILE_MODES = ("thread", "task")
+
+# 输出格式
+PROFILE_FORMATS = ("collapsed", "speedscope")
+
+# 单个调用栈的最大深度，防止深递归时采样开销失控
+MAX_STACK_DEPTH = 128
+
+# 栈键：根标签加上从外到内的代码对象
+StackKey = Tuple[Any, ...]
+
+
+def _frame_label(code: Any) -> str:
+    """生成栈帧的可读标签"""
+    if isinstance(code, str):
+        return code
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _walk_thread_stack(frame: Optional[FrameType]) -> List[CodeType]:
+    """从最内层栈帧向外收集代码对象，返回从外到内的顺序"""
+    codes = []
+    while frame is not None and len(codes) < MAX_STACK_DEPTH:
+        codes.append(frame.f_code)
+        frame = frame.f_back
+    codes.reverse()
+    return codes
+
+
+def _walk_await_chain(coro: Any) -> List[Any]:
+    """
+    沿协程的 await 链向内收集代码对象，返回从外到内的顺序
+
+    Task.get_stack 对挂起的协程只返回最外层一帧，这里逐层跟随 cr_await，
+    链条末端若是Future等非协程对象，以其类型名作为叶子节点。
+    """
+    codes: List[Any] = []
+    while coro is not None and len(codes) < MAX_STACK_DEPTH:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            if not hasattr(coro, "cr_frame") and not hasattr(coro, "gi_frame"):
+                codes.append(f"<await {type(coro).__name__}>")
+            break
+        codes.append(frame.f_code)
+        coro = getattr(coro, "cr_await", None) if hasattr(coro, "cr_await") else getattr(coro, "gi_yieldfrom", None)
+    return codes
+
+
+class SamplingProfiler:
+    """
+    采样分析器
+
+    后台守护线程每隔 interval 秒采集一次，只累加 {调用栈: 次数}，内存占用取决于
+    不同调用栈的数量而不是运行时长，可以在长时间的回填任务中持续开启。
+    """
+
+    def __init__(self, output_path: str, interval: float = 0.01, mode: str = "thread",
+                 output_format: str = "collapsed", flush_interval: float = 60.0):
+        """
+        初始化采样分析器
+
+        Args:
+            output_path: 输出文件路径
+            interval: 采样间隔（秒）
+            mode: 采样模式，thread 或 task
+            output_format: 输出格式，collapsed 或 speedscope
+            flush_interval: 定期写出结果的间隔（秒），0表示只在停止时写出
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"不支持的采样模式: {mode}")
+        if output_format not in PROFILE_FORMATS:
+            raise ValueError(f"不支持的输出格式: {output_format}")
+
+        self.output_path = output_path
+        self.interval = max(0.001, interval)
+        self.mode = mode
+        self.output_format = output_format
+        self.flush_interval = flush_interval
+
+        self._counts: Dict[StackKey, int] = {}
+        self._samples = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._start_time = 0.0
+        self._sample_time = 0.0
+
+    @property
+    def running(self) -> bool:
+        """是否正在采样"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        """
+        启动采样线程
+
+        Args:
+            loop: 要分析的事件循环，task 模式必需，默认使用当前运行中的事件循环
+        """
+        if self.running:
+            return
+
+        if self.mode == "task":
+            if loop is None:
+                loop = asyncio.get_running_loop()
+            self._loop = loop
+
+        self._stop_event.clear()
+        self._start_time = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        logger.info(f"采样分析已启动: 模式={self.mode}, 间隔={self.interval * 1000:.1f}ms, 输出={self.output_path}")
+
+    def stop(self) -> None:
+        """停止采样并写出结果"""
+        if self._thread is None:
+            return
+
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        self.write()
+
+        overhead = self._sample_time / max(time.perf_counter() - self._start_time, 1e-9) * 100
+        logger.info(f"采样分析已停止: 共 {self._samples} 次采样, {len(self._counts)} 个调用栈, "
+                    f"采样开销约 {overhead:.2f}%")
+
+    def _run(self) -> None:
+        """采样线程主循环"""
+        own_ident = threading.get_ident()
+        next_flush = time.monotonic() + self.flush_interval if self.flush_interval > 0 else None
+
+        while not self._stop_event.wait(self.interval):
+            started = time.perf_counter()
+            try:
+                if self.mode == "task":
+                    self._sample_tasks()
+                else:
+                    self._sample_threads(own_ident)
+                self._samples += 1
+            except Exception as e:
+                # 跨线程读取可能与被分析线程发生竞争，丢弃本次采样即可
+                logger.trace(f"采样失败: {str(e)}")
+            self._sample_time += time.perf_counter() - started
+
+            if next_flush is not None and time.monotonic() >= next_flush:
+                self.write()
+                next_flush = time.monotonic() + self.flush_interval
+
+    def _add(self, key: StackKey) -> None:
+        """累加一次调用栈计数"""
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0) + 1
+
+    def _sample_threads(self, own_ident: int) -> None:
+        """采集除采样线程外所有线程的调用栈"""
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            root = f"thread:{names.get(ident, ident)}"
+            self._add((root, *_walk_thread_stack(frame)))
+
+    def _sample_tasks(self) -> None:
+        """
+        采集事件循环中所有未完成任务的协程等待链
+
+        每个挂起的任务都计一次，因此结果反映的是各协程占用的墙钟时间，
+        例如等待网络的下载协程和上传协程会各自累积时间。
+        """
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+
+        for task in list(asyncio.all_tasks(loop)):
+            if task.done():
+                continue
+            codes = _walk_await_chain(task.get_coro())
+            if codes:
+                self._add(tuple(codes))
+
+    def _snapshot(self) -> Tuple[Dict[StackKey, int], float]:
+        """获取计数快照和已运行时长"""
+        with self._lock:
+            counts = dict(self._counts)
+        return counts, time.perf_counter() - self._start_time
+
+    def render_collapsed(self) -> str:
+        """
+        生成折叠栈文本，每行格式为 "帧1;帧2;帧3 次数"，可直接用于 flamegraph.pl 或 speedscope
+
+        Returns:
+            str: 折叠栈文本
+        """
+        counts, _ = self._snapshot()
+        lines = [
+            f"{';'.join(_frame_label(code).replace(';', ':') for code in key)} {count}"
+            for key, count in sorted(counts.items(), key=lambda item: -item[1])
+        ]
+        return "\n".join(lines) + "\n"
+
+    def render_speedscope(self) -> Dict[str, Any]:
+        """
+        生成speedscope格式的采样数据，相同调用栈合并为一条带权重的样本
+
+        Returns:
+            Dict[str, Any]: speedscope文件内容
+        """
+        counts, elapsed = self._snapshot()
+        frame_index: Dict[Any, int] = {}
+        frames = []
+        samples = []
+        weights = []
+
+        for key, count in counts.items():
+            stack = []
+            for code in key:
+                index = frame_index.get(code)
+                if index is None:
+                    index = len(frames)
+                    frame_index[code] = index
+                    if isinstance(code, str):
+                        frames.append({"name": code})
+                    else:
+                        frames.append({
+                            "name": getattr(code, "co_qualname", code.co_name),
+                            "file": code.co_filename,
+                            "line": code.co_firstlineno
+                        })
+                stack.append(index)
+            samples.append(stack)
+            weights.append(round(count * self.interval, 6))
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": f"{APP_NAME} ({self.mode})",
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": round(elapsed, 6),
+                "samples": samples,
+                "weights": weights
+            }],
+            "name": os.path.basename(self.output_path),
+            "exporter": f"{APP_NAME} {__name__}"
+        }
+
+    def write(self, path: Optional[str] = None) -> None:
+        """
+        写出当前结果，先写临时文件再替换，避免读到不完整的文件
+
+        Args:
+            path: 输出路径，默认使用初始化时的路径
+        """
+        path = path or self.output_path
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            temp_path = f"{path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                if self.output_format == "speedscope":
+                    json.dump(self.render_speedscope(), f, ensure_ascii=False)
+                else:
+                    f.write(self.render_collapsed())
+            os.replace(temp_path, path)
+        except Exception as e:
+            logger.error(f"写出采样结果失败: {str(e)}")
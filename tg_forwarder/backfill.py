@@ -0,0 +1,376 @@
+"""
+多进程回填模块，把大范围的历史消息按ID分片，由多个使用不同会话的工作进程并行转发
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import multiprocessing
+from typing import Dict, Any, List
+
+from tg_forwarder.logModule.logger import setup_logger, get_logger
+from tg_forwarder.config import Config
+from tg_forwarder.client import TelegramClient
+from tg_forwarder.manager import ForwardManager
+from tg_forwarder.utils.checkpoint import CheckpointStore
+from tg_forwarder.utils.shard_lease import ShardLeaseStore, DONE, FAILED
+
+# 获取日志记录器
+logger = get_logger("backfill")
+
+
+def _shard_checkpoint_path(state_dir: str, shard_id: int) -> str:
+    """分片检查点文件路径"""
+    return os.path.join(state_dir, "shards", f"shard_{shard_id}.json")
+
+
+class BackfillCoordinator:
+    """
+    回填协调器
+
+    在主进程中确定消息范围并划分分片，然后为会话池中的每个会话启动一个工作进程。
+    工作进程通过状态文件领取分片，每处理完 checkpoint_interval 条消息记录一次分片
+    检查点。工作进程异常退出时释放它持有的分片并重新启动，新进程从分片检查点继续。
+    """
+
+    def __init__(self, config_path: str = "config.ini"):
+        """
+        初始化回填协调器
+
+        Args:
+            config_path: 配置文件路径
+        """
+        self.config_path = config_path
+        self.config = Config(config_path)
+        self.backfill_config = self.config.get_backfill_config()
+        self.state_dir = self.backfill_config['state_dir']
+        self.store = ShardLeaseStore(os.path.join(self.state_dir, "leases.json"))
+        # 工作进程 {序号: (会话名, 进程)}
+        self.workers: Dict[int, Any] = {}
+        self.restarts = 0
+        self.start_time = 0.0
+
+    async def setup(self) -> None:
+        """
+        确定回填范围并划分分片，确认会话池中的会话都已登录
+
+        Raises:
+            ValueError: 无法解析转发路由或会话池为空时抛出
+        """
+        sessions = self.worker_sessions()
+        if not sessions:
+            raise ValueError("回填会话池为空，请在 [BACKFILL] sessions 中配置会话名")
+
+        # 用第一个会话解析频道和消息范围，结束后释放会话文件给工作进程使用
+        manager = ForwardManager(self.config_path, session_name=sessions[0])
+        await manager.setup()
+        try:
+            route = await manager._resolve_route()
+            if not route["success"]:
+                raise ValueError(f"解析转发路由失败: {route.get('error')}")
+
+            forward_config = self.config.get_forward_config()
+            start_message_id = max(1, forward_config['start_message_id'])
+            end_message_id = forward_config['end_message_id']
+            if not end_message_id or end_message_id <= 0:
+                end_message_id = await manager.client.get_latest_message_id(route["source_id"]) or 0
+        finally:
+            await manager.shutdown()
+
+        shard_count = await asyncio.to_thread(
+            self.store.prepare, route["source_id"], route["target_ids"], start_message_id, end_message_id,
+            self.backfill_config['shard_size']
+        )
+        logger.info(f"回填范围 {start_message_id}-{end_message_id}，待处理分片 {shard_count} 个，工作进程 {len(sessions)} 个")
+
+        # 工作进程无法交互输入验证码，其余会话在这里先完成登录
+        for session_name in sessions[1:]:
+            api_config = self.config.get_api_config()
+            api_config['session_name'] = session_name
+            client = TelegramClient(api_config, self.config.get_proxy_config())
+            await client.connect()
+            await client.disconnect()
+
+    def worker_sessions(self) -> List[str]:
+        """
+        获取工作进程使用的会话，每个进程一个会话
+
+        Returns:
+            List[str]: 会话名列表
+        """
+        sessions = self.backfill_config['sessions']
+        return sessions[:max(1, self.backfill_config['workers'])]
+
+    def _spawn(self, index: int, session_name: str) -> Any:
+        """
+        启动一个工作进程
+
+        Args:
+            index: 工作进程序号
+            session_name: 会话名
+
+        Returns:
+            multiprocessing.Process: 工作进程
+        """
+        context = multiprocessing.get_context("spawn")
+        process = context.Process(
+            target=run_worker,
+            args=(self.config_path, self.store.path, session_name, index),
+            name=f"backfill-{index}"
+        )
+        process.start()
+        logger.info(f"启动回填工作进程 {index} (会话: {session_name}, PID: {process.pid})")
+        return process
+
+    async def run(self, poll_interval: float = 1.0) -> Dict[str, Any]:
+        """
+        启动工作进程并等待所有分片处理完成
+
+        Args:
+            poll_interval: 检查工作进程状态的间隔（秒）
+
+        Returns:
+            Dict[str, Any]: 合并后的回填报告
+        """
+        self.start_time = time.time()
+        for index, session_name in enumerate(self.worker_sessions()):
+            self.workers[index] = (session_name, self._spawn(index, session_name))
+
+        finished_at = None
+        while self.workers:
+            await asyncio.sleep(poll_interval)
+
+            for index, (session_name, process) in list(self.workers.items()):
+                if process.is_alive():
+                    continue
+                del self.workers[index]
+
+                released = await asyncio.to_thread(self.store.release_worker, f"{session_name}:{process.pid}")
+                if process.exitcode != 0:
+                    logger.error(f"回填工作进程 {index} 异常退出 (退出码: {process.exitcode})，释放分片: {released}")
+
+                # 还有可领取的分片时重新启动该会话的工作进程，新进程从分片检查点继续
+                if not await asyncio.to_thread(self.store.has_claimable):
+                    continue
+                if process.exitcode != 0:
+                    if self.restarts >= self.backfill_config['max_restarts']:
+                        logger.error("工作进程重启次数已达上限，不再重启")
+                        continue
+                    self.restarts += 1
+                self.workers[index] = (session_name, self._spawn(index, session_name))
+
+            # 所有分片都已结束后，给仍在运行的进程一个租约周期退出，之后强制结束
+            if self.workers and not await asyncio.to_thread(self.store.has_unfinished):
+                finished_at = finished_at or time.monotonic()
+                if time.monotonic() - finished_at > self.backfill_config['lease_ttl']:
+                    await self.shutdown()
+
+        report = await asyncio.to_thread(self.build_report)
+        self._save_report(report)
+        return report
+
+    def build_report(self) -> Dict[str, Any]:
+        """
+        合并各分片的处理结果
+
+        Returns:
+            Dict[str, Any]: 回填报告
+        """
+        state = self.store.snapshot()
+        shards = state.get("shards", [])
+        report = {
+            "mode": "backfill",
+            "start_id": state.get("job", {}).get("start_id"),
+            "end_id": state.get("end_id"),
+            "total": sum(shard["end_id"] - shard["start_id"] + 1 for shard in shards),
+            "processed": 0,
+            "success": 0,
+            "failed": 0,
+            "shards_done": 0,
+            "shards_failed": 0,
+            "worker_restarts": self.restarts,
+            "shards": [],
+            "start_time": self.start_time,
+            "end_time": time.time(),
+        }
+
+        for shard in shards:
+            result = shard.get("result") or {}
+            for key in ("processed", "success", "failed"):
+                report[key] += result.get(key, 0)
+            report["shards_done"] += shard["status"] == DONE
+            report["shards_failed"] += shard["status"] == FAILED
+            report["shards"].append({
+                "id": shard["id"],
+                "start_id": shard["start_id"],
+                "end_id": shard["end_id"],
+                "status": shard["status"],
+                "attempts": shard["attempts"],
+                **result
+            })
+
+        report["duration"] = report["end_time"] - report["start_time"]
+        report["success_flag"] = bool(shards) and report["shards_done"] == len(shards)
+        return report
+
+    def _save_report(self, report: Dict[str, Any]) -> None:
+        """保存回填报告到状态目录"""
+        report_path = os.path.join(self.state_dir, "report.json")
+        try:
+            with open(report_path, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            logger.info(f"回填报告已保存: {report_path}")
+        except Exception as e:
+            logger.error(f"保存回填报告时出错: {str(e)}")
+
+    async def shutdown(self) -> None:
+        """结束仍在运行的工作进程"""
+        for index, (session_name, process) in list(self.workers.items()):
+            if process.is_alive():
+                logger.warning(f"结束回填工作进程 {index} (PID: {process.pid})")
+                process.terminate()
+                await asyncio.to_thread(process.join, 10)
+            await asyncio.to_thread(self.store.release_worker, f"{session_name}:{process.pid}")
+        self.workers.clear()
+
+
+async def _heartbeat(store: ShardLeaseStore, shard_id: int, worker_id: str,
+                     ttl: float, lost: asyncio.Event) -> None:
+    """定期续约，租约被其他进程领取时设置 lost"""
+    while True:
+        await asyncio.sleep(ttl / 3)
+        if not await asyncio.to_thread(store.renew, shard_id, worker_id, ttl):
+            logger.warning(f"分片 {shard_id} 的租约已失效")
+            lost.set()
+            return
+
+
+async def _run_shard(manager: ForwardManager, store: ShardLeaseStore, route: Dict[str, Any],
+                     shard: Dict[str, Any], worker_id: str, backfill_config: Dict[str, Any]) -> None:
+    """
+    处理一个分片，每处理 checkpoint_interval 条消息记录一次分片检查点
+
+    Args:
+        manager: 工作进程的转发管理器
+        store: 租约存储
+        route: 已解析的转发路由
+        shard: 领取到的分片
+        worker_id: 工作进程标识
+        backfill_config: 回填配置
+    """
+    shard_id = shard["id"]
+    state_dir = os.path.dirname(store.path)
+    manager.checkpoint_store = CheckpointStore(_shard_checkpoint_path(state_dir, shard_id))
+    logger.info(f"领取分片 {shard_id}: {shard['start_id']}-{shard['end_id']} (第 {shard['attempts']} 次)")
+
+    lost = asyncio.Event()
+    heartbeat = asyncio.create_task(
+        _heartbeat(store, shard_id, worker_id, backfill_config['lease_ttl'], lost)
+    )
+    # 之前的进程已处理的部分计入本分片的统计
+    totals = {"processed": 0, "success": 0, "failed": 0, **(shard.get("progress") or {})}
+    start_time = time.time()
+
+    try:
+        step = max(1, backfill_config['checkpoint_interval'])
+        for step_start in range(shard["start_id"], shard["end_id"] + 1, step):
+            if lost.is_set():
+                return
+
+            step_end = min(step_start + step - 1, shard["end_id"])
+            result = await manager.run_range(route, step_start, step_end)
+            if not result.get("success_flag", False):
+                logger.error(f"分片 {shard_id} 处理 {step_start}-{step_end} 失败: {result.get('error')}")
+                await asyncio.to_thread(
+                    store.release, shard_id, worker_id, str(result.get("error")), backfill_config['max_attempts']
+                )
+                return
+
+            for key in totals:
+                totals[key] += result.get(key, 0)
+            if not await asyncio.to_thread(
+                store.renew, shard_id, worker_id, backfill_config['lease_ttl'], progress=totals
+            ):
+                lost.set()
+
+        if lost.is_set():
+            return
+
+        # 还有消息没有送达所有目标频道时分片不算完成，释放后重新领取时从分片检查点重试
+        resume_id = manager.checkpoint_store.resume_from(route["source_id"], route["target_ids"])
+        if resume_id is None or resume_id <= shard["end_id"]:
+            pending_from = shard["start_id"] if resume_id is None else resume_id
+            error = f"消息 {pending_from}-{shard['end_id']} 中仍有未送达的消息"
+            logger.warning(f"分片 {shard_id} {error}，释放分片等待重试")
+            await asyncio.to_thread(
+                store.release, shard_id, worker_id, error, backfill_config['max_attempts']
+            )
+            return
+
+        result = {**totals, "duration": time.time() - start_time, "worker": worker_id}
+        if await asyncio.to_thread(store.complete, shard_id, worker_id, result):
+            logger.info(f"分片 {shard_id} 完成: 处理 {totals['processed']}, 成功 {totals['success']}, 失败 {totals['failed']}")
+    finally:
+        heartbeat.cancel()
+
+
+async def _worker_main(config_path: str, state_path: str, session_name: str, index: int) -> int:
+    """
+    工作进程主循环：领取分片并处理，直到没有可领取的分片
+
+    Returns:
+        int: 进程退出码
+    """
+    worker_id = f"{session_name}:{os.getpid()}"
+    store = ShardLeaseStore(state_path)
+    manager = ForwardManager(config_path, route_name=f"backfill_{index}", session_name=session_name)
+    await manager.setup()
+
+    try:
+        route = await manager._resolve_route()
+        if not route["success"]:
+            logger.error(f"工作进程 {index} 解析转发路由失败: {route.get('error')}")
+            return 1
+
+        backfill_config = manager.config.get_backfill_config()
+        while True:
+            shard = await asyncio.to_thread(store.claim, worker_id, backfill_config['lease_ttl'])
+            if shard is None:
+                logger.info(f"工作进程 {index} 没有可领取的分片，退出")
+                return 0
+            await _run_shard(manager, store, route, shard, worker_id, backfill_config)
+
+    finally:
+        await manager.shutdown()
+
+
+def run_worker(config_path: str, state_path: str, session_name: str, index: int) -> None:
+    """
+    工作进程入口
+
+    Args:
+        config_path: 配置文件路径
+        state_path: 租约状态文件路径
+        session_name: 该进程使用的会话名
+        index: 工作进程序号
+    """
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+    setup_logger({
+        'level': 'INFO',
+        'file': f'logs/backfill_worker_{index}.log',
+        'rotation': '10 MB',
+        'retention': '7 days'
+    })
+
+    try:
+        exit_code = asyncio.run(_worker_main(config_path, state_path, session_name, index))
+    except KeyboardInterrupt:
+        exit_code = 130
+    except Exception as e:
+        logger.exception(f"回填工作进程 {index} 发生错误: {str(e)}")
+        exit_code = 1
+    sys.exit(exit_code)
@@ -10,6 +10,8 @@ from pyrogram.types import Message
 from pyrogram.errors import FloodWait, AuthKeyUnregistered, AuthKeyDuplicated, SessionPasswordNeeded
 
 from tg_forwarder.logModule.logger import get_logger
+from tg_forwarder.utils.metrics import metrics, record_flood_wait
+from tg_forwarder.utils.id_set import IdIntervalSet
 
 
 logger = get_logger("client")
@@ -22,14 +24,17 @@ class TelegramClient:
         初始化Telegram客户端
         
         Args:
-            api_config: API配置信息，包含api_id和api_hash
+            api_config: API配置信息，包含api_id和api_hash，可选的session_name指定会话名
             proxy_config: 代理配置信息（可选）
         """
         self.api_id = api_config['api_id']
         self.api_hash = api_config['api_hash']
         self.phone_number = api_config.get('phone_number')
+        self.session_name = api_config.get('session_name') or 'tg_forwarder'
         self.proxy_config = proxy_config
         self.client = None
+        # Pyrogram客户端原始的更新处理方法，开始接收更新时替换为带错误处理的版本
+        self._raw_handle_updates = None
     
     async def _setup_client(self) -> Client:
         """设置客户端并处理代理配置"""
@@ -39,7 +44,7 @@ class TelegramClient:
             'app_version': "TG Forwarder v1.0",
             'device_model': "PC",
             'system_version': "Windows",
-            'name': 'tg_forwarder'
+            'name': self.session_name
         }
         
         # 添加代理配置
@@ -100,8 +105,9 @@ class TelegramClient:
         except (AuthKeyUnregistered, AuthKeyDuplicated) as e:
             logger.error(f"认证失败: {str(e)}")
             # 删除会话文件并重试
-            if os.path.exists("tg_forwarder.session"):
-                os.remove("tg_forwarder.session")
+            session_file = f"{self.session_name}.session"
+            if os.path.exists(session_file):
+                os.remove(session_file)
                 logger.info("已删除会话文件，请重新运行程序")
             raise
         
@@ -109,9 +115,32 @@ class TelegramClient:
             logger.error(f"连接Telegram API时出错: {str(e)}")
             raise
     
+    async def start_updates(self) -> None:
+        """
+        开始接收Telegram更新，已注册的消息处理器随后会收到新消息
+        """
+        if self.client is None or self.client.is_initialized:
+            return
+        
+        # 在Pyrogram客户端处理更新前加入错误处理
+        self._raw_handle_updates = self.client.handle_updates
+        self.client.handle_updates = self.handle_updates
+        await self.client.initialize()
+        logger.info("已开始接收Telegram更新")
+    
+    async def stop_updates(self) -> None:
+        """停止接收Telegram更新"""
+        if self.client is None or not self.client.is_initialized:
+            return
+        
+        await self.client.terminate()
+        del self.client.handle_updates
+        logger.info("已停止接收Telegram更新")
+    
     async def disconnect(self) -> None:
         """断开与Telegram API的连接"""
         if self.client:
+            await self.stop_updates()
             await self.client.disconnect()
             logger.info("已断开与Telegram的连接")
     
@@ -206,6 +235,7 @@ class TelegramClient:
                 raise
             
         except FloodWait as e:
+            record_flood_wait("get_entity", e.value)
             logger.warning(f"触发Telegram限流，等待{e.value}秒...")
             await asyncio.sleep(e.value)
             # 重试
@@ -229,6 +259,7 @@ class TelegramClient:
             message = await self.client.get_messages(channel, message_id)
             return message
         except FloodWait as e:
+            record_flood_wait("get_message", e.value)
             logger.warning(f"触发Telegram限流，等待{e.value}秒...")
             await asyncio.sleep(e.value)
             return await self.get_message(channel, message_id)
@@ -236,7 +267,8 @@ class TelegramClient:
             logger.error(f"获取消息时出错 (频道: {channel}, 消息ID: {message_id}): {str(e)}")
             return None
     
-    async def get_messages_range(self, channel: Union[str, int], start_id: int, end_id: int, batch_size: int = 100) -> List[Message]:
+    async def get_messages_range(self, channel: Union[str, int], start_id: int, end_id: int, batch_size: int = 100,
+                                 failed_ids: Optional[IdIntervalSet] = None) -> List[Message]:
         """
         获取指定范围内的消息
         
@@ -245,6 +277,7 @@ class TelegramClient:
             start_id: 起始消息ID
             end_id: 结束消息ID
             batch_size: 每批次获取的消息数量
+            failed_ids: 获取失败的批次的消息ID会加入该集合，调用方据此避免把未获取的消息当作已处理
         
         Returns:
             List[Message]: 消息列表
@@ -260,12 +293,14 @@ class TelegramClient:
                 batch = await self.client.get_messages(channel, ids)
                 valid_messages = [msg for msg in batch if msg is not None]
                 messages.extend(valid_messages)
+                metrics.inc("messages_fetched_total", len(valid_messages))
                 
                 logger.info(f"已获取消息: {current_id}-{next_id} (有效: {len(valid_messages)})")
                 
                 current_id = next_id + 1
                 
             except FloodWait as e:
+                record_flood_wait("get_messages_range", e.value)
                 logger.warning(f"触发Telegram限流，等待{e.value}秒...")
                 await asyncio.sleep(e.value)
                 # 不增加current_id，重试当前批次
@@ -273,6 +308,8 @@ class TelegramClient:
                 
             except Exception as e:
                 logger.error(f"获取批量消息时出错: {str(e)}")
+                if failed_ids is not None:
+                    failed_ids.add_range(current_id, next_id)
                 # 继续下一批
                 current_id = next_id + 1
         
@@ -298,6 +335,7 @@ class TelegramClient:
             logger.info(f"已获取频道历史消息: {len(messages)}条")
         
         except FloodWait as e:
+            record_flood_wait("get_chat_history", e.value)
             logger.warning(f"触发Telegram限流，等待{e.value}秒...")
             await asyncio.sleep(e.value)
             # 递归调用
@@ -346,6 +384,7 @@ class TelegramClient:
             logger.info(f"成功获取媒体组 (聊天: {chat_id}, 消息ID: {message_id}): {len(media_group)} 条消息")
             return media_group
         except FloodWait as e:
+            record_flood_wait("get_media_group", e.value)
             logger.warning(f"触发Telegram限流，等待{e.value}秒...")
             await asyncio.sleep(e.value)
             # 重试
@@ -357,14 +396,33 @@ class TelegramClient:
             logger.error(f"获取媒体组时出错: {str(e)}")
             raise 
 
-    async def handle_updates(self):
+    async def download_media(self, file_id: str, file_name: str) -> Optional[str]:
+        """
+        按文件ID下载媒体文件
+        
+        Args:
+            file_id: 媒体文件ID
+            file_name: 保存路径
+        
+        Returns:
+            Optional[str]: 下载后的文件路径，失败时返回None
+            
+        Raises:
+            FloodWait: 触发限流时抛出，由调用方决定等待或放弃
+        """
+        return await self.client.download_media(file_id, file_name=file_name)
+    
+    async def handle_updates(self, updates) -> None:
         """
         处理Telegram更新
-        重写此方法以增加错误处理，防止Peer ID无效错误导致程序崩溃
+        包装Pyrogram客户端的同名方法以增加错误处理，防止Peer ID无效错误导致程序崩溃
+        
+        Args:
+            updates: 原始更新对象
         """
         try:
             # 调用原始方法
-            await super().handle_updates()
+            await self._raw_handle_updates(updates)
         except ValueError as e:
             if "Peer id invalid" in str(e):
                 # 记录错误但不中断程序
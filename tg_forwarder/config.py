@@ -4,9 +4,18 @@
 
 import os
 import configparser
-from typing import List, Optional, Dict, Any, Union
+from typing import List, Optional, Dict, Any, Union, Callable, Set
 from pathlib import Path
 
+from tg_forwarder.logModule.logger import get_logger
+from tg_forwarder.utils.file_watcher import FileWatcher
+
+# 获取日志记录器
+logger = get_logger("config")
+
+# 配置观察者回调，参数为 (配置节, {变化的键: 新值})，键被删除时新值为None
+ConfigObserver = Callable[[str, Dict[str, Optional[str]]], None]
+
 class ConfigError(Exception):
     """配置错误异常"""
     pass
@@ -29,27 +38,133 @@ class Config:
         
         self.config.read(config_path, encoding='utf-8')
         self._validate_config()
+        
+        # 配置观察者 {配置节: set(回调函数)}
+        self._observers: Dict[str, Set[ConfigObserver]] = {}
+        # 配置文件监视器
+        self._watcher: Optional[FileWatcher] = None
     
-    def _validate_config(self) -> None:
-        """验证配置文件的完整性和正确性"""
+    def _validate_config(self, config: Optional[configparser.ConfigParser] = None) -> None:
+        """
+        验证配置文件的完整性和正确性
+        
+        Args:
+            config: 要验证的配置，默认为当前配置
+        """
+        config = config if config is not None else self.config
+        
         # 验证API部分
-        if 'API' not in self.config:
+        if 'API' not in config:
             raise ConfigError("配置文件中缺少 [API] 部分")
         
         required_api_fields = ['api_id', 'api_hash']
         for field in required_api_fields:
-            if field not in self.config['API'] or not self.config['API'][field]:
+            if field not in config['API'] or not config['API'][field]:
                 raise ConfigError(f"配置文件中缺少必要的API参数: {field}")
         
+        # 配置了多条转发路由时不要求 [CHANNELS] 部分
+        if 'ROUTES' in config and len(config['ROUTES']) > 0:
+            for name, value in config['ROUTES'].items():
+                self.parse_route(name, value)
+            return
+        
         # 验证CHANNELS部分
-        if 'CHANNELS' not in self.config:
+        if 'CHANNELS' not in config:
             raise ConfigError("配置文件中缺少 [CHANNELS] 部分")
         
         required_channel_fields = ['source_channel', 'target_channels']
         for field in required_channel_fields:
-            if field not in self.config['CHANNELS'] or not self.config['CHANNELS'][field]:
+            if field not in config['CHANNELS'] or not config['CHANNELS'][field]:
                 raise ConfigError(f"配置文件中缺少必要的频道参数: {field}")
     
+    def add_observer(self, section: str, callback: ConfigObserver) -> None:
+        """
+        添加配置节观察者，配置文件重新加载后该节有变化时调用
+        
+        Args:
+            section: 配置节
+            callback: 回调函数，参数为 (配置节, {变化的键: 新值})
+        """
+        self._observers.setdefault(section, set()).add(callback)
+    
+    def remove_observer(self, section: str, callback: ConfigObserver) -> bool:
+        """
+        移除配置节观察者
+        
+        Args:
+            section: 配置节
+            callback: 回调函数
+            
+        Returns:
+            bool: 是否成功移除
+        """
+        observers = self._observers.get(section)
+        if not observers or callback not in observers:
+            return False
+        observers.discard(callback)
+        if not observers:
+            del self._observers[section]
+        return True
+    
+    def reload(self) -> Dict[str, Dict[str, Optional[str]]]:
+        """
+        重新读取配置文件，只通知实际变化的配置项；新配置验证失败时保留原配置
+        
+        Returns:
+            Dict[str, Dict[str, Optional[str]]]: {配置节: {变化的键: 新值}}
+        """
+        new_config = configparser.ConfigParser()
+        try:
+            new_config.read(self.config_path, encoding='utf-8')
+            self._validate_config(new_config)
+        except (ConfigError, configparser.Error) as e:
+            logger.error(f"重新加载配置文件失败，保留原配置: {str(e)}")
+            return {}
+        
+        changes = {}
+        for section in set(self.config.sections()) | set(new_config.sections()):
+            old_values = dict(self.config[section]) if self.config.has_section(section) else {}
+            new_values = dict(new_config[section]) if new_config.has_section(section) else {}
+            changed = {
+                key: new_values.get(key)
+                for key in old_values.keys() | new_values.keys()
+                if old_values.get(key) != new_values.get(key)
+            }
+            if changed:
+                changes[section] = changed
+        
+        self.config = new_config
+        
+        for section, changed in changes.items():
+            logger.info(f"配置节 [{section}] 已更新: {', '.join(sorted(changed))}")
+            for callback in list(self._observers.get(section, ())):
+                try:
+                    callback(section, changed)
+                except Exception as e:
+                    logger.error(f"调用配置观察者回调时出错: {str(e)}")
+        
+        return changes
+    
+    def start_watching(self, debounce: float = 0.05, poll_interval: float = 1.0) -> None:
+        """
+        在当前事件循环中监视配置文件，文件变化后自动重新加载
+        
+        Args:
+            debounce: 合并连续变更的等待时间（秒）
+            poll_interval: 不支持 inotify 时的检查间隔（秒）
+        """
+        if self._watcher is not None:
+            return
+        self._watcher = FileWatcher(lambda paths: self.reload(), debounce=debounce, poll_interval=poll_interval)
+        self._watcher.start([Path(self.config_path)])
+        logger.debug(f"配置文件监视已启动: 方式={self._watcher.mode}")
+    
+    def stop_watching(self) -> None:
+        """停止监视配置文件"""
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+    
     def get_api_config(self) -> Dict[str, Any]:
         """获取API配置"""
         api_config = {
@@ -61,6 +176,10 @@ class Config:
         if 'phone_number' in self.config['API'] and self.config['API']['phone_number']:
             api_config['phone_number'] = self.config['API']['phone_number']
         
+        # 可选的会话名
+        if 'session_name' in self.config['API'] and self.config['API']['session_name']:
+            api_config['session_name'] = self.config['API']['session_name']
+        
         return api_config
     
     def get_proxy_config(self) -> Optional[Dict[str, Any]]:
@@ -96,6 +215,58 @@ class Config:
             'target_channels': target_channels
         }
     
+    @staticmethod
+    def parse_route(name: str, value: str) -> Dict[str, Any]:
+        """
+        解析一条转发路由，格式为 "源频道 -> 目标频道1, 目标频道2"
+        
+        Args:
+            name: 路由名
+            value: 路由定义
+            
+        Returns:
+            Dict[str, Any]: 路由配置，包含 name、source_channel、target_channels
+            
+        Raises:
+            ConfigError: 路由格式无效时抛出
+        """
+        source_channel, separator, targets = value.partition('->')
+        target_channels = [channel.strip() for channel in targets.split(',') if channel.strip()]
+        if not separator or not source_channel.strip() or not target_channels:
+            raise ConfigError(f"转发路由 {name} 格式无效，应为 \"源频道 -> 目标频道1, 目标频道2\": {value}")
+        
+        return {
+            'name': name,
+            'source_channel': source_channel.strip(),
+            'target_channels': target_channels
+        }
+    
+    def get_routes_config(self) -> List[Dict[str, Any]]:
+        """
+        获取 [ROUTES] 中配置的转发路由
+        
+        Returns:
+            List[Dict[str, Any]]: 路由配置列表，没有配置时为空列表
+        """
+        if 'ROUTES' not in self.config:
+            return []
+        return [self.parse_route(name, value) for name, value in self.config['ROUTES'].items()]
+    
+    def get_route_runner_config(self) -> Dict[str, Any]:
+        """
+        获取多路由运行配置
+        
+        Returns:
+            Dict[str, Any]: 多路由运行配置字典，send_interval 默认使用 [FORWARD] delay
+        """
+        return {
+            'max_concurrent_routes': self.config.getint('ROUTE_RUNNER', 'max_concurrent_routes', fallback=0),
+            'send_interval': self.config.getfloat(
+                'ROUTE_RUNNER', 'send_interval',
+                fallback=self.config.getfloat('FORWARD', 'delay', fallback=1.5)
+            )
+        }
+    
     def get_forward_config(self) -> Dict[str, Any]:
         """
         获取转发配置
@@ -199,4 +370,95 @@ class Config:
                 'preserve_formatting': True
             }
         
-        return upload_config 
\ No newline at end of file
+        return upload_config
+    
+    def get_metrics_config(self) -> Dict[str, Any]:
+        """
+        获取指标服务配置
+        
+        Returns:
+            Dict[str, Any]: 指标服务配置字典
+        """
+        return {
+            'enabled': self.config.getboolean('METRICS', 'enabled', fallback=False),
+            'host': self.config.get('METRICS', 'host', fallback='127.0.0.1'),
+            'port': self.config.getint('METRICS', 'port', fallback=9464),
+            'lag_interval': self.config.getfloat('METRICS', 'lag_interval', fallback=1.0)
+        }
+    
+    def get_loop_monitor_config(self) -> Dict[str, Any]:
+        """
+        获取事件循环阻塞监控配置
+        
+        Returns:
+            Dict[str, Any]: 阻塞监控配置字典
+        """
+        return {
+            'enabled': self.config.getboolean('LOOP_MONITOR', 'enabled', fallback=True),
+            'threshold': self.config.getfloat('LOOP_MONITOR', 'threshold', fallback=0.5),
+            'interval': self.config.getfloat('LOOP_MONITOR', 'interval', fallback=0.1)
+        }
+    
+    def get_config_watch_config(self) -> Dict[str, Any]:
+        """
+        获取配置文件监视配置
+        
+        Returns:
+            Dict[str, Any]: 配置文件监视配置字典
+        """
+        return {
+            'enabled': self.config.getboolean('CONFIG_WATCH', 'enabled', fallback=True),
+            'debounce': self.config.getfloat('CONFIG_WATCH', 'debounce', fallback=0.05),
+            'poll_interval': self.config.getfloat('CONFIG_WATCH', 'poll_interval', fallback=1.0)
+        }
+    
+    def get_live_tail_config(self) -> Dict[str, Any]:
+        """
+        获取实时跟随配置
+        
+        Returns:
+            Dict[str, Any]: 实时跟随配置字典
+        """
+        return {
+            'enabled': self.config.getboolean('LIVE_TAIL', 'enabled', fallback=False),
+            'album_window': self.config.getfloat('LIVE_TAIL', 'album_window', fallback=0.5),
+            'max_pending': self.config.getint('LIVE_TAIL', 'max_pending', fallback=1000)
+        }
+    
+    def get_backfill_config(self) -> Dict[str, Any]:
+        """
+        获取多进程回填配置
+        
+        Returns:
+            Dict[str, Any]: 回填配置字典，sessions 为会话池，每个工作进程使用其中一个会话
+        """
+        default_session = self.get_api_config().get('session_name', 'tg_forwarder')
+        sessions = [
+            session.strip()
+            for session in self.config.get('BACKFILL', 'sessions', fallback=default_session).split(',')
+            if session.strip()
+        ]
+        default_state_dir = os.path.join(self.get_download_config()['temp_folder'], 'backfill')
+        return {
+            'sessions': sessions,
+            'workers': self.config.getint('BACKFILL', 'workers', fallback=len(sessions)),
+            'shard_size': self.config.getint('BACKFILL', 'shard_size', fallback=5000),
+            'checkpoint_interval': self.config.getint('BACKFILL', 'checkpoint_interval', fallback=500),
+            'lease_ttl': self.config.getfloat('BACKFILL', 'lease_ttl', fallback=120.0),
+            'max_attempts': self.config.getint('BACKFILL', 'max_attempts', fallback=3),
+            'max_restarts': self.config.getint('BACKFILL', 'max_restarts', fallback=3),
+            'state_dir': self.config.get('BACKFILL', 'state_dir', fallback=default_state_dir)
+        }
+    
+    def get_checkpoint_config(self) -> Dict[str, Any]:
+        """
+        获取转发检查点配置
+        
+        Returns:
+            Dict[str, Any]: 检查点配置字典，默认保存在下载临时目录中
+        """
+        default_path = os.path.join(self.get_download_config()['temp_folder'], 'checkpoints.json')
+        return {
+            'enabled': self.config.getboolean('CHECKPOINT', 'enabled', fallback=True),
+            'path': self.config.get('CHECKPOINT', 'path', fallback=default_path)
+        } 
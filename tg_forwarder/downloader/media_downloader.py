@@ -10,50 +10,16 @@ from typing import Dict, Any, List, Union, Optional, Set, Tuple
 from collections import defaultdict
 import json
 
-from pyrogram.types import Message, MessageEntity
 from pyrogram.errors import FloodWait
 
 from tg_forwarder.logModule.logger import get_logger
+from tg_forwarder.utils.metrics import metrics, record_flood_wait
+from tg_forwarder.downloader.message_ref import MessageRef
+from tg_forwarder.utils.id_set import ChatIdSet
 
 # 获取日志记录器
 logger = get_logger("media_downloader")
 
-def entity_to_dict(entity: MessageEntity) -> Dict[str, Any]:
-    """
-    将MessageEntity对象转换为字典
-    
-    Args:
-        entity: MessageEntity对象
-        
-    Returns:
-        Dict[str, Any]: 实体字典
-    """
-    result = {
-        "type": str(entity.type) if hasattr(entity.type, "value") else entity.type,
-        "offset": entity.offset,
-        "length": entity.length
-    }
-    
-    # 添加可选属性
-    if hasattr(entity, "url") and entity.url:
-        result["url"] = entity.url
-    
-    if hasattr(entity, "user") and entity.user:
-        result["user"] = {
-            "id": entity.user.id,
-            "is_bot": entity.user.is_bot,
-            "first_name": entity.user.first_name,
-            "username": getattr(entity.user, "username", None)
-        }
-    
-    if hasattr(entity, "language") and entity.language:
-        result["language"] = entity.language
-        
-    if hasattr(entity, "custom_emoji_id") and entity.custom_emoji_id:
-        result["custom_emoji_id"] = entity.custom_emoji_id
-    
-    return result
-
 class MediaDownloader:
     """媒体下载器，负责下载消息中的媒体文件"""
     
@@ -105,12 +71,29 @@ class MediaDownloader:
         # 加载现有元数据
         self._load_metadata()
         
-        # 初始化已下载消息集合
-        self.downloaded_messages = set()
+        # 初始化已下载消息集合，按聊天保存消息ID区间
+        self.downloaded_messages = ChatIdSet()
         
         # 加载已下载消息记录
         self._load_downloaded_messages()
     
+    def set_concurrency(self, concurrent_downloads: int) -> None:
+        """
+        调整并发下载数量，运行中调用时对之后开始的下载生效（串行模式下只记录该值）
+        
+        Args:
+            concurrent_downloads: 并发下载数量
+        """
+        concurrent_downloads = max(1, int(concurrent_downloads))
+        self.concurrent_downloads = concurrent_downloads
+        if self.serial_mode or concurrent_downloads == self.effective_concurrent:
+            return
+        
+        logger.info(f"并发下载数量调整: {self.effective_concurrent} -> {concurrent_downloads}")
+        self.effective_concurrent = concurrent_downloads
+        # 已持有旧信号量的下载完成后释放回旧信号量，不影响新的限制
+        self.semaphore = asyncio.Semaphore(concurrent_downloads)
+    
     def _load_metadata(self) -> None:
         """加载现有元数据"""
         try:
@@ -196,7 +179,7 @@ class MediaDownloader:
         
         logger.info(f"开始串行下载 {len(all_messages)} 个文件...")
         
-        # 准备需要下载的消息列表
+        # 准备需要下载的消息列表，完整的Message对象在这里转换为紧凑的消息描述
         messages_to_download = []
         for message in all_messages:
             # 检查消息是否为None
@@ -204,29 +187,18 @@ class MediaDownloader:
                 logger.warning("跳过无效消息: 消息对象为None")
                 continue
                 
-            # 检查消息是否已下载过 (通过获取属性而不是get方法)
             try:
-                message_id = message.id if hasattr(message, "id") else 0
-                
-                # 检查chat属性和chat.id属性
-                if not hasattr(message, "chat"):
-                    logger.warning(f"跳过无效消息: 消息 {message_id} 缺少chat属性")
-                    continue
-                    
-                if message.chat is None:
-                    logger.warning(f"跳过无效消息: 消息 {message_id} 的chat属性为None")
-                    continue
-                    
-                chat_id = message.chat.id if hasattr(message.chat, "id") else 0
+                if not isinstance(message, MessageRef):
+                    message = MessageRef.from_message(message)
                 
+                message_id = message.id or 0
+                chat_id = message.chat_id or 0
                 if message_id == 0 or chat_id == 0:
                     logger.warning(f"跳过无效消息: 消息ID={message_id}, 聊天ID={chat_id}")
                     continue
                 
-                if self._is_message_downloaded(chat_id, message_id):
-                    logger.debug(f"消息已下载过: {chat_id}_{message_id}")
-                    continue
-                
+                # 已下载过的消息仍交给上传流程，部分目标频道可能在之前的运行中未送达，
+                # 文件还在时 _download_media_file 直接复用
                 messages_to_download.append(message)
             except Exception as e:
                 logger.error(f"处理消息对象时出错: {str(e)}")
@@ -260,15 +232,16 @@ class MediaDownloader:
         return {
             "success": len(success_files),
             "failed": len(failed_files),
+            "failed_ids": [item.get("message_id") for item in failed_files],
             "files": success_files
         }
     
-    async def _download_media_file(self, message: Message, group_id: str = None) -> Dict[str, Any]:
+    async def _download_media_file(self, message: MessageRef, group_id: str = None) -> Dict[str, Any]:
         """
         下载单个媒体文件
         
         Args:
-            message: 消息对象
+            message: 消息描述
             group_id: 媒体组ID
             
         Returns:
@@ -279,21 +252,21 @@ class MediaDownloader:
         
         # 消息ID作为索引
         message_id = message.id
-        chat_id = message.chat.id
+        chat_id = message.chat_id
         
         # 生成唯一文件名
         file_name = self._generate_file_name(message, chat_id, message_id, group_id)
         file_path = os.path.join(self.temp_folder, file_name)
         
-        # 如果文件已存在且已处理，跳过
-        if file_path in self.processed_files:
+        # 如果文件已存在且已处理（包括之前运行中下载过的消息），跳过
+        if file_path in self.processed_files or self._is_message_downloaded(chat_id, message_id):
             # 检查已存在文件的大小是否大于0
             if os.path.exists(file_path) and os.path.getsize(file_path) > 0:
                 logger.debug(f"文件已存在，跳过下载: {file_path}")
                 return {
                     "message_id": message_id,
                     "chat_id": chat_id,
-                    "media_group_id": group_id or (message.media_group_id if hasattr(message, "media_group_id") else None),
+                    "media_group_id": group_id or message.media_group_id,
                     "file_path": file_path,
                     "file_name": file_name,
                     "success": True,
@@ -304,8 +277,7 @@ class MediaDownloader:
             else:
                 # 文件存在但大小为0或不存在，重新下载
                 logger.warning(f"文件 {file_path} 已存在但大小为0或不存在，重新下载")
-                if file_path in self.processed_files:
-                    self.processed_files.remove(file_path)
+                self.processed_files.discard(file_path)
         
         # 创建临时文件路径
         temp_file_path = f"{file_path}.temp"
@@ -317,7 +289,7 @@ class MediaDownloader:
                 
                 # 直接下载到最终文件路径，而不是临时文件
                 # 这是为了避免文件重命名操作可能导致的问题
-                downloaded_file = await message.download(file_name=file_path)
+                downloaded_file = await self.client.download_media(message.file_id, file_path)
                 
                 if downloaded_file:
                     # 检查文件大小
@@ -335,10 +307,13 @@ class MediaDownloader:
                         # 保存更新的映射
                         self._save_metadata()
                         
+                        metrics.inc("messages_downloaded_total")
+                        metrics.inc("bytes_downloaded_total", file_size)
+                        
                         logger.info(f"下载成功: {file_name} ({file_size/1024:.1f} KB, {duration:.1f}秒)")
                         
                         # 返回包含媒体组ID的结果
-                        media_group_id = group_id or (message.media_group_id if hasattr(message, "media_group_id") else None)
+                        media_group_id = group_id or message.media_group_id
                         
                         return {
                             "message_id": message_id,
@@ -370,6 +345,7 @@ class MediaDownloader:
             except FloodWait as e:
                 # 处理FloodWait错误，等待指定的时间
                 wait_time = e.value if hasattr(e, 'value') else e.x if hasattr(e, 'x') else 60
+                record_flood_wait("download_media", wait_time)
                 logger.warning(f"触发频率限制，等待 {wait_time} 秒")
                 
                 # 如果等待时间过长，记录错误并放弃此次下载
@@ -417,12 +393,12 @@ class MediaDownloader:
             "error": "下载失败，达到最大重试次数"
         }
     
-    def _generate_file_name(self, message: Message, chat_id: int, message_id: int, group_id: str = None) -> str:
+    def _generate_file_name(self, message: MessageRef, chat_id: int, message_id: int, group_id: str = None) -> str:
         """
         生成唯一文件名
         
         Args:
-            message: 消息对象
+            message: 消息描述
             chat_id: 聊天ID
             message_id: 消息ID
             group_id: 媒体组ID
@@ -433,27 +409,23 @@ class MediaDownloader:
         # 确定文件后缀和原始文件名
         original_name = ""
         ext = ""
+        message_type = message.message_type
         
-        if hasattr(message, "document") and message.document:
-            original_name = message.document.file_name or ""
+        if message_type == "document":
+            original_name = message.file_name or ""
             if original_name:
                 ext = os.path.splitext(original_name)[1] or ""
                 original_name = os.path.splitext(original_name)[0]
-        elif hasattr(message, "photo") and message.photo:
+        elif message_type == "photo":
             ext = ".jpg"
-        elif hasattr(message, "video") and message.video:
-            ext = ".mp4"
-            original_name = message.video.file_name or ""
+        elif message_type in ("video", "audio"):
+            ext = ".mp4" if message_type == "video" else ".mp3"
+            original_name = message.file_name or ""
             if original_name:
                 original_name = os.path.splitext(original_name)[0]
-        elif hasattr(message, "audio") and message.audio:
-            ext = ".mp3"
-            original_name = message.audio.file_name or ""
-            if original_name:
-                original_name = os.path.splitext(original_name)[0]
-        elif hasattr(message, "voice") and message.voice:
+        elif message_type == "voice":
             ext = ".ogg"
-        elif hasattr(message, "animation") and message.animation:
+        elif message_type == "animation":
             ext = ".mp4"
         
         # 生成基本文件名
@@ -474,157 +446,58 @@ class MediaDownloader:
         # 添加后缀
         return f"{base_name}{ext}"
     
-    def _has_downloadable_media(self, message: Message) -> bool:
+    def _has_downloadable_media(self, message: MessageRef) -> bool:
         """
         检查消息是否包含可下载的媒体
         
         Args:
-            message: 消息对象
+            message: 消息描述
             
         Returns:
             bool: 是否包含可下载媒体
         """
-        return (
-            (hasattr(message, "photo") and message.photo) or
-            (hasattr(message, "video") and message.video) or
-            (hasattr(message, "document") and message.document) or
-            (hasattr(message, "audio") and message.audio) or
-            (hasattr(message, "voice") and message.voice) or
-            (hasattr(message, "animation") and message.animation)
-        )
+        return message.has_downloadable_media
     
-    def _store_message_metadata(self, message: Message, group_id: str = None) -> None:
+    def _store_message_metadata(self, message: MessageRef, group_id: str = None) -> None:
         """
         存储消息元数据
         
         Args:
-            message: 消息对象
+            message: 消息描述
             group_id: 媒体组ID
         """
         # 确保消息ID存在
-        if not message or not hasattr(message, "id"):
+        if not message or not message.id:
             return
         
-        # 提取基本信息
-        msg_id = message.id
-        chat_id = message.chat.id if hasattr(message, "chat") and message.chat else None
-        
-        # 确定媒体组ID - 优先使用传入的group_id，其次使用消息自带的media_group_id
-        media_group_id = None
-        if group_id:
-            media_group_id = group_id
-            logger.debug(f"使用传入的媒体组ID: {group_id} (消息ID: {msg_id})")
-        elif hasattr(message, "media_group_id") and message.media_group_id:
-            media_group_id = message.media_group_id
-            logger.debug(f"使用消息自带的媒体组ID: {media_group_id} (消息ID: {msg_id})")
-        
-        metadata = {
-            "message_id": msg_id,
-            "chat_id": chat_id,
-            "date": message.date.timestamp() if hasattr(message, "date") and message.date else time.time(),
-            "media_group_id": media_group_id,
-            "message_type": self._get_message_type(message),
-            "caption": message.caption if hasattr(message, "caption") else None,
-            "caption_entities": [entity_to_dict(entity) for entity in message.caption_entities] if hasattr(message, "caption_entities") and message.caption_entities else None,
-            "text": message.text if hasattr(message, "text") else None,
-            "text_entities": [entity_to_dict(entity) for entity in message.entities] if hasattr(message, "entities") and message.entities else None,
-        }
+        # 媒体组ID优先使用传入的group_id，其次使用消息自带的media_group_id
+        metadata = message.to_metadata(group_id)
+        if metadata["date"] is None:
+            metadata["date"] = time.time()
         
-        # 添加文件特有的元数据
-        if hasattr(message, "document") and message.document:
-            metadata.update({
-                "file_name": message.document.file_name,
-                "file_size": message.document.file_size,
-                "mime_type": message.document.mime_type
-            })
-        elif hasattr(message, "video") and message.video:
-            metadata.update({
-                "duration": message.video.duration,
-                "width": message.video.width,
-                "height": message.video.height,
-                "file_name": message.video.file_name,
-                "file_size": message.video.file_size,
-                "mime_type": message.video.mime_type
-            })
-        elif hasattr(message, "audio") and message.audio:
-            metadata.update({
-                "duration": message.audio.duration,
-                "performer": message.audio.performer,
-                "title": message.audio.title,
-                "file_name": message.audio.file_name,
-                "file_size": message.audio.file_size,
-                "mime_type": message.audio.mime_type
-            })
-        elif hasattr(message, "photo") and message.photo:
-            # 对于照片，选择最大尺寸
-            metadata.update({
-                "width": message.photo.width,
-                "height": message.photo.height,
-                "file_size": message.photo.file_size
-            })
-        
-        # 将消息ID转为字符串作为键
-        str_msg_id = str(msg_id)
-        
-        # 存储元数据
-        self.message_metadata[str_msg_id] = metadata
+        # 将消息ID转为字符串作为键，存储元数据
+        self.message_metadata[str(message.id)] = metadata
         
         # 记录添加的元数据
-        logger.debug(f"已存储消息 {msg_id} 的元数据，媒体组ID: {media_group_id}, 类型: {metadata['message_type']}")
+        logger.debug(f"已存储消息 {message.id} 的元数据，媒体组ID: {metadata['media_group_id']}, 类型: {metadata['message_type']}")
         
         # 保存元数据到文件
         self._save_metadata()
     
-    def _get_message_type(self, message: Message) -> str:
-        """
-        获取消息类型
-        
-        Args:
-            message: 消息对象
-            
-        Returns:
-            str: 消息类型
-        """
-        if hasattr(message, "text") and message.text:
-            return "text"
-        elif hasattr(message, "photo") and message.photo:
-            return "photo"
-        elif hasattr(message, "video") and message.video:
-            return "video"
-        elif hasattr(message, "document") and message.document:
-            return "document"
-        elif hasattr(message, "audio") and message.audio:
-            return "audio"
-        elif hasattr(message, "voice") and message.voice:
-            return "voice"
-        elif hasattr(message, "sticker") and message.sticker:
-            return "sticker"
-        elif hasattr(message, "animation") and message.animation:
-            return "animation"
-        elif hasattr(message, "contact") and message.contact:
-            return "contact"
-        elif hasattr(message, "location") and message.location:
-            return "location"
-        elif hasattr(message, "poll") and message.poll:
-            return "poll"
-        else:
-            return "unknown"
-    
-    async def _process_message_media(self, message) -> Dict[str, Any]:
+    async def _process_message_media(self, message: MessageRef) -> Dict[str, Any]:
         """
         处理单个消息的媒体文件下载
         
         Args:
-            message: 消息数据（Pyrogram Message对象）
+            message: 消息描述
             
         Returns:
             Dict[str, Any]: 下载结果
         """
         try:
-            # 获取消息基本信息（直接访问属性而不是使用get方法）
-            message_id = message.id if hasattr(message, "id") else 0
-            chat_id = message.chat.id if hasattr(message, "chat") else 0
-            group_id = message.media_group_id if hasattr(message, "media_group_id") else None
+            message_id = message.id
+            chat_id = message.chat_id
+            group_id = message.media_group_id
             
             # 存储消息元数据
             self._store_message_metadata(message, group_id)
@@ -642,9 +515,7 @@ class MediaDownloader:
             logger.error(f"处理消息媒体出错: {str(e)}")
             import traceback
             logger.error(f"错误详情: {traceback.format_exc()}")
-            message_id = message.id if hasattr(message, "id") else "unknown"
-            chat_id = message.chat.id if hasattr(message, "chat") else "unknown"
-            return {"error": str(e), "message_id": message_id, "chat_id": chat_id}
+            return {"error": str(e), "message_id": message.id, "chat_id": message.chat_id}
     
     def _is_message_downloaded(self, chat_id, message_id) -> bool:
         """
@@ -657,8 +528,7 @@ class MediaDownloader:
         Returns:
             bool: 是否已下载
         """
-        key = f"{chat_id}_{message_id}"
-        return key in self.downloaded_messages
+        return self.downloaded_messages.contains(chat_id, message_id)
         
     def _mark_message_downloaded(self, chat_id, message_id) -> None:
         """
@@ -668,8 +538,8 @@ class MediaDownloader:
             chat_id: 聊天ID
             message_id: 消息ID
         """
-        key = f"{chat_id}_{message_id}"
-        self.downloaded_messages.add(key)
+        if not self.downloaded_messages.add(chat_id, message_id):
+            return
         
         # 定期保存下载状态
         if len(self.downloaded_messages) % 10 == 0:
@@ -678,29 +548,39 @@ class MediaDownloader:
     def _save_downloaded_messages(self) -> None:
         """
         保存已下载消息记录到文件
+        
+        只写入每个聊天的消息ID区间，先写临时文件再替换，避免中断时留下半截文件。
         """
         try:
             download_record_path = os.path.join(self.temp_folder, "downloaded_messages.json")
-            with open(download_record_path, 'w', encoding='utf-8') as f:
-                json.dump(list(self.downloaded_messages), f)
-            logger.debug(f"已保存下载记录，共 {len(self.downloaded_messages)} 条消息")
+            temp_path = f"{download_record_path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.downloaded_messages.to_dict(), f)
+            os.replace(temp_path, download_record_path)
+            logger.debug(f"已保存下载记录，共 {len(self.downloaded_messages)} 条消息，"
+                         f"{self.downloaded_messages.interval_count()} 个区间")
         except Exception as e:
             logger.error(f"保存下载记录失败: {str(e)}")
     
     def _load_downloaded_messages(self) -> None:
         """
         从文件加载已下载消息记录
+        
+        兼容旧版本写入的 "chatid_msgid" 字符串列表，下次保存时转换为区间格式。
         """
         try:
             download_record_path = os.path.join(self.temp_folder, "downloaded_messages.json")
             if os.path.exists(download_record_path):
                 with open(download_record_path, 'r', encoding='utf-8') as f:
                     records = json.load(f)
-                    self.downloaded_messages = set(records)
+                if isinstance(records, list):
+                    self.downloaded_messages = ChatIdSet.from_keys(records)
+                else:
+                    self.downloaded_messages = ChatIdSet.from_dict(records)
                 logger.info(f"已加载下载记录，共 {len(self.downloaded_messages)} 条消息")
             else:
                 logger.info("下载记录文件不存在，创建新记录")
-                self.downloaded_messages = set()
+                self.downloaded_messages = ChatIdSet()
         except Exception as e:
             logger.error(f"加载下载记录失败: {str(e)}")
-            self.downloaded_messages = set() 
\ No newline at end of file
+            self.downloaded_messages = ChatIdSet()
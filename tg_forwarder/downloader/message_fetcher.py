@@ -11,6 +11,9 @@ from pyrogram.types import Message
 from pyrogram.errors import FloodWait
 
 from tg_forwarder.logModule.logger import get_logger
+from tg_forwarder.utils.metrics import record_flood_wait
+from tg_forwarder.downloader.message_ref import MessageRef
+from tg_forwarder.utils.id_set import IdIntervalSet
 
 # 获取日志记录器
 logger = get_logger("message_fetcher")
@@ -29,8 +32,12 @@ class MessageFetcher:
         self.client = client
         self.batch_size = batch_size
         self.processed_media_groups: Set[str] = set()
-        self.processed_message_ids: Set[int] = set()
-        self.message_metadata = defaultdict(dict)
+        # 已处理的消息ID，按连续区间保存
+        self.processed_message_ids = IdIntervalSet()
+        # 获取失败的消息ID，这些消息没有进入流水线，不能当作已处理
+        self.failed_message_ids = IdIntervalSet()
+        # 已获取消息的紧凑描述 {消息ID: MessageRef}
+        self.message_metadata: Dict[int, MessageRef] = {}
     
     async def get_messages(self, 
                          source_chat_id: Union[str, int], 
@@ -79,7 +86,9 @@ class MessageFetcher:
             
             try:
                 logger.debug(f"获取消息批次: {current_id} 到 {batch_end}")
-                messages = await self.client.get_messages_range(source_chat_id, start_message_id, end_message_id, self.batch_size)
+                messages = await self.client.get_messages_range(
+                    source_chat_id, current_id, batch_end, self.batch_size, failed_ids=self.failed_message_ids
+                )
                 
                 # 处理获取到的消息
                 grouped_messages = await self._process_messages(messages, source_chat_id)
@@ -105,24 +114,28 @@ class MessageFetcher:
                 await asyncio.sleep(0.5)
                 
             except FloodWait as e:
-                wait_time = e.x
+                wait_time = e.value
+                record_flood_wait("get_messages_range", wait_time)
                 logger.warning(f"触发频率限制，等待 {wait_time} 秒")
                 await asyncio.sleep(wait_time)
             except Exception as e:
                 logger.error(f"获取消息 {current_id} 到 {batch_end} 时出错: {str(e)}")
                 logger.exception("错误详情:")
+                self.failed_message_ids.add_range(current_id, batch_end)
                 current_id = batch_end + 1  # 跳过错误的批次
     
     async def _process_messages(self, messages: List[Message], chat_id: Union[str, int]) -> Dict[str, List]:
         """
         处理消息列表，按媒体组分组
         
+        返回的是消息描述（MessageRef），完整的Message对象在这里之后不再被引用。
+        
         Args:
             messages: 消息列表
             chat_id: 频道ID
             
         Returns:
-            Dict[str, List]: 按媒体组分组的消息列表
+            Dict[str, List]: 按媒体组分组的消息描述列表
         """
         result = {
             "media_groups": [],
@@ -155,10 +168,7 @@ class MessageFetcher:
                 pending_groups[group_key].append(message)
             else:
                 # 如果不属于媒体组，视为单条消息
-                result["single_messages"].append(message)
-                
-                # 存储消息元数据
-                self._store_message_metadata(message)
+                result["single_messages"].append(self._store_message_metadata(message))
         
         # 第二次处理，获取完整媒体组
         for group_key, messages in pending_groups.items():
@@ -175,19 +185,17 @@ class MessageFetcher:
                     # 标记媒体组为已处理
                     self.processed_media_groups.add(group_key)
                     
-                    # 添加到结果中
-                    result["media_groups"].append(complete_group)
-                    
-                    # 存储每条消息的元数据
-                    for msg in complete_group:
+                    # 存储每条消息的元数据，添加到结果中
+                    result["media_groups"].append([
                         self._store_message_metadata(msg, media_group_id=messages[0].media_group_id)
-                        
+                        for msg in complete_group
+                    ])
+                    
                     logger.info(f"获取到完整媒体组 {group_key}，包含 {len(complete_group)} 条消息")
                 else:
                     # 如果无法获取完整组，将各消息添加为单条消息
                     for msg in messages:
-                        result["single_messages"].append(msg)
-                        self._store_message_metadata(msg)
+                        result["single_messages"].append(self._store_message_metadata(msg))
                     
                     logger.warning(f"无法获取完整媒体组 {group_key}，将 {len(messages)} 条消息作为单独消息处理")
             except Exception as e:
@@ -196,82 +204,25 @@ class MessageFetcher:
                 
                 # 如果出错，将各消息添加为单条消息
                 for msg in messages:
-                    result["single_messages"].append(msg)
-                    self._store_message_metadata(msg)
+                    result["single_messages"].append(self._store_message_metadata(msg))
         
         return result
     
-    def _store_message_metadata(self, message: Message, media_group_id: str = None) -> None:
+    def _store_message_metadata(self, message: Message, media_group_id: str = None) -> MessageRef:
         """
-        存储消息元数据
+        提取并存储消息描述
         
         Args:
             message: 消息对象
             media_group_id: 媒体组ID，如果消息不属于媒体组则为None
-        """
-        # 确保消息ID存在
-        if not message or not hasattr(message, "id"):
-            return
-        
-        # 提取基本信息
-        msg_id = message.id
-        chat_id = message.chat.id if hasattr(message, "chat") and message.chat else None
-        
-        metadata = {
-            "message_id": msg_id,
-            "chat_id": chat_id,
-            "date": message.date if hasattr(message, "date") else None,
-            "media_group_id": media_group_id or (message.media_group_id if hasattr(message, "media_group_id") else None),
-            "message_type": self._get_message_type(message),
-            "caption": message.caption if hasattr(message, "caption") else None,
-            "caption_entities": message.caption_entities if hasattr(message, "caption_entities") else None,
-            "file_name": getattr(getattr(message, "document", None), "file_name", None),
-            "file_size": getattr(getattr(message, "document", None), "file_size", None),
-            "mime_type": getattr(getattr(message, "document", None), "mime_type", None),
-            "duration": getattr(getattr(message, "video", None), "duration", None) or 
-                       getattr(getattr(message, "audio", None), "duration", None),
-            "width": getattr(getattr(message, "photo", None), "width", None) or 
-                    getattr(getattr(message, "video", None), "width", None),
-            "height": getattr(getattr(message, "photo", None), "height", None) or 
-                     getattr(getattr(message, "video", None), "height", None),
-            "performer": getattr(getattr(message, "audio", None), "performer", None),
-            "title": getattr(getattr(message, "audio", None), "title", None)
-        }
-        
-        # 存储元数据
-        self.message_metadata[msg_id] = metadata
-    
-    def _get_message_type(self, message: Message) -> str:
-        """
-        获取消息类型
-        
-        Args:
-            message: 消息对象
             
         Returns:
-            str: 消息类型
+            MessageRef: 消息描述
         """
-        if hasattr(message, "text") and message.text:
-            return "text"
-        elif hasattr(message, "photo") and message.photo:
-            return "photo"
-        elif hasattr(message, "video") and message.video:
-            return "video"
-        elif hasattr(message, "document") and message.document:
-            return "document"
-        elif hasattr(message, "audio") and message.audio:
-            return "audio"
-        elif hasattr(message, "voice") and message.voice:
-            return "voice"
-        elif hasattr(message, "sticker") and message.sticker:
-            return "sticker"
-        elif hasattr(message, "animation") and message.animation:
-            return "animation"
-        elif hasattr(message, "contact") and message.contact:
-            return "contact"
-        elif hasattr(message, "location") and message.location:
-            return "location"
-        elif hasattr(message, "poll") and message.poll:
-            return "poll"
-        else:
-            return "unknown" 
\ No newline at end of file
+        ref = MessageRef.from_message(message)
+        if media_group_id:
+            ref.media_group_id = media_group_id
+        
+        # 存储元数据
+        self.message_metadata[ref.id] = ref
+        return ref
@@ -0,0 +1,199 @@
+"""
+消息描述模块，用只包含下载和重组所需字段的紧凑对象代替完整的 Pyrogram Message
+"""
+
+from typing import Dict, Any, Optional, Tuple
+
+from pyrogram.types import Message, MessageEntity
+
+# 可以下载的媒体类型
+DOWNLOADABLE_TYPES = ("photo", "video", "document", "audio", "voice", "animation")
+
+# 各媒体类型写入元数据的文件字段
+MEDIA_METADATA_FIELDS = {
+    "document": ("file_name", "file_size", "mime_type"),
+    "video": ("duration", "width", "height", "file_name", "file_size", "mime_type"),
+    "audio": ("duration", "performer", "title", "file_name", "file_size", "mime_type"),
+    "photo": ("width", "height", "file_size"),
+}
+
+
+def entity_to_dict(entity: MessageEntity) -> Dict[str, Any]:
+    """
+    将MessageEntity对象转换为字典
+
+    Args:
+        entity: MessageEntity对象
+
+    Returns:
+        Dict[str, Any]: 实体字典
+    """
+    result = {
+        "type": str(entity.type) if hasattr(entity.type, "value") else entity.type,
+        "offset": entity.offset,
+        "length": entity.length
+    }
+
+    # 添加可选属性
+    if hasattr(entity, "url") and entity.url:
+        result["url"] = entity.url
+
+    if hasattr(entity, "user") and entity.user:
+        result["user"] = {
+            "id": entity.user.id,
+            "is_bot": entity.user.is_bot,
+            "first_name": entity.user.first_name,
+            "username": getattr(entity.user, "username", None)
+        }
+
+    if hasattr(entity, "language") and entity.language:
+        result["language"] = entity.language
+
+    if hasattr(entity, "custom_emoji_id") and entity.custom_emoji_id:
+        result["custom_emoji_id"] = entity.custom_emoji_id
+
+    return result
+
+
+def get_message_type(message: Message) -> str:
+    """
+    获取消息类型
+
+    Args:
+        message: 消息对象
+
+    Returns:
+        str: 消息类型
+    """
+    if hasattr(message, "text") and message.text:
+        return "text"
+    elif hasattr(message, "photo") and message.photo:
+        return "photo"
+    elif hasattr(message, "video") and message.video:
+        return "video"
+    elif hasattr(message, "document") and message.document:
+        return "document"
+    elif hasattr(message, "audio") and message.audio:
+        return "audio"
+    elif hasattr(message, "voice") and message.voice:
+        return "voice"
+    elif hasattr(message, "sticker") and message.sticker:
+        return "sticker"
+    elif hasattr(message, "animation") and message.animation:
+        return "animation"
+    elif hasattr(message, "contact") and message.contact:
+        return "contact"
+    elif hasattr(message, "location") and message.location:
+        return "location"
+    elif hasattr(message, "poll") and message.poll:
+        return "poll"
+    else:
+        return "unknown"
+
+
+def _entities(entities) -> Optional[Tuple[Dict[str, Any], ...]]:
+    """转换消息实体列表，没有实体时返回None"""
+    return tuple(entity_to_dict(entity) for entity in entities) if entities else None
+
+
+class MessageRef:
+    """
+    消息描述
+
+    获取消息后立即从 Message 中提取ID、媒体组、类型、文件ID、文件属性、说明文字和实体，
+    之后下载和上传流水线只持有该对象，Message 及其引用的聊天、用户等对象随即释放。
+    """
+
+    __slots__ = (
+        "id", "chat_id", "date", "media_group_id", "message_type",
+        "file_id", "file_name", "file_size", "mime_type",
+        "duration", "width", "height", "performer", "title",
+        "caption", "caption_entities", "text", "text_entities",
+    )
+    _OPTIONAL_FIELDS = tuple(name for name in __slots__ if name not in ("id", "chat_id", "message_type"))
+
+    def __init__(self, id: int, chat_id: Optional[int], message_type: str = "unknown", **fields):
+        """
+        初始化消息描述
+
+        Args:
+            id: 消息ID
+            chat_id: 聊天ID
+            message_type: 消息类型
+            **fields: 其余字段，未提供的字段为None
+        """
+        self.id = id
+        self.chat_id = chat_id
+        self.message_type = message_type
+        for name in self._OPTIONAL_FIELDS:
+            setattr(self, name, fields.get(name))
+
+    @classmethod
+    def from_message(cls, message: Message) -> "MessageRef":
+        """
+        从 Pyrogram Message 提取消息描述
+
+        Args:
+            message: 消息对象
+
+        Returns:
+            MessageRef: 消息描述
+        """
+        message_type = get_message_type(message)
+        media = getattr(message, message_type, None) if message_type in DOWNLOADABLE_TYPES else None
+        chat = getattr(message, "chat", None)
+        date = getattr(message, "date", None)
+
+        return cls(
+            message.id,
+            chat.id if chat else None,
+            message_type,
+            date=date.timestamp() if date else None,
+            media_group_id=getattr(message, "media_group_id", None),
+            file_id=getattr(media, "file_id", None),
+            file_name=getattr(media, "file_name", None),
+            file_size=getattr(media, "file_size", None),
+            mime_type=getattr(media, "mime_type", None),
+            duration=getattr(media, "duration", None),
+            width=getattr(media, "width", None),
+            height=getattr(media, "height", None),
+            performer=getattr(media, "performer", None),
+            title=getattr(media, "title", None),
+            caption=getattr(message, "caption", None),
+            caption_entities=_entities(getattr(message, "caption_entities", None)),
+            text=getattr(message, "text", None),
+            text_entities=_entities(getattr(message, "entities", None)),
+        )
+
+    @property
+    def has_downloadable_media(self) -> bool:
+        """是否包含可下载的媒体"""
+        return self.message_type in DOWNLOADABLE_TYPES and bool(self.file_id)
+
+    def to_metadata(self, media_group_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        生成写入 message_metadata.json 的元数据
+
+        Args:
+            media_group_id: 媒体组ID，默认使用消息自带的媒体组ID
+
+        Returns:
+            Dict[str, Any]: 元数据字典
+        """
+        metadata = {
+            "message_id": self.id,
+            "chat_id": self.chat_id,
+            "date": self.date,
+            "media_group_id": media_group_id or self.media_group_id,
+            "message_type": self.message_type,
+            "caption": self.caption,
+            "caption_entities": list(self.caption_entities) if self.caption_entities else None,
+            "text": self.text,
+            "text_entities": list(self.text_entities) if self.text_entities else None,
+        }
+        for name in MEDIA_METADATA_FIELDS.get(self.message_type, ()):
+            metadata[name] = getattr(self, name)
+        return metadata
+
+    def __repr__(self) -> str:
+        return f"MessageRef(id={self.id}, chat_id={self.chat_id}, type={self.message_type}, group={self.media_group_id})"
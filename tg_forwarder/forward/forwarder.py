@@ -4,7 +4,7 @@
 
 import time
 import asyncio
-from typing import Dict, Any, Optional, List, Union, Tuple
+from typing import Dict, Any, Optional, List, Union, Tuple, Callable
 from collections import defaultdict
 from pyrogram.types import Message
 from pyrogram.errors import FloodWait
@@ -14,6 +14,8 @@ from tg_forwarder.logModule.logger import get_logger
 from tg_forwarder.utils.channel_utils import parse_channel, format_channel, filter_channels, get_channel_utils
 # 导入公共工具函数
 from tg_forwarder.utils.common import get_client_instance
+from tg_forwarder.utils.metrics import metrics
+from tg_forwarder.utils.id_set import IdIntervalSet
 
 logger = get_logger("forwarder")
 
@@ -37,6 +39,15 @@ class MessageForwarder:
         self.delay = config.get('delay', 1)
         self.batch_size = config.get('batch_size', 100)
         self.skip_emoji_messages = config.get('skip_emoji_messages', False)
+        
+        # 多条路由共享发送频率时的调度器（FairPacer），None表示只按 delay 间隔发送
+        self.pacer = None
+        self.route_name = "default"
+    
+    async def wait_turn(self) -> None:
+        """等待共享的发送调度器放行"""
+        if self.pacer is not None:
+            await self.pacer.acquire(self.route_name)
     
     def has_emoji(self, text: str) -> bool:
         """
@@ -91,6 +102,8 @@ class MessageForwarder:
         results = defaultdict(list)
         forwards_restricted = False
         
+        await self.wait_turn()
+        
         # 首先检查源频道是否设置了保护内容（禁止转发）
         try:
             source_chat = await self.client.get_entity(source_message.chat.id)
@@ -168,6 +181,8 @@ class MessageForwarder:
                     logger.info(f"跳过包含Emoji的媒体组消息: {msg.id} (媒体组ID: {msg.media_group_id})")
                     return results
 
+        await self.wait_turn()
+
         # 首先检查源频道是否设置了保护内容（禁止转发）
         try:
             source_chat = await self.client.get_entity(media_group[0].chat.id)
@@ -307,13 +322,15 @@ class MessageForwarder:
         return grouped_messages, stats
     
     async def process_grouped_messages(self, grouped_messages: List[Tuple[str, Any]], 
-                                    valid_targets: List[Union[str, int]]) -> Tuple[Dict[str, List], Dict[str, Any]]:
+                                    valid_targets: List[Union[str, int]],
+                                    is_delivered: Optional[Callable[[Union[str, int], int], bool]] = None) -> Tuple[Dict[str, List], Dict[str, Any]]:
         """
         处理分组后的消息
         
         Args:
             grouped_messages: 分组后的消息列表
             valid_targets: 有效的目标频道ID列表
+            is_delivered: 判断消息是否已送达目标频道的函数，参数为(目标频道, 消息ID)，已送达的目标频道不再转发
             
         Returns:
             Tuple[Dict[str, List], Dict[str, Any]]: 
@@ -333,16 +350,29 @@ class MessageForwarder:
             "media_messages": 0,
             "failed_messages": [],
             "forwards_restricted": False,
-            "error_messages": []
+            "error_messages": [],
+            "skipped_delivered": 0  # 已送达所有目标频道而跳过的消息数
         }
+        # 按目标频道记录未送达的消息ID
+        failed_by_target = defaultdict(list)
         
         # 处理分组后的消息
         for msg_type, msg_data in grouped_messages:
+            # 跳过之前的运行中已送达的目标频道
+            unit_targets = valid_targets
+            if is_delivered is not None:
+                unit_ids = [msg.id for msg in msg_data] if msg_type == "media_group" else [msg_data.id]
+                unit_targets = [t for t in valid_targets if not all(is_delivered(t, i) for i in unit_ids)]
+                if not unit_targets:
+                    logger.debug(f"消息 {unit_ids} 已送达所有目标频道，跳过")
+                    stats["skipped_delivered"] += len(unit_ids)
+                    continue
+            
             try:
                 if msg_type == "media_group":
                     # 转发媒体组
                     media_group = msg_data
-                    result = await self.forward_media_group(media_group, valid_targets)
+                    result = await self.forward_media_group(media_group, unit_targets)
                     
                     # 检查是否因禁止转发而停止
                     if "forwards_restricted" in result:
@@ -368,10 +398,12 @@ class MessageForwarder:
                     
                     success = any(bool(msgs) for target, msgs in result.items() 
                                  if target != "error_messages" and target != "forwards_restricted")
+                    self._record_target_failures(failed_by_target, result, unit_targets, [msg.id for msg in media_group])
                     stats["processed"] += len(media_group)
                     if success:
                         stats["success"] += len(media_group)
                         stats["media_groups"] += 1
+                        metrics.inc("messages_forwarded_total", len(media_group))
                     else:
                         stats["failed"] += len(media_group)
                         # 记录转发失败的媒体组消息ID
@@ -386,7 +418,7 @@ class MessageForwarder:
                 else:
                     # 转发单条消息
                     message = msg_data
-                    result = await self.forward_message(message, valid_targets)
+                    result = await self.forward_message(message, unit_targets)
                     
                     # 检查是否因禁止转发而停止
                     if "forwards_restricted" in result:
@@ -411,9 +443,11 @@ class MessageForwarder:
                     
                     success = any(bool(msgs) for target, msgs in result.items() 
                                  if target != "error_messages" and target != "forwards_restricted")
+                    self._record_target_failures(failed_by_target, result, unit_targets, [message.id])
                     stats["processed"] += 1
                     if success:
                         stats["success"] += 1
+                        metrics.inc("messages_forwarded_total")
                     else:
                         stats["failed"] += 1
                         # 记录转发失败的消息ID
@@ -432,6 +466,9 @@ class MessageForwarder:
             
             except Exception as e:
                 logger.error(f"处理消息时出错: {str(e)}")
+                failed_ids = [msg.id for msg in msg_data] if msg_type == "media_group" else [msg_data.id]
+                for target in unit_targets:
+                    failed_by_target[str(target)].extend(failed_ids)
                 if msg_type == "media_group":
                     stats["failed"] += len(msg_data)
                     stats["processed"] += len(msg_data)
@@ -448,8 +485,27 @@ class MessageForwarder:
                     # 保存源消息便于后续可能的处理
                     source_messages.append(msg_data)
         
+        stats["failed_by_target"] = dict(failed_by_target)
         return dict(forwarded_messages), {"stats": stats, "source_messages": source_messages}
     
+    def _record_target_failures(self, failed_by_target: Dict[str, List[int]], result: Dict[str, Any],
+                                valid_targets: List[Union[str, int]], message_ids: List[int]) -> None:
+        """
+        记录没有收到转发消息的目标频道
+        
+        Args:
+            failed_by_target: {目标频道: [未送达的消息ID]}
+            result: forward_message 或 forward_media_group 的返回结果
+            valid_targets: 目标频道ID列表
+            message_ids: 本次转发的源消息ID
+        """
+        # 结果为空表示消息按配置被跳过，不算作未送达
+        if not result:
+            return
+        for target in valid_targets:
+            if not result.get(str(target)):
+                failed_by_target[str(target)].extend(message_ids)
+    
     def log_result_summary(self, stats: Dict[str, Any]) -> None:
         """
         记录结果摘要日志
@@ -517,7 +573,8 @@ class MessageForwarder:
             logger.warning(f"  - {error_type}: {count}条 ({percentage:.1f}%)")
     
     async def process_messages(self, source_channel: Union[str, int], target_channels: List[Union[str, int]], 
-                             start_id: Optional[int] = None, end_id: Optional[int] = None) -> Dict[str, Any]:
+                             start_id: Optional[int] = None, end_id: Optional[int] = None,
+                             is_delivered: Optional[Callable[[Union[str, int], int], bool]] = None) -> Dict[str, Any]:
         """
         处理并转发消息
         
@@ -526,6 +583,7 @@ class MessageForwarder:
             target_channels: 目标频道ID或用户名列表
             start_id: 起始消息ID
             end_id: 结束消息ID
+            is_delivered: 判断消息是否已送达目标频道的函数，参数为(目标频道, 消息ID)
         
         Returns:
             Dict[str, Any]: 处理结果统计
@@ -554,10 +612,13 @@ class MessageForwarder:
         
         # 初始化统计信息
         stats = self.initialize_stats(start_id, end_id)
+        stats["start_id"] = start_id
+        stats["end_id"] = end_id
         
-        # 获取消息
+        # 获取消息，记录获取失败的批次
+        fetch_failed = IdIntervalSet()
         messages = await self.client.get_messages_range(
-            source_channel, start_id, end_id, self.batch_size
+            source_channel, start_id, end_id, self.batch_size, failed_ids=fetch_failed
         )
         
         # 对消息进行分组
@@ -567,12 +628,20 @@ class MessageForwarder:
         stats.update(group_stats)
         
         # 处理分组后的消息
-        forwarded_messages, process_result = await self.process_grouped_messages(grouped_messages, valid_targets)
+        forwarded_messages, process_result = await self.process_grouped_messages(grouped_messages, valid_targets, is_delivered)
         
         # 更新统计信息
         stats.update(process_result["stats"])
+        stats["skipped"] += stats["skipped_delivered"]
         source_messages = process_result["source_messages"]
         
+        # 获取失败的消息没有送达任何目标频道，检查点不能越过这些消息
+        stats["fetch_failed_ids"] = list(fetch_failed)
+        if stats["fetch_failed_ids"]:
+            logger.warning(f"有 {len(stats['fetch_failed_ids'])} 条消息获取失败，下次运行时重试")
+            for target in valid_targets:
+                stats["failed_by_target"].setdefault(str(target), []).extend(stats["fetch_failed_ids"])
+        
         # 计算总耗时
         stats["end_time"] = time.time()
         stats["duration"] = stats["end_time"] - stats["start_time"]
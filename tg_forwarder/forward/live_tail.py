@@ -0,0 +1,186 @@
+"""
+实时跟随模块，订阅源频道的新消息并立即交给转发流程处理
+"""
+
+import time
+import asyncio
+from typing import Dict, Any, Optional, List, Union, Callable, Awaitable
+
+from pyrogram import filters
+from pyrogram.handlers import MessageHandler
+from pyrogram.types import Message
+
+from tg_forwarder.logModule.logger import get_logger
+from tg_forwarder.utils.id_set import ChatIdSet
+
+logger = get_logger("live_tail")
+
+# 处理一个消息单元（单条消息或完整媒体组）的回调
+UnitHandler = Callable[[List[Message]], Awaitable[Any]]
+
+# 判断消息是否已送达所有目标频道的回调，参数为 (聊天ID, 消息ID)
+DeliveredCheck = Callable[[Union[str, int], int], bool]
+
+
+class LiveTail:
+    """
+    实时跟随源频道的新消息
+
+    通过Pyrogram的更新推送接收新消息，不轮询历史。单条消息立即进入处理队列；
+    媒体组消息按 media_group_id 收集，在 album_window 秒内没有新的同组消息后
+    作为一个整体进入队列。队列由单个协程按到达顺序处理，相邻两次处理之间至少
+    间隔 min_interval 秒。重新连接后重复推送的消息和检查点中已送达的消息被跳过。
+    """
+
+    def __init__(self, client, source_channels: List[Union[str, int]], handler: UnitHandler,
+                 album_window: float = 0.5, min_interval: float = 0.0, max_pending: int = 1000,
+                 group: int = 0, is_delivered: Optional[DeliveredCheck] = None):
+        """
+        初始化实时跟随器
+
+        Args:
+            client: Telegram客户端实例（TelegramClient）
+            source_channels: 源频道真实ID列表
+            handler: 处理消息单元的协程函数，参数为按ID排序的消息列表
+            album_window: 媒体组收集窗口（秒），窗口内没有新的同组消息即视为完整
+            min_interval: 相邻两次处理之间的最小间隔（秒）
+            max_pending: 处理队列的最大长度
+            group: 消息处理器分组，同一分组中只有第一个匹配的处理器收到消息，
+                多个跟随器订阅同一频道时需使用不同分组
+            is_delivered: 判断消息是否已送达所有目标频道，已送达的消息不再处理
+        """
+        self.client = client
+        self.source_channels = list(source_channels)
+        self.handler = handler
+        self.album_window = album_window
+        self.min_interval = min_interval
+        self.group = group
+        self.is_delivered = is_delivered
+
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        # 正在收集的媒体组 {(chat_id, media_group_id): {"messages": [...], "timer": TimerHandle}}
+        self._albums: Dict[tuple, Dict[str, Any]] = {}
+        self._handler = None
+        self._worker: Optional[asyncio.Task] = None
+        self._last_dispatch = 0.0
+        # 已收到的消息ID，跳过重复推送的更新
+        self._seen = ChatIdSet()
+
+        self.stats = {
+            "received": 0,
+            "units": 0,
+            "albums": 0,
+            "failed": 0,
+            "dropped": 0,
+            "duplicates": 0,
+            "max_latency": 0.0,
+        }
+
+    @property
+    def running(self) -> bool:
+        """是否正在跟随"""
+        return self._worker is not None and not self._worker.done()
+
+    async def start(self) -> None:
+        """注册新消息处理器并开始接收更新"""
+        if self.running:
+            return
+
+        self._worker = asyncio.create_task(self._run())
+        self._handler = MessageHandler(self._on_message, filters.chat(self.source_channels))
+        self.client.client.add_handler(self._handler, self.group)
+        await self.client.start_updates()
+        logger.info(f"开始实时跟随 {len(self.source_channels)} 个源频道的新消息，媒体组收集窗口 {self.album_window} 秒")
+
+    async def stop(self, timeout: float = 30.0) -> None:
+        """
+        停止接收更新，处理完已收到的消息后结束
+
+        Args:
+            timeout: 等待队列处理完成的最长时间（秒）
+        """
+        if self._handler is not None:
+            self.client.client.remove_handler(self._handler, self.group)
+            self._handler = None
+
+        # 正在收集的媒体组不再等待窗口结束
+        for key in list(self._albums):
+            self._flush_album(key)
+
+        if self._worker is None:
+            return
+
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"停止实时跟随时仍有 {self._queue.qsize()} 个消息单元未处理")
+
+        self._worker.cancel()
+        await asyncio.gather(self._worker, return_exceptions=True)
+        self._worker = None
+        logger.info(f"实时跟随已停止: 收到 {self.stats['received']} 条消息，处理 {self.stats['units']} 个单元")
+
+    async def _on_message(self, client, message: Message) -> None:
+        """Pyrogram新消息回调"""
+        self.stats["received"] += 1
+        chat_id = message.chat.id
+
+        if not self._seen.add(chat_id, message.id) or (
+                self.is_delivered is not None and self.is_delivered(chat_id, message.id)):
+            self.stats["duplicates"] += 1
+            logger.debug(f"跳过重复或已送达的消息 {chat_id}_{message.id}")
+            return
+
+        if message.media_group_id:
+            key = (chat_id, message.media_group_id)
+            album = self._albums.get(key)
+            if album is None:
+                album = self._albums[key] = {"messages": [], "timer": None, "received_at": time.monotonic()}
+            else:
+                album["timer"].cancel()
+            album["messages"].append(message)
+            album["timer"] = asyncio.get_running_loop().call_later(self.album_window, self._flush_album, key)
+            return
+
+        # 同一频道中先到达的媒体组先进入队列，保持发布顺序
+        for key in [key for key in self._albums if key[0] == chat_id]:
+            self._flush_album(key)
+        self._enqueue([message], time.monotonic())
+
+    def _flush_album(self, key: tuple) -> None:
+        """媒体组收集完成，放入处理队列"""
+        album = self._albums.pop(key, None)
+        if album is None:
+            return
+        album["timer"].cancel()
+        self.stats["albums"] += 1
+        self._enqueue(sorted(album["messages"], key=lambda m: m.id), album["received_at"])
+
+    def _enqueue(self, messages: List[Message], received_at: float) -> None:
+        """放入处理队列，队列已满时丢弃并记录"""
+        try:
+            self._queue.put_nowait((messages, received_at))
+        except asyncio.QueueFull:
+            self.stats["dropped"] += len(messages)
+            logger.error(f"实时跟随处理队列已满，丢弃消息 {[m.id for m in messages]}")
+
+    async def _run(self) -> None:
+        """按到达顺序处理消息单元"""
+        while True:
+            messages, received_at = await self._queue.get()
+            try:
+                wait = self._last_dispatch + self.min_interval - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self._last_dispatch = time.monotonic()
+
+                await self.handler(messages)
+                self.stats["units"] += 1
+                latency = time.monotonic() - received_at
+                self.stats["max_latency"] = max(self.stats["max_latency"], latency)
+                logger.debug(f"消息 {[m.id for m in messages]} 处理完成，延迟 {latency:.3f} 秒")
+            except Exception as e:
+                self.stats["failed"] += len(messages)
+                logger.error(f"处理实时消息 {[m.id for m in messages]} 时出错: {str(e)}")
+            finally:
+                self._queue.task_done()
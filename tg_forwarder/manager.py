@@ -3,17 +3,19 @@
 """
 
 import asyncio
-from typing import Dict, Any, Optional, List, Union, Tuple
+from typing import Dict, Any, Optional, List, Union, Tuple, Callable
 import logging
 import sys
 import os
 import configparser
 import time
+from collections import defaultdict
 
 from tg_forwarder.config import Config
 from tg_forwarder.client import TelegramClient
 from tg_forwarder.utils.channel_utils import ChannelUtils, get_channel_utils, parse_channel
 from tg_forwarder.forward.forwarder import MessageForwarder
+from tg_forwarder.forward.live_tail import LiveTail
 from tg_forwarder.logModule.logger import setup_logger, get_logger
 from tg_forwarder.client import Client
 
@@ -23,6 +25,11 @@ from tg_forwarder.downloader.message_fetcher import MessageFetcher
 from tg_forwarder.downloader.media_downloader import MediaDownloader
 from tg_forwarder.uploader.assember import MessageAssembler
 from tg_forwarder.uploader.media_uploader import MediaUploader
+from tg_forwarder.utils.metrics import MetricsServer, get_metrics
+from tg_forwarder.utils.loop_monitor import LoopLagMonitor
+from tg_forwarder.utils.checkpoint import CheckpointStore
+from tg_forwarder.utils.fair_pacer import FairPacer
+from tg_forwarder.utils.id_set import IdIntervalSet
 
 # 获取日志记录器
 logger = get_logger("manager")
@@ -30,26 +37,94 @@ logger = get_logger("manager")
 class ForwardManager:
     """转发管理器类，负责协调整个转发流程"""
     
-    def __init__(self, config_path: str = "config.ini"):
+    # 运行中可以调整的参数所在的配置节
+    LIVE_SETTING_SECTIONS = ('FORWARD', 'DOWNLOAD', 'UPLOAD')
+    
+    def __init__(self, config_path: str = "config.ini", channels: Optional[Dict[str, Any]] = None,
+                 route_name: Optional[str] = None, session_name: Optional[str] = None):
         """
         初始化转发管理器
         
         Args:
             config_path: 配置文件路径
+            channels: 频道配置，包含 source_channel 和 target_channels，默认使用配置文件的 [CHANNELS]
+            route_name: 路由名，多条路由在同一进程中运行时用于区分临时目录和发送调度
+            session_name: Telegram会话名，默认使用配置文件中的设置，多个进程同时运行时各用一个会话
         """
         self.config_path = config_path
         self.config = Config(config_path)
+        self.channels = channels
+        self.route_name = route_name
+        self.session_name = session_name
         self.client = None
         self.forwarder = None
         # 使用ChannelUtils替代原来的channel_validator和channel_state_manager
         self.channel_utils = None
+        # 本地指标服务（可选）
+        self.metrics_server = None
+        # 事件循环阻塞监控
+        self.loop_monitor = None
+        # 当前生效的可调参数 {参数名: 值}
+        self.live_settings: Dict[str, Any] = {}
+        # 正在运行的下载上传流水线组件，用于在运行中应用参数调整
+        self._pipeline: Dict[str, Any] = {}
+        # 实时跟随模式下的跟随器
+        self._tail: Optional[LiveTail] = None
+        # 转发检查点存储，第一次使用时创建
+        self.checkpoint_store: Optional[CheckpointStore] = None
+        # 多条路由共享的发送调度器和上传客户端，由 RouteRunner 设置
+        self.pacer: Optional[FairPacer] = None
+        self.upload_client_manager = None
+        # 实时跟随的消息处理器分组，多条路由各用一个分组
+        self.handler_group = 0
+        # 是否通过 attach() 共享主管理器的连接
+        self.attached = False
     
     async def setup(self) -> None:
         """初始化组件"""
         try:
+            # 启动本地指标服务
+            metrics_config = self.config.get_metrics_config()
+            if metrics_config['enabled']:
+                self.metrics_server = MetricsServer(
+                    host=metrics_config['host'],
+                    port=metrics_config['port'],
+                    lag_interval=metrics_config['lag_interval']
+                )
+                if not await self.metrics_server.start():
+                    self.metrics_server = None
+            
+            # 启动事件循环阻塞监控
+            monitor_config = self.config.get_loop_monitor_config()
+            if monitor_config['enabled']:
+                self.loop_monitor = LoopLagMonitor(
+                    threshold=monitor_config['threshold'],
+                    interval=monitor_config['interval']
+                )
+                self.loop_monitor.add_callback(self._record_loop_stall)
+                await self.loop_monitor.start()
+            
+            # 监视配置文件，并发数、批次大小和延迟在运行中修改后立即生效
+            self._apply_live_settings()
+            for section in self.LIVE_SETTING_SECTIONS:
+                self.config.add_observer(section, self._apply_live_settings)
+            get_metrics().register_callback(
+                "pipeline_setting", "manager",
+                lambda: {(("setting", name),): float(value) for name, value in self.live_settings.items()}
+            )
+            watch_config = self.config.get_config_watch_config()
+            if watch_config['enabled']:
+                self.config.start_watching(
+                    debounce=watch_config['debounce'],
+                    poll_interval=watch_config['poll_interval']
+                )
+            
             # 创建Pyrogram客户端
+            api_config = self.config.get_api_config()
+            if self.session_name:
+                api_config['session_name'] = self.session_name
             self.client = TelegramClient(
-                api_config=self.config.get_api_config(),
+                api_config=api_config,
                 proxy_config=self.config.get_proxy_config()
             )
             # 连接到Telegram
@@ -67,13 +142,158 @@ class ForwardManager:
             logger.error(f"初始化组件时出错: {str(e)}")
             raise
         
+    def attach(self, primary: "ForwardManager", pacer: Optional[FairPacer] = None,
+               upload_client_manager=None) -> None:
+        """
+        使用另一个已初始化管理器的客户端、配置和频道缓存，代替 setup()
+        
+        多条路由在同一进程中运行时，每条路由一个管理器，共享主管理器的连接。
+        
+        Args:
+            primary: 已调用过 setup() 的主管理器
+            pacer: 所有路由共享的发送调度器
+            upload_client_manager: 所有路由共享的上传客户端管理器
+        """
+        self.config = primary.config
+        self.client = primary.client
+        self.channel_utils = primary.channel_utils
+        # 每个管理器保存自己的参数副本，配置变化时各自比较并应用到自己的组件
+        self.live_settings = dict(primary.live_settings)
+        self.attached = True
+        self.checkpoint_store = primary.get_checkpoint_store()
+        self.pacer = pacer
+        self.upload_client_manager = upload_client_manager
+        
+        self.forwarder = MessageForwarder(self.client, self.config.get_forward_config())
+        if pacer is not None:
+            # 发送间隔由共享的调度器控制
+            self.forwarder.delay = 0
+            self.forwarder.pacer = pacer
+            self.forwarder.route_name = self.route_name
+        
+        for section in self.LIVE_SETTING_SECTIONS:
+            self.config.add_observer(section, self._apply_live_settings)
+    
+    def detach(self) -> None:
+        """取消 attach() 注册的配置观察者，连接由主管理器关闭"""
+        for section in self.LIVE_SETTING_SECTIONS:
+            self.config.remove_observer(section, self._apply_live_settings)
+        self.attached = False
+    
+    def get_checkpoint_store(self) -> Optional[CheckpointStore]:
+        """
+        获取转发检查点存储
+        
+        Returns:
+            Optional[CheckpointStore]: 检查点存储，配置中禁用检查点且没有指定存储时返回None
+        """
+        if self.checkpoint_store is not None:
+            return self.checkpoint_store
+        checkpoint_config = self.config.get_checkpoint_config()
+        if checkpoint_config['enabled']:
+            self.checkpoint_store = CheckpointStore(checkpoint_config['path'])
+        return self.checkpoint_store
+    
     async def shutdown(self) -> None:
         """关闭所有组件并释放资源"""
         if self.client:
             await self.client.disconnect()
         
+        self.config.stop_watching()
+        for section in self.LIVE_SETTING_SECTIONS:
+            self.config.remove_observer(section, self._apply_live_settings)
+        get_metrics().unregister_callback("pipeline_setting", "manager")
+        
+        if self.metrics_server:
+            await self.metrics_server.stop()
+            self.metrics_server = None
+        
+        if self.loop_monitor:
+            await self.loop_monitor.stop()
+            self.loop_monitor = None
+        
         logger.info("已关闭所有组件")
     
+    def _read_live_settings(self) -> Dict[str, Any]:
+        """
+        从配置中读取运行中可以调整的参数
+        
+        Returns:
+            Dict[str, Any]: {参数名: 值}
+        """
+        forward_config = self.config.get_forward_config()
+        download_config = self.config.get_download_config()
+        upload_config = self.config.get_upload_config()
+        return {
+            'batch_size': forward_config.get('batch_size', 30),
+            'delay': forward_config.get('delay', 1.5),
+            'concurrent_downloads': download_config['concurrent_downloads'],
+            'concurrent_uploads': upload_config['concurrent_uploads'],
+            'wait_between_messages': upload_config['wait_between_messages'],
+        }
+    
+    def _apply_live_settings(self, section: Optional[str] = None, changed: Optional[Dict[str, Any]] = None) -> None:
+        """
+        将配置中的可调参数应用到正在运行的组件，作为配置观察者在配置文件变化后调用
+        
+        Args:
+            section: 发生变化的配置节
+            changed: 变化的配置项
+        """
+        try:
+            settings = self._read_live_settings()
+        except ValueError as e:
+            logger.error(f"可调参数的配置值无效，保留当前参数: {str(e)}")
+            return
+        
+        for name, value in settings.items():
+            old_value = self.live_settings.get(name)
+            if old_value == value:
+                continue
+            
+            self.live_settings[name] = value
+            if old_value is None:
+                continue
+            
+            # 日志和指标由主管理器记录，路由管理器只更新自己的组件
+            if not self.attached:
+                logger.info(f"参数 {name} 已调整: {old_value} -> {value}")
+                get_metrics().inc("pipeline_setting_changes_total", setting=name)
+            
+            if name == 'batch_size':
+                if self.forwarder:
+                    self.forwarder.batch_size = value
+                if 'message_fetcher' in self._pipeline:
+                    self._pipeline['message_fetcher'].batch_size = value
+            elif name == 'delay':
+                # 使用共享发送调度器时发送间隔由调度器控制
+                if self.pacer is not None:
+                    continue
+                if self.forwarder:
+                    self.forwarder.delay = value
+                if self._tail:
+                    self._tail.min_interval = value
+            elif name == 'concurrent_downloads':
+                if 'media_downloader' in self._pipeline:
+                    self._pipeline['media_downloader'].set_concurrency(value)
+            elif name == 'concurrent_uploads':
+                if 'upload_queue' in self._pipeline:
+                    self._pipeline['upload_queue'].resize(value)
+            elif name == 'wait_between_messages':
+                if 'media_uploader' in self._pipeline:
+                    self._pipeline['media_uploader'].set_wait_time(value)
+    
+    def _record_loop_stall(self, report: Dict[str, Any]) -> None:
+        """
+        将事件循环阻塞记录到指标中
+        
+        Args:
+            report: 阻塞报告
+        """
+        metrics = get_metrics()
+        metrics.inc("event_loop_stalls_total", location=report["location"])
+        metrics.inc("event_loop_stalled_seconds_total", report["lag"])
+    
     async def validate_channels(self) -> Tuple[List[str], List[str]]:
         """
         验证频道列表
@@ -151,7 +371,7 @@ class ForwardManager:
         logger.info("开始解析频道配置...")
         
         # 获取频道配置
-        channels_config = self.config.get_channels_config()
+        channels_config = self.channels or self.config.get_channels_config()
         
         # 获取目标频道列表
         target_channels = channels_config['target_channels']
@@ -305,7 +525,8 @@ class ForwardManager:
         return source_allow_forward, sorted_targets
     
     async def process_normal_forward(self, source_identifier: Union[str, int], target_identifiers: List[Union[str, int]], 
-                                   start_message_id: int, end_message_id: int) -> Dict[str, Any]:
+                                   start_message_id: int, end_message_id: int,
+                                   is_delivered: Optional[Callable[[Union[str, int], int], bool]] = None) -> Dict[str, Any]:
         """
         处理正常转发流程
         
@@ -314,6 +535,7 @@ class ForwardManager:
             target_identifiers: 目标频道标识符列表
             start_message_id: 起始消息ID
             end_message_id: 结束消息ID
+            is_delivered: 判断消息是否已送达目标频道的函数，已送达的目标频道不再转发
             
         Returns:
             Dict[str, Any]: 处理结果统计
@@ -323,7 +545,8 @@ class ForwardManager:
             source_identifier,
             target_identifiers,
             start_message_id,
-            end_message_id
+            end_message_id,
+            is_delivered
         )
         
         # 处理普通转发中的错误（非禁止转发导致的失败）
@@ -425,8 +648,10 @@ class ForwardManager:
         Returns:
             Dict[str, Any]: 包含创建的组件和配置
         """
-        # 创建下载配置
+        # 创建下载配置，多条路由各自使用临时目录下的子目录
         download_config = self.config.get_download_config()
+        if self.route_name:
+            download_config["temp_folder"] = os.path.join(download_config["temp_folder"], self.route_name)
         
         # 创建上传配置
         upload_config = self.config.get_upload_config()
@@ -471,7 +696,10 @@ class ForwardManager:
             temp_folder=download_config["temp_folder"],
             wait_time=upload_config["wait_between_messages"],
             retry_count=upload_config.get("retry_count", download_config["retry_count"]),
-            retry_delay=upload_config.get("retry_delay", download_config["retry_delay"])
+            retry_delay=upload_config.get("retry_delay", download_config["retry_delay"]),
+            client_manager=self.upload_client_manager,
+            pacer=self.pacer,
+            route_name=self.route_name or "default"
         )
         
         # 初始化媒体上传器的临时客户端
@@ -488,7 +716,9 @@ class ForwardManager:
         }
 
     async def _download_producer(self, message_fetcher, media_downloader, real_source_id, 
-                               start_message_id, end_message_id, download_upload_queue, pipeline_control):
+                               start_message_id, end_message_id, download_upload_queue, pipeline_control,
+                               is_delivered: Optional[Callable[[Union[str, int], int], bool]] = None,
+                               target_ids: Optional[List[Union[str, int]]] = None):
         """
         下载生产者任务，处理消息的获取和媒体下载
         
@@ -500,7 +730,15 @@ class ForwardManager:
             end_message_id: 结束消息ID
             download_upload_queue: 下载和上传之间的队列
             pipeline_control: 流水线控制字典
+            is_delivered: 判断消息是否已送达目标频道的函数
+            target_ids: 目标频道真实ID列表
         """
+        def delivered_everywhere(messages) -> bool:
+            """消息是否已送达所有目标频道，是则不需要下载"""
+            return is_delivered is not None and bool(target_ids) and all(
+                is_delivered(target, message.id) for target in target_ids for message in messages
+            )
+        
         try:
             # 获取消息批次
             async for batch in message_fetcher.get_messages(
@@ -518,6 +756,10 @@ class ForwardManager:
                 for group_index, group_messages in enumerate(media_groups):
                     # 从第一个消息获取媒体组ID
                     if group_messages and len(group_messages) > 0:
+                        if delivered_everywhere(group_messages):
+                            logger.debug(f"媒体组消息 {[message.id for message in group_messages]} 已送达所有目标频道，跳过")
+                            continue
+                        
                         first_message = group_messages[0]
                         group_id = first_message.media_group_id if hasattr(first_message, "media_group_id") else f"group_{group_index}"
                         logger.info(f"开始下载媒体组 {group_id}，包含 {len(group_messages)} 个文件")
@@ -533,6 +775,7 @@ class ForwardManager:
                         
                         # 下载这个媒体组的所有文件
                         download_result = await media_downloader.download_media_batch(group_batch)
+                        pipeline_control["failed_ids"].update(download_result.get("failed_ids", []))
                         
                         # 如果下载成功，立即添加到上传队列
                         if download_result.get("success", 0) > 0:
@@ -551,6 +794,10 @@ class ForwardManager:
                 
                 # 处理单条消息（每条消息作为一个任务）
                 for message in single_messages:
+                    if delivered_everywhere([message]):
+                        logger.debug(f"消息 {message.id} 已送达所有目标频道，跳过")
+                        continue
+                    
                     # 使用直接属性访问而不是get方法
                     message_id = message.id if hasattr(message, "id") else "unknown"
                     logger.info(f"开始下载单条消息 {message_id}")
@@ -566,6 +813,7 @@ class ForwardManager:
                     
                     # 下载这条消息
                     download_result = await media_downloader.download_media_batch(message_batch)
+                    pipeline_control["failed_ids"].update(download_result.get("failed_ids", []))
                     
                     # 如果下载成功，立即添加到上传队列
                     if download_result.get("success", 0) > 0:
@@ -585,10 +833,14 @@ class ForwardManager:
                 logger.info(f"批次 {batch['id']} 所有媒体组和单条消息处理完成")
                 
         except Exception as e:
+            # 出错位置之后的消息没有处理，本次范围不能记为完成
+            pipeline_control["download_error"] = str(e)
             logger.error(f"下载生产者任务出错: {str(e)}")
             import traceback
             logger.error(f"错误详情: {traceback.format_exc()}")
         finally:
+            # 获取失败的消息没有进入流水线，按所有目标频道都未送达处理
+            pipeline_control["failed_ids"].update(message_fetcher.failed_message_ids)
             # 标记下载完成
             pipeline_control["downloading_complete"] = True
             logger.info(f"所有下载任务完成，总计下载 {pipeline_control['download_count']} 个项目")
@@ -643,18 +895,20 @@ class ForwardManager:
             batch_id = download_task.get("batch_id")
             download_result = download_task.get("download_result")
             
-            # 检查是否已处理过该批次，避免重复转发
-            if batch_id in pipeline_control["processed_items"]:
-                logger.info(f"批次 {batch_id} 已处理过，跳过")
-                return True
-            
-            logger.info(f"开始处理批次 {batch_id} 的上传任务")
-            
             # 获取下载文件列表
             files = download_result.get("files", [])
             if not files:
                 logger.warning(f"批次 {batch_id} 没有可用文件，跳过上传")
                 return True
+            
+            # 检查批次中的消息是否都已上传过，避免重复转发
+            message_ids = [file["message_id"] for file in files if file.get("message_id") is not None]
+            processed_items = pipeline_control["processed_items"]
+            if message_ids and all(message_id in processed_items for message_id in message_ids):
+                logger.info(f"批次 {batch_id} 已处理过，跳过")
+                return True
+            
+            logger.info(f"开始处理批次 {batch_id} 的上传任务")
                 
             # 记录下载的文件信息，用于调试
             logger.debug(f"准备组装批次 {batch_id} 的 {len(files)} 个文件")
@@ -682,8 +936,12 @@ class ForwardManager:
             result["success"] += upload_result.get("success_total", 0)
             result["failed"] += upload_result.get("failed_total", 0)
             
-            # 标记该批次已处理
-            pipeline_control["processed_items"].add(batch_id)
+            # 记录未送达的消息，检查点不会越过这些消息
+            for target, failed_ids in upload_result.get("failed_by_target", {}).items():
+                pipeline_control["failed_by_target"][target].update(failed_ids)
+            
+            # 标记该批次的消息已处理
+            processed_items.update(message_ids)
             pipeline_control["upload_count"] += 1
             
             logger.info(f"批次 {batch_id} 上传完成，成功: {upload_result.get('success_total', 0)}，" +
@@ -699,10 +957,13 @@ class ForwardManager:
             logger.error(f"上传消费者任务出错: {str(e)}")
             import traceback
             logger.error(f"错误详情: {traceback.format_exc()}")
+            files = (download_task.get("download_result") or {}).get("files", [])
+            pipeline_control["failed_ids"].update(f.get("message_id") for f in files if f.get("message_id"))
             return False
 
     async def _process_download_upload(self, real_source_id, real_target_ids, 
-                                     start_message_id, end_message_id):
+                                     start_message_id, end_message_id,
+                                     is_delivered: Optional[Callable[[Union[str, int], int], bool]] = None):
         """
         处理下载上传流程（当源频道禁止转发时使用）
         
@@ -711,6 +972,7 @@ class ForwardManager:
             real_target_ids: 目标频道真实ID列表
             start_message_id: 起始消息ID
             end_message_id: 结束消息ID
+            is_delivered: 判断消息是否已送达目标频道的函数，已送达的目标频道不再上传
             
         Returns:
             Dict[str, Any]: 处理结果统计
@@ -743,6 +1005,7 @@ class ForwardManager:
             message_assembler = components["message_assembler"]
             media_uploader = components["media_uploader"]
             upload_config = components["upload_config"]
+            media_uploader.is_delivered = is_delivered
             
             # 确认上传器已使用正确的目标频道
             logger.info(f"上传器将发送消息到 {len(media_uploader.target_channels)} 个目标频道")
@@ -753,9 +1016,11 @@ class ForwardManager:
             # 创建媒体处理流水线的控制标志
             pipeline_control = {
                 "downloading_complete": False,
-                "processed_items": set(),  # 用于跟踪已处理项目，避免重复转发
+                "processed_items": IdIntervalSet(),  # 已上传的消息ID，避免重复转发
                 "download_count": 0,
-                "upload_count": 0
+                "upload_count": 0,
+                "failed_ids": set(),  # 所有目标频道都未送达的消息ID
+                "failed_by_target": defaultdict(set)  # 按目标频道记录未送达的消息ID
             }
             
             logger.info("开始下载和上传并行处理流水线...")
@@ -764,7 +1029,8 @@ class ForwardManager:
             download_task = asyncio.create_task(
                 self._download_producer(
                     message_fetcher, media_downloader, real_source_id,
-                    start_message_id, end_message_id, download_upload_queue, pipeline_control
+                    start_message_id, end_message_id, download_upload_queue, pipeline_control,
+                    is_delivered, real_target_ids
                 )
             )
             
@@ -774,6 +1040,12 @@ class ForwardManager:
                 max_workers=upload_config.get("concurrent_uploads", 3)
             )
             
+            # 注册队列深度和工作者数量的指标采集
+            self._register_pipeline_metrics(download_upload_queue, upload_queue)
+            
+            # 记录流水线组件，运行中修改配置时调整并发数、批次大小和消息间隔
+            self._pipeline = {**components, "upload_queue": upload_queue}
+            
             # 启动上传任务队列
             upload_task = asyncio.create_task(
                 upload_queue.run(
@@ -798,6 +1070,12 @@ class ForwardManager:
                     return_when=asyncio.ALL_COMPLETED
                 )
                 
+                # 两个任务都正常结束且下载没有中途出错时，范围内未记录失败的消息都已处理
+                result["range_complete"] = (
+                    download_future.done() and upload_future.done()
+                    and not pipeline_control.get("download_error")
+                )
+                
                 # 检查是否有任务因超时未完成
                 if not download_future.done():
                     logger.warning("下载任务执行超时，强制结束")
@@ -827,6 +1105,10 @@ class ForwardManager:
             
             # 更新结果统计
             result.update({
+                "failed_by_target": {
+                    str(target): sorted(pipeline_control["failed_ids"] | pipeline_control["failed_by_target"][str(target)])
+                    for target in real_target_ids
+                },
                 "download_count": pipeline_control["download_count"],
                 "upload_count": pipeline_control["upload_count"],
                 "error": None,
@@ -845,6 +1127,9 @@ class ForwardManager:
             result["success_flag"] = False  # 失败标志
         
         finally:
+            self._pipeline = {}
+            self._unregister_pipeline_metrics()
+            
             # 关闭媒体上传器临时客户端
             if components and 'media_uploader' in components:
                 logger.info("关闭媒体上传器临时客户端...")
@@ -852,6 +1137,34 @@ class ForwardManager:
         
         return result
 
+    def _register_pipeline_metrics(self, download_upload_queue: asyncio.Queue, upload_queue: TaskQueue) -> None:
+        """
+        注册下载上传流水线的抓取时指标
+        
+        Args:
+            download_upload_queue: 下载和上传之间的队列
+            upload_queue: 上传任务队列
+        """
+        registry = get_metrics()
+        registry.register_callback("queue_depth", "download_upload", download_upload_queue.qsize, queue="download_upload")
+        registry.register_callback("queue_depth", "upload", upload_queue.qsize, queue="upload")
+        registry.register_callback("active_workers", "upload", lambda: upload_queue.active_workers, pool="upload")
+        registry.register_callback(
+            "task_queue_tasks", "upload",
+            lambda: {
+                (("queue", "upload"), ("state", state)): upload_queue.stats[state]
+                for state in ("enqueued", "dequeued", "completed", "failed")
+            }
+        )
+    
+    def _unregister_pipeline_metrics(self) -> None:
+        """注销下载上传流水线的抓取时指标"""
+        registry = get_metrics()
+        registry.unregister_callback("queue_depth", "download_upload")
+        registry.unregister_callback("queue_depth", "upload")
+        registry.unregister_callback("active_workers", "upload")
+        registry.unregister_callback("task_queue_tasks", "upload")
+
     def _create_error_result(self, error_message):
         """
         创建标准错误结果字典
@@ -867,6 +1180,101 @@ class ForwardManager:
             "error": error_message
         }
 
+    async def _resume_range(self, checkpoint_store: CheckpointStore, source_id: Union[str, int],
+                            target_ids: List[Union[str, int]], start_message_id: int,
+                            end_message_id: int) -> Tuple[int, int]:
+        """
+        根据检查点确定本次处理的消息范围
+        
+        Args:
+            checkpoint_store: 检查点存储
+            source_id: 源频道真实ID
+            target_ids: 目标频道真实ID列表
+            start_message_id: 配置的起始消息ID
+            end_message_id: 配置的结束消息ID，0表示最新消息
+            
+        Returns:
+            Tuple[int, int]: (起始消息ID, 结束消息ID)
+        """
+        # 结束ID为0时先确定最新消息ID，检查点才能记录确切的范围
+        if not end_message_id or end_message_id <= 0:
+            latest_id = await self.client.get_latest_message_id(source_id)
+            if latest_id:
+                end_message_id = latest_id
+        
+        resume_id = checkpoint_store.resume_from(source_id, target_ids)
+        if resume_id is not None and resume_id > start_message_id:
+            logger.info(f"根据检查点从消息 {resume_id} 继续（配置的起始ID: {start_message_id}）")
+            start_message_id = resume_id
+        
+        return start_message_id, end_message_id
+    
+    def _record_checkpoints(self, checkpoint_store: CheckpointStore, source_id: Union[str, int],
+                            target_ids: List[Union[str, int]], start_message_id: int,
+                            end_message_id: int, result: Dict[str, Any]) -> None:
+        """
+        根据处理结果更新各路由的检查点
+        
+        Args:
+            checkpoint_store: 检查点存储
+            source_id: 源频道真实ID
+            target_ids: 目标频道真实ID列表
+            start_message_id: 本次处理的起始消息ID
+            end_message_id: 本次处理的结束消息ID
+            result: 处理结果
+        """
+        if not end_message_id or end_message_id <= 0 or result.get("success_flag") is False:
+            return
+        
+        # 转发中途停止（如源频道禁止转发）时，只记录第一条失败消息之前的部分
+        failed_messages = result.get("failed_messages", []) + result.get("fetch_failed_ids", [])
+        if result.get("forwards_restricted") and result.get("range_complete") is None:
+            end_message_id = min(failed_messages) - 1 if failed_messages else start_message_id - 1
+        elif result.get("range_complete") is False:
+            return
+        
+        failed_by_target = result.get("failed_by_target", {})
+        for target_id in target_ids:
+            checkpoint_store.record(
+                source_id, target_id, max(1, start_message_id), end_message_id,
+                failed_by_target.get(str(target_id), [])
+            )
+        checkpoint_store.save()
+
+    async def _resolve_route(self) -> Dict[str, Any]:
+        """
+        解析频道信息，预检查频道状态并获取源频道和目标频道的真实ID
+        
+        Returns:
+            Dict[str, Any]: 包含 source_allow_forward、source_id、target_ids，失败时包含错误信息
+        """
+        # 1. 解析频道信息
+        source_identifier, target_identifiers, extra_configs = await self.parse_channels()
+        
+        # 检查是否有错误结果返回
+        if isinstance(extra_configs, dict) and "error" in extra_configs:
+            logger.error(f"频道解析失败: {extra_configs.get('error')}")
+            return {"success": False, "error": extra_configs.get('error', "频道解析失败")}
+        
+        if not source_identifier:
+            return {"success": False, "error": "无法找到有效的源频道"}
+        
+        if not target_identifiers:
+            return {"success": False, "error": "无法找到有效的目标频道"}
+        
+        # 2. 预检查频道状态并排序目标频道
+        source_allow_forward, sorted_targets = await self.prepare_channels(source_identifier, target_identifiers)
+        
+        # 3. 获取源频道和目标频道的真实ID
+        logger.info("获取源频道和目标频道的真实ID...")
+        channel_id_result = await self._get_real_channel_ids(source_identifier, sorted_targets)
+        
+        if not channel_id_result["success"]:
+            return channel_id_result
+        
+        channel_id_result["source_allow_forward"] = source_allow_forward
+        return channel_id_result
+
     async def run(self) -> Dict[str, Any]:
         """
         运行转发流程
@@ -875,40 +1283,56 @@ class ForwardManager:
             Dict[str, Any]: 处理结果统计
         """
         try:
-            # 1. 解析频道信息
-            source_identifier, target_identifiers, extra_configs = await self.parse_channels()
-            
-            # 检查是否有错误结果返回
-            if isinstance(extra_configs, dict) and "error" in extra_configs:
-                logger.error(f"频道解析失败: {extra_configs.get('error')}")
-                return {
-                    "success_flag": False, 
-                    "error": extra_configs.get('error', "频道解析失败")
-                }
-            
-            if not source_identifier:
-                return self._create_error_result("无法找到有效的源频道")
-            
-            if not target_identifiers:
-                return self._create_error_result("无法找到有效的目标频道")
-            
-            # 2. 预检查频道状态并排序目标频道
-            source_allow_forward, sorted_targets = await self.prepare_channels(source_identifier, target_identifiers)
-            
-            # 3. 获取源频道和目标频道的真实ID
-            logger.info("获取源频道和目标频道的真实ID...")
-            channel_id_result = await self._get_real_channel_ids(source_identifier, sorted_targets)
-            
-            if not channel_id_result["success"]:
-                return self._create_error_result(channel_id_result["error"])
-            
-            real_source_id = channel_id_result["source_id"]
-            real_target_ids = channel_id_result["target_ids"]
+            # 1-3. 解析频道信息，预检查频道状态，获取真实ID
+            route = await self._resolve_route()
+            if not route["success"]:
+                return self._create_error_result(route["error"])
             
             # 4. 获取转发配置
             forward_config = self.config.get_forward_config()
-            start_message_id = forward_config['start_message_id']
-            end_message_id = forward_config['end_message_id']
+            return await self.run_range(route, forward_config['start_message_id'], forward_config['end_message_id'])
+        
+        except Exception as e:
+            logger.error(f"转发过程中发生错误: {str(e)}")
+            import traceback
+            logger.error(traceback.format_exc())
+            return self._create_error_result(str(e))
+    
+    async def run_range(self, route: Dict[str, Any], start_message_id: int, end_message_id: int) -> Dict[str, Any]:
+        """
+        转发已解析路由中指定范围的消息
+        
+        Args:
+            route: _resolve_route() 的返回结果
+            start_message_id: 起始消息ID
+            end_message_id: 结束消息ID，0表示最新消息
+        
+        Returns:
+            Dict[str, Any]: 处理结果统计
+        """
+        try:
+            source_allow_forward = route["source_allow_forward"]
+            real_source_id = route["source_id"]
+            real_target_ids = route["target_ids"]
+            
+            # 从各路由的检查点继续，只处理上次运行之后的新消息
+            checkpoint_store = self.get_checkpoint_store()
+            if checkpoint_store is not None:
+                start_message_id, end_message_id = await self._resume_range(
+                    checkpoint_store, real_source_id, real_target_ids, start_message_id, end_message_id
+                )
+                if start_message_id > end_message_id:
+                    logger.info(f"所有路由的检查点已到达消息 {end_message_id}，没有需要处理的新消息")
+                    return {
+                        "total": 0, "processed": 0, "success": 0, "failed": 0,
+                        "start_time": time.time(), "success_flag": True
+                    }
+            
+            # 已送达的目标频道不再重复发送
+            is_delivered = (
+                (lambda target, message_id: checkpoint_store.is_delivered(real_source_id, target, message_id))
+                if checkpoint_store is not None else None
+            )
             
             # 5. 根据源频道转发状态选择处理方式
             if source_allow_forward:
@@ -917,7 +1341,8 @@ class ForwardManager:
                     real_source_id,
                     real_target_ids,
                     start_message_id,
-                    end_message_id
+                    end_message_id,
+                    is_delivered=is_delivered
                 )
             else:
                 # 源频道禁止转发，使用下载上传流程
@@ -926,15 +1351,24 @@ class ForwardManager:
                     real_source_id,
                     real_target_ids,
                     start_message_id,
-                    end_message_id
+                    end_message_id,
+                    is_delivered=is_delivered
+                )
+            
+            # 6. 更新各路由的检查点
+            if checkpoint_store is not None:
+                self._record_checkpoints(
+                    checkpoint_store, real_source_id, real_target_ids,
+                    result.get("start_id", start_message_id), result.get("end_id", end_message_id), result
                 )
             
-            # 6. 计算总耗时
+            # 7. 计算总耗时，记录结束时生效的可调参数
+            result["settings"] = dict(self.live_settings)
             result["end_time"] = time.time()
             result["duration"] = result.get("end_time", 0) - result.get("start_time", 0)
             logger.info(f"总耗时: {result.get('duration', 0):.2f}秒")
             
-            # 7. 添加成功标志（如果尚未设置）
+            # 8. 添加成功标志（如果尚未设置）
             if "success_flag" not in result:
                 result["success_flag"] = True
             
@@ -946,6 +1380,169 @@ class ForwardManager:
             logger.error(traceback.format_exc())
             return self._create_error_result(str(e))
     
+    async def run_tail(self, stop_event: Optional[asyncio.Event] = None) -> Dict[str, Any]:
+        """
+        实时跟随模式：订阅源频道的新消息并立即转发，直到 stop_event 被设置或任务被取消
+        
+        源频道允许转发时直接转发，否则（或转发时发现禁止转发）下载后重新上传。
+        
+        Args:
+            stop_event: 停止信号，为None时一直运行到任务被取消
+            
+        Returns:
+            Dict[str, Any]: 处理结果统计
+        """
+        result = {
+            "mode": "tail",
+            "processed": 0,
+            "success": 0,
+            "failed": 0,
+            "start_time": time.time(),
+        }
+        
+        try:
+            route = await self._resolve_route()
+            if not route["success"]:
+                return self._create_error_result(route["error"])
+        except Exception as e:
+            logger.error(f"实时跟随初始化时发生错误: {str(e)}")
+            return self._create_error_result(str(e))
+        
+        real_source_id = route["source_id"]
+        real_target_ids = route["target_ids"]
+        # 下载上传组件在第一次需要时创建
+        state = {"forward": route["source_allow_forward"], "components": None, "pipeline_control": None}
+        
+        async def handle_unit(messages: List[Any]) -> None:
+            if state["forward"] and await self._tail_forward_unit(messages, real_target_ids, result):
+                return
+            
+            if state["forward"]:
+                logger.warning("源频道禁止转发消息，实时跟随改用下载上传流程")
+                state["forward"] = False
+            
+            if state["components"] is None:
+                state["components"] = await self._setup_media_components(target_channels=real_target_ids)
+                state["pipeline_control"] = {
+                    "processed_items": IdIntervalSet(), "download_count": 0, "upload_count": 0,
+                    "failed_ids": set(), "failed_by_target": defaultdict(set)
+                }
+                self._pipeline = dict(state["components"])
+            await self._tail_download_upload_unit(messages, state["components"], state["pipeline_control"], result)
+        
+        # 检查点中已送达所有目标频道的消息不再处理
+        checkpoint_store = self.get_checkpoint_store()
+        is_delivered = (
+            (lambda chat_id, message_id: all(
+                checkpoint_store.is_delivered(real_source_id, target_id, message_id) for target_id in real_target_ids
+            ))
+            if checkpoint_store is not None else None
+        )
+        
+        tail_config = self.config.get_live_tail_config()
+        self._tail = LiveTail(
+            self.client,
+            [real_source_id],
+            handle_unit,
+            album_window=tail_config['album_window'],
+            min_interval=0 if self.pacer is not None else self.live_settings.get('delay', 0),
+            max_pending=tail_config['max_pending'],
+            group=self.handler_group,
+            is_delivered=is_delivered
+        )
+        
+        try:
+            await self._tail.start()
+            if stop_event is None:
+                stop_event = asyncio.Event()
+            await stop_event.wait()
+        except asyncio.CancelledError:
+            logger.info("实时跟随被取消")
+        finally:
+            await self._tail.stop()
+            result.update(self._tail.stats)
+            self._tail = None
+            self._pipeline = {}
+            if state["components"]:
+                await state["components"]["media_uploader"].shutdown()
+        
+        result["end_time"] = time.time()
+        result["duration"] = result["end_time"] - result["start_time"]
+        result["success_flag"] = True
+        logger.info(f"实时跟随结束: 处理 {result['processed']} 条，成功 {result['success']} 条，失败 {result['failed']} 条，"
+                    f"最大延迟 {result['max_latency']:.3f} 秒")
+        return result
+    
+    async def _tail_forward_unit(self, messages: List[Any], target_ids: List[Union[str, int]],
+                                 result: Dict[str, Any]) -> bool:
+        """
+        直接转发实时收到的消息单元
+        
+        Args:
+            messages: 单条消息或完整媒体组
+            target_ids: 目标频道真实ID列表
+            result: 结果统计字典
+            
+        Returns:
+            bool: 源频道禁止转发时返回False，由调用者改用下载上传流程
+        """
+        if len(messages) > 1 or messages[0].media_group_id:
+            forward_result = await self.forwarder.forward_media_group(messages, target_ids)
+        elif self.forwarder.skip_emoji_messages and messages[0].text and self.forwarder.has_emoji(messages[0].text):
+            logger.info(f"跳过包含Emoji的消息: {messages[0].id}")
+            return True
+        else:
+            forward_result = await self.forwarder.forward_message(messages[0], target_ids)
+        
+        if "forwards_restricted" in forward_result:
+            return False
+        
+        for error_message in forward_result.get("error_messages", []):
+            logger.warning(error_message)
+        
+        success = any(msgs for target, msgs in forward_result.items() if target != "error_messages")
+        result["processed"] += len(messages)
+        if success:
+            result["success"] += len(messages)
+            get_metrics().inc("messages_forwarded_total", len(messages))
+        else:
+            result["failed"] += len(messages)
+        return True
+    
+    async def _tail_download_upload_unit(self, messages: List[Any], components: Dict[str, Any],
+                                         pipeline_control: Dict[str, Any], result: Dict[str, Any]) -> None:
+        """
+        下载并重新上传实时收到的消息单元
+        
+        Args:
+            messages: 单条消息或完整媒体组
+            components: 媒体处理组件
+            pipeline_control: 流水线控制字典
+            result: 结果统计字典
+        """
+        is_group = len(messages) > 1 or bool(messages[0].media_group_id)
+        batch_id = f"group_{messages[0].media_group_id}" if is_group else f"message_{messages[0].id}"
+        batch = {
+            "id": batch_id,
+            "media_groups": [messages] if is_group else {},
+            "messages": [] if is_group else messages,
+            "progress": 0
+        }
+        
+        download_result = await components["media_downloader"].download_media_batch(batch)
+        if download_result.get("success", 0) <= 0:
+            logger.warning(f"实时消息 {batch_id} 下载失败或无内容，跳过上传")
+            return
+        
+        pipeline_control["download_count"] += 1
+        await self._upload_consumer(
+            {"batch_id": batch_id, "batch": batch, "download_result": download_result, "progress": 0},
+            components["message_assembler"],
+            components["media_uploader"],
+            pipeline_control,
+            result
+        )
+    
     @classmethod
     async def run_from_config(cls, config_path: str = "config.ini") -> Dict[str, Any]:
         """
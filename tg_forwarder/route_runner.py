@@ -0,0 +1,173 @@
+"""
+多路由运行模块，在一个进程中并发运行 [ROUTES] 中配置的多条转发路由
+"""
+
+import re
+import time
+import asyncio
+from typing import Dict, Any, Optional
+
+from tg_forwarder.logModule.logger import get_logger
+from tg_forwarder.manager import ForwardManager
+from tg_forwarder.uploader.media_uploader import MediaUploader
+from tg_forwarder.utils.fair_pacer import FairPacer
+
+# 获取日志记录器
+logger = get_logger("route_runner")
+
+
+class RouteRunner:
+    """
+    多路由运行器
+
+    所有路由共享同一个Telegram连接、频道缓存、上传客户端和检查点文件，
+    发送频率由 FairPacer 在路由之间轮流分配。
+    """
+
+    PACER_SECTIONS = ('FORWARD', 'ROUTE_RUNNER')
+
+    def __init__(self, config_path: str = "config.ini"):
+        """
+        初始化多路由运行器
+
+        Args:
+            config_path: 配置文件路径
+        """
+        self.config_path = config_path
+        self.primary = ForwardManager(config_path)
+        self.config = self.primary.config
+        self.pacer: Optional[FairPacer] = None
+        self.upload_client_manager = None
+        self.routes: Dict[str, ForwardManager] = {}
+
+    async def setup(self) -> None:
+        """连接Telegram并为每条路由创建转发管理器"""
+        await self.primary.setup()
+
+        runner_config = self.config.get_route_runner_config()
+        self.pacer = FairPacer(runner_config['send_interval'])
+        for section in self.PACER_SECTIONS:
+            self.config.add_observer(section, self._apply_pacer_settings)
+
+        # 上传客户端在第一条需要下载上传的路由中初始化
+        self.upload_client_manager = MediaUploader.create_client_manager(self.primary.client)
+
+        for index, route in enumerate(self.config.get_routes_config()):
+            name = self._route_dir_name(route['name'])
+            if name in self.routes:
+                name = f"{name}_{index}"
+
+            manager = ForwardManager(
+                self.config_path,
+                channels={
+                    'source_channel': route['source_channel'],
+                    'target_channels': route['target_channels']
+                },
+                route_name=name
+            )
+            manager.attach(self.primary, pacer=self.pacer, upload_client_manager=self.upload_client_manager)
+            manager.handler_group = index
+            self.routes[name] = manager
+
+        logger.info(f"已加载 {len(self.routes)} 条转发路由: {', '.join(self.routes)}，发送间隔 {self.pacer.min_interval} 秒")
+
+    @staticmethod
+    def _route_dir_name(name: str) -> str:
+        """路由名转换为可用作目录名的形式"""
+        return re.sub(r'[^\w.-]', '_', name) or "route"
+
+    def _apply_pacer_settings(self, section: Optional[str] = None, changed: Optional[Dict[str, Any]] = None) -> None:
+        """
+        配置文件变化后更新共享的发送间隔
+
+        Args:
+            section: 发生变化的配置节
+            changed: 发生变化的键值
+        """
+        if self.pacer is None:
+            return
+        send_interval = self.config.get_route_runner_config()['send_interval']
+        if send_interval != self.pacer.min_interval:
+            logger.info(f"发送间隔已更新: {self.pacer.min_interval} -> {send_interval} 秒")
+            self.pacer.min_interval = send_interval
+
+    async def run(self, tail: bool = False, stop_event: Optional[asyncio.Event] = None) -> Dict[str, Any]:
+        """
+        并发运行所有路由
+
+        Args:
+            tail: 是否使用实时跟随模式
+            stop_event: 实时跟随模式的停止信号
+
+        Returns:
+            Dict[str, Any]: 汇总统计，routes 中为每条路由的处理结果
+        """
+        start_time = time.time()
+        max_concurrent = self.config.get_route_runner_config()['max_concurrent_routes']
+        # 实时跟随的路由一直运行，不能限制并发数
+        semaphore = asyncio.Semaphore(max_concurrent) if max_concurrent > 0 and not tail else None
+
+        async def run_route(name: str, manager: ForwardManager) -> Dict[str, Any]:
+            if semaphore is None:
+                return await self._run_route(name, manager, tail, stop_event)
+            async with semaphore:
+                return await self._run_route(name, manager, tail, stop_event)
+
+        names = list(self.routes)
+        results = await asyncio.gather(*(run_route(name, self.routes[name]) for name in names))
+        route_results = dict(zip(names, results))
+
+        summary = {
+            "routes": route_results,
+            "total": sum(result.get("total", 0) for result in results),
+            "processed": sum(result.get("processed", 0) for result in results),
+            "success": sum(result.get("success", 0) for result in results),
+            "failed": sum(result.get("failed", 0) for result in results),
+            "pacer": self.pacer.get_stats() if self.pacer else {},
+            "success_flag": bool(results) and all(result.get("success_flag", False) for result in results),
+            "duration": time.time() - start_time
+        }
+
+        for name, result in route_results.items():
+            status = "成功" if result.get("success_flag", False) else f"失败 ({result.get('error', '')})"
+            logger.info(f"路由 {name}: 处理 {result.get('processed', 0)}, 成功 {result.get('success', 0)}, 失败 {result.get('failed', 0)}, {status}")
+
+        return summary
+
+    async def _run_route(self, name: str, manager: ForwardManager, tail: bool,
+                         stop_event: Optional[asyncio.Event]) -> Dict[str, Any]:
+        """
+        运行单条路由，异常不影响其他路由
+
+        Args:
+            name: 路由名
+            manager: 路由的转发管理器
+            tail: 是否使用实时跟随模式
+            stop_event: 实时跟随模式的停止信号
+
+        Returns:
+            Dict[str, Any]: 路由的处理结果
+        """
+        logger.info(f"开始运行路由 {name}")
+        try:
+            if tail:
+                return await manager.run_tail(stop_event)
+            return await manager.run()
+        except Exception as e:
+            logger.exception(f"路由 {name} 运行时发生错误: {str(e)}")
+            return manager._create_error_result(str(e))
+
+    async def shutdown(self) -> None:
+        """关闭共享的上传客户端、发送调度器和Telegram连接"""
+        if self.upload_client_manager is not None and self.upload_client_manager.initialized:
+            await self.upload_client_manager.shutdown()
+
+        if self.pacer is not None:
+            await self.pacer.close()
+
+        for section in self.PACER_SECTIONS:
+            self.config.remove_observer(section, self._apply_pacer_settings)
+        for manager in self.routes.values():
+            manager.detach()
+
+        await self.primary.shutdown()
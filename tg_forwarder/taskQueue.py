@@ -3,7 +3,7 @@
 """
 
 import asyncio
-from typing import Dict, Any, List, Callable, Awaitable, Optional, Union
+from typing import Dict, Any, List, Callable, Awaitable, Optional, Union, Set
 import time
 from concurrent.futures import ThreadPoolExecutor
 
@@ -31,11 +31,72 @@ class TaskQueue:
             "completed": 0, # 成功完成数
             "failed": 0,    # 失败数
             "start_time": 0,
-            "end_time": 0
+            "end_time": 0,
+            "max_workers": max_workers
         }
         self.consumer_tasks = []
         self.producer_task = None
         self.is_running = False
+        # 正在处理任务的消费者数量
+        self.active_workers = 0
+        # 仍在运行的消费者数量
+        self.live_workers = 0
+        # 等待任务的空闲消费者，缩减消费者数量时直接取消
+        self._idle_consumers: Set[asyncio.Task] = set()
+        # 因缩减消费者数量而取消的消费者
+        self._retired_consumers: Set[asyncio.Task] = set()
+        # 生产者已完成，正在向消费者发送结束信号
+        self._draining = False
+        self._consumer_func: Optional[Callable[[Any], Awaitable[bool]]] = None
+    
+    def qsize(self) -> int:
+        """
+        获取队列中等待处理的任务数
+        
+        Returns:
+            int: 队列深度
+        """
+        return self.queue.qsize()
+    
+    def resize(self, max_workers: int) -> None:
+        """
+        调整消费者数量，运行中立即生效：增加时启动新的消费者，减少时先取消
+        空闲的消费者，其余多出的消费者在完成当前任务后退出
+        
+        Args:
+            max_workers: 新的最大消费者数量
+        """
+        max_workers = max(1, int(max_workers))
+        if max_workers == self.max_workers:
+            return
+        
+        logger.info(f"消费者数量调整: {self.max_workers} -> {max_workers}")
+        self.max_workers = max_workers
+        self.stats["max_workers"] = max_workers
+        
+        if not self.is_running or self._draining:
+            return
+        
+        while self.live_workers < self.max_workers:
+            self._spawn_consumer()
+        
+        for task in list(self._idle_consumers):
+            if self.live_workers - len(self._retired_consumers) <= self.max_workers:
+                break
+            self._retired_consumers.add(task)
+            task.cancel()
+    
+    def _spawn_consumer(self) -> None:
+        """启动一个消费者"""
+        consumer_id = len(self.consumer_tasks) + 1
+        consumer_task = asyncio.create_task(self._consumer_wrapper(self._consumer_func, consumer_id))
+        self.consumer_tasks.append(consumer_task)
+        self.live_workers += 1
+        logger.info(f"消费者 #{consumer_id} 开始运行...")
+    
+    def _should_retire(self) -> bool:
+        """消费者数量缩减后，多出的消费者是否应退出"""
+        return not self._draining and self.live_workers - len(self._retired_consumers) > self.max_workers
     
     async def put(self, item: Any) -> None:
         """
@@ -60,6 +121,7 @@ class TaskQueue:
             Dict[str, Any]: 任务统计信息
         """
         self.is_running = True
+        self._draining = False
         self.stats["start_time"] = time.time()
         
         # 创建并启动生产者任务
@@ -67,19 +129,18 @@ class TaskQueue:
         
         # 创建并启动消费者任务
         self.consumer_tasks = []
-        for i in range(self.max_workers):
-            consumer_id = i + 1
-            consumer_task = asyncio.create_task(self._consumer_wrapper(consumer_func, consumer_id))
-            self.consumer_tasks.append(consumer_task)
-            logger.info(f"消费者 #{consumer_id} 开始运行...")
+        self._consumer_func = consumer_func
+        for _ in range(self.max_workers):
+            self._spawn_consumer()
         
         try:
             # 等待生产者和消费者完成
             await self.producer_task
             logger.info("生产者任务已完成")
             
-            # 向每个消费者发送结束信号
-            for _ in range(len(self.consumer_tasks)):
+            # 向每个仍在运行的消费者发送结束信号
+            self._draining = True
+            for _ in range(self.live_workers - len(self._retired_consumers)):
                 await self.queue.put(None)
             
             # 等待所有消费者处理完毕
@@ -136,10 +197,19 @@ class TaskQueue:
             consumer_func: 消费者函数
             consumer_id: 消费者ID
         """
+        task = asyncio.current_task()
         while self.is_running:
+            if self._should_retire():
+                logger.info(f"消费者 #{consumer_id} 因消费者数量调整而退出")
+                break
+            
             try:
                 # 从队列获取任务
-                item = await self.queue.get()
+                self._idle_consumers.add(task)
+                try:
+                    item = await self.queue.get()
+                finally:
+                    self._idle_consumers.discard(task)
                 
                 # 判断是否为结束信号
                 if item is None:
@@ -149,7 +219,11 @@ class TaskQueue:
                 
                 # 处理任务
                 self.stats["dequeued"] += 1
-                result = await consumer_func(item)
+                self.active_workers += 1
+                try:
+                    result = await consumer_func(item)
+                finally:
+                    self.active_workers -= 1
                 
                 # 更新统计信息
                 if result is False:
@@ -161,7 +235,10 @@ class TaskQueue:
                 self.queue.task_done()
                 
             except asyncio.CancelledError:
-                logger.warning(f"消费者 #{consumer_id} 被取消")
+                if task in self._retired_consumers:
+                    logger.info(f"消费者 #{consumer_id} 因消费者数量调整而退出")
+                else:
+                    logger.warning(f"消费者 #{consumer_id} 被取消")
                 break
             except Exception as e:
                 logger.error(f"消费者 #{consumer_id} 处理任务时出错: {str(e)}")
@@ -173,6 +250,8 @@ class TaskQueue:
                 except:
                     pass
         
+        self.live_workers -= 1
+        self._retired_consumers.discard(task)
         logger.info(f"消费者 #{consumer_id} 完成所有任务")
     
     async def shutdown(self) -> None:
@@ -5,6 +5,7 @@
 import os
 import asyncio
 import time
+from collections import defaultdict
 from typing import Dict, Any, List, Union, Optional
 
 from tg_forwarder.logModule.logger import get_logger
@@ -15,6 +16,7 @@ from tg_forwarder.uploader.utils import (
     MediaUtils
 )
 from tg_forwarder.uploader.message_sender import MessageSender
+from tg_forwarder.utils.metrics import metrics
 
 # 获取日志记录器
 logger = get_logger("media_uploader")
@@ -24,7 +26,9 @@ class MediaUploader:
     """媒体上传器，负责上传媒体文件到目标频道"""
     
     def __init__(self, client, target_channels: List[Union[str, int]], temp_folder: str = "temp",
-                 wait_time: float = 1.0, retry_count: int = 3, retry_delay: int = 5):
+                 wait_time: float = 1.0, retry_count: int = 3, retry_delay: int = 5,
+                 client_manager: Optional[TelegramClientManager] = None, pacer=None,
+                 route_name: str = "default"):
         """
         初始化媒体上传器
         
@@ -35,6 +39,9 @@ class MediaUploader:
             wait_time: 消息间隔时间（秒）
             retry_count: 重试次数
             retry_delay: 重试延迟时间（秒）
+            client_manager: 共享的上传客户端管理器，为None时创建自己的临时客户端
+            pacer: 多条路由共享发送频率时的调度器（FairPacer）
+            route_name: 在调度器中使用的路由名
         """
         # 验证配置
         config = {
@@ -50,14 +57,16 @@ class MediaUploader:
         history_path = os.path.join(self.config['temp_folder'], "upload_history.json")
         self.history_manager = UploadHistoryManager(history_path)
         
-        # 创建客户端管理器
-        client_config = UploaderConfigValidator.validate_client_config(client)
-        self.client_manager = TelegramClientManager(
-            api_id=client_config['api_config']['api_id'],
-            api_hash=client_config['api_config']['api_hash'],
-            proxy_config=client_config['proxy_config'],
-            session_name="media_uploader_fixed"  # 使用固定的会话名称
-        )
+        # 创建客户端管理器，共享的客户端由创建者负责关闭
+        self.owns_client = client_manager is None
+        if client_manager is None:
+            client_manager = self.create_client_manager(client)
+        self.client_manager = client_manager
+        self.pacer = pacer
+        self.route_name = route_name
+        
+        # 判断消息是否已送达目标频道的函数，参数为(目标频道, 源消息ID)，为None时发送到所有目标频道
+        self.is_delivered = None
         
         # 创建消息发送器
         self.message_sender = MessageSender(
@@ -70,6 +79,66 @@ class MediaUploader:
         # 当前是否已初始化
         self._initialized = False
     
+    @staticmethod
+    def create_client_manager(client) -> TelegramClientManager:
+        """
+        创建上传使用的客户端管理器
+        
+        Args:
+            client: Telegram客户端，提供API和代理配置
+            
+        Returns:
+            TelegramClientManager: 客户端管理器
+        """
+        client_config = UploaderConfigValidator.validate_client_config(client)
+        return TelegramClientManager(
+            api_id=client_config['api_config']['api_id'],
+            api_hash=client_config['api_config']['api_hash'],
+            proxy_config=client_config['proxy_config'],
+            session_name=MediaUploader.upload_session_name(client)
+        )
+    
+    @staticmethod
+    def upload_session_name(client) -> str:
+        """
+        上传客户端使用的会话名，默认会话使用固定名称，其他会话各自对应一个上传会话
+        
+        Args:
+            client: Telegram客户端
+            
+        Returns:
+            str: 会话名
+        """
+        session_name = getattr(client, 'session_name', 'tg_forwarder')
+        if session_name == 'tg_forwarder':
+            return "media_uploader_fixed"
+        return f"{session_name}_uploader"
+    
+    def _pending_targets(self, messages: List[Dict[str, Any]]) -> List[Union[str, int]]:
+        """
+        获取还需要发送这些消息的目标频道
+        
+        Args:
+            messages: 消息数据列表
+            
+        Returns:
+            List[Union[str, int]]: 至少有一条消息未送达的目标频道，保持原顺序
+        """
+        if self.is_delivered is None:
+            return self.target_channels
+        message_ids = [int(message.get("message_id")) for message in messages if message.get("message_id")]
+        if not message_ids:
+            return self.target_channels
+        return [
+            channel for channel in self.target_channels
+            if not all(self.is_delivered(channel, message_id) for message_id in message_ids)
+        ]
+    
+    async def _wait_turn(self) -> None:
+        """等待共享的发送调度器放行"""
+        if self.pacer is not None:
+            await self.pacer.acquire(self.route_name)
+    
     async def initialize(self):
         """
         初始化上传器，创建临时客户端
@@ -107,11 +176,27 @@ class MediaUploader:
         await self.history_manager.save_if_dirty()
         
         # 关闭客户端
-        await self.client_manager.shutdown()
+        if self.owns_client:
+            await self.client_manager.shutdown()
         
         self._initialized = False
         logger.info("上传器已关闭")
     
+    def set_wait_time(self, wait_time: float) -> None:
+        """
+        调整消息间隔时间，运行中调用时从下一条消息开始生效
+        
+        Args:
+            wait_time: 消息间隔时间（秒）
+        """
+        wait_time = max(0.0, float(wait_time))
+        if wait_time == self.config['wait_time']:
+            return
+        
+        logger.info(f"消息间隔时间调整: {self.config['wait_time']} -> {wait_time} 秒")
+        self.config['wait_time'] = wait_time
+        self.message_sender.wait_time = wait_time
+    
     async def upload_batch(self, batch_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         上传一批媒体文件
@@ -158,7 +243,9 @@ class MediaUploader:
                 "success_singles": 0,
                 "failed_groups": 0,
                 "failed_singles": 0,
-                "start_time": start_time
+                "start_time": start_time,
+                # 按目标频道记录未送达的源消息ID
+                "failed_by_target": defaultdict(list)
             }
             
             # 先处理媒体组，因为需要保持消息组的完整性
@@ -169,20 +256,34 @@ class MediaUploader:
                 if not group_id or not messages:
                     continue
                 
+                # 跳过之前的运行中已送达的目标频道
+                channels = self._pending_targets(messages)
+                if not channels:
+                    logger.info(f"媒体组 {group_id} 已送达所有目标频道，跳过")
+                    stats["success_groups"] += 1
+                    continue
+                
                 # 检查是否已上传
-                if self.history_manager.is_group_uploaded(group_id, self.target_channels[0], source_channel_id):
+                if self.history_manager.is_group_uploaded(group_id, channels[0], source_channel_id):
                     logger.info(f"媒体组 {group_id} 已上传到目标频道，跳过")
+                    # 其他目标频道可能在之前的运行中失败，从已上传的消息复制过去
+                    uploaded_ids = self.history_manager.get_uploaded_message_ids(group_id, channels[0], source_channel_id)
+                    if len(channels) > 1 and uploaded_ids:
+                        failed_channels = await self._forward_to_other_channels(channels[0], uploaded_ids[0], group_id, True, source_channel_id, channels[1:])
+                        self._record_failed_targets(stats, failed_channels, messages)
                     stats["success_groups"] += 1
                     continue
                 
                 # 上传到第一个目标频道
-                first_channel = self.target_channels[0]
+                first_channel = channels[0]
                 
                 try:
+                    await self._wait_turn()
                     result = await self.message_sender.send_media_group(messages, first_channel)
                     
                     if result.get("success"):
                         stats["success_groups"] += 1
+                        self._record_upload_metrics(messages)
                         
                         # 记录上传结果
                         await self.history_manager.record_upload(
@@ -193,15 +294,18 @@ class MediaUploader:
                         )
                         
                         # 将消息从第一个频道复制到其他频道
-                        if len(self.target_channels) > 1 and result.get("message_ids"):
+                        if len(channels) > 1 and result.get("message_ids"):
                             first_message_id = result["message_ids"][0]
-                            await self._forward_to_other_channels(first_channel, first_message_id, group_id, True, source_channel_id)
+                            failed_channels = await self._forward_to_other_channels(first_channel, first_message_id, group_id, True, source_channel_id, channels[1:])
+                            self._record_failed_targets(stats, failed_channels, messages)
                     else:
                         stats["failed_groups"] += 1
+                        self._record_failed_targets(stats, channels, messages)
                         logger.error(f"上传媒体组 {group_id} 失败: {result.get('error', '未知错误')}")
                 
                 except Exception as e:
                     stats["failed_groups"] += 1
+                    self._record_failed_targets(stats, channels, messages)
                     logger.error(f"上传媒体组 {group_id} 时发生错误: {str(e)}")
                 
                 # 等待一段时间，避免触发限制
@@ -214,20 +318,34 @@ class MediaUploader:
                 if not message_id:
                     continue
                 
+                # 跳过之前的运行中已送达的目标频道
+                channels = self._pending_targets([message])
+                if not channels:
+                    logger.info(f"消息 {message_id} 已送达所有目标频道，跳过")
+                    stats["success_singles"] += 1
+                    continue
+                
                 # 检查是否已上传
-                if self.history_manager.is_message_uploaded(message_id, self.target_channels[0], source_channel_id):
+                if self.history_manager.is_message_uploaded(message_id, channels[0], source_channel_id):
                     logger.info(f"消息 {message_id} 已上传到目标频道，跳过")
+                    # 其他目标频道可能在之前的运行中失败，从已上传的消息复制过去
+                    uploaded_ids = self.history_manager.get_uploaded_message_ids(message_id, channels[0], source_channel_id)
+                    if len(channels) > 1 and uploaded_ids:
+                        failed_channels = await self._forward_to_other_channels(channels[0], uploaded_ids[0], message_id, False, source_channel_id, channels[1:])
+                        self._record_failed_targets(stats, failed_channels, [message])
                     stats["success_singles"] += 1
                     continue
                 
                 # 上传到第一个目标频道
-                first_channel = self.target_channels[0]
+                first_channel = channels[0]
                 
                 try:
+                    await self._wait_turn()
                     result = await self.message_sender.send_single_message(message, first_channel)
                     
                     if result.get("success"):
                         stats["success_singles"] += 1
+                        self._record_upload_metrics([message])
                         
                         # 记录上传结果
                         await self.history_manager.record_upload(
@@ -238,14 +356,17 @@ class MediaUploader:
                         )
                         
                         # 将消息从第一个频道复制到其他频道
-                        if len(self.target_channels) > 1 and result.get("message_id"):
-                            await self._forward_to_other_channels(first_channel, result["message_id"], message_id, False, source_channel_id)
+                        if len(channels) > 1 and result.get("message_id"):
+                            failed_channels = await self._forward_to_other_channels(first_channel, result["message_id"], message_id, False, source_channel_id, channels[1:])
+                            self._record_failed_targets(stats, failed_channels, [message])
                     else:
                         stats["failed_singles"] += 1
+                        self._record_failed_targets(stats, channels, [message])
                         logger.error(f"上传消息 {message_id} 失败: {result.get('error', '未知错误')}")
                 
                 except Exception as e:
                     stats["failed_singles"] += 1
+                    self._record_failed_targets(stats, channels, [message])
                     logger.error(f"上传消息 {message_id} 时发生错误: {str(e)}")
                 
                 # 等待一段时间，避免触发限制
@@ -257,6 +378,7 @@ class MediaUploader:
             stats["success_total"] = stats["success_groups"] + stats["success_singles"]
             stats["failed_total"] = stats["failed_groups"] + stats["failed_singles"]
             stats["total_messages"] = stats["total_groups"] + stats["total_singles"]
+            stats["failed_by_target"] = dict(stats["failed_by_target"])
             
             # 计算成功率
             if stats["total_messages"] > 0:
@@ -287,11 +409,43 @@ class MediaUploader:
                 "failed_singles": stats.get("failed_singles", 0) if 'stats' in locals() else 0
             }
     
+    def _record_failed_targets(self, stats: Dict[str, Any], channels: List[Union[str, int]],
+                               messages: List[Dict[str, Any]]) -> None:
+        """
+        记录未送达目标频道的源消息ID
+        
+        Args:
+            stats: 上传统计
+            channels: 未送达的目标频道
+            messages: 未送达的消息数据列表
+        """
+        # 重组后的消息ID是字符串，统一转换为整数，与检查点中的消息ID一致
+        message_ids = [int(message.get("message_id")) for message in messages if message.get("message_id")]
+        for channel in channels:
+            stats["failed_by_target"][str(channel)].extend(message_ids)
+    
+    def _record_upload_metrics(self, messages: List[Dict[str, Any]]) -> None:
+        """
+        记录已上传消息数和字节数
+        
+        Args:
+            messages: 已上传的消息数据列表
+        """
+        total_bytes = 0
+        for message in messages:
+            file_path = message.get("file_path")
+            if file_path and os.path.exists(file_path):
+                total_bytes += os.path.getsize(file_path)
+        
+        metrics.inc("messages_uploaded_total", len(messages))
+        metrics.inc("bytes_uploaded_total", total_bytes)
+    
     async def _forward_to_other_channels(self, source_channel: Union[str, int], 
                                        message_id: int, 
                                         original_id: Union[str, int],
                                         is_media_group: bool = False,
-                                        source_channel_id: Optional[Union[str, int]] = None) -> None:
+                                        source_channel_id: Optional[Union[str, int]] = None,
+                                        other_channels: Optional[List[Union[str, int]]] = None) -> List[Union[str, int]]:
         """
         将消息从第一个频道转发到其他频道
         
@@ -301,18 +455,25 @@ class MediaUploader:
             original_id: 原始消息ID或媒体组ID
             is_media_group: 是否为媒体组，默认为False
             source_channel_id: 原始来源频道ID（可选）
+            other_channels: 要转发到的频道，默认为第一个之外的所有目标频道
+            
+        Returns:
+            List[Union[str, int]]: 转发失败的频道列表
         """
+        if other_channels is None:
+            other_channels = self.target_channels[1:]
+        
         # 确保已初始化
         if not self._initialized:
             success = await self.initialize()
             if not success:
                 logger.error("上传器初始化失败，转发失败")
-                return
-        
-        other_channels = self.target_channels[1:]
+                return other_channels
         
         if not other_channels:
-            return
+            return []
+        
+        failed_channels = []
         
         if is_media_group:
             logger.info(f"将媒体组 (消息ID: {message_id}) 从频道 {source_channel} 转发到 {len(other_channels)} 个其他频道")
@@ -327,6 +488,7 @@ class MediaUploader:
             
             # 根据消息类型使用不同的转发方法
             try:
+                await self._wait_turn()
                 if is_media_group:
                     result = await self.message_sender.copy_media_group(source_channel, message_id, channel_id)
                     
@@ -340,6 +502,7 @@ class MediaUploader:
                         )
                         logger.info(f"媒体组转发成功，目标频道: {channel_id}, 共 {len(result.get('message_ids', []))} 条消息")
                     else:
+                        failed_channels.append(channel_id)
                         logger.error(f"媒体组转发失败，目标频道: {channel_id}, 错误: {result.get('error', '未知错误')}")
                 
                 else:
@@ -355,13 +518,17 @@ class MediaUploader:
                         )
                         logger.info(f"消息转发成功，目标频道: {channel_id}, 消息ID: {result.get('message_id')}")
                     else:
+                        failed_channels.append(channel_id)
                         logger.error(f"消息转发失败，目标频道: {channel_id}, 错误: {result.get('error', '未知错误')}")
             
             except Exception as e:
+                failed_channels.append(channel_id)
                 logger.error(f"转发消息到频道 {channel_id} 时出错: {str(e)}")
             
             # 转发后等待一小段时间，避免触发限制
             await asyncio.sleep(self.config['wait_time'])
+        
+        return failed_channels
     
     def cleanup_old_records(self, max_age_days: int = 30) -> int:
         """
@@ -391,8 +558,8 @@ class MediaUploader:
         
         for root, _, files in os.walk(self.config['temp_folder']):
             for file in files:
-                # 跳过历史记录文件
-                if file == "upload_history.json":
+                # 跳过历史记录和检查点文件
+                if file in ("upload_history.json", "checkpoints.json"):
                     continue
                 
                 # 跳过会话文件
@@ -10,6 +10,7 @@ from typing import Dict, Any, List, Union, Optional, Tuple
 from pyrogram.errors import FloodWait, SlowmodeWait, ChannelPrivate, ChatForwardsRestricted
 
 from tg_forwarder.logModule.logger import get_logger
+from tg_forwarder.utils.metrics import record_flood_wait
 from tg_forwarder.uploader.utils import TelegramClientManager, MediaUtils
 from tg_forwarder.utils.channel_utils import ChannelUtils, get_channel_utils
 
@@ -97,6 +98,7 @@ class MessageSender:
                 }
                 
             except FloodWait as e:
+                record_flood_wait("send_media_group", e.value)
                 wait_time = e.value
                 logger.warning(f"触发频率限制，等待 {wait_time} 秒...")
                 await asyncio.sleep(wait_time)
@@ -197,6 +199,7 @@ class MessageSender:
                     }
             
             except FloodWait as e:
+                record_flood_wait("send_single_message", e.value)
                 wait_time = e.value
                 logger.warning(f"触发频率限制，等待 {wait_time} 秒")
                 await asyncio.sleep(wait_time)
@@ -256,6 +259,7 @@ class MessageSender:
                     }
             
             except FloodWait as e:
+                record_flood_wait("send_message", e.value)
                 wait_time = e.value
                 logger.warning(f"触发频率限制，等待 {wait_time} 秒")
                 await asyncio.sleep(wait_time)
@@ -315,6 +319,7 @@ class MessageSender:
                     }
             
             except FloodWait as e:
+                record_flood_wait("copy_message", e.value)
                 wait_time = e.value
                 logger.warning(f"触发频率限制，等待 {wait_time} 秒")
                 await asyncio.sleep(wait_time)
@@ -376,6 +381,7 @@ class MessageSender:
                     }
             
             except FloodWait as e:
+                record_flood_wait("copy_media_group", e.value)
                 wait_time = e.value
                 logger.warning(f"触发频率限制，等待 {wait_time} 秒")
                 await asyncio.sleep(wait_time)
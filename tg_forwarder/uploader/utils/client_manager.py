@@ -11,6 +11,7 @@ from pyrogram import Client
 from pyrogram.errors import FloodWait, InternalServerError, Unauthorized
 
 from tg_forwarder.logModule.logger import get_logger
+from tg_forwarder.utils.metrics import record_flood_wait
 
 # 获取日志记录器
 logger = get_logger("client_manager")
@@ -48,11 +49,27 @@ class TelegramClientManager:
         
         # 健康检查任务
         self._health_check_task = None
+        
+        # 多个上传器共享客户端时，保证只创建一次
+        self._init_lock = asyncio.Lock()
     
     async def initialize(self, force: bool = False) -> bool:
         """
         初始化客户端
         
+        Args:
+            force: 是否强制重新初始化
+            
+        Returns:
+            bool: 初始化是否成功
+        """
+        async with self._init_lock:
+            return await self._initialize(force)
+    
+    async def _initialize(self, force: bool = False) -> bool:
+        """
+        初始化客户端，调用方需持有 _init_lock
+        
         Args:
             force: 是否强制重新初始化
             
@@ -284,6 +301,7 @@ class TelegramClientManager:
                 
             except FloodWait as e:
                 wait_time = e.value
+                record_flood_wait(getattr(func, "__name__", "unknown"), wait_time)
                 logger.warning(f"触发频率限制，等待 {wait_time} 秒")
                 await asyncio.sleep(wait_time)
                 # 不计入重试次数
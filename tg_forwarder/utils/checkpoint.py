@@ -0,0 +1,211 @@
+"""
+转发进度检查点模块，按(源频道, 目标频道)路由记录已完整送达的最高连续消息ID
+"""
+
+import os
+import json
+import time
+import bisect
+from typing import Dict, Any, Optional, List, Union, Iterable, Tuple
+
+from tg_forwarder.logModule.logger import get_logger
+
+# 获取日志记录器
+logger = get_logger("checkpoint")
+
+# 闭区间 [起始ID, 结束ID]
+Interval = Tuple[int, int]
+
+
+def _route_key(source: Union[str, int], target: Union[str, int]) -> str:
+    """路由在存储文件中的键"""
+    return f"{source}->{target}"
+
+
+def _subtract(start_id: int, end_id: int, excluded: Iterable[int]) -> List[Interval]:
+    """
+    从区间中去掉指定的ID
+
+    Args:
+        start_id: 起始ID
+        end_id: 结束ID
+        excluded: 要去掉的ID
+
+    Returns:
+        List[Interval]: 剩余的有序区间列表
+    """
+    intervals = []
+    current = start_id
+    for message_id in sorted(set(i for i in excluded if start_id <= i <= end_id)):
+        if message_id > current:
+            intervals.append((current, message_id - 1))
+        current = message_id + 1
+    if current <= end_id:
+        intervals.append((current, end_id))
+    return intervals
+
+
+def _merge(intervals: Iterable[Interval]) -> List[Interval]:
+    """合并重叠或相邻的区间"""
+    merged: List[List[int]] = []
+    for start_id, end_id in sorted(intervals):
+        if merged and start_id <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end_id)
+        else:
+            merged.append([start_id, end_id])
+    return [(start_id, end_id) for start_id, end_id in merged]
+
+
+class CheckpointStore:
+    """
+    路由检查点存储
+
+    每条路由保存检查点 checkpoint（该ID及之前的消息都已送达或确认无需处理）和
+    检查点之后已完成的区间。中间有失败的消息时检查点停在失败消息之前，后面已完成
+    的区间保留下来，失败的消息在后续运行中成功后检查点再越过这些区间。
+    """
+
+    def __init__(self, path: str):
+        """
+        初始化检查点存储
+
+        Args:
+            path: 检查点文件路径
+        """
+        self.path = path
+        self.routes: Dict[str, Dict[str, Any]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """
+        加载检查点文件
+
+        Returns:
+            Dict[str, Dict[str, Any]]: {路由键: 路由记录}
+        """
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, "r", encoding="utf-8") as f:
+                    routes = json.load(f).get("routes", {})
+                logger.info(f"加载转发检查点: {len(routes)} 条路由")
+                return routes
+        except Exception as e:
+            logger.error(f"加载转发检查点时出错: {str(e)}")
+
+        return {}
+
+    def save(self) -> None:
+        """保存检查点文件"""
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            # 先写临时文件再替换，避免中断时损坏检查点
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": 1, "routes": self.routes}, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            logger.error(f"保存转发检查点时出错: {str(e)}")
+
+    def get(self, source: Union[str, int], target: Union[str, int]) -> Optional[int]:
+        """
+        获取路由的检查点
+
+        Args:
+            source: 源频道ID
+            target: 目标频道ID
+
+        Returns:
+            Optional[int]: 检查点，路由没有记录时返回None
+        """
+        route = self.routes.get(_route_key(source, target))
+        return route["checkpoint"] if route else None
+
+    def is_delivered(self, source: Union[str, int], target: Union[str, int], message_id: int) -> bool:
+        """
+        判断消息是否已送达该路由的目标频道
+
+        Args:
+            source: 源频道ID
+            target: 目标频道ID
+            message_id: 源消息ID
+
+        Returns:
+            bool: 消息在检查点之前或在已完成的区间中时返回True
+        """
+        route = self.routes.get(_route_key(source, target))
+        if route is None:
+            return False
+        if message_id <= route["checkpoint"]:
+            return True
+
+        completed = route["completed"]
+        index = bisect.bisect_right(completed, [message_id, float("inf")]) - 1
+        return index >= 0 and completed[index][0] <= message_id <= completed[index][1]
+
+    def resume_from(self, source: Union[str, int], targets: List[Union[str, int]]) -> Optional[int]:
+        """
+        获取一组目标频道可以共同继续的起始消息ID
+
+        Args:
+            source: 源频道ID
+            targets: 目标频道ID列表
+
+        Returns:
+            Optional[int]: 所有目标频道中最小检查点的下一个ID，任一目标频道没有记录时返回None
+        """
+        checkpoints = [self.get(source, target) for target in targets]
+        if not checkpoints or any(checkpoint is None for checkpoint in checkpoints):
+            return None
+        return min(checkpoints) + 1
+
+    def record(self, source: Union[str, int], target: Union[str, int],
+               start_id: int, end_id: int, failed_ids: Iterable[int] = ()) -> int:
+        """
+        记录一次运行的结果，[start_id, end_id] 中除 failed_ids 外的消息都已处理完成
+
+        Args:
+            source: 源频道ID
+            target: 目标频道ID
+            start_id: 本次处理的起始消息ID
+            end_id: 本次处理的结束消息ID
+            failed_ids: 未能送达该目标频道的消息ID
+
+        Returns:
+            int: 更新后的检查点
+        """
+        key = _route_key(source, target)
+        route = self.routes.get(key)
+        if route is None:
+            # 新路由从第一次处理的起始位置开始计算
+            route = self.routes[key] = {
+                "source": source,
+                "target": target,
+                "checkpoint": start_id - 1,
+                "completed": []
+            }
+
+        checkpoint = route["checkpoint"]
+        intervals = _merge(
+            [tuple(interval) for interval in route["completed"]] +
+            _subtract(start_id, end_id, failed_ids)
+        )
+
+        # 检查点越过所有与之相连的已完成区间
+        remaining = []
+        for interval_start, interval_end in intervals:
+            if interval_end <= checkpoint:
+                continue
+            if interval_start <= checkpoint + 1 and not remaining:
+                checkpoint = interval_end
+            else:
+                remaining.append([interval_start, interval_end])
+
+        if checkpoint != route["checkpoint"]:
+            logger.info(f"路由 {key} 检查点: {route['checkpoint']} -> {checkpoint}")
+
+        route["checkpoint"] = checkpoint
+        route["completed"] = remaining
+        route["updated_at"] = time.time()
+        return checkpoint
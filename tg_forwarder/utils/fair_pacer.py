@@ -0,0 +1,110 @@
+"""
+公平发送调度模块，多条转发路由共享同一账号的发送频率，按路由轮流放行
+"""
+
+import time
+import asyncio
+from collections import OrderedDict, deque
+from typing import Dict, Any, Optional, Deque
+
+from tg_forwarder.logModule.logger import get_logger
+
+# 获取日志记录器
+logger = get_logger("fair_pacer")
+
+
+class FairPacer:
+    """
+    按路由轮转的发送许可
+
+    每次发送前调用 acquire(路由名)。相邻两次放行至少间隔 min_interval 秒，
+    有多条路由在等待时按轮转顺序每条路由放行一次，消息多的路由不会挤占
+    其他路由的发送机会。
+    """
+
+    def __init__(self, min_interval: float = 0.0):
+        """
+        初始化发送调度器
+
+        Args:
+            min_interval: 相邻两次放行之间的最小间隔（秒），由所有路由共享
+        """
+        self.min_interval = min_interval
+        # 每条路由等待中的许可 {路由名: deque[Future]}，按轮转顺序排列
+        self._waiters: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._last_grant = 0.0
+        # 每条路由的统计 {路由名: {"granted": 次数, "waited": 累计等待秒数}}
+        self.stats: Dict[str, Dict[str, float]] = {}
+
+    async def acquire(self, route: str) -> None:
+        """
+        等待轮到该路由发送
+
+        Args:
+            route: 路由名
+        """
+        if self._dispatcher is None or self._dispatcher.done():
+            self._wakeup = asyncio.Event()
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(route, deque()).append(future)
+        self._wakeup.set()
+
+        started = time.monotonic()
+        await future
+        route_stats = self.stats.setdefault(route, {"granted": 0, "waited": 0.0})
+        route_stats["granted"] += 1
+        route_stats["waited"] += time.monotonic() - started
+
+    async def _dispatch(self) -> None:
+        """按轮转顺序放行等待中的路由"""
+        while True:
+            if not self._waiters:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            wait = self._last_grant + self.min_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            # 取队首路由，放行后移到队尾
+            route, waiters = next(iter(self._waiters.items()))
+            future = waiters.popleft()
+            if waiters:
+                self._waiters.move_to_end(route)
+            else:
+                del self._waiters[route]
+
+            # 等待方已取消时不占用本次发送机会
+            if future.done():
+                continue
+            future.set_result(None)
+            self._last_grant = time.monotonic()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取调度统计
+
+        Returns:
+            Dict[str, Any]: 每条路由的放行次数、累计等待时间和当前等待数
+        """
+        return {
+            route: {**route_stats, "pending": len(self._waiters.get(route, ()))}
+            for route, route_stats in self.stats.items()
+        }
+
+    async def close(self) -> None:
+        """停止调度，取消所有等待中的许可"""
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            await asyncio.gather(self._dispatcher, return_exceptions=True)
+            self._dispatcher = None
+
+        for waiters in self._waiters.values():
+            for future in waiters:
+                future.cancel()
+        self._waiters.clear()
@@ -0,0 +1,241 @@
+"""
+消息ID集合模块，用有序闭区间保存已处理的消息ID
+"""
+
+import bisect
+from typing import Dict, Any, List, Iterable, Iterator, Tuple, Union
+
+Interval = Tuple[int, int]
+
+# 持久化格式版本
+ID_SET_VERSION = 1
+
+
+class IdIntervalSet:
+    """
+    整数ID集合
+
+    同一聊天的消息ID基本连续，集合按互不重叠、互不相邻的闭区间保存，
+    连续处理的一百万条消息只占一个区间。查询和插入的查找部分为 O(log n)，n 为区间数。
+    """
+
+    __slots__ = ("_starts", "_ends", "_count")
+
+    def __init__(self, ids: Iterable[int] = ()):
+        """
+        初始化集合
+
+        Args:
+            ids: 初始ID
+        """
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+        self._count = 0
+        self.update(ids)
+
+    @classmethod
+    def from_intervals(cls, intervals: Iterable[Iterable[int]]) -> "IdIntervalSet":
+        """
+        从区间列表创建集合
+
+        Args:
+            intervals: [[起始ID, 结束ID], ...]，可以无序或重叠
+
+        Returns:
+            IdIntervalSet: ID集合
+        """
+        id_set = cls()
+        for start, end in intervals:
+            id_set.add_range(int(start), int(end))
+        return id_set
+
+    def __contains__(self, value: Any) -> bool:
+        if not isinstance(value, int):
+            return False
+        index = bisect.bisect_right(self._starts, value) - 1
+        return index >= 0 and value <= self._ends[index]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[int]:
+        for start, end in zip(self._starts, self._ends):
+            yield from range(start, end + 1)
+
+    def __repr__(self) -> str:
+        return f"IdIntervalSet(count={self._count}, intervals={len(self._starts)})"
+
+    def add(self, value: int) -> bool:
+        """
+        添加ID
+
+        Args:
+            value: ID
+
+        Returns:
+            bool: ID原本不在集合中时返回True
+        """
+        return self.add_range(value, value) > 0
+
+    def add_range(self, start: int, end: int) -> int:
+        """
+        添加闭区间 [start, end] 内的所有ID
+
+        Args:
+            start: 起始ID
+            end: 结束ID
+
+        Returns:
+            int: 新增的ID数量
+        """
+        if end < start:
+            return 0
+
+        # 与新区间重叠或相邻的已有区间为 [left, right)，合并成一个区间
+        left = bisect.bisect_left(self._ends, start - 1)
+        right = bisect.bisect_right(self._starts, end + 1)
+
+        merged_start, merged_end = start, end
+        existing = 0
+        if left < right:
+            merged_start = min(start, self._starts[left])
+            merged_end = max(end, self._ends[right - 1])
+            existing = sum(self._ends[i] - self._starts[i] + 1 for i in range(left, right))
+
+        self._starts[left:right] = [merged_start]
+        self._ends[left:right] = [merged_end]
+
+        added = (merged_end - merged_start + 1) - existing
+        self._count += added
+        return added
+
+    def update(self, ids: Iterable[int]) -> None:
+        """
+        批量添加ID
+
+        Args:
+            ids: ID列表
+        """
+        for value in ids:
+            self.add(value)
+
+    def intervals(self) -> List[List[int]]:
+        """
+        获取区间列表
+
+        Returns:
+            List[List[int]]: [[起始ID, 结束ID], ...]，按起始ID升序
+        """
+        return [[start, end] for start, end in zip(self._starts, self._ends)]
+
+    def clear(self) -> None:
+        """清空集合"""
+        self._starts.clear()
+        self._ends.clear()
+        self._count = 0
+
+
+class ChatIdSet:
+    """
+    按聊天分组的消息ID集合
+
+    代替 "chatid_msgid" 字符串集合，每个聊天一个 IdIntervalSet，
+    持久化时只保存各聊天的区间列表。
+    """
+
+    def __init__(self):
+        """初始化集合"""
+        self.chats: Dict[str, IdIntervalSet] = {}
+
+    @staticmethod
+    def _key(chat_id: Union[str, int]) -> str:
+        return str(chat_id)
+
+    def add(self, chat_id: Union[str, int], message_id: int) -> bool:
+        """
+        添加消息
+
+        Args:
+            chat_id: 聊天ID
+            message_id: 消息ID
+
+        Returns:
+            bool: 消息原本不在集合中时返回True
+        """
+        key = self._key(chat_id)
+        id_set = self.chats.get(key)
+        if id_set is None:
+            id_set = self.chats[key] = IdIntervalSet()
+        return id_set.add(int(message_id))
+
+    def contains(self, chat_id: Union[str, int], message_id: int) -> bool:
+        """
+        检查消息是否在集合中
+
+        Args:
+            chat_id: 聊天ID
+            message_id: 消息ID
+
+        Returns:
+            bool: 是否在集合中
+        """
+        id_set = self.chats.get(self._key(chat_id))
+        return id_set is not None and int(message_id) in id_set
+
+    def __len__(self) -> int:
+        return sum(len(id_set) for id_set in self.chats.values())
+
+    def interval_count(self) -> int:
+        """
+        获取区间总数
+
+        Returns:
+            int: 所有聊天的区间数之和
+        """
+        return sum(len(id_set.intervals()) for id_set in self.chats.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        转换为可写入JSON的字典
+
+        Returns:
+            Dict[str, Any]: {"version": 1, "chats": {聊天ID: [[起始ID, 结束ID], ...]}}
+        """
+        return {
+            "version": ID_SET_VERSION,
+            "chats": {key: id_set.intervals() for key, id_set in self.chats.items() if len(id_set)},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ChatIdSet":
+        """
+        从 to_dict 的结果恢复集合
+
+        Args:
+            data: 字典
+
+        Returns:
+            ChatIdSet: 集合
+        """
+        chat_set = cls()
+        for key, intervals in (data.get("chats") or {}).items():
+            chat_set.chats[cls._key(key)] = IdIntervalSet.from_intervals(intervals)
+        return chat_set
+
+    @classmethod
+    def from_keys(cls, keys: Iterable[str]) -> "ChatIdSet":
+        """
+        从旧格式的 "chatid_msgid" 字符串列表恢复集合
+
+        Args:
+            keys: 字符串列表
+
+        Returns:
+            ChatIdSet: 集合，无法解析的条目被忽略
+        """
+        chat_set = cls()
+        for key in keys:
+            chat_id, _, message_id = str(key).rpartition("_")
+            if chat_id and message_id.lstrip("-").isdigit():
+                chat_set.add(chat_id, int(message_id))
+        return chat_set
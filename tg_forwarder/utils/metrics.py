@@ -0,0 +1,348 @@
+"""
+运行指标模块，收集流水线计数器并通过本地HTTP端点以Prometheus文本格式暴露
+"""
+
+import asyncio
+import time
+from typing import Dict, Any, Optional, Callable, Tuple, Union
+
+from tg_forwarder.logModule.logger import get_logger
+
+# 获取日志记录器
+logger = get_logger("metrics")
+
+# 标签键，使用排序后的(名称, 值)元组，保证同一组标签只对应一条时间序列
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# 采集回调返回单个值，或 {标签字典元组: 值} 形式的多条时间序列
+GaugeCallback = Callable[[], Union[float, Dict[LabelKey, float]]]
+
+# 内置指标定义 {指标名: (类型, 说明)}
+DEFAULT_METRICS: Dict[str, Tuple[str, str]] = {
+    "messages_fetched_total": ("counter", "从源频道获取的消息数"),
+    "messages_downloaded_total": ("counter", "下载完成的媒体消息数"),
+    "messages_uploaded_total": ("counter", "上传完成的消息数"),
+    "messages_forwarded_total": ("counter", "直接转发成功的消息数"),
+    "bytes_downloaded_total": ("counter", "下载的字节数"),
+    "bytes_uploaded_total": ("counter", "上传的字节数"),
+    "floodwait_seconds_total": ("counter", "按方法统计的FloodWait等待秒数"),
+    "floodwait_events_total": ("counter", "按方法统计的FloodWait次数"),
+    "queue_depth": ("gauge", "流水线队列当前深度"),
+    "active_workers": ("gauge", "正在处理任务的消费者数"),
+    "task_queue_tasks": ("gauge", "任务队列按状态统计的任务数"),
+    "event_loop_lag_seconds": ("gauge", "事件循环调度延迟（秒）"),
+    "event_loop_stalls_total": ("counter", "按阻塞位置统计的事件循环阻塞次数"),
+    "event_loop_stalled_seconds_total": ("counter", "事件循环阻塞累计秒数"),
+    "pipeline_setting": ("gauge", "流水线参数当前生效的值"),
+    "pipeline_setting_changes_total": ("counter", "运行中调整流水线参数的次数"),
+    "uptime_seconds": ("gauge", "指标注册表创建以来的秒数"),
+}
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    """将标签字典转换为可哈希的键"""
+    if not labels:
+        return ()
+    return tuple(sorted((str(k), str(v)) for k, v in labels.items()))
+
+
+def _escape_label_value(value: str) -> str:
+    """转义Prometheus标签值中的特殊字符"""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_sample(name: str, key: LabelKey, value: float) -> str:
+    """格式化单条样本行"""
+    if key:
+        labels = ",".join(f'{k}="{_escape_label_value(v)}"' for k, v in key)
+        name = f"{name}{{{labels}}}"
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return f"{name} {value}"
+
+
+class MetricsRegistry:
+    """
+    指标注册表，保存计数器和仪表盘数值
+
+    所有更新都在事件循环线程中进行，只做字典运算，不加锁，开销可以忽略。
+    """
+
+    def __init__(self, namespace: str = "tg_forwarder"):
+        """
+        初始化指标注册表
+
+        Args:
+            namespace: 指标名前缀
+        """
+        self.namespace = namespace
+        self._definitions: Dict[str, Tuple[str, str]] = dict(DEFAULT_METRICS)
+        self._values: Dict[str, Dict[LabelKey, float]] = {}
+        self._callbacks: Dict[str, Dict[str, Tuple[GaugeCallback, LabelKey]]] = {}
+        self.start_time = time.time()
+
+    def describe(self, name: str, metric_type: str, help_text: str) -> None:
+        """
+        注册自定义指标的类型和说明
+
+        Args:
+            name: 指标名（不含前缀）
+            metric_type: 指标类型，counter 或 gauge
+            help_text: 指标说明
+        """
+        self._definitions[name] = (metric_type, help_text)
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """
+        增加计数器
+
+        Args:
+            name: 指标名（不含前缀）
+            value: 增量
+            **labels: 指标标签
+        """
+        series = self._values.setdefault(name, {})
+        key = _label_key(labels)
+        series[key] = series.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        """
+        设置仪表盘数值
+
+        Args:
+            name: 指标名（不含前缀）
+            value: 当前值
+            **labels: 指标标签
+        """
+        self._values.setdefault(name, {})[_label_key(labels)] = value
+
+    def get(self, name: str, **labels) -> float:
+        """
+        获取指标当前值
+
+        Args:
+            name: 指标名（不含前缀）
+            **labels: 指标标签
+
+        Returns:
+            float: 指标值，不存在时为0
+        """
+        return self._values.get(name, {}).get(_label_key(labels), 0)
+
+    def register_callback(self, name: str, source: str, callback: GaugeCallback, **labels) -> None:
+        """
+        注册在抓取时计算的仪表盘，用于队列深度等由其他组件持有的状态
+
+        Args:
+            name: 指标名（不含前缀）
+            source: 数据来源标识，同一指标下唯一，注销时使用
+            callback: 返回数值或 {标签键: 值} 的回调
+            **labels: 回调返回单个数值时使用的标签
+        """
+        self._callbacks.setdefault(name, {})[source] = (callback, _label_key(labels))
+
+    def unregister_callback(self, name: str, source: str) -> None:
+        """
+        注销抓取回调
+
+        Args:
+            name: 指标名（不含前缀）
+            source: 数据来源标识
+        """
+        callbacks = self._callbacks.get(name)
+        if callbacks:
+            callbacks.pop(source, None)
+            if not callbacks:
+                del self._callbacks[name]
+
+    def _collect(self) -> Dict[str, Dict[LabelKey, float]]:
+        """合并静态数值和回调数值"""
+        collected = {name: dict(series) for name, series in self._values.items()}
+        collected.setdefault("uptime_seconds", {})[()] = round(time.time() - self.start_time, 3)
+
+        for name, callbacks in self._callbacks.items():
+            series = collected.setdefault(name, {})
+            for source, (callback, key) in list(callbacks.items()):
+                try:
+                    value = callback()
+                except Exception as e:
+                    logger.debug(f"采集指标 {name} ({source}) 时出错: {str(e)}")
+                    continue
+
+                if isinstance(value, dict):
+                    series.update(value)
+                elif value is not None:
+                    series[key] = value
+
+        return collected
+
+    def render(self) -> str:
+        """
+        以Prometheus文本格式输出所有指标
+
+        Returns:
+            str: 指标文本
+        """
+        lines = []
+        for name, series in sorted(self._collect().items()):
+            if not series:
+                continue
+            full_name = f"{self.namespace}_{name}"
+            metric_type, help_text = self._definitions.get(name, ("untyped", name))
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} {metric_type}")
+            for key, value in sorted(series.items()):
+                lines.append(_format_sample(full_name, key, value))
+
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """
+        获取所有指标的字典快照，便于日志输出或测试
+
+        Returns:
+            Dict[str, Dict[str, float]]: {指标名: {标签字符串: 值}}
+        """
+        return {
+            name: {",".join(f"{k}={v}" for k, v in key): value for key, value in series.items()}
+            for name, series in self._collect().items()
+        }
+
+
+# 全局指标注册表
+metrics = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    """
+    获取全局指标注册表
+
+    Returns:
+        MetricsRegistry: 指标注册表
+    """
+    return metrics
+
+
+def record_flood_wait(method: str, seconds: float) -> None:
+    """
+    记录一次FloodWait等待
+
+    Args:
+        method: 触发限流的方法名
+        seconds: 需要等待的秒数
+    """
+    metrics.inc("floodwait_seconds_total", seconds, method=method)
+    metrics.inc("floodwait_events_total", method=method)
+
+
+class MetricsServer:
+    """
+    本地指标HTTP服务，与转发流程运行在同一个事件循环中
+
+    只实现 GET /metrics 所需的最小HTTP子集，不依赖额外的第三方库。
+    """
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None, host: str = "127.0.0.1",
+                 port: int = 9464, lag_interval: float = 1.0):
+        """
+        初始化指标服务
+
+        Args:
+            registry: 指标注册表，默认使用全局注册表
+            host: 监听地址
+            port: 监听端口
+            lag_interval: 事件循环延迟采样间隔（秒），0表示不采样
+        """
+        self.registry = registry or metrics
+        self.host = host
+        self.port = port
+        self.lag_interval = lag_interval
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._lag_task: Optional[asyncio.Task] = None
+
+    async def start(self) -> bool:
+        """
+        启动HTTP服务和事件循环延迟采样
+
+        Returns:
+            bool: 是否成功启动
+        """
+        try:
+            self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        except OSError as e:
+            logger.error(f"启动指标服务失败 ({self.host}:{self.port}): {str(e)}")
+            return False
+
+        if self.lag_interval > 0:
+            self._lag_task = asyncio.create_task(self._sample_loop_lag())
+
+        logger.info(f"指标服务已启动: http://{self.host}:{self.port}/metrics")
+        return True
+
+    async def stop(self) -> None:
+        """停止HTTP服务和延迟采样"""
+        if self._lag_task and not self._lag_task.done():
+            self._lag_task.cancel()
+            try:
+                await self._lag_task
+            except asyncio.CancelledError:
+                pass
+        self._lag_task = None
+
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+            logger.info("指标服务已停止")
+
+    async def _sample_loop_lag(self) -> None:
+        """周期性测量事件循环的调度延迟"""
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.lag_interval
+            await asyncio.sleep(self.lag_interval)
+            self.registry.set("event_loop_lag_seconds", round(max(0.0, loop.time() - expected), 6))
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        处理单个HTTP请求
+
+        Args:
+            reader: 请求读取流
+            writer: 响应写入流
+        """
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5.0)
+            # 丢弃请求头
+            while True:
+                header = await asyncio.wait_for(reader.readline(), timeout=5.0)
+                if not header or header in (b"\r\n", b"\n"):
+                    break
+
+            parts = request_line.decode("latin-1").split()
+            method = parts[0] if parts else ""
+            path = parts[1].split("?", 1)[0] if len(parts) > 1 else ""
+
+            if method not in ("GET", "HEAD"):
+                status, body = "405 Method Not Allowed", b"method not allowed\n"
+            elif path in ("/metrics", "/"):
+                status, body = "200 OK", self.registry.render().encode("utf-8")
+            else:
+                status, body = "404 Not Found", b"not found\n"
+
+            headers = (
+                f"HTTP/1.1 {status}\r\n"
+                "Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n"
+            )
+            writer.write(headers.encode("latin-1"))
+            if method != "HEAD":
+                writer.write(body)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        except Exception as e:
+            logger.debug(f"处理指标请求时出错: {str(e)}")
+        finally:
+            writer.close()
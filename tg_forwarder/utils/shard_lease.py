@@ -0,0 +1,288 @@
+"""
+分片租约模块，多个回填进程通过本地状态文件领取消息ID分片
+"""
+
+import os
+import json
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, List, Union, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from tg_forwarder.logModule.logger import get_logger
+
+# 获取日志记录器
+logger = get_logger("shard_lease")
+
+# 分片状态
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+
+class ShardLeaseStore:
+    """
+    分片租约存储
+
+    状态文件记录每个分片的状态、持有租约的工作进程和租约到期时间。工作进程
+    领取分片后需要在到期前续约，进程退出或卡住时租约过期，分片可以被其他
+    进程重新领取。所有读写都在文件锁内完成，可以在多个进程间共享。
+    方法会阻塞等待文件锁，协程中通过 asyncio.to_thread 调用。
+    """
+
+    def __init__(self, path: str, lock_timeout: float = 30.0):
+        """
+        初始化租约存储
+
+        Args:
+            path: 状态文件路径
+            lock_timeout: 等待文件锁的最长时间（秒）
+        """
+        self.path = path
+        self.lock_path = f"{path}.lock"
+        self.lock_timeout = lock_timeout
+
+    @staticmethod
+    def _try_lock(fd: int) -> bool:
+        """尝试对锁文件加独占锁，已被其他进程持有时返回False"""
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    @staticmethod
+    def _unlock(fd: int) -> None:
+        """释放锁文件上的锁"""
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+    @contextmanager
+    def _locked(self, save: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        持有文件锁读取状态，退出时保存修改后的状态
+
+        Args:
+            save: 是否在退出时保存状态
+
+        Yields:
+            Dict[str, Any]: 状态字典
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # 使用操作系统的文件锁，持有者进程退出时锁自动释放，锁文件本身一直保留，
+        # 不需要判断和删除过期的锁文件
+        fd = os.open(self.lock_path, os.O_CREAT | os.O_RDWR)
+        try:
+            deadline = time.monotonic() + self.lock_timeout
+            while not self._try_lock(fd):
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"等待租约锁超时: {self.lock_path}")
+                time.sleep(0.02)
+
+            try:
+                state = self._read()
+                yield state
+                if not save:
+                    return
+                temp_path = f"{self.path}.tmp"
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump(state, f, ensure_ascii=False, indent=2)
+                os.replace(temp_path, self.path)
+            finally:
+                self._unlock(fd)
+        finally:
+            os.close(fd)
+
+    def _read(self) -> Dict[str, Any]:
+        """读取状态文件，不存在时返回空状态"""
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        return {"version": 1, "shards": []}
+
+    def prepare(self, source: Union[str, int], targets: List[Union[str, int]],
+                start_id: int, end_id: int, shard_size: int) -> int:
+        """
+        按消息ID范围创建分片，状态文件中已有相同任务时沿用原有分片，只为新增的范围追加分片
+
+        Args:
+            source: 源频道ID
+            targets: 目标频道ID列表
+            start_id: 起始消息ID
+            end_id: 结束消息ID
+            shard_size: 每个分片包含的消息ID数
+
+        Returns:
+            int: 尚未完成的分片数
+        """
+        job = {"source": source, "targets": list(targets), "start_id": start_id, "shard_size": shard_size}
+        with self._locked() as state:
+            if state.get("job") != job:
+                if state.get("shards"):
+                    logger.info("回填任务已变化，重新划分分片")
+                state["job"] = job
+                state["end_id"] = start_id - 1
+                state["shards"] = []
+            else:
+                # 重新运行时失败的分片再给一次机会，上次运行中断时未完成的分片从各自的检查点继续
+                for shard in state["shards"]:
+                    if shard["status"] == FAILED:
+                        shard["attempts"] = 0
+                    if shard["status"] in (FAILED, LEASED):
+                        shard.update(status=PENDING, worker=None, lease_until=0)
+
+            # 结束ID变大时（如源频道有了新消息）在已有分片之后追加新分片
+            shards = state["shards"]
+            for shard_start in range(state["end_id"] + 1, end_id + 1, shard_size):
+                shards.append({
+                    "id": len(shards),
+                    "start_id": shard_start,
+                    "end_id": min(shard_start + shard_size - 1, end_id),
+                    "status": PENDING,
+                    "worker": None,
+                    "lease_until": 0,
+                    "attempts": 0,
+                    "progress": None,
+                    "result": None
+                })
+            state["end_id"] = max(state["end_id"], end_id)
+
+            return sum(1 for shard in state["shards"] if shard["status"] != DONE)
+
+    def claim(self, worker: str, ttl: float) -> Optional[Dict[str, Any]]:
+        """
+        领取一个待处理或租约已过期的分片
+
+        Args:
+            worker: 工作进程标识
+            ttl: 租约时长（秒）
+
+        Returns:
+            Optional[Dict[str, Any]]: 领取到的分片，没有可领取的分片时返回None
+        """
+        now = time.time()
+        with self._locked() as state:
+            for shard in state["shards"]:
+                expired = shard["status"] == LEASED and shard["lease_until"] < now
+                if shard["status"] != PENDING and not expired:
+                    continue
+                if expired:
+                    logger.warning(f"分片 {shard['id']} 的租约已过期（原持有者 {shard['worker']}），重新领取")
+                shard.update(status=LEASED, worker=worker, lease_until=now + ttl, attempts=shard["attempts"] + 1)
+                return dict(shard)
+        return None
+
+    def renew(self, shard_id: int, worker: str, ttl: float, progress: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        续约
+
+        Args:
+            shard_id: 分片ID
+            worker: 工作进程标识
+            ttl: 租约时长（秒）
+            progress: 分片已累计的处理统计，重新领取的进程在此基础上继续累计
+
+        Returns:
+            bool: 仍持有租约时返回True，租约已被其他进程领取时返回False
+        """
+        with self._locked() as state:
+            shard = state["shards"][shard_id]
+            if shard["status"] != LEASED or shard["worker"] != worker:
+                return False
+            shard["lease_until"] = time.time() + ttl
+            if progress is not None:
+                shard["progress"] = progress
+            return True
+
+    def complete(self, shard_id: int, worker: str, result: Dict[str, Any]) -> bool:
+        """
+        标记分片已完成
+
+        Args:
+            shard_id: 分片ID
+            worker: 工作进程标识
+            result: 分片的处理结果
+
+        Returns:
+            bool: 是否仍持有租约并已标记完成
+        """
+        with self._locked() as state:
+            shard = state["shards"][shard_id]
+            if shard["status"] != LEASED or shard["worker"] != worker:
+                return False
+            shard.update(status=DONE, lease_until=0, result=result)
+            return True
+
+    def release(self, shard_id: int, worker: str, error: str, max_attempts: int) -> None:
+        """
+        处理失败时释放分片，超过最大尝试次数后标记为失败
+
+        Args:
+            shard_id: 分片ID
+            worker: 工作进程标识
+            error: 错误信息
+            max_attempts: 最大尝试次数
+        """
+        with self._locked() as state:
+            shard = state["shards"][shard_id]
+            if shard["status"] != LEASED or shard["worker"] != worker:
+                return
+            shard["status"] = FAILED if shard["attempts"] >= max_attempts else PENDING
+            shard.update(worker=None, lease_until=0, result={"error": error})
+
+    def release_worker(self, worker: str) -> List[int]:
+        """
+        释放已退出的工作进程持有的所有租约，不必等待租约过期
+
+        Args:
+            worker: 工作进程标识
+
+        Returns:
+            List[int]: 被释放的分片ID
+        """
+        released = []
+        with self._locked() as state:
+            for shard in state["shards"]:
+                if shard["status"] == LEASED and shard["worker"] == worker:
+                    shard.update(status=PENDING, worker=None, lease_until=0)
+                    released.append(shard["id"])
+        return released
+
+    def has_claimable(self) -> bool:
+        """是否还有可以领取的分片（待处理或租约已过期）"""
+        now = time.time()
+        with self._locked(save=False) as state:
+            return any(
+                shard["status"] == PENDING or (shard["status"] == LEASED and shard["lease_until"] < now)
+                for shard in state["shards"]
+            )
+
+    def has_unfinished(self) -> bool:
+        """是否还有待处理或处理中的分片"""
+        with self._locked(save=False) as state:
+            return any(shard["status"] in (PENDING, LEASED) for shard in state["shards"])
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        读取当前状态
+
+        Returns:
+            Dict[str, Any]: 状态字典
+        """
+        with self._locked(save=False) as state:
+            return state